@@ -5,92 +5,37 @@
 """
 import argparse
 import json
-import os
 import sys
-import yaml
+import time
 from pathlib import Path
 
 # .envファイルから環境変数を読み込み
 from dotenv import load_dotenv
 load_dotenv()
-from typing import Optional
+from typing import Callable, Optional
 
 # ライブラリパスを追加
 sys.path.insert(0, str(Path(__file__).parent))
 
+from lib.config import Config, ConfigError, basic_auth_from_config, target_configs
 from lib.loader import Loader, LoaderError
-from lib.structurer import Structurer, StructurerError
-from lib.validator import Validator
-from lib.generator import Generator
 from lib.publisher import Publisher, PublisherError
-from lib.history import HistoryManager
-
-
-class Config:
-    """設定管理クラス"""
-    
-    def __init__(self, config_path: str = "config.yaml"):
-        self.config = self._load_config(config_path)
-    
-    def _load_config(self, path: str) -> dict:
-        """設定ファイル読み込み（環境変数展開対応）"""
-        config_file = Path(path)
-        if not config_file.exists():
-            # デフォルト設定
-            return {
-                'gemini': {
-                    'api_key': os.environ.get('GEMINI_API_KEY', ''),
-                    'model': 'gemini-2.0-flash',
-                    'temperature': 0.3,
-                },
-                'wordpress': {
-                    'site_url': os.environ.get('WP_SITE_URL', ''),
-                    'username': os.environ.get('WP_USERNAME', 'admin'),
-                    'app_password': os.environ.get('WP_APP_PASSWORD', ''),
-                    'default_category': 'コラム',
-                    'default_status': 'draft',
-                },
-                'output': {
-                    'save_json': True,
-                    'save_html': True,
-                    'json_dir': 'output/json',
-                    'html_dir': 'output/html',
-                },
-                'cta': {
-                    'enabled': True,
-                    'template_file': 'block-html/posts/cta.txt',
-                },
-                'prompt': {
-                    'template_file': 'docs/prompts/article_structure.md',
-                }
-            }
-        
-        with open(config_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 環境変数展開 ${VAR_NAME}
-        import re
-        def replace_env(match):
-            var_name = match.group(1)
-            return os.environ.get(var_name, '')
-        
-        content = re.sub(r'\$\{(\w+)\}', replace_env, content)
-        return yaml.safe_load(content)
-    
-    def get(self, *keys, default=None):
-        """ネストした設定値を取得"""
-        value = self.config
-        for key in keys:
-            if isinstance(value, dict):
-                value = value.get(key)
-            else:
-                return default
-        return value if value is not None else default
-
-
-def print_step(step_num: int, total: int, message: str):
-    """ステップ表示"""
-    print(f"\n[{step_num}/{total}] {message}")
+from lib.blocks import html_to_article, BlockParseError
+from lib.pipeline import (
+    ACTION_DRY_RUN, EVENT_ERROR, EVENT_REPORT, EVENT_STEP, EVENT_SUCCESS, EVENT_WARNING,
+    AutoApprove, BatchQueue, DecisionPolicy, FanOut, Pipeline, PipelineEvent, PipelineOptions,
+    format_fanout_summary, open_artifact_store, open_draft_index, open_history, open_schedule_queue
+)
+from lib.archive import Archive
+from lib.lint import expand_paths, format_issue, lint_file
+from lib.artifacts import format_versions
+from lib.daemon import Daemon, DaemonError
+from lib.scheduler import PENDING, PREPARED, SchedulerError
+from lib.related import open_related_index, post_url
+from lib.similarity import open_similarity_index
+from lib.sync import format_sync_report
+from lib.terminology import TerminologyError, format_hit, open_term_checker
+from lib.wxr import WXRItem, WXRWriter, WXRError, iter_wxr_items, is_safe_slug, META_DESCRIPTION_KEY
 
 
 def print_success(message: str):
@@ -108,6 +53,48 @@ def print_error(message: str):
     print(f"  ✗ {message}")
 
 
+def format_event(event: PipelineEvent) -> str:
+    """パイプラインの進捗イベントの表示文字列（print_success等と同じ形式）"""
+    if event.kind == EVENT_STEP:
+        return f"\n[{event.step}/{event.total}] {event.message}"
+    elif event.kind == EVENT_SUCCESS:
+        return f"  ✓ {event.message}"
+    elif event.kind == EVENT_WARNING:
+        return f"  ⚠ {event.message}"
+    elif event.kind == EVENT_ERROR:
+        return f"  ✗ {event.message}"
+    elif event.kind == EVENT_REPORT:
+        return "\n" + event.message
+    return event.message
+
+
+def print_event(event: PipelineEvent):
+    """パイプラインの進捗イベントを表示"""
+    print(format_event(event))
+
+
+def print_target_event(event: PipelineEvent):
+    """複数サイトへの投稿時: 投稿先のイベントには投稿先名を付けて表示"""
+    if event.target and event.kind != EVENT_REPORT:
+        event.message = f"[{event.target}] {event.message}"
+    elif event.target:
+        event.message = f"[{event.target}]\n{event.message}"
+    print_event(event)
+
+
+class InteractivePolicy(DecisionPolicy):
+    """標準入力で確認する（CLI用）"""
+    
+    def confirm_structure(self, draft, article_json) -> bool:
+        print("\nJSON構造化が完了しました。続行しますか？ [y/n]: ", end="")
+        return input().strip().lower() == 'y'
+    
+    def confirm_update(self, draft, post_id, diff) -> bool:
+        print(f"\n  既存投稿が見つかりました（ID: {post_id}）")
+        print("  更新しますか？ [y/n]: ", end="")
+        return input().strip().lower() == 'y'
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='記事自動投稿ツール - 原稿からWordPress投稿まで自動化'
@@ -147,6 +134,11 @@ def main():
         action='store_true',
         help='既存投稿を無視して新規作成'
     )
+    parser.add_argument(
+        '--full-update',
+        action='store_true',
+        help='前回投稿時から変更が無くても本文を含めて更新'
+    )
     parser.add_argument(
         '--no-cta',
         action='store_true',
@@ -157,11 +149,109 @@ def main():
         action='store_true',
         help='バリデーションをスキップ'
     )
+    parser.add_argument(
+        '--skip-link-check',
+        action='store_true',
+        help='投稿前のリンク・画像URLチェックをスキップ'
+    )
     parser.add_argument(
         '--test-connection',
         action='store_true',
         help='API接続テスト'
     )
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='投稿をまとめてバッチAPIで送信（WordPress 5.6以上）'
+    )
+    parser.add_argument(
+        '--target',
+        action='append',
+        metavar='NAME',
+        help='投稿先（config.yamlのtargets）を指定。複数指定可、省略時はすべて'
+    )
+    parser.add_argument(
+        '--export-wxr',
+        metavar='PATH',
+        help='生成済み記事をWXRファイルに一括エクスポート'
+    )
+    parser.add_argument(
+        '--import-wxr',
+        metavar='PATH',
+        help='WXRファイルを投稿履歴と記事JSONに一括インポート'
+    )
+    parser.add_argument(
+        '--status',
+        action='store_true',
+        help='原稿の状態一覧（未投稿・スラッグ衝突・要更新）'
+    )
+    parser.add_argument(
+        '--sync',
+        action='store_true',
+        help='WordPressの投稿一覧と投稿履歴を同期（2回目以降は前回以降の更新分のみ）'
+    )
+    parser.add_argument(
+        '--full-sync',
+        action='store_true',
+        help='--sync時に全件を取得し、削除済みの投稿も検出する'
+    )
+    parser.add_argument(
+        '--rollback',
+        nargs='+',
+        metavar=('SLUG', 'VERSION'),
+        help='保存済みの版を再投稿（版番号省略時は前回投稿した版）'
+    )
+    parser.add_argument(
+        '--versions',
+        metavar='SLUG',
+        help='記事の保存済みの版一覧'
+    )
+    parser.add_argument(
+        '--gc-artifacts',
+        action='store_true',
+        help='古い版と参照されない生成物を削除（artifacts.max_versions / max_age_days）'
+    )
+    parser.add_argument(
+        '--index-similar',
+        action='store_true',
+        help='アーカイブ全体から類似記事チェックの索引を作り直す'
+    )
+    parser.add_argument(
+        '--index-related',
+        action='store_true',
+        help='アーカイブ全体から関連記事の索引を作り直す（投稿履歴にある記事のみ）'
+    )
+    parser.add_argument(
+        '--audit-terms',
+        action='store_true',
+        help='過去記事をまとめて用語辞書で照合（禁止表現・表記ゆれ）'
+    )
+    parser.add_argument(
+        '--lint-blocks',
+        nargs='*',
+        metavar='PATH',
+        help='ブロックHTMLのコメント・タグの対応を検査（省略時はlint.paths。globの ** 可）'
+    )
+    parser.add_argument(
+        '--schedule',
+        action='store_true',
+        help='原稿をscheduled_atの日時で予約投稿キューに登録'
+    )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='常駐してローカルHTTP APIで投稿依頼を受け付ける（Ctrl+Cで終了）'
+    )
+    parser.add_argument(
+        '--socket',
+        metavar='PATH',
+        help='--serve時にTCPの代わりにUnixソケットで待ち受ける'
+    )
+    parser.add_argument(
+        '--run-scheduler',
+        action='store_true',
+        help='予約投稿キューを処理し続ける（Ctrl+Cで終了）'
+    )
     
     args = parser.parse_args()
     
@@ -172,18 +262,88 @@ def main():
     if args.test_connection:
         return run_connection_test(config)
     
+    # WXR入出力モード
+    if args.export_wxr:
+        return run_export_wxr(config, args.export_wxr)
+    if args.import_wxr:
+        return run_import_wxr(config, args.import_wxr)
+    
+    # 原稿の状態一覧
+    if args.status:
+        return run_status(config)
+    
+    # 投稿履歴の同期
+    if args.sync or args.full_sync:
+        return run_sync(config, args)
+    
+    # 類似記事チェックの索引
+    if args.index_similar:
+        return run_index_similar(config)
+    if args.index_related:
+        return run_index_related(config)
+    if args.audit_terms:
+        return run_audit_terms(config)
+    if args.lint_blocks is not None:
+        return run_lint_blocks(config, args.lint_blocks)
+    
+    # 生成物の版
+    if args.versions:
+        return run_versions(config, args.versions)
+    if args.gc_artifacts:
+        return run_gc_artifacts(config)
+    if args.rollback:
+        if len(args.rollback) > 2 or (len(args.rollback) == 2 and not args.rollback[1].lstrip('v').isdigit()):
+            parser.error("--rollback SLUG [VERSION]")
+        return run_rollback(config, args)
+    
+    # 常駐モード
+    if args.serve:
+        return run_daemon(config, args)
+    
+    # 予約投稿
+    if args.run_scheduler:
+        return run_scheduler(config, args)
+    if args.schedule:
+        if not args.files:
+            parser.print_help()
+            return 1
+        return run_schedule(config, args.files)
+    
     # ファイル指定なし
     if not args.files:
         parser.print_help()
         return 1
     
+    try:
+        targets = target_configs(config, args.target)
+    except ConfigError as e:
+        print_error(str(e))
+        return 1
+    
+    options = PipelineOptions.from_args(args)
+    if len(targets) > 1:
+        return run_fanout(config, targets, args, options)
+    
+    # 投稿先が1つ（targets未設定、または--targetで1つ指定）
+    _, target = targets[0]
+    pipeline = Pipeline(target, policy=InteractivePolicy(), on_event=print_event)
+    
+    # バッチ投稿の準備
+    batch = None
+    if args.batch and not args.dry_run:
+        publisher = pipeline.publisher
+        if publisher is None:
+            print_error("WordPress設定が不完全です")
+            return 1
+        batch = BatchQueue.from_config(target, publisher, options, on_event=print_event)
+    
     # 複数ファイル処理
     success_count = 0
     fail_count = 0
     
     for file_path in args.files:
         try:
-            result = process_file(file_path, config, args)
+            result = process_file(file_path, pipeline, options, batch=batch)
             if result:
                 success_count += 1
             else:
@@ -195,6 +355,16 @@ def main():
             print_error(f"予期しないエラー: {e}")
             fail_count += 1
     
+    # バッチ送信（生成までは成功済みなので、ここでの失敗に付け替える）
+    if batch is not None:
+        try:
+            _, batch_fail = batch.flush()
+        except PublisherError as e:
+            print_error(str(e))
+            batch_fail = len(batch.jobs)
+        success_count -= batch_fail
+        fail_count += batch_fail
+    
     # 結果サマリ
     if len(args.files) > 1:
         print("\n" + "=" * 50)
@@ -203,6 +373,55 @@ def main():
     return 0 if fail_count == 0 else 1
 
 
+def run_fanout(config: Config, targets: list, args, options: PipelineOptions) -> int:
+    """構造化・HTML生成を1回だけ行い、複数の投稿先に並行して投稿する"""
+    names = [name for name, _ in targets]
+    print(f"投稿先: {', '.join(names)}")
+    fanout = FanOut(config, targets, policy=InteractivePolicy(), on_event=print_target_event)
+    
+    # バッチ投稿の準備（投稿先ごと。リンクチェックは構造化後に1回だけ行う）
+    batches = {}
+    if args.batch and not args.dry_run:
+        for name, pipeline in fanout.pipelines.items():
+            if pipeline.publisher is None:
+                print_error(f"{name}: WordPress設定が不完全です")
+                return 1
+            batches[name] = BatchQueue.from_config(
+                pipeline.config, pipeline.publisher, options,
+                on_event=lambda event, name=name: print_target_event(
+                    PipelineEvent(**{**vars(event), 'target': name})
+                ),
+                link_check=False
+            )
+    
+    results = []
+    for file_path in args.files:
+        print("\n" + "=" * 50)
+        print("記事自動投稿ツール")
+        print("=" * 50)
+        try:
+            results.append(fanout.run(file_path, options, batches=batches))
+        except KeyboardInterrupt:
+            print("\n\n中断されました")
+            return 130
+    
+    batch_fail = 0
+    for name, batch in batches.items():
+        try:
+            batch_fail += batch.flush()[1]
+        except PublisherError as e:
+            print_error(f"[{name}] {e}")
+            batch_fail += len(batch.jobs)
+    
+    print("\n" + "=" * 50)
+    if options.dry_run:
+        print("ドライラン完了（投稿はスキップ）")
+    else:
+        print(format_fanout_summary(results, names))
+    
+    return 0 if all(result.ok for result in results) and batch_fail == 0 else 1
+
+
 def run_connection_test(config: Config) -> int:
     """API接続テスト"""
     print("=" * 50)
@@ -230,13 +449,9 @@ def run_connection_test(config: Config) -> int:
     app_password = config.get('wordpress', 'app_password')
     
     # Basic認証設定
-    basic_auth = None
-    if config.get('wordpress', 'basic_auth', 'enabled'):
-        ba_user = config.get('wordpress', 'basic_auth', 'username')
-        ba_pass = config.get('wordpress', 'basic_auth', 'password')
-        if ba_user and ba_pass:
-            basic_auth = (ba_user, ba_pass)
-            print_success("Basic認証: 有効")
+    basic_auth = basic_auth_from_config(config)
+    if basic_auth:
+        print_success("Basic認証: 有効")
     
     if site_url and app_password:
         try:
@@ -256,206 +471,489 @@ def run_connection_test(config: Config) -> int:
     return 0
 
 
-def process_file(file_path: str, config: Config, args) -> bool:
-    """1ファイルを処理"""
-    print("\n" + "=" * 50)
-    print("記事自動投稿ツール")
+def run_export_wxr(config: Config, output_path: str) -> int:
+    """生成済みHTMLをWXRファイルにエクスポート"""
+    print("=" * 50)
+    print("WXRエクスポート")
     print("=" * 50)
     
-    total_steps = 5 if not args.dry_run else 4
+    html_dir = Path(config.get('output', 'html_dir', default='output/html'))
+    history = open_history(config)
+    loader = Loader()
+    default_status = config.get('wordpress', 'default_status', default='draft')
+    default_category = config.get('wordpress', 'default_category')
     
-    # Step 1: 原稿読込
-    print_step(1, total_steps, "原稿読込中...")
+    skipped = 0
     try:
-        loader = Loader()
-        draft = loader.load(file_path)
-        print_success(f"タイトル: {draft.title}")
-        print_success(f"スラッグ: {draft.slug}")
-    except LoaderError as e:
-        print_error(str(e))
-        return False
+        with WXRWriter(
+            output_path,
+            site_url=config.get('wordpress', 'site_url', default=''),
+            author=config.get('wordpress', 'username', default='admin')
+        ) as writer:
+            for html_path in sorted(html_dir.glob('*.txt')):
+                slug = html_path.stem
+                entry = history.get_entry(slug)
+                
+                # 原稿が残っていればメタ情報を補完
+                draft = None
+                source = Path(entry.source_file) if entry and entry.source_file else None
+                if source and source.suffix == '.md' and source.exists():
+                    try:
+                        draft = loader.load(str(source))
+                    except LoaderError as e:
+                        print_warning(f"{slug}: 原稿を読めません（{e}）")
+                
+                title = draft.title if draft else (entry.title if entry else '')
+                if not title:
+                    print_warning(f"{slug}: タイトル不明のためスキップ")
+                    skipped += 1
+                    continue
+                
+                category = draft.category if draft and draft.category else default_category
+                meta = {}
+                if draft and draft.description:
+                    meta[META_DESCRIPTION_KEY] = draft.description
+                
+                writer.write_item(WXRItem(
+                    title=title,
+                    slug=slug,
+                    content=html_path.read_text(encoding='utf-8'),
+                    status=draft.status if draft else default_status,
+                    post_id=entry.post_id if entry else None,
+                    categories=[category] if category else [],
+                    tags=list(draft.tags or []) if draft else [],
+                    meta=meta,
+                ))
+    except (OSError, WXRError) as e:
+        print_error(f"エクスポート失敗: {e}")
+        return 1
     
-    # Step 2: AI構造化
-    print_step(2, total_steps, "AI構造化中...")
-    try:
-        api_key = config.get('gemini', 'api_key')
-        if not api_key:
-            print_error("GEMINI_API_KEYが設定されていません")
-            return False
-        
-        prompt_path = config.get('prompt', 'template_file')
-        structurer = Structurer(
-            api_key=api_key,
-            model=config.get('gemini', 'model'),
-            temperature=config.get('gemini', 'temperature', default=0.3),
-            prompt_template_path=prompt_path
-        )
+    print_success(f"{writer.count}件をエクスポート: {output_path}")
+    if skipped:
+        print_warning(f"{skipped}件をスキップ")
+    return 0
+
+
+def run_status(config: Config) -> int:
+    """原稿の状態一覧"""
+    print("=" * 50)
+    print("原稿の状態")
+    print("=" * 50)
+    
+    with open_draft_index(config) as index:
+        counts = index.counts()
+        print(f"\n原稿: {counts['drafts']}件（投稿済み: {counts['published']}件）")
         
-        import time
-        start = time.time()
-        article_json = structurer.structure(draft.content, draft.title)
-        elapsed = time.time() - start
+        unpublished = index.unpublished()
+        print(f"\n[未投稿] {len(unpublished)}件")
+        for item in unpublished:
+            print(f"  - {item.slug}  {item.title}  ({item.path})")
         
-        print_success(f"Gemini API: 成功（{elapsed:.1f}秒）")
+        stale = index.stale()
+        print(f"\n[投稿後に変更あり] {len(stale)}件")
+        for item in stale:
+            print(f"  - {item.slug}  ID: {item.post_id}  最終投稿: {item.published_at}  ({item.path})")
         
-        # JSON保存
-        if config.get('output', 'save_json'):
-            json_dir = Path(config.get('output', 'json_dir', default='output/json'))
-            json_dir.mkdir(parents=True, exist_ok=True)
-            json_path = json_dir / f"{draft.slug}.json"
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(article_json.raw_json, f, ensure_ascii=False, indent=2)
-            print_success(f"JSON保存: {json_path}")
+        collisions = index.collisions()
+        print(f"\n[スラッグ衝突] {len(collisions)}件")
+        for slug, paths in collisions.items():
+            print(f"  - {slug}")
+            for path in paths:
+                print(f"      {path}")
         
-    except StructurerError as e:
+        errors = index.errors()
+        if errors:
+            print(f"\n[読み込みエラー] {len(errors)}件")
+            for item in errors:
+                print(f"  - {item.path}: {item.error}")
+    
+    print("\n" + "=" * 50)
+    return 1 if collisions or errors else 0
+
+
+def run_sync(config: Config, args) -> int:
+    """WordPressの投稿一覧と投稿履歴を同期（投稿先ごと）"""
+    try:
+        targets = target_configs(config, args.target)
+    except ConfigError as e:
         print_error(str(e))
-        return False
+        return 1
     
-    # バリデーション
-    if not args.skip_validation:
-        validator = Validator()
-        validation_result = validator.validate(article_json.raw_json)
-        print("\n" + validation_result.format_report())
+    ok = True
+    for name, target in targets:
+        print("=" * 50)
+        print(f"同期: {name}" if len(targets) > 1 else "同期")
+        print("=" * 50)
         
-        if not validation_result.is_valid:
-            print_error("バリデーションエラー: 続行できません")
-            return False
+        try:
+            report = Pipeline(target).sync(full=args.full_sync)
+        except PublisherError as e:
+            print_error(str(e))
+            ok = False
+            continue
+        print(format_sync_report(report))
+        ok = ok and report.ok
+    
+    return 0 if ok else 1
+
+
+def warn_skipped(archive: Archive):
+    """アーカイブの走査で読めずに飛ばしたファイルを警告"""
+    for path, error in archive.errors:
+        print_warning(f"読み込めないため飛ばしました: {error}")
+
+
+def run_index_similar(config: Config) -> int:
+    """アーカイブ全体から類似記事チェックの索引を作り直す"""
+    index = open_similarity_index(config)
+    if index is None:
+        print_error("similarity.enabledがfalseです")
+        return 1
     
-    # 確認モード
-    if args.confirm:
-        print("\nJSON構造化が完了しました。続行しますか？ [y/n]: ", end="")
-        response = input().strip().lower()
-        if response != 'y':
-            print("中止しました")
-            return False
+    dirs = config.get('similarity', 'archive_dirs', default=['output/json', '../block-html/posts'])
+    archive = Archive.from_dirs(dirs)
+    start = time.perf_counter()
+    count = index.build(archive)
+    index.save()
+    elapsed = time.perf_counter() - start
+    warn_skipped(archive)
+    print_success(f"{count}記事・{len(index.units)}節を登録しました（{elapsed:.1f}秒）: {index.index_file}")
+    return 0
+
+
+def run_index_related(config: Config) -> int:
+    """アーカイブ全体から関連記事の索引を作り直す（リンク切れを避けるため、投稿済みの記事だけ登録）"""
+    index = open_related_index(config)
+    if index is None:
+        print_error("related.enabledがfalseです")
+        return 1
     
-    # Step 3: HTML生成
-    print_step(3, total_steps, "HTML生成中...")
+    history = open_history(config)
+    
+    def published():
+        for article in archive:
+            if history.find_live(article.slug):
+                entry = history.get_entry(article.slug)
+                title = entry.title if entry and entry.title else article.slug
+                yield article, title, post_url(config, article.slug)
+    
+    dirs = config.get('related', 'archive_dirs', default=['output/json', '../block-html/posts'])
+    archive = Archive.from_dirs(dirs)
+    start = time.perf_counter()
+    count = index.build(published())
+    index.save()
+    elapsed = time.perf_counter() - start
+    warn_skipped(archive)
+    print_success(f"{count}記事・{len(index.terms)}語を登録しました（{elapsed:.1f}秒）: {index.index_file}")
+    if not count:
+        print_warning("投稿履歴にある記事がありません（--import-wxr / --sync で履歴を取り込めます）")
+    return 0
+
+
+def run_audit_terms(config: Config) -> int:
+    """過去記事をまとめて用語辞書で照合（禁止表現があれば1を返す）"""
+    try:
+        checker = open_term_checker(config)
+    except TerminologyError as e:
+        print_error(str(e))
+        return 1
+    if checker is None:
+        print_error("terminology.enabledがfalseです")
+        return 1
     
-    cta_path = config.get('cta', 'template_file') if config.get('cta', 'enabled') else None
-    generator = Generator(cta_template_path=cta_path)
+    dirs = config.get('terminology', 'archive_dirs', default=['output/json', '../block-html/posts'])
+    archive = Archive.from_dirs(dirs)
+    errors = warnings = flagged = 0
+    start = time.perf_counter()
+    for article in archive:
+        hits = checker.check(article.to_dict())
+        if not hits:
+            continue
+        flagged += 1
+        print(f"\n{article.slug}")
+        for hit in hits:
+            if hit.is_error:
+                errors += 1
+                print(f"  ✗ [ERR-004] {format_hit(hit)}")
+            else:
+                warnings += 1
+                print(f"  ⚠ [WRN-008] {format_hit(hit)}")
+    elapsed = time.perf_counter() - start
+    warn_skipped(archive)
     
-    html_content = generator.generate(
-        article_json.raw_json,
-        include_cta=not args.no_cta and config.get('cta', 'enabled', default=True)
+    print(f"\n{len(archive)}記事を照合（{elapsed:.2f}秒）: {flagged}記事 / 禁止表現 {errors}件 / 表記ゆれ {warnings}件")
+    return 1 if errors else 0
+
+
+def run_lint_blocks(config: Config, patterns: list[str]) -> int:
+    """ブロックHTMLファイルをまとめて検査（問題があれば1を返す）"""
+    patterns = patterns or config.get(
+        'lint', 'paths', default=['../block-html/**/*.txt', '../wordpress/blocks/*.txt']
     )
+    paths = expand_paths(patterns)
+    if not paths:
+        print_error("検査するファイルがありません: " + ", ".join(patterns))
+        return 1
     
-    # ブロック数カウント
-    block_count = html_content.count('<!-- wp:')
-    print_success(f"ブロック数: {block_count}")
-    
-    # HTML保存
-    if config.get('output', 'save_html'):
-        html_dir = Path(config.get('output', 'html_dir', default='output/html'))
-        html_dir.mkdir(parents=True, exist_ok=True)
-        html_path = html_dir / f"{draft.slug}.txt"
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print_success(f"HTML保存: {html_path}")
+    total = size = flagged = 0
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            issues = lint_file(path)
+        except (OSError, UnicodeDecodeError) as e:
+            print_error(f"{path}: {e}")
+            flagged += 1
+            continue
+        size += path.stat().st_size
+        if issues:
+            flagged += 1
+            total += len(issues)
+            for issue in issues:
+                print(f"  ✗ {format_issue(issue, str(path))}")
+    elapsed = time.perf_counter() - start
+    
+    summary = f"{len(paths)}ファイル（{size / 1024:.0f}KB、{elapsed:.2f}秒）を検査"
+    if flagged:
+        print_error(f"{summary}: {flagged}ファイルに{total}件の問題があります")
+        return 1
+    print_success(f"{summary}: 問題なし")
+    return 0
+
+
+def run_versions(config: Config, slug: str) -> int:
+    """記事の保存済みの版一覧"""
+    store = open_artifact_store(config)
+    if store is None:
+        print_error("artifacts.enabledがfalseです")
+        return 1
+    print(format_versions(slug, store.versions(slug)))
+    return 0
+
+
+def run_gc_artifacts(config: Config) -> int:
+    """古い版と参照されない生成物を削除"""
+    store = open_artifact_store(config)
+    if store is None:
+        print_error("artifacts.enabledがfalseです")
+        return 1
+    report = store.gc()
+    print(f"[Artifacts] 版 {report.versions_removed}件 / 生成物 {report.objects_removed}件を削除"
+          f"（{report.bytes_freed / 1024:.1f} KB）")
+    return 0
+
+
+def run_rollback(config: Config, args) -> int:
+    """保存済みの版を再投稿（複数の投稿先には同じ版を並行して投稿）"""
+    slug = args.rollback[0]
+    version = int(args.rollback[1].lstrip('v')) if len(args.rollback) > 1 else None
+    try:
+        targets = target_configs(config, args.target)
+    except ConfigError as e:
+        print_error(str(e))
+        return 1
     
-    # ドライランなら終了
-    if args.dry_run:
-        print("\n" + "=" * 50)
-        print("ドライラン完了（投稿はスキップ）")
-        print("=" * 50)
-        return True
+    print("=" * 50)
+    print(f"ロールバック: {slug}")
+    print("=" * 50)
     
-    # Step 4: WordPress投稿
-    print_step(4, total_steps, "WordPress投稿中...")
+    if len(targets) == 1:
+        _, target = targets[0]
+        result = Pipeline(target, on_event=print_event).rollback(slug, version)
+        if result.ok:
+            print(f"\n編集URL: {result.edit_url}")
+        return 0 if result.ok else 1
+    
+    result = FanOut(config, targets, on_event=print_target_event).rollback(slug, version)
+    for name, target in result.targets.items():
+        if target.ok:
+            print(f"\n編集URL（{name}）: {target.edit_url}")
+    if result.targets:
+        print("\n" + format_fanout_summary([result], [name for name, _ in targets]))
+    return 0 if result.ok else 1
+
+
+def run_schedule(config: Config, files: list[str]) -> int:
+    """原稿を予約投稿キューに登録"""
+    print("=" * 50)
+    print("予約投稿キューに登録")
+    print("=" * 50)
     
-    site_url = config.get('wordpress', 'site_url')
-    username = config.get('wordpress', 'username')
-    app_password = config.get('wordpress', 'app_password')
+    pipeline = Pipeline(config)
+    queue = open_schedule_queue(config)
+    failed = 0
     
-    # Basic認証設定
-    basic_auth = None
-    if config.get('wordpress', 'basic_auth', 'enabled'):
-        ba_user = config.get('wordpress', 'basic_auth', 'username')
-        ba_pass = config.get('wordpress', 'basic_auth', 'password')
-        if ba_user and ba_pass:
-            basic_auth = (ba_user, ba_pass)
-    
-    if not site_url or not app_password:
-        print_error("WordPress設定が不完全です")
-        return False
+    for file_path in files:
+        try:
+            job = pipeline.schedule(file_path, queue)
+        except (LoaderError, SchedulerError) as e:
+            print_error(f"{file_path}: {e}")
+            failed += 1
+            continue
+        print_success(f"{job.slug}: {job.scheduled_at}")
+    
+    print("\n予約済み:")
+    for job in queue.ordered():
+        print(f"  {job.scheduled_at}  {job.state:<8} {job.slug}")
+    return 0 if failed == 0 else 1
+
+
+def run_scheduler(config: Config, args) -> int:
+    """予約投稿キューを処理し続ける"""
+    print("=" * 50)
+    print("予約投稿スケジューラー")
+    print("=" * 50)
     
+    # 予約処理は対話なしで実行する
+    pipeline = Pipeline(config, policy=AutoApprove(), on_event=print_event)
+    queue = open_schedule_queue(config)
     try:
-        publisher = Publisher(site_url, username, app_password, basic_auth=basic_auth)
-        history = HistoryManager()
-        
-        # 既存投稿チェック
-        existing_post_id = None
-        if not args.force_new:
-            existing_post_id = history.find_by_slug(draft.slug)
-            if not existing_post_id:
-                existing_post_id = publisher.find_post_by_slug(draft.slug)
-        
-        # 投稿ステータス
-        status = 'publish' if args.publish else config.get('wordpress', 'default_status', default='draft')
-        
-        if existing_post_id and not args.force_new:
-            # 更新モード
-            if not args.force_update:
-                print(f"\n  既存投稿が見つかりました（ID: {existing_post_id}）")
-                print("  更新しますか？ [y/n]: ", end="")
-                response = input().strip().lower()
-                if response != 'y':
-                    print("中止しました")
-                    return False
-            
-            result = publisher.update_post(
-                post_id=existing_post_id,
-                title=draft.title,
-                content=html_content,
-                status=status,
-                meta_description=draft.description
-            )
-            history.save_updated(draft.slug, draft.title)
-        else:
-            # 新規作成
-            category_id = None
-            if draft.category:
-                category_id = publisher.get_category_id(draft.category)
-            elif config.get('wordpress', 'default_category'):
-                category_id = publisher.get_category_id(
-                    config.get('wordpress', 'default_category')
-                )
-            
-            tag_ids = []
-            if draft.tags:
-                tag_ids = publisher.get_tag_ids(draft.tags)
-            
-            result = publisher.create_post(
-                title=draft.title,
-                content=html_content,
-                slug=draft.slug,
-                status=status,
-                category_id=category_id,
-                tag_ids=tag_ids,
-                meta_description=draft.description
-            )
-            history.save_created(
-                slug=draft.slug,
-                post_id=result.post_id,
-                title=draft.title,
-                source_file=file_path
-            )
-        
-        print_success(f"投稿ID: {result.post_id}")
-        print_success(f"アクション: {result.action}")
-        print_success(f"ステータス: {result.status}")
-        
-    except PublisherError as e:
+        scheduler = pipeline.create_scheduler(queue, PipelineOptions.from_args(args))
+    except SchedulerError as e:
         print_error(str(e))
-        return False
+        return 1
     
-    # 完了
-    print("\n" + "=" * 50)
-    print("完了！")
-    print(f"編集URL: {result.edit_url}")
+    pending = [job for job in queue.ordered() if job.state in (PENDING, PREPARED)]
+    print(f"待機中のジョブ: {len(pending)}件（モード: {scheduler.mode}）")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+        print("\n終了しました")
+    return 0
+
+
+def run_daemon(config: Config, args) -> int:
+    """投稿依頼をローカルHTTP APIで受け付けて処理し続ける"""
     print("=" * 50)
+    print("記事自動投稿デーモン")
+    print("=" * 50)
+    
+    # 起動時に一度だけ作り、全ジョブで使い回す（Structurerはget_structurerで共有される）
+    # 依頼は対話なしで処理する。進捗は標準出力ではなくジョブのログに書く
+    pipeline = Pipeline(config, policy=AutoApprove())
+    if pipeline.publisher is None:
+        print_warning("WordPress設定が不完全です（dry_runの依頼のみ処理できます）")
+    
+    def handle(job) -> bool:
+        options = PipelineOptions(**job.options).merged(confirm=False, force_update=True)
+        return process_file(
+            job.file, pipeline, options,
+            on_event=lambda event: job.write_log(format_event(event)),
+            echo=job.write_log
+        )
     
-    return True
+    socket_path = args.socket or config.get('daemon', 'socket')
+    try:
+        daemon = Daemon(
+            handle,
+            host=config.get('daemon', 'host', default='127.0.0.1'),
+            port=config.get('daemon', 'port', default=8765),
+            socket_path=socket_path,
+            spool_dir=config.get('daemon', 'spool_dir', default='output/spool'),
+            token=config.get('daemon', 'token'),
+            verbose=config.get('daemon', 'access_log', default=False)
+        )
+    except (DaemonError, OSError) as e:
+        print_error(f"起動できません: {e}")
+        return 1
+    
+    print(f"待ち受け中: {daemon.address}（Ctrl+Cで終了）")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\n終了しました")
+    return 0
+
+
+def run_import_wxr(config: Config, input_path: str) -> int:
+    """WXRファイルを投稿履歴と記事JSONにインポート"""
+    print("=" * 50)
+    print("WXRインポート")
+    print("=" * 50)
+    
+    json_dir = Path(config.get('output', 'json_dir', default='output/json'))
+    html_dir = Path(config.get('output', 'html_dir', default='output/html'))
+    json_dir.mkdir(parents=True, exist_ok=True)
+    html_dir.mkdir(parents=True, exist_ok=True)
+    history = open_history(config)
+    
+    imported = registered = unparsed = rejected = 0
+    try:
+        with history.deferred_save():
+            for item in iter_wxr_items(input_path):
+                if not item.slug:
+                    continue
+                # スラッグはファイル名になるため、出力ディレクトリの外を指すものは取り込まない
+                if not is_safe_slug(item.slug):
+                    print_warning(f"{item.slug!r}: ファイル名に使えないスラッグのためスキップ")
+                    rejected += 1
+                    continue
+                imported += 1
+                
+                (html_dir / f"{item.slug}.txt").write_text(item.content, encoding='utf-8')
+                
+                try:
+                    article = html_to_article(item.content)
+                    with open(json_dir / f"{item.slug}.json", 'w', encoding='utf-8') as f:
+                        json.dump(article, f, ensure_ascii=False, indent=2)
+                except BlockParseError as e:
+                    print_warning(f"{item.slug}: JSON変換できません（{e}）")
+                    unparsed += 1
+                
+                if item.post_id and history.save_imported(
+                    slug=item.slug,
+                    post_id=item.post_id,
+                    title=item.title,
+                    created_at=item.post_date,
+                    source_file=input_path
+                ):
+                    registered += 1
+    except WXRError as e:
+        print_error(f"インポート失敗: {e}")
+        return 1
+    
+    print_success(f"{imported}件を読み込み（履歴に{registered}件を追加）")
+    if unparsed:
+        print_warning(f"{unparsed}件はJSON変換できませんでした")
+    if rejected:
+        print_warning(f"{rejected}件はスラッグが不正なためスキップしました")
+    return 0
+
+
+def process_file(
+    file_path: str,
+    pipeline: Pipeline,
+    options: PipelineOptions,
+    batch: Optional[BatchQueue] = None,
+    on_event: Optional[Callable[[PipelineEvent], None]] = None,
+    echo: Callable[[str], None] = print
+) -> bool:
+    """
+    1ファイルを処理（batch指定時は投稿をキューに積むだけ）
+    
+    Args:
+        on_event: パイプラインに設定した通知先に加えて進捗を通知する先
+        echo: 見出し・完了メッセージの出力先（デーモンではジョブのログ）
+    """
+    echo("\n" + "=" * 50)
+    echo("記事自動投稿ツール")
+    echo("=" * 50)
+    
+    result = pipeline.run(file_path, options, batch=batch, on_event=on_event)
+    
+    # ドライランなら終了
+    if result.action == ACTION_DRY_RUN:
+        echo("\n" + "=" * 50)
+        echo("ドライラン完了（投稿はスキップ）")
+        echo("=" * 50)
+    elif result.ok and result.edit_url:
+        # 完了
+        echo("\n" + "=" * 50)
+        echo("完了！")
+        echo(f"編集URL: {result.edit_url}")
+        echo("=" * 50)
+    
+    return result.ok
 
 
 if __name__ == "__main__":
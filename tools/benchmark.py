@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+"""
+記事自動投稿ツール - ベンチマークスクリプト
+各処理の性能を手元のサンプルで計測する
+
+使用方法:
+    python benchmark.py escape
+    python benchmark.py memory --articles 10000
+    python benchmark.py loader --drafts 2000
+    python benchmark.py rest --articles 50
+    python benchmark.py similarity --articles 1000
+    python benchmark.py related --articles 1000
+    python benchmark.py terms --articles 200 --patterns 5000
+    python benchmark.py lint --articles 500
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+TOOLS_DIR = Path(__file__).parent
+REPO_DIR = TOOLS_DIR.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+
+def load_sample_corpus() -> list[dict]:
+    """リポジトリ内の記事JSONを集める"""
+    paths = sorted(REPO_DIR.glob('block-html/posts/*.json'))
+    paths += sorted(TOOLS_DIR.glob('output/json/*.json'))
+    paths.append(TOOLS_DIR / 'sample_post.json')
+
+    corpus = []
+    for path in paths:
+        try:
+            corpus.append(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return corpus
+
+
+def _best_of(func, repeat: int) -> float:
+    """repeat回実行した最短時間（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_escape(args) -> int:
+    """サニタイズ有無でのHTML生成時間を比較"""
+    import block_generator
+    from block_generator import BlockGenerator, sanitize_article
+    from lib.generator import Generator
+
+    corpus = load_sample_corpus()
+    if not corpus:
+        print("サンプルJSONが見つかりません")
+        return 1
+
+    cta_path = str(REPO_DIR / 'block-html' / 'posts' / 'cta.txt')
+    plain = Generator(cta_template_path=cta_path)
+    plain._generator = BlockGenerator(escape=False)
+    escaped = Generator(cta_template_path=cta_path)
+
+    def run(generator, clear: bool, sanitized: bool = False, data_list=corpus):
+        def _run():
+            for _ in range(args.rounds):
+                # 毎周メモを破棄し、すべての文字列を初見として扱う
+                if clear:
+                    block_generator.clear_sanitize_cache()
+                for data in data_list:
+                    generator.generate(data, sanitized=sanitized)
+        return _run
+
+    def presanitize():
+        # パイプラインでは構造化の直後に1回だけ行う（Structurer._to_article）
+        for _ in range(args.rounds):
+            block_generator.clear_sanitize_cache()
+            for data in corpus:
+                sanitize_article(data)
+
+    sanitized_corpus = [sanitize_article(data) for data in corpus]
+
+    # ノイズを避けるため交互に計測して最短値を採る
+    base = cold = warm = pre = prepass = float('inf')
+    for _ in range(args.repeat):
+        base = min(base, _best_of(run(plain, False), 1))
+        cold = min(cold, _best_of(run(escaped, True), 1))
+        warm = min(warm, _best_of(run(escaped, False), 1))
+        pre = min(pre, _best_of(run(escaped, True, sanitized=True, data_list=sanitized_corpus), 1))
+        prepass = min(prepass, _best_of(presanitize, 1))
+
+    articles = len(corpus) * args.rounds
+    print(f"記事数: {len(corpus)}（{args.rounds}周 = {articles}件）")
+    print(f"エスケープなし:         {base * 1000:.1f} ms（{base / articles * 1e6:.1f} µs/記事）")
+    print(f"生成時にサニタイズ(初回):   {cold * 1000:.1f} ms（{(cold - base) / base * 100:+.1f}%）")
+    print(f"生成時にサニタイズ(再生成): {warm * 1000:.1f} ms（{(warm - base) / base * 100:+.1f}%）")
+    print(f"構造化時にサニタイズ済み:   {pre * 1000:.1f} ms（{(pre - base) / base * 100:+.1f}%）")
+    print(f"  構造化時のsanitize_article: {prepass / articles * 1e6:.1f} µs/記事（構造化のAPI呼び出し1回に対して）")
+    return 0
+
+
+def synthesize_corpus(count: int) -> list[str]:
+    """
+    サンプル記事を複製してcount件の記事JSON（文字列）を作る
+
+    本文・項目は記事ごとに別の文字列にし、見出しやtypeなど実際のアーカイブでも
+    繰り返し出現する文字列はそのまま残す
+    """
+    samples = load_sample_corpus()
+    corpus = []
+    for index in range(count):
+        article = json.loads(json.dumps(samples[index % len(samples)]))
+        suffix = f"（{index}）"
+        if article.get('lead'):
+            article['lead'] += suffix
+        for section in article.get('sections', []):
+            for key in ('text', 'content', 'q', 'a'):
+                if isinstance(section.get(key), str) and section.get('type') != 'heading':
+                    section[key] += suffix
+            if section.get('type') == 'list':
+                section['items'] = [item + suffix for item in section.get('items', [])]
+            if section.get('type') == 'table':
+                section['rows'] = [[cell + suffix for cell in row] for row in section.get('rows', [])]
+        corpus.append(json.dumps(article, ensure_ascii=False))
+    return corpus
+
+
+def _measure(build) -> tuple[int, int, object]:
+    """buildの結果を保持した状態の確保量と、構築中のピーク（バイト）"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak, result
+
+
+def bench_memory(args) -> int:
+    """記事JSON（dict）と型付きArticleのメモリ使用量を比較"""
+    from lib.sections import Article
+    from lib.structurer import ArticleJSON
+    from lib.validator import Validator
+
+    if not load_sample_corpus():
+        print("サンプルJSONが見つかりません")
+        return 1
+
+    corpus = synthesize_corpus(args.articles)
+    count = len(corpus)
+
+    def as_dicts():
+        return [json.loads(text) for text in corpus]
+
+    def as_article_json():
+        return [ArticleJSON(json.loads(text)) for text in corpus]
+
+    def as_articles():
+        return [Article.from_dict(json.loads(text), slug=f"post-{i}") for i, text in enumerate(corpus)]
+
+    def streamed():
+        # 1件ずつ読み込んで検証し、保持しない（Archiveの使い方）
+        validator = Validator()
+        warnings = 0
+        for text in corpus:
+            warnings += len(validator.validate(Article.from_dict(json.loads(text)).to_dict()).warnings)
+        return warnings
+
+    print(f"記事数: {count}（JSON合計 {sum(len(text.encode('utf-8')) for text in corpus) / 1e6:.1f} MB）")
+    print(f"{'表現':<22}{'保持':>12}{'ピーク':>12}{'1記事あたり':>14}")
+    baseline = None
+    for label, build in (
+        ('dict（json.loads）', as_dicts),
+        ('ArticleJSON', as_article_json),
+        ('Article（__slots__）', as_articles),
+        ('Article（逐次・非保持）', streamed),
+    ):
+        current, peak, result = _measure(build)
+        del result
+        baseline = baseline or current
+        print(
+            f"{label:<20}{current / 1e6:>10.1f} MB{peak / 1e6:>10.1f} MB"
+            f"{current / count / 1e3:>10.2f} KB（{(current - baseline) / baseline * 100:+.0f}%）"
+        )
+    return 0
+
+
+def bench_loader(args) -> int:
+    """原稿フォルダの一覧作成（フロントマター読み込み）の時間を比較"""
+    import re
+    import tempfile
+    import yaml
+    from lib.loader import Loader
+
+    samples = sorted(REPO_DIR.glob('drafts/*.md'))
+    if not samples:
+        print("サンプル原稿が見つかりません")
+        return 1
+    texts = [path.read_text(encoding='utf-8') for path in samples]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 本文を長めにした原稿を作る（実際の長い解説記事相当）
+        for index in range(args.drafts):
+            text = texts[index % len(texts)].replace('slug: ', f'slug: bench-{index}-', 1)
+            Path(tmp, f"draft-{index:05d}.md").write_text(text + texts[0].split('---', 2)[-1] * 3, encoding='utf-8')
+        paths = sorted(Path(tmp).glob('*.md'))
+
+        pattern = r'^---\s*\n(.*?)\n---\s*\n(.*)$'
+
+        def regex_scan():
+            for path in paths:
+                match = re.match(pattern, path.read_text(encoding='utf-8'), re.DOTALL)
+                yaml.safe_load(match.group(1))
+                match.group(2).strip()
+
+        def loader_scan(with_body: bool, clear: bool):
+            def _run():
+                if clear:
+                    Loader.clear_cache()
+                loader = Loader()
+                for path in paths:
+                    loader.load(str(path), with_body=with_body)
+            return _run
+
+        results = [
+            ('正規表現 + safe_load', _best_of(regex_scan, args.repeat)),
+            ('Loader（本文あり）', _best_of(loader_scan(True, True), args.repeat)),
+            ('Loader（フロントマターのみ）', _best_of(loader_scan(False, True), args.repeat)),
+            ('Loader（キャッシュ済み）', _best_of(loader_scan(False, False), args.repeat)),
+        ]
+
+    print(f"原稿数: {len(paths)}（YAMLローダー: {'CSafeLoader' if hasattr(yaml, 'CSafeLoader') else 'SafeLoader'}）")
+    base = results[0][1]
+    for label, elapsed in results:
+        print(f"{label:<24}{elapsed * 1000:>9.1f} ms（{base / elapsed:.1f}倍）")
+    return 0
+
+
+class _FakeWordPress:
+    """ベンチマーク用のWordPress REST APIもどき（投稿・検索・カテゴリ/タグのみ）
+
+    実際のWordPressと同じく編集コンテキストの投稿オブジェクト全体を返し、
+    _fieldsの絞り込みとgzip圧縮に対応する。送ったレスポンス本文のバイト数を数える
+    """
+
+    def __init__(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.posts: dict[int, dict] = {}
+        self.bytes_sent = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _body(self) -> dict:
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length)) if length else {}
+
+            def do_GET(self):
+                fake.handle(self, 'GET', None)
+
+            def do_POST(self):
+                fake.handle(self, 'POST', self._body())
+
+            def do_PUT(self):
+                fake.handle(self, 'PUT', self._body())
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.bytes_sent = 0
+            self.requests = 0
+
+    def _post_object(self, post_id: int, data: dict) -> dict:
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        link = f"{self.url}/{data.get('slug', post_id)}/"
+        rendered = data.get('content', '')
+        return {
+            'id': post_id, 'date': now, 'date_gmt': now,
+            'guid': {'rendered': f"{self.url}/?p={post_id}", 'raw': f"{self.url}/?p={post_id}"},
+            'modified': now, 'modified_gmt': now, 'password': '',
+            'slug': data.get('slug', ''), 'status': data.get('status', 'draft'), 'type': 'post',
+            'link': link, 'title': {'raw': data.get('title', ''), 'rendered': data.get('title', '')},
+            'content': {'raw': rendered, 'rendered': rendered, 'protected': False, 'block_version': 1},
+            'excerpt': {'raw': '', 'rendered': f"<p>{data.get('title', '')}</p>\n", 'protected': False},
+            'author': 1, 'featured_media': data.get('featured_media', 0),
+            'comment_status': 'closed', 'ping_status': 'closed', 'sticky': False,
+            'template': '', 'format': 'standard', 'meta': data.get('meta', {}),
+            'categories': data.get('categories', [1]), 'tags': data.get('tags', []),
+            'permalink_template': f"{self.url}/%postname%/", 'generated_slug': data.get('slug', ''),
+            '_links': {
+                rel: [{'href': f"{self.url}/wp-json/wp/v2/{rel}?post={post_id}", 'embeddable': True}]
+                for rel in ('self', 'collection', 'about', 'author', 'replies', 'version-history',
+                            'predecessor-version', 'wp:attachment', 'wp:term', 'curies')
+            },
+        }
+
+    @staticmethod
+    def _project(obj, fields: Optional[str]):
+        if not fields:
+            return obj
+        keys = fields.split(',')
+        if isinstance(obj, list):
+            return [{key: item[key] for key in keys if key in item} for item in obj]
+        return {key: obj[key] for key in keys if key in obj}
+
+    def handle(self, handler, method: str, body: Optional[dict]):
+        import gzip
+        from urllib.parse import parse_qs, urlparse
+
+        url = urlparse(handler.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path.replace('/wp-json/wp/v2', '', 1)
+        status, payload = 404, {'code': 'rest_no_route'}
+
+        with self._lock:
+            if path == '/posts' and method == 'GET':
+                status = 200
+                payload = [post for post in self.posts.values() if post['slug'] == query.get('slug')]
+            elif path == '/posts' and method == 'POST':
+                post_id = len(self.posts) + 1
+                self.posts[post_id] = self._post_object(post_id, body)
+                status, payload = 201, self.posts[post_id]
+            elif path.startswith('/posts/') and method == 'PUT':
+                post_id = int(path.rsplit('/', 1)[1])
+                merged = {**self.posts[post_id], **body}
+                merged['content'] = body.get('content', self.posts[post_id]['content']['raw'])
+                merged['title'] = body.get('title', self.posts[post_id]['title']['raw'])
+                self.posts[post_id] = self._post_object(post_id, merged)
+                status, payload = 200, self.posts[post_id]
+            elif path in ('/categories', '/tags') and method == 'GET':
+                status = 200
+                payload = [
+                    {'id': term_id, 'count': 3, 'description': '', 'link': f"{self.url}/{path}/{term_id}/",
+                     'name': f"term-{term_id}", 'slug': f"term-{term_id}", 'taxonomy': path[1:-1],
+                     'parent': 0, 'meta': [], '_links': {'self': [{'href': f"{self.url}{path}/{term_id}"}]}}
+                    for term_id in range(1, 41)
+                ]
+
+        data = json.dumps(self._project(payload, query.get('_fields')), ensure_ascii=False).encode('utf-8')
+        encoding = None
+        if 'gzip' in (handler.headers.get('Accept-Encoding') or ''):
+            data = gzip.compress(data)
+            encoding = 'gzip'
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json; charset=UTF-8')
+        if encoding:
+            handler.send_header('Content-Encoding', encoding)
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+        with self._lock:
+            self.bytes_sent += len(data)
+            self.requests += 1
+
+
+def bench_rest(args) -> int:
+    """WordPress REST APIの転送量（記事あたりのレスポンスバイト数）を比較"""
+    from lib.generator import Generator
+    from lib.publisher import Publisher
+
+    corpus = load_sample_corpus()
+    if not corpus:
+        print("サンプルJSONが見つかりません")
+        return 1
+    generator = Generator()
+    pages = [generator.generate(corpus[index % len(corpus)]) for index in range(args.articles)]
+
+    class FullResponsePublisher(Publisher):
+        """_fieldsを付けない（従来の動作。gzip/deflateはrequestsの既定で従来から受け付けている）"""
+        POST_FIELDS = None
+        LOOKUP_FIELDS = None
+        TERM_FIELDS = None
+
+    def publish_all(publisher: Publisher, prefix: str):
+        """新規作成（検索→作成）と再投稿（検索→更新）を全記事に行う"""
+        publisher.get_category_id('term-1')
+        publisher.get_tag_ids(['term-2'])
+        for index, content in enumerate(pages):
+            slug = f"{prefix}-{index}"
+            if publisher.find_post_by_slug(slug) is None:
+                publisher.create_post(title=slug, content=content, slug=slug)
+            post_id = publisher.find_post_by_slug(slug)
+            publisher.update_post(post_id=post_id, title=slug, content=content)
+
+    server = _FakeWordPress()
+    try:
+        results = []
+        for label, cls in (('従来（全フィールド）', FullResponsePublisher),
+                           ('_fields', Publisher)):
+            server.reset_counters()
+            start = time.perf_counter()
+            publish_all(cls(server.url, 'admin', 'password'), prefix=cls.__name__)
+            elapsed = time.perf_counter() - start
+            results.append((label, server.bytes_sent, server.requests, elapsed))
+    finally:
+        server.close()
+
+    print(f"記事数: {args.articles}（1記事あたり 検索2回 + 作成1回 + 更新1回）")
+    base = results[0][1]
+    for label, sent, count, elapsed in results:
+        print(f"{label:<22}{sent / args.articles / 1024:>9.1f} KB/記事"
+              f"{count:>6}リクエスト{elapsed * 1000:>9.1f} ms（転送量 {sent / base:.1%}）")
+    return 0
+
+
+def bench_similarity(args) -> int:
+    """類似記事チェック: MinHash/LSH索引の読み込み・更新・問い合わせと総当たり比較の時間を比較"""
+    import tempfile
+    from lib.sections import Article
+    from lib.similarity import SimilarityIndex, normalize_text, section_texts, shingles
+
+    if not load_sample_corpus():
+        print("サンプルJSONが見つかりません")
+        return 1
+
+    articles = [
+        Article.from_dict(json.loads(data), slug=f"article-{index}")
+        for index, data in enumerate(synthesize_corpus(args.articles))
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        index_file = str(Path(tmp) / 'similarity_index.json')
+        index = SimilarityIndex(index_file=index_file)
+        start = time.perf_counter()
+        index.build(articles)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        index.save()
+        save = time.perf_counter() - start
+        size = Path(index_file).stat().st_size
+
+        # 記事ごとに開き直していた時の費用（今はプロセス内で1回だけ読み込む）
+        start = time.perf_counter()
+        index = SimilarityIndex(index_file=index_file)
+        load = time.perf_counter() - start
+
+    queries = articles[:args.queries]
+    update = _best_of(lambda: [index.update(article.slug, article) for article in queries], args.repeat)
+
+    # 総当たり: 全記事の節のn-gram集合を持っておき、Jaccard係数を1つずつ計算する
+    units = [
+        (article.slug, shingles(normalize_text(text), index.ngram))
+        for article in articles for _, text in section_texts(article)
+    ]
+
+    def brute_force(article):
+        found = 0
+        for _, text in section_texts(article):
+            grams = shingles(normalize_text(text), index.ngram)
+            for slug, other in units:
+                if slug != article.slug and len(grams & other) / len(grams | other) >= index.threshold:
+                    found += 1
+        return found
+
+    lsh = _best_of(lambda: [index.query(article, article.slug) for article in queries], args.repeat)
+    brute = _best_of(lambda: [brute_force(article) for article in queries[:max(1, args.queries // 10)]], 1)
+    brute_per = brute / max(1, args.queries // 10)
+    matches = sum(len(index.query(article, article.slug)) for article in queries)
+
+    print(f"記事数: {len(articles)}（登録 {len(index.units)}節、索引作成 {build:.2f}秒）")
+    print(f"索引ファイル: {size / 1024 / 1024:.1f} MB（読み込み {load * 1000:.0f} ms、保存 {save * 1000:.0f} ms）")
+    print(f"更新（メモリ上）: {update / len(queries) * 1000:.2f} ms/記事")
+    print(f"MinHash/LSH: {lsh / len(queries) * 1000:.2f} ms/記事（類似 {matches / len(queries):.1f}件/記事）")
+    print(f"総当たり:    {brute_per * 1000:.2f} ms/記事（{brute_per / (lsh / len(queries)):.0f}倍）")
+    print(f"記事ごとに索引を開き直すと: {(load + lsh / len(queries)) * 1000:.0f} ms/記事")
+    return 0
+
+
+def bench_related(args) -> int:
+    """関連記事: TF-IDF索引の作成・読み込みと、1記事あたりの検索時間"""
+    import tempfile
+    from lib import related
+    from lib.sections import Article
+
+    if not load_sample_corpus():
+        print("サンプルJSONが見つかりません")
+        return 1
+
+    corpus = [json.loads(data) for data in synthesize_corpus(args.articles)]
+    with tempfile.TemporaryDirectory() as tmp:
+        index_file = str(Path(tmp) / 'related_index.json')
+        index = related.RelatedIndex(index_file=index_file)
+        start = time.perf_counter()
+        index.build(
+            (Article.from_dict(data, slug=f"article-{number}"), f"記事{number}", f"/article-{number}/")
+            for number, data in enumerate(corpus)
+        )
+        build = time.perf_counter() - start
+        index.save()
+
+        start = time.perf_counter()
+        index = related.RelatedIndex(index_file=index_file)
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        index._build_model()
+        model = time.perf_counter() - start
+
+    queries = corpus[:args.queries]
+    elapsed = _best_of(
+        lambda: [index.query(data, slug=f"article-{number}") for number, data in enumerate(queries)],
+        args.repeat
+    )
+
+    # 投稿のたびの更新: 計算済みの重みに差分として加え、続けて検索する
+    start = time.perf_counter()
+    for number, data in enumerate(queries[:related.MAX_PENDING_DOCS]):
+        index.update(f"article-{number}", Article.from_dict(data), f"記事{number}", f"/article-{number}/")
+        index.query(data, slug=f"article-{number}")
+    update = (time.perf_counter() - start) / min(len(queries), related.MAX_PENDING_DOCS)
+
+    backend = "numpy/scipy（疎行列）" if related.sparse is not None else "転置リスト（numpy/scipyなし）"
+    print(f"記事数: {len(index)}（{len(index.terms)}語、索引作成 {build:.2f}秒）")
+    print(f"読み込み: {load * 1000:.0f} ms + 重みの計算 {model * 1000:.0f} ms")
+    print(f"検索 [{backend}]: {elapsed / len(queries) * 1000:.2f} ms/記事")
+    print(f"更新（メモリ上の差分）+ 検索: {update * 1000:.2f} ms/記事")
+    print(f"記事ごとに索引を開き直すと: {(load + model + elapsed / len(queries)) * 1000:.0f} ms/記事")
+    return 0
+
+
+def bench_terms(args) -> int:
+    """用語チェック: Aho-Corasickオートマトン1回の走査と、パターンごとの正規表現検索を比較"""
+    import random
+    import re
+    import tempfile
+    import yaml
+    from lib.terminology import TermChecker, iter_text_fields, normalize
+
+    if not load_sample_corpus():
+        print("サンプルJSONが見つかりません")
+        return 1
+
+    corpus = [json.loads(data) for data in synthesize_corpus(args.articles)]
+    texts = [normalize(value) for data in corpus[:50] for _, value in iter_text_fields(data)]
+
+    # 辞書: 本文の一部（実際に一致する語）と、本文に無い漢字の組み合わせを半分ずつ
+    rng = random.Random(0)
+    patterns = set()
+    while len(patterns) < args.patterns // 2:
+        text = rng.choice(texts)
+        if len(text) >= 6:
+            start = rng.randrange(len(text) - 5)
+            patterns.add(text[start:start + rng.randint(3, 6)])
+    while len(patterns) < args.patterns:
+        patterns.add(''.join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(rng.randint(2, 5))))
+    patterns = sorted(patterns)
+    dictionary = {'prohibited': [{'pattern': pattern} for pattern in patterns]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dictionary_file = Path(tmp) / 'terminology.yaml'
+        dictionary_file.write_text(yaml.safe_dump(dictionary, allow_unicode=True), encoding='utf-8')
+        cache_file = str(Path(tmp) / 'automaton.json')
+        start = time.perf_counter()
+        TermChecker(str(dictionary_file), cache_file)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        checker = TermChecker(str(dictionary_file), cache_file)
+        cached = time.perf_counter() - start
+
+    automaton = _best_of(lambda: [checker.check(data) for data in corpus], args.repeat)
+    hits = sum(len(checker.check(data)) for data in corpus)
+
+    regexes = [re.compile(re.escape(normalize(pattern))) for pattern in patterns]
+    sample = corpus[:max(1, len(corpus) // 10)]
+
+    def per_pattern():
+        for data in sample:
+            for _, value in iter_text_fields(data):
+                text = normalize(value)
+                for regex in regexes:
+                    for _ in regex.finditer(text):
+                        pass
+
+    regex = _best_of(per_pattern, 1) / len(sample)
+    per_article = automaton / len(corpus)
+    print(f"辞書: {len(patterns)}語（構築 {build * 1000:.0f} ms、キャッシュから {cached * 1000:.0f} ms）")
+    print(f"オートマトン: {per_article * 1000:.2f} ms/記事（一致 {hits / len(corpus):.1f}件/記事）")
+    print(f"正規表現×{len(patterns)}: {regex * 1000:.2f} ms/記事（{regex / per_article:.0f}倍）")
+    return 0
+
+
+def bench_lint(args) -> int:
+    """ブロックHTMLの検査: 生成したHTMLを検査する速度（MB/s）"""
+    from lib.blocks import parse_blocks
+    from lib.generator import Generator
+    from lib.lint import lint_blocks
+
+    if not load_sample_corpus():
+        print("サンプルJSONが見つかりません")
+        return 1
+
+    generator = Generator(cta_template_path=str(REPO_DIR / 'block-html' / 'posts' / 'cta.txt'))
+    pages = [generator.generate(json.loads(data)) for data in synthesize_corpus(args.articles)]
+    content = '\n\n'.join(pages)
+    size = len(content.encode('utf-8')) / 1024 / 1024
+
+    issues = len(lint_blocks(content))
+    lint = _best_of(lambda: lint_blocks(content), args.repeat)
+    parse = _best_of(lambda: parse_blocks(content), args.repeat)
+    print(f"HTML: {len(pages)}記事・{size:.1f}MB（問題 {issues}件）")
+    print(f"検査:  {size / lint:.1f} MB/s（{lint / len(pages) * 1000:.2f} ms/記事）")
+    print(f"参考（parse_blocksのみ）: {size / parse:.1f} MB/s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='記事自動投稿ツールのベンチマーク')
+    sub = parser.add_subparsers(dest='target', required=True)
+
+    p = sub.add_parser('escape', help='HTMLサニタイズのオーバーヘッド')
+    p.add_argument('--rounds', type=int, default=300)
+    p.add_argument('--repeat', type=int, default=15)
+    p.set_defaults(func=bench_escape)
+
+    p = sub.add_parser('memory', help='記事データのメモリ使用量（合成コーパス）')
+    p.add_argument('--articles', type=int, default=10000)
+    p.set_defaults(func=bench_memory)
+
+    p = sub.add_parser('loader', help='原稿フォルダの一覧作成')
+    p.add_argument('--drafts', type=int, default=2000)
+    p.add_argument('--repeat', type=int, default=3)
+    p.set_defaults(func=bench_loader)
+
+    p = sub.add_parser('rest', help='WordPress REST APIの転送量（ローカルの疑似サーバー）')
+    p.add_argument('--articles', type=int, default=50)
+    p.set_defaults(func=bench_rest)
+
+    p = sub.add_parser('similarity', help='類似記事チェック（MinHash/LSHと総当たり）')
+    p.add_argument('--articles', type=int, default=1000)
+    p.add_argument('--queries', type=int, default=20)
+    p.add_argument('--repeat', type=int, default=3)
+    p.set_defaults(func=bench_similarity)
+
+    p = sub.add_parser('related', help='関連記事（TF-IDF索引の検索）')
+    p.add_argument('--articles', type=int, default=1000)
+    p.add_argument('--queries', type=int, default=20)
+    p.add_argument('--repeat', type=int, default=3)
+    p.set_defaults(func=bench_related)
+
+    p = sub.add_parser('terms', help='用語チェック（Aho-Corasickとパターンごとの正規表現）')
+    p.add_argument('--articles', type=int, default=200)
+    p.add_argument('--patterns', type=int, default=5000)
+    p.add_argument('--repeat', type=int, default=3)
+    p.set_defaults(func=bench_terms)
+
+    p = sub.add_parser('lint', help='ブロックHTMLの検査（MB/s）')
+    p.add_argument('--articles', type=int, default=500)
+    p.add_argument('--repeat', type=int, default=3)
+    p.set_defaults(func=bench_lint)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
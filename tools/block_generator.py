@@ -9,24 +9,245 @@ WordPress Block HTML Generator
 """
 
 import json
+import re
 import sys
 import io
+from html import escape as _html_escape, unescape as _html_unescape
 from pathlib import Path
 
 # Windows環境でのUTF-8出力対応
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# （ラッパーを作り直すと元のstdoutが閉じるため、エンコーディングだけ変更する）
+if hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(encoding='utf-8')
+else:
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+
+# ========== エスケープ・サニタイズ ==========
+
+# 本文中でそのまま出力を許可するインラインタグと属性
+ALLOWED_INLINE_TAGS = {
+    'strong': (), 'b': (), 'em': (), 'i': (), 'u': (), 's': (),
+    'mark': ('class',), 'code': (), 'br': (), 'sup': (), 'sub': (),
+    'span': ('class',), 'a': ('href', 'target', 'rel'),
+}
+VOID_INLINE_TAGS = {'br'}
+
+# タグ・文字参照・裸の特殊文字を1回の走査で拾う
+_INLINE_TOKEN_RE = re.compile(
+    r'<(/?)([a-zA-Z][a-zA-Z0-9]*)((?:\s+[^<>]*?)?)\s*/?>'
+    r'|&(?:#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6}|[a-zA-Z][a-zA-Z0-9]{1,31});'
+    r'|[<>&]'
+)
+# 属性なしでそのまま出力できる許可タグ（_is_cleanで正規表現を使わずに判定する）
+_CLEAN_INLINE_TAGS = frozenset(('strong', 'b', 'em', 'i', 'u', 's', 'mark', 'code', 'sup', 'sub', 'span'))
+_ATTR_RE = re.compile(r'([a-zA-Z][a-zA-Z0-9-]*)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_UNSAFE_URL_RE = re.compile(r'^(?:javascript|vbscript|data):', re.IGNORECASE)
+# ブラウザがURLを解釈する前に取り除く文字（制御文字と空白。java\tscript: なども javascript: になる）
+_URL_IGNORED_RE = re.compile(r'[\x00-\x20\x7f]+')
+
+_ESCAPE_CHARS = {'<': '&lt;', '>': '&gt;', '&': '&amp;'}
+
+
+def _safe_url(url: str):
+    """制御文字・空白を除いたURL（javascript: などのスキームならNone）"""
+    url = _URL_IGNORED_RE.sub('', url)
+    return None if _UNSAFE_URL_RE.match(url) else url
+
+
+def _sanitize_token(match: re.Match, open_tags: list) -> str:
+    """
+    トークン1つを許可タグ・文字参照はそのまま、それ以外はエスケープして返す
+    
+    open_tagsは開いている許可タグのスタック。閉じタグは開いているタグだけを閉じ
+    （間に開いたままのタグがあれば先に閉じる）、開いていないタグの閉じタグは捨てる
+    """
+    token = match.group(0)
+    if len(token) == 1:
+        return _ESCAPE_CHARS[token]
+    if token[0] == '&':
+        return token
+    
+    closing, name, attr_text = match.group(1), match.group(2).lower(), match.group(3)
+    allowed_attrs = ALLOWED_INLINE_TAGS.get(name)
+    if allowed_attrs is None:
+        return _html_escape(token, quote=False)
+    if closing:
+        if name not in open_tags:
+            return ''
+        closed = []
+        while True:
+            opened = open_tags.pop()
+            closed.append(f'</{opened}>')
+            if opened == name:
+                return ''.join(closed)
+    if name not in VOID_INLINE_TAGS:
+        open_tags.append(name)
+    
+    attrs = []
+    for attr in _ATTR_RE.finditer(attr_text or ''):
+        attr_name = attr.group(1).lower()
+        value = attr.group(2) if attr.group(2) is not None else attr.group(3)
+        if attr_name not in allowed_attrs:
+            continue
+        # 文字参照を戻してから検査し、エスケープは最後に1回だけ行う（&amp; を &amp;amp; にしない）
+        value = _html_unescape(value)
+        if attr_name == 'href':
+            value = _safe_url(value)
+            if value is None:
+                continue
+        attrs.append(f' {attr_name}="{_html_escape(value, quote=True)}"')
+    return f'<{name}{"".join(attrs)}>'
+
+
+def _sanitize(value: str) -> str:
+    """許可タグ以外をエスケープし、閉じていない許可タグを末尾で閉じる"""
+    open_tags = []
+    sanitized = _INLINE_TOKEN_RE.sub(lambda match: _sanitize_token(match, open_tags), value)
+    if open_tags:
+        sanitized += ''.join(f'</{name}>' for name in reversed(open_tags))
+    return sanitized
+
+
+def _is_clean(value: str) -> bool:
+    """
+    属性なしの許可タグ（開き・閉じが対応している）と <br> だけを含み、変換不要か
+    
+    生成する記事の本文は <strong> などの単純なタグだけのことが多いため、
+    正規表現を使わずに < で区切ってタグ名だけを確認する（文字参照を含む時は_sanitizeに任せる）
+    """
+    if '&' in value:
+        return False
+    open_tags = []
+    for part in value.split('<')[1:]:
+        end = part.find('>')
+        if end < 0:
+            return False
+        name = part[:end]
+        if name == 'br':
+            continue
+        if name[:1] == '/':
+            if not open_tags or open_tags.pop() != name[1:]:
+                return False
+        elif name in _CLEAN_INLINE_TAGS:
+            open_tags.append(name)
+        else:
+            return False
+    return not open_tags
+
+
+# サニタイズ結果のメモ（文字列 → 出力）。上限に達したら破棄して作り直す
+_SANITIZE_MEMO_MAX = 65536
+_sanitize_memo: dict = {}
+_sanitize_memo_get = _sanitize_memo.get
+
+
+def sanitize_inline(value) -> str:
+    """
+    本文テキストをブロックHTMLに埋め込める形に整える
+    
+    許可されたインラインタグ（strong, a など）と既存の文字参照は残し、
+    それ以外の <, >, & はエスケープする。閉じていない許可タグは末尾で閉じ、
+    開いていないタグの閉じタグは捨てる。同じ文字列は再計算しない。
+    
+    本文の大半は < も & も含まないため、その場合はメモも引かずにそのまま返す
+    （> だけならタグにも文字参照にもならないので、エスケープしなくてよい）
+    """
+    if value.__class__ is not str:
+        if value is None:
+            return ''
+        value = str(value)
+    if '<' not in value and '&' not in value:
+        return value
+    
+    cached = _sanitize_memo_get(value)
+    if cached is None:
+        cached = value if _is_clean(value) else _sanitize(value)
+        if len(_sanitize_memo) >= _SANITIZE_MEMO_MAX:
+            _sanitize_memo.clear()
+        _sanitize_memo[value] = cached
+    return cached
+
+
+def clear_sanitize_cache():
+    """サニタイズ結果のメモを破棄"""
+    _sanitize_memo.clear()
+
+
+# 記事JSONのうち本文テキストではない（sanitize_inlineを通さずに使う）項目
+_NON_TEXT_KEYS = frozenset(('type', 'level', 'style', 'height', 'ordered', 'fixed_layout', 'url'))
+
+
+def sanitize_article(data):
+    """
+    記事JSONの本文テキストをすべてsanitize_inlineにかけた複製を返す
+
+    構造化の直後に1回だけ行い、HTML生成はBlockGenerator(escape=False)でそのまま使う
+    （sanitize_inlineは2回かけても結果が変わらないため、どちらで生成しても同じHTMLになる）
+    """
+    if isinstance(data, dict):
+        return {
+            key: value if key in _NON_TEXT_KEYS else sanitize_article(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [sanitize_article(value) for value in data]
+    if isinstance(data, str):
+        return sanitize_inline(data)
+    return data
+
+
+def block_attrs(attrs: dict) -> str:
+    """
+    ブロックコメント用の属性JSONを生成
+    WordPressのserialize_block_attributes()と同じ文字をエスケープする
+    """
+    encoded = json.dumps(attrs, ensure_ascii=False, separators=(',', ':'))
+    return (
+        encoded
+        .replace('--', '\\u002d\\u002d')
+        .replace('<', '\\u003c')
+        .replace('>', '\\u003e')
+        .replace('&', '\\u0026')
+        .replace('\\"', '\\u0022')
+    )
+
+
+def _passthrough(value) -> str:
+    return '' if value is None else str(value)
+
 
 class BlockGenerator:
     """WordPressブロックHTMLジェネレーター"""
     
-    def __init__(self):
+    def __init__(self, escape: bool = True):
+        """
+        Args:
+            escape: 本文テキストをサニタイズするか（sanitize_article済みの記事JSONはFalseで生成する）
+        """
         self.output = []
         self.h2_counter = 0  # h2のナンバリング用カウンター
+        self.faq_items = []  # 生成中に出現したFAQ (質問, 回答)。構造化データ用
+        self._text = sanitize_inline if escape else _passthrough
+        
+        # セクションタイプ → 処理メソッド（セクションごとに作り直さない）
+        self._handlers = {
+            'heading': self._heading,
+            'paragraph': self._paragraph,
+            'list': self._list,
+            'faq': self._faq,
+            'box': self._box,
+            'warning': self._warning_box,
+            'table': self._table,
+            'spacer': self._spacer,
+            'related': self._related,
+        }
     
     def generate(self, data: dict) -> str:
         """メイン生成関数"""
         self.output = []
         self.h2_counter = 0  # h2カウンターをリセット
+        self.faq_items = []
         
         # ① リード文（あれば）
         if 'lead' in data:
@@ -55,18 +276,7 @@ class BlockGenerator:
         """セクションタイプに応じて処理を振り分け"""
         section_type = section.get('type', 'paragraph')
         
-        handlers = {
-            'heading': self._heading,
-            'paragraph': self._paragraph,
-            'list': self._list,
-            'faq': self._faq,
-            'box': self._box,
-            'warning': self._warning_box,
-            'table': self._table,
-            'spacer': self._spacer,
-        }
-        
-        handler = handlers.get(section_type, self._paragraph)
+        handler = self._handlers.get(section_type, self._paragraph)
         result = handler(section)
         if result:
             self.output.append(result)
@@ -75,8 +285,13 @@ class BlockGenerator:
     
     def _heading(self, section: dict) -> str:
         """見出しブロック"""
-        level = section.get('level', 2)
-        text = section.get('text', '')
+        try:
+            level = int(section.get('level', 2))
+        except (ValueError, TypeError):
+            level = 2
+        if not 1 <= level <= 6:
+            level = 2
+        text = self._text(section.get('text', ''))
         
         result = ''
         
@@ -104,9 +319,10 @@ class BlockGenerator:
     
     def _paragraph(self, section: dict) -> str:
         """段落ブロック"""
-        text = section.get('text', '')
         if isinstance(section, str):
-            text = section
+            text = self._text(section)
+        else:
+            text = self._text(section.get('text', ''))
         
         return f'''<!-- wp:paragraph {{"style":{{"typography":{{"lineHeight":"1.8"}}}}}} -->
 <p style="line-height:1.8">{text}</p>
@@ -120,7 +336,7 @@ class BlockGenerator:
         tag = 'ol' if ordered else 'ul'
         list_items = '\n'.join([
             f'''<!-- wp:list-item -->
-<li>{item}</li>
+<li>{self._text(item)}</li>
 <!-- /wp:list-item -->'''
             for item in items
         ])
@@ -133,9 +349,9 @@ class BlockGenerator:
     
     def _spacer(self, section: dict) -> str:
         """スペーサーブロック"""
-        height = section.get('height', '2rem')
-        return f'''<!-- wp:spacer {{"height":"{height}"}} -->
-<div style="height:{height}" aria-hidden="true" class="wp-block-spacer"></div>
+        height = str(section.get('height', '2rem'))
+        return f'''<!-- wp:spacer {block_attrs({"height": height})} -->
+<div style="height:{_html_escape(height, quote=True)}" aria-hidden="true" class="wp-block-spacer"></div>
 <!-- /wp:spacer -->'''
     
     # ========== VK Blocks コンポーネント ==========
@@ -156,13 +372,13 @@ class BlockGenerator:
         # リストアイテムを生成
         list_items = '\n'.join([
             f'''<!-- wp:list-item -->
-<li>{item}</li>
+<li>{self._text(item)}</li>
 <!-- /wp:list-item -->'''
             for item in items
         ])
         
         return f'''<!-- wp:vk-blocks/border-box {{"headingTag":"h3","includeInToc":false,"faIcon":"\\u003ci class=\\u0022fa-solid fa-circle-info\\u0022\\u003e\\u003c/i\\u003e","className":"is-style-vk_borderBox-style-solid-kado-tit-banner"}} -->
-<div class="wp-block-vk-blocks-border-box vk_borderBox vk_borderBox-background-transparent is-style-vk_borderBox-style-solid-kado-tit-banner"><div class="vk_borderBox_title_container"><i class="fa-solid fa-circle-info"></i><h3 class="vk_borderBox_title">{title}</h3></div><div class="vk_borderBox_body"><!-- wp:list -->
+<div class="wp-block-vk-blocks-border-box vk_borderBox vk_borderBox-background-transparent is-style-vk_borderBox-style-solid-kado-tit-banner"><div class="vk_borderBox_title_container"><i class="fa-solid fa-circle-info"></i><h3 class="vk_borderBox_title">{self._text(title)}</h3></div><div class="vk_borderBox_body"><!-- wp:list -->
 <ul class="wp-block-list">
 {list_items}
 </ul>
@@ -183,13 +399,13 @@ class BlockGenerator:
         
         list_items = '\n'.join([
             f'''<!-- wp:list-item -->
-<li>{item}</li>
+<li>{self._text(item)}</li>
 <!-- /wp:list-item -->'''
             for item in items
         ])
         
         return f'''<!-- wp:vk-blocks/border-box {{"headingTag":"h3","includeInToc":false,"faIcon":"\\u003ci class=\\u0022fa-solid fa-check\\u0022\\u003e\\u003c/i\\u003e","className":"is-style-vk_borderBox-style-solid-kado-tit-banner"}} -->
-<div class="wp-block-vk-blocks-border-box vk_borderBox vk_borderBox-background-transparent is-style-vk_borderBox-style-solid-kado-tit-banner"><div class="vk_borderBox_title_container"><i class="fa-solid fa-check"></i><h3 class="vk_borderBox_title">{title}</h3></div><div class="vk_borderBox_body"><!-- wp:list -->
+<div class="wp-block-vk-blocks-border-box vk_borderBox vk_borderBox-background-transparent is-style-vk_borderBox-style-solid-kado-tit-banner"><div class="vk_borderBox_title_container"><i class="fa-solid fa-check"></i><h3 class="vk_borderBox_title">{self._text(title)}</h3></div><div class="vk_borderBox_body"><!-- wp:list -->
 <ul class="wp-block-list">
 {list_items}
 </ul>
@@ -198,8 +414,8 @@ class BlockGenerator:
     
     def _box(self, section: dict) -> str:
         """汎用ボックス"""
-        title = section.get('title', '')
-        content = section.get('content', '')
+        title = self._text(section.get('title', ''))
+        content = self._text(section.get('content', ''))
         style = section.get('style', 'info')  # info, success, warning
         
         colors = {
@@ -233,20 +449,20 @@ class BlockGenerator:
         # ヘッダー行の生成
         header_html = ''
         if headers:
-            header_cells = ''.join([f'<th>{cell}</th>' for cell in headers])
+            header_cells = ''.join([f'<th>{self._text(cell)}</th>' for cell in headers])
             header_html = f'<thead><tr>{header_cells}</tr></thead>'
         
         # ボディ行の生成
         body_rows = []
         for row in rows:
-            cells = ''.join([f'<td>{cell}</td>' for cell in row])
+            cells = ''.join([f'<td>{self._text(cell)}</td>' for cell in row])
             body_rows.append(f'<tr>{cells}</tr>')
         body_html = f'<tbody>{"".join(body_rows)}</tbody>'
         
         # キャプションの生成
         caption_html = ''
         if caption:
-            caption_html = f'<figcaption class="wp-element-caption">{caption}</figcaption>'
+            caption_html = f'<figcaption class="wp-element-caption">{self._text(caption)}</figcaption>'
         
         # テーブル属性
         table_attrs = {
@@ -264,7 +480,7 @@ class BlockGenerator:
     
     def _warning_box(self, section: dict) -> str:
         """警告ボックス（VK Blocks Alert）"""
-        content = section.get('content', section.get('text', ''))
+        content = self._text(section.get('content', section.get('text', '')))
         
         return f'''<!-- wp:vk-blocks/alert {{"style":"warning","icon":"\\u003ci class=\\u0022fa-solid fa-triangle-exclamation\\u0022\\u003e\\u003c/i\\u003e","iconText":"Warning"}} -->
 <div class="wp-block-vk-blocks-alert vk_alert alert alert-warning has-alert-icon"><div class="vk_alert_icon"><div class="vk_alert_icon_icon"><i class="fa-solid fa-triangle-exclamation"></i></div><div class="vk_alert_icon_text"><span>Warning</span></div></div><div class="vk_alert_content"><!-- wp:paragraph {{"fontSize":"regular"}} -->
@@ -274,8 +490,16 @@ class BlockGenerator:
     
     def _faq(self, section: dict) -> str:
         """FAQブロック（VK Blocks FAQ2形式）"""
-        q = section.get('q', section.get('question', ''))
-        a = section.get('a', section.get('answer', ''))
+        # {"type": "faq", "items": [{"q": ..., "a": ...}]} 形式は1問ずつ展開
+        if 'items' in section:
+            return '\n\n'.join(
+                self._faq(item) for item in section.get('items') or []
+                if isinstance(item, dict)
+            )
+        
+        q = self._text(section.get('q', section.get('question', '')))
+        a = self._text(section.get('a', section.get('answer', '')))
+        self.faq_items.append((q, a))
         
         return f'''<!-- wp:vk-blocks/faq2 {{"className":"is-style-vk_faq-bgfill-rounded"}} -->
 <div class="wp-block-vk-blocks-faq2 vk_faq  [accordion_trigger_switch] is-style-vk_faq-bgfill-rounded"><div class="vk_faq-header"></div><dl class="vk_faq-body"><!-- wp:vk-blocks/faq2-q -->
@@ -291,6 +515,39 @@ class BlockGenerator:
 <!-- /wp:vk-blocks/faq2-a --></dl><div class="vk_faq-footer"></div></div>
 <!-- /wp:vk-blocks/faq2 -->'''
 
+    
+    def _related(self, section: dict) -> str:
+        """関連記事（見出し + リンクのリスト。項目は {"title", "url"}）"""
+        # 項目は構造化の外（投稿履歴・設定）から加わるため、escapeの指定に関わらずサニタイズする
+        items = [
+            (url, sanitize_inline(item.get('title') or url))
+            for item in section.get('items') or []
+            if isinstance(item, dict) and item.get('url')
+            for url in [_safe_url(str(item['url']))] if url
+        ]
+        if not items:
+            return ''
+        title = sanitize_inline(section.get('title', '関連記事'))
+        
+        list_items = '\n'.join([
+            f'''<!-- wp:list-item -->
+<li><a href="{_html_escape(url, quote=True)}">{title}</a></li>
+<!-- /wp:list-item -->'''
+            for url, title in items
+        ])
+        
+        return f'''<!-- wp:group {{"className":"related-posts","layout":{{"type":"constrained"}}}} -->
+<div class="wp-block-group related-posts"><!-- wp:heading {{"level":4}} -->
+<h4 class="wp-block-heading">{title}</h4>
+<!-- /wp:heading -->
+
+<!-- wp:list -->
+<ul class="wp-block-list">
+{list_items}
+</ul>
+<!-- /wp:list --></div>
+<!-- /wp:group -->'''
+
 
 def load_data(filepath: str) -> dict:
     """JSONまたはYAMLファイルを読み込む"""
@@ -2,17 +2,27 @@
 記事自動投稿ツール - ライブラリモジュール
 """
 from .loader import Loader, Draft
-from .structurer import Structurer
+from .structurer import Structurer, get_structurer
 from .validator import Validator, ValidationResult
-from .generator import Generator
+from .generator import Generator, get_generator
 from .publisher import Publisher, PostResult
 from .history import HistoryManager
+from .blocks import Block, parse_blocks, html_to_article
+from .sections import Article, section_from_dict
+from .archive import Archive
+from .config import Config
+from .pipeline import Pipeline, PipelineOptions, PipelineResult
 
 __all__ = [
     'Loader', 'Draft',
-    'Structurer',
+    'Structurer', 'get_structurer',
     'Validator', 'ValidationResult',
-    'Generator',
+    'Generator', 'get_generator',
     'Publisher', 'PostResult',
     'HistoryManager',
+    'Block', 'parse_blocks', 'html_to_article',
+    'Article', 'section_from_dict',
+    'Archive',
+    'Config',
+    'Pipeline', 'PipelineOptions', 'PipelineResult',
 ]
@@ -0,0 +1,121 @@
+"""
+Archive - 記事アーカイブ読込モジュール
+記事JSON・ブロックHTMLのファイル一覧だけを保持し、記事は参照した時に読み込む
+"""
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .blocks import BlockParseError, load_article_from_html
+from .sections import Article
+
+
+JSON_SUFFIXES = ('.json',)
+HTML_SUFFIXES = ('.txt', '.html')
+
+
+class ArchiveError(Exception):
+    """Archive関連のエラー"""
+    pass
+
+
+class Archive:
+    """記事アーカイブ（遅延読み込み）
+
+    archive = Archive.from_dirs(['output/json', '../block-html/posts'])
+    for article in archive:
+        ...
+
+    同じスラッグの記事JSONとブロックHTMLがある場合は記事JSONを優先する
+    """
+
+    def __init__(self, paths: Iterable[Path]):
+        """
+        Args:
+            paths: 記事ファイル（.json / .txt / .html）のパス
+        """
+        self._paths: dict[str, Path] = {}
+        for path in paths:
+            path = Path(path)
+            slug = path.stem
+            current = self._paths.get(slug)
+            if current is None or (
+                path.suffix in JSON_SUFFIXES and current.suffix not in JSON_SUFFIXES
+            ):
+                self._paths[slug] = path
+        # 直近の走査で読めずに飛ばしたファイル: (パス, 理由)
+        self.errors: list[tuple[Path, str]] = []
+
+    @classmethod
+    def from_dirs(cls, dirs: Iterable[str], pattern: str = '*') -> 'Archive':
+        """ディレクトリ内の記事ファイルを集める"""
+        paths = []
+        for directory in dirs:
+            for path in sorted(Path(directory).glob(pattern)):
+                if path.suffix in JSON_SUFFIXES + HTML_SUFFIXES and path.is_file():
+                    paths.append(path)
+        return cls(paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._paths
+
+    @property
+    def slugs(self) -> list[str]:
+        return list(self._paths)
+
+    def path(self, slug: str) -> Optional[Path]:
+        return self._paths.get(slug)
+
+    def load(self, slug: str) -> Article:
+        """
+        記事を1件読み込む
+
+        Raises:
+            ArchiveError: 存在しないスラッグ、または読み込み・解析失敗時
+        """
+        path = self._paths.get(slug)
+        if path is None:
+            raise ArchiveError(f"Article not found: {slug}")
+        data = self.load_dict(path)
+        if not isinstance(data, dict):
+            raise ArchiveError(f"Failed to parse {path}: 記事JSONがオブジェクトではありません")
+        try:
+            return Article.from_dict(data, slug=slug)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            # 壊れたセクション（levelが数値でない、itemsが配列でない等）
+            raise ArchiveError(f"Failed to parse {path}: {e}")
+
+    @staticmethod
+    def load_dict(path: Path) -> dict:
+        """ファイルを記事JSON（dict）として読み込む"""
+        try:
+            if path.suffix in JSON_SUFFIXES:
+                with open(path, encoding='utf-8') as f:
+                    return json.load(f)
+            return load_article_from_html(str(path))
+        except (OSError, json.JSONDecodeError, BlockParseError) as e:
+            raise ArchiveError(f"Failed to load {path}: {e}")
+
+    def __iter__(self) -> Iterator[Article]:
+        """記事を1件ずつ読み込んで返す（読み込めないファイルは飛ばしてerrorsに記録する）"""
+        self.errors = []
+        for slug, path in self._paths.items():
+            try:
+                article = self.load(slug)
+            except ArchiveError as e:
+                self.errors.append((path, str(e)))
+                continue
+            yield article
+
+
+if __name__ == "__main__":
+    # テスト用
+    import sys
+    archive = Archive.from_dirs(sys.argv[1:] or ['output/json'])
+    for item in archive:
+        print(f"{item.slug}: {len(item.sections)} sections")
+    for path, error in archive.errors:
+        print(f"skipped: {error}")
@@ -0,0 +1,398 @@
+"""
+Artifacts - 生成物の版管理モジュール
+構造化JSON・ブロックHTMLを内容ハッシュで圧縮保存し、スラッグごとに版の一覧を持つ
+
+同じ内容は1回だけ保存する（再生成で変わらなかったHTMLや、版をまたいで同じJSON）。
+保存した版はそのまま再投稿できるため、ロールバックは再構造化なしの更新1回で済む
+
+    output/artifacts/objects/ab/cdef….zst   内容（zstandardが無ければ .zz = zlib）
+    output/artifacts/index/{slug}.json      版の一覧
+"""
+import hashlib
+import json
+import threading
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# 圧縮形式ごとの拡張子
+ZSTD_SUFFIX = '.zst'
+ZLIB_SUFFIX = '.zz'
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+# 版の一覧の読み書きを直列にする（並行実行時に複数のArtifactStoreから更新されるため）
+_INDEX_LOCK = threading.Lock()
+
+
+class ArtifactError(Exception):
+    """Artifact関連のエラー"""
+    pass
+
+
+@dataclass
+class ArtifactVersion:
+    """スラッグの版1つ（内容はハッシュで参照する）"""
+    version: int
+    created_at: str
+    json: Optional[str]          # 構造化JSONのハッシュ
+    html: str                    # ブロックHTMLのハッシュ
+    meta: Optional[str] = None   # 追加の投稿メタ（構造化データ等）のハッシュ
+    title: str = ''
+    description: Optional[str] = None
+    source_file: str = ''
+    content_hash: Optional[str] = None  # 原稿ファイルのSHA-256（投稿履歴のcontent_hashと同じ）
+    published_at: list[str] = field(default_factory=list)  # この版を投稿した日時
+    rolled_back_at: Optional[str] = None  # ロールバックで取り下げた日時（ロールバック先の候補にしない）
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ArtifactVersion':
+        known = {key: data[key] for key in cls.__dataclass_fields__ if key in data}
+        return cls(**known)
+
+
+@dataclass
+class Artifact:
+    """版の内容"""
+    version: ArtifactVersion
+    article_json: Optional[dict]
+    html: str
+    extra_meta: Optional[dict]
+
+
+@dataclass
+class GCReport:
+    """ガベージコレクションの結果"""
+    versions_removed: int = 0
+    objects_removed: int = 0
+    bytes_freed: int = 0
+
+
+class ArtifactStore:
+    """生成物を内容アドレスで保存するクラス"""
+
+    def __init__(
+        self,
+        root: str = "output/artifacts",
+        max_versions: int = 20,
+        max_age_days: float = 90,
+        codec: Optional[str] = None
+    ):
+        """
+        Args:
+            root: 保存先ディレクトリ
+            max_versions: スラッグごとに残す版数（0なら無制限）
+            max_age_days: これより古い版は削除対象（0なら無期限）。件数・期間のどちらかに収まれば残す
+            codec: 圧縮形式（zstd / zlib）。省略時はzstandardがあればzstd
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_dir = self.root / "index"
+        self.max_versions = max_versions
+        self.max_age_days = max_age_days
+
+        if codec is None:
+            codec = 'zstd' if zstandard is not None else 'zlib'
+        if codec not in ('zstd', 'zlib'):
+            raise ArtifactError(f"Unsupported codec: {codec}")
+        if codec == 'zstd' and zstandard is None:
+            raise ArtifactError("zstandard is not installed")
+        self.codec = codec
+
+    @classmethod
+    def from_config(cls, config) -> 'ArtifactStore':
+        """config.yamlのartifactsセクションから作成"""
+        return cls(
+            root=config.get('artifacts', 'dir', default='output/artifacts'),
+            max_versions=int(config.get('artifacts', 'max_versions', default=20)),
+            max_age_days=float(config.get('artifacts', 'max_age_days', default=90)),
+            codec=config.get('artifacts', 'codec'),
+        )
+
+    # ========== 内容 ==========
+
+    def _object_path(self, digest: str, suffix: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}{suffix}"
+
+    def put(self, data: bytes) -> str:
+        """内容を保存してハッシュを返す（同じ内容は保存済みなら書かない）"""
+        digest = hashlib.sha256(data).hexdigest()
+        for suffix in (ZSTD_SUFFIX, ZLIB_SUFFIX):
+            if self._object_path(digest, suffix).exists():
+                return digest
+
+        if self.codec == 'zstd':
+            compressed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+            path = self._object_path(digest, ZSTD_SUFFIX)
+        else:
+            compressed = zlib.compress(data, ZLIB_LEVEL)
+            path = self._object_path(digest, ZLIB_SUFFIX)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(compressed)
+        tmp.replace(path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """
+        ハッシュから内容を読み出す
+
+        Raises:
+            ArtifactError: 見つからない・壊れている時
+        """
+        path = self._object_path(digest, ZSTD_SUFFIX)
+        if path.exists():
+            if zstandard is None:
+                raise ArtifactError(f"zstandard is required to read {path}")
+            data = zstandard.ZstdDecompressor().decompress(path.read_bytes())
+        else:
+            path = self._object_path(digest, ZLIB_SUFFIX)
+            if not path.exists():
+                raise ArtifactError(f"Artifact not found: {digest}")
+            data = zlib.decompress(path.read_bytes())
+
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ArtifactError(f"Artifact is corrupted: {path}")
+        return data
+
+    def _put_json(self, value) -> str:
+        return self.put(json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+    def _get_json(self, digest: str):
+        return json.loads(self.get(digest))
+
+    # ========== 版の一覧 ==========
+
+    def _index_path(self, slug: str) -> Path:
+        return self.index_dir / f"{slug}.json"
+
+    def versions(self, slug: str) -> list[ArtifactVersion]:
+        """スラッグの版（古い順）"""
+        path = self._index_path(slug)
+        if not path.exists():
+            return []
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return []
+        return [ArtifactVersion.from_dict(entry) for entry in data.get('versions', [])]
+
+    def _save_versions(self, slug: str, versions: list[ArtifactVersion]):
+        path = self._index_path(slug)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(
+            json.dumps({'slug': slug, 'versions': [asdict(v) for v in versions]}, ensure_ascii=False),
+            encoding='utf-8'
+        )
+        tmp.replace(path)
+
+    def slugs(self) -> list[str]:
+        if not self.index_dir.exists():
+            return []
+        return sorted(path.stem for path in self.index_dir.glob('*.json'))
+
+    def record(
+        self,
+        slug: str,
+        html: str,
+        article_json: Optional[dict] = None,
+        extra_meta: Optional[dict] = None,
+        title: str = '',
+        description: Optional[str] = None,
+        source_file: str = '',
+        content_hash: Optional[str] = None
+    ) -> ArtifactVersion:
+        """
+        生成物を新しい版として保存（最新版と同じ内容なら最新版を返す）
+
+        Returns:
+            ArtifactVersion: 保存した（または同じ内容の）版
+        """
+        html_digest = self.put(html.encode('utf-8'))
+        json_digest = self._put_json(article_json) if article_json is not None else None
+        meta_digest = self._put_json(extra_meta) if extra_meta else None
+
+        with _INDEX_LOCK:
+            versions = self.versions(slug)
+            latest = versions[-1] if versions else None
+            if latest is not None and (latest.html, latest.json, latest.meta, latest.title) == \
+                    (html_digest, json_digest, meta_digest, title):
+                return latest
+
+            version = ArtifactVersion(
+                version=(latest.version + 1) if latest else 1,
+                created_at=datetime.now().isoformat(),
+                json=json_digest,
+                html=html_digest,
+                meta=meta_digest,
+                title=title,
+                description=description,
+                source_file=source_file,
+                content_hash=content_hash,
+            )
+            versions.append(version)
+            self._save_versions(slug, self._prune(versions))
+            return version
+
+    def mark_published(self, slug: str, html: str):
+        """
+        投稿した版に投稿日時を記録（同じHTMLの最新の版）
+        """
+        digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        with _INDEX_LOCK:
+            versions = self.versions(slug)
+            for version in reversed(versions):
+                if version.html == digest:
+                    version.published_at.append(datetime.now().isoformat())
+                    version.rolled_back_at = None
+                    self._save_versions(slug, versions)
+                    return
+
+    def mark_rolled_back(self, slug: str, version_number: int):
+        """
+        ロールバックで取り下げた版を記録（次の引数なしのロールバックで戻らないようにする）
+        """
+        with _INDEX_LOCK:
+            versions = self.versions(slug)
+            for version in versions:
+                if version.version == version_number:
+                    version.rolled_back_at = datetime.now().isoformat()
+                    self._save_versions(slug, versions)
+                    return
+
+    def load(self, slug: str, version: Optional[int] = None) -> Artifact:
+        """
+        版の内容を読み出す
+
+        Args:
+            version: 版番号（省略時はロールバック先 = rollback_target）
+
+        Raises:
+            ArtifactError: 版が無い時
+        """
+        versions = self.versions(slug)
+        if not versions:
+            raise ArtifactError(f"No artifacts for slug: {slug}")
+        if version is None:
+            entry = rollback_target(versions)
+            if entry is None:
+                raise ArtifactError(f"No earlier version to roll back to: {slug}")
+        else:
+            entry = next((v for v in versions if v.version == version), None)
+            if entry is None:
+                raise ArtifactError(f"Version {version} not found for slug: {slug}")
+
+        return Artifact(
+            version=entry,
+            article_json=self._get_json(entry.json) if entry.json else None,
+            html=self.get(entry.html).decode('utf-8'),
+            extra_meta=self._get_json(entry.meta) if entry.meta else None,
+        )
+
+    # ========== 削除 ==========
+
+    def _prune(self, versions: list[ArtifactVersion]) -> list[ArtifactVersion]:
+        """
+        残す版を選ぶ
+
+        直近max_versions件、またはmax_age_days以内の版を残す（0の条件は使わない）。
+        最新版と、最後に投稿した版（ロールバック先の候補）は常に残す
+        """
+        if not versions or (not self.max_versions and not self.max_age_days):
+            return versions
+
+        keep = {versions[-1].version}
+        published = sorted((v for v in versions if v.published_at), key=lambda v: v.published_at[-1])
+        keep.update(v.version for v in published[-2:])
+        target = rollback_target(versions)
+        if target is not None:
+            keep.add(target.version)
+        if self.max_versions:
+            keep.update(v.version for v in versions[-self.max_versions:])
+        if self.max_age_days:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            keep.update(v.version for v in versions if v.created_at >= cutoff)
+        return [v for v in versions if v.version in keep]
+
+    def gc(self, dry_run: bool = False) -> GCReport:
+        """
+        全スラッグの古い版を削除し、どの版からも参照されない内容を消す
+        """
+        report = GCReport()
+        referenced = set()
+        with _INDEX_LOCK:
+            for slug in self.slugs():
+                versions = self.versions(slug)
+                kept = self._prune(versions)
+                report.versions_removed += len(versions) - len(kept)
+                if len(kept) != len(versions) and not dry_run:
+                    self._save_versions(slug, kept)
+                for version in kept:
+                    referenced.update(d for d in (version.json, version.html, version.meta) if d)
+
+            if not self.objects_dir.exists():
+                return report
+            for path in self.objects_dir.glob('*/*'):
+                if path.name.endswith('.tmp'):
+                    continue
+                digest = path.parent.name + path.name.split('.', 1)[0]
+                if digest in referenced:
+                    continue
+                report.objects_removed += 1
+                report.bytes_freed += path.stat().st_size
+                if not dry_run:
+                    path.unlink()
+        return report
+
+
+def live_version(versions: list[ArtifactVersion]) -> Optional[ArtifactVersion]:
+    """投稿中の版（最後に投稿した版）"""
+    published = [v for v in versions if v.published_at]
+    return max(published, key=lambda v: v.published_at[-1]) if published else None
+
+
+def rollback_target(versions: list[ArtifactVersion]) -> Optional[ArtifactVersion]:
+    """
+    版番号を省略した時のロールバック先
+
+    投稿中の版より古く、HTMLが違い、ロールバックで取り下げていない版のうち最後に投稿した版。
+    ロールバックで投稿した古い版が「最後に投稿した版」になっても、続けて実行すればさらに1つ前に戻る。
+    投稿記録が足りなければ（投稿中の版が分からなければ最新版より）1つ前の版
+    """
+    current = live_version(versions) or (versions[-1] if versions else None)
+    if current is None:
+        return None
+    older = [
+        v for v in versions
+        if v.version < current.version and v.html != current.html and not v.rolled_back_at
+    ]
+    published = [v for v in older if v.published_at]
+    if published:
+        return published[-1]
+    return older[-1] if older else None
+
+
+def format_versions(slug: str, versions: list[ArtifactVersion]) -> str:
+    """版の一覧を出力"""
+    if not versions:
+        return f"[Artifacts] {slug}: 保存された版はありません"
+    target = rollback_target(versions)
+    lines = [f"[Artifacts] {slug}: {len(versions)}版"]
+    for version in reversed(versions):
+        published = f"  投稿: {version.published_at[-1][:19]}" if version.published_at else ""
+        mark = " ← ロールバック先" if target is not None and version.version == target.version else ""
+        lines.append(
+            f"  v{version.version}  {version.created_at[:19]}  html:{version.html[:10]}{published}{mark}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,352 @@
+"""
+Blocks - ブロックHTML解析モジュール
+WordPressブロックHTMLをブロックツリーに分解し、記事JSONへ戻す
+
+block_generator.pyが出力するテンプレートを逆変換の基準とする
+"""
+import json
+import re
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+# <!-- wp:name {"attr":...} --> / <!-- /wp:name --> / <!-- wp:name /-->
+BLOCK_DELIMITER_RE = re.compile(
+    r'<!--\s+(?P<closer>/)?wp:(?P<name>[a-z][a-z0-9_-]*(?:/[a-z][a-z0-9_-]*)?)'
+    r'\s+(?:(?P<attrs>\{.*?\})\s+)?(?P<void>/)?-->',
+    re.DOTALL
+)
+
+_OUTER_TAG_RE = re.compile(r'^\s*<([a-zA-Z][a-zA-Z0-9]*)\b[^>]*>(.*)</\1>\s*$', re.DOTALL)
+_TAG_CONTENT_RE = {
+    tag: re.compile(rf'<{tag}\b[^>]*>(.*?)</{tag}>', re.DOTALL)
+    for tag in ('h3', 'li', 'th', 'td', 'tr', 'figcaption')
+}
+
+
+class BlockParseError(Exception):
+    """ブロックHTML解析関連のエラー"""
+    pass
+
+
+class Block:
+    """ブロック1つ分のノード
+
+    属性JSONは文字列のまま保持し、attrsに初めてアクセスした時にデコードする
+    """
+
+    __slots__ = ('name', 'attrs_raw', '_attrs', 'inner_blocks', 'inner_content')
+
+    def __init__(self, name: Optional[str], attrs_raw: Optional[str] = None):
+        """
+        Args:
+            name: ブロック名（例: paragraph, vk-blocks/alert）。ブロック外のHTMLはNone
+            attrs_raw: ブロックコメント内の属性JSON文字列
+        """
+        self.name = name
+        self.attrs_raw = attrs_raw
+        self._attrs = None
+        self.inner_blocks: list['Block'] = []
+        # 子ブロックの位置はNoneで表す（WordPressのinnerContentと同じ形式）
+        self.inner_content: list[Optional[str]] = []
+
+    @property
+    def attrs(self) -> dict:
+        """属性（遅延デコード）"""
+        if self._attrs is None:
+            if not self.attrs_raw:
+                self._attrs = {}
+            else:
+                try:
+                    self._attrs = json.loads(self.attrs_raw)
+                except json.JSONDecodeError as e:
+                    raise BlockParseError(f"Invalid block attributes in wp:{self.name}: {e}")
+        return self._attrs
+
+    @property
+    def inner_html(self) -> str:
+        """子ブロックを除いたブロック自身のHTML"""
+        return ''.join(part for part in self.inner_content if part is not None)
+
+    def serialize(self) -> str:
+        """ブロックコメント込みのHTMLに戻す"""
+        if self.name is None:
+            return self.inner_html
+
+        opener = f'<!-- wp:{self.name} '
+        if self.attrs_raw:
+            opener += f'{self.attrs_raw} '
+        if not self.inner_content:
+            return opener + '/-->'
+
+        children = iter(self.inner_blocks)
+        body = ''.join(
+            part if part is not None else next(children).serialize()
+            for part in self.inner_content
+        )
+        return f'{opener}-->{body}<!-- /wp:{self.name} -->'
+
+    def find_all(self, name: str) -> Iterator['Block']:
+        """子孫ブロックを名前で検索"""
+        for child in self.inner_blocks:
+            if child.name == name:
+                yield child
+            yield from child.find_all(name)
+
+    def __repr__(self) -> str:
+        return f"Block({self.name!r}, children={len(self.inner_blocks)})"
+
+
+def iter_blocks(content: str, keep_freeform: bool = False) -> Iterator[Block]:
+    """
+    ブロックHTMLを先頭から走査し、トップレベルのブロックを閉じた順に返す
+
+    Args:
+        content: ブロックHTML
+        keep_freeform: ブロック外のHTML（空白以外）もname=Noneのブロックとして返すか
+
+    Yields:
+        Block: トップレベルのブロック
+
+    Raises:
+        BlockParseError: 開始・終了コメントの対応が取れない時
+    """
+    stack: list[Block] = []
+    pos = 0
+
+    for match in BLOCK_DELIMITER_RE.finditer(content):
+        start, end = match.span()
+        text = content[pos:start]
+        pos = end
+
+        if stack:
+            if text:
+                stack[-1].inner_content.append(text)
+        elif keep_freeform and text.strip():
+            freeform = Block(None)
+            freeform.inner_content.append(text)
+            yield freeform
+
+        name = match.group('name')
+
+        if match.group('closer'):
+            if not stack or stack[-1].name != name:
+                opened = stack[-1].name if stack else None
+                raise BlockParseError(
+                    f"Unexpected closer wp:{name} at offset {start} (open: {opened})"
+                )
+            block = stack.pop()
+            if stack:
+                stack[-1].inner_blocks.append(block)
+                stack[-1].inner_content.append(None)
+            else:
+                yield block
+            continue
+
+        block = Block(name, match.group('attrs'))
+        if match.group('void'):
+            if stack:
+                stack[-1].inner_blocks.append(block)
+                stack[-1].inner_content.append(None)
+            else:
+                yield block
+        else:
+            stack.append(block)
+
+    if stack:
+        raise BlockParseError(f"Unclosed block: wp:{stack[-1].name}")
+
+    rest = content[pos:]
+    if keep_freeform and rest.strip():
+        freeform = Block(None)
+        freeform.inner_content.append(rest)
+        yield freeform
+
+
+def parse_blocks(content: str, keep_freeform: bool = False) -> list[Block]:
+    """ブロックHTMLをトップレベルブロックのリストに変換"""
+    return list(iter_blocks(content, keep_freeform=keep_freeform))
+
+
+# ========== 記事JSONへの逆変換 ==========
+
+def _unwrap(html: str) -> str:
+    """最も外側のタグを外した中身を返す"""
+    match = _OUTER_TAG_RE.match(html)
+    return match.group(2).strip() if match else html.strip()
+
+
+def _first_paragraph_text(block: Block) -> str:
+    for paragraph in block.find_all('paragraph'):
+        return _unwrap(paragraph.inner_html)
+    return ''
+
+
+def _list_items(block: Block) -> list[str]:
+    items = [_unwrap(item.inner_html) for item in block.find_all('list-item')]
+    if not items:
+        # list-itemブロック導入前（WordPress 6.0以前）の形式
+        items = [item.strip() for item in _TAG_CONTENT_RE['li'].findall(block.inner_html)]
+    return items
+
+
+def _border_box(block: Block) -> tuple[str, dict]:
+    """border-boxをpoints/summary/boxのいずれかに変換"""
+    icon = block.attrs.get('faIcon', '')
+    title_match = _TAG_CONTENT_RE['h3'].search(block.inner_html)
+    title = title_match.group(1).strip() if title_match else ''
+    items = _list_items(block)
+
+    if 'fa-circle-info' in icon:
+        return 'points', {'title': title or 'この記事のポイント', 'items': items}
+    if 'fa-check' in icon:
+        return 'summary', {'title': title or 'まとめ', 'items': items}
+    return 'section', {'type': 'box', 'title': title, 'content': '<br>'.join(items)}
+
+
+def _table(block: Block) -> dict:
+    html = block.inner_html
+    headers = [cell.strip() for cell in _TAG_CONTENT_RE['th'].findall(html)]
+    rows = []
+    for row_html in _TAG_CONTENT_RE['tr'].findall(html):
+        cells = _TAG_CONTENT_RE['td'].findall(row_html)
+        if cells:
+            rows.append([cell.strip() for cell in cells])
+
+    section = {'type': 'table', 'headers': headers, 'rows': rows}
+    caption = _TAG_CONTENT_RE['figcaption'].search(html)
+    if caption:
+        section['caption'] = caption.group(1).strip()
+    return section
+
+
+def _group(block: Block) -> Optional[dict]:
+    """汎用ボックス（見出しh4 + 段落のgroup）のみ変換し、それ以外はNone"""
+    names = [child.name for child in block.inner_blocks]
+    if names not in (['paragraph'], ['heading', 'paragraph']):
+        return None
+
+    title = ''
+    if names[0] == 'heading':
+        title = _unwrap(block.inner_blocks[0].inner_html)
+    return {'type': 'box', 'title': title, 'content': _first_paragraph_text(block)}
+
+
+def block_to_section(block: Block) -> Optional[dict]:
+    """
+    ブロック1つをsection辞書に変換
+
+    Returns:
+        dict or None: 対応するsectionがないブロック（CTAや再利用ブロック等）はNone
+    """
+    name = block.name
+
+    if name == 'heading':
+        try:
+            level = int(block.attrs.get('level', 2))
+        except (ValueError, TypeError):
+            raise BlockParseError(f"Invalid heading level: {block.attrs.get('level')!r}")
+        return {
+            'type': 'heading',
+            'level': level,
+            'text': _unwrap(block.inner_html),
+        }
+    if name == 'paragraph':
+        return {'type': 'paragraph', 'text': _unwrap(block.inner_html)}
+    if name == 'list':
+        section = {'type': 'list', 'items': _list_items(block)}
+        if block.inner_html.lstrip().startswith('<ol'):
+            section['ordered'] = True
+        return section
+    if name == 'vk-blocks/alert':
+        return {'type': 'warning', 'text': _first_paragraph_text(block)}
+    if name == 'table':
+        return _table(block)
+    if name == 'vk-blocks/faq2':
+        question = next(block.find_all('vk-blocks/faq2-q'), None)
+        answer = next(block.find_all('vk-blocks/faq2-a'), None)
+        return {
+            'type': 'faq',
+            'q': _first_paragraph_text(question) if question else '',
+            'a': _first_paragraph_text(answer) if answer else '',
+        }
+    if name == 'spacer':
+        return {'type': 'spacer', 'height': block.attrs.get('height', '2rem')}
+    if name == 'group':
+        return _group(block)
+    return None
+
+
+def blocks_to_article(blocks: list[Block]) -> dict:
+    """
+    トップレベルブロックのリストを記事JSON（BlockGeneratorの入力形式）に変換
+
+    - 最初の見出しより前の段落 → lead
+    - ポイント/まとめのborder-box → points/summary
+    - それ以外 → sections（対応しないブロックは読み飛ばす）
+
+    Args:
+        blocks: parse_blocks()の結果
+
+    Returns:
+        dict: 記事JSON
+    """
+    article = {}
+    sections = []
+
+    for block in blocks:
+        if block.name == 'vk-blocks/border-box':
+            key, value = _border_box(block)
+            if key == 'section':
+                sections.append(value)
+            else:
+                article[key] = value
+            continue
+
+        section = block_to_section(block)
+        if section is None:
+            continue
+
+        if (
+            section['type'] == 'paragraph'
+            and not sections
+            and 'lead' not in article
+            and 'points' not in article
+        ):
+            article['lead'] = section['text']
+            continue
+
+        sections.append(section)
+
+    article['sections'] = sections
+    # BlockGeneratorの出力順（lead, points, sections, summary）に揃える
+    order = ['lead', 'points', 'sections', 'summary']
+    return {key: article[key] for key in order if key in article}
+
+
+def html_to_article(content: str) -> dict:
+    """ブロックHTMLを記事JSONに変換"""
+    return blocks_to_article(parse_blocks(content))
+
+
+def load_article_from_html(file_path: str) -> dict:
+    """
+    ブロックHTMLファイルを読み込み記事JSONに変換
+
+    Raises:
+        BlockParseError: ファイルが読めない、またはブロックの対応が取れない時
+    """
+    path = Path(file_path)
+    try:
+        content = path.read_text(encoding='utf-8')
+    except Exception as e:
+        raise BlockParseError(f"Failed to read file: {e}")
+    return html_to_article(content)
+
+
+if __name__ == "__main__":
+    # テスト用
+    import sys
+    if len(sys.argv) > 1:
+        article = load_article_from_html(sys.argv[1])
+        print(json.dumps(article, ensure_ascii=False, indent=2))
@@ -0,0 +1,174 @@
+"""
+Config - 設定管理モジュール
+config.yamlを読み込み、${VAR_NAME}形式の環境変数を展開する
+"""
+import copy
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+
+# 投稿先ごとに分けるファイルの既定の置き場所（output/targets/{name}/...）
+TARGETS_DIR = "output/targets"
+
+# targetsの項目のうち、wordpressセクションではなくファイルパスの指定になるもの
+TARGET_PATH_KEYS = ('history_file', 'snapshot_dir', 'media_index_file', 'sync_state_file')
+
+
+class ConfigError(Exception):
+    """Config関連のエラー"""
+    pass
+
+
+def deep_merge(base: dict, override: dict) -> dict:
+    """dictを再帰的にマージした新しいdictを返す（overrideが優先）"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class Config:
+    """設定管理クラス"""
+    
+    def __init__(self, config_path: str = "config.yaml"):
+        self.config = self._load_config(config_path)
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Config':
+        """読み込み済みの設定から作成"""
+        config = cls.__new__(cls)
+        config.config = data
+        return config
+    
+    def overlay(self, overrides: dict) -> 'Config':
+        """一部の設定を上書きしたConfigを返す（元のConfigは変更しない）"""
+        return Config.from_dict(deep_merge(self.config or {}, overrides))
+    
+    def _load_config(self, path: str) -> dict:
+        """設定ファイル読み込み（環境変数展開対応）"""
+        config_file = Path(path)
+        if not config_file.exists():
+            # デフォルト設定
+            return {
+                'gemini': {
+                    'api_key': os.environ.get('GEMINI_API_KEY', ''),
+                    'model': 'gemini-2.0-flash',
+                    'temperature': 0.3,
+                },
+                'wordpress': {
+                    'site_url': os.environ.get('WP_SITE_URL', ''),
+                    'username': os.environ.get('WP_USERNAME', 'admin'),
+                    'app_password': os.environ.get('WP_APP_PASSWORD', ''),
+                    'default_category': 'コラム',
+                    'default_status': 'draft',
+                },
+                'output': {
+                    'save_json': True,
+                    'save_html': True,
+                    'json_dir': 'output/json',
+                    'html_dir': 'output/html',
+                },
+                'cta': {
+                    'enabled': True,
+                    'template_file': 'block-html/posts/cta.txt',
+                },
+                'prompt': {
+                    'template_file': 'docs/prompts/article_structure.md',
+                }
+            }
+        
+        with open(config_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        # 環境変数展開 ${VAR_NAME}
+        def replace_env(match):
+            var_name = match.group(1)
+            return os.environ.get(var_name, '')
+        
+        content = re.sub(r'\$\{(\w+)\}', replace_env, content)
+        return yaml.safe_load(content)
+    
+    def get(self, *keys, default=None):
+        """ネストした設定値を取得"""
+        value = self.config
+        for key in keys:
+            if isinstance(value, dict):
+                value = value.get(key)
+            else:
+                return default
+        return value if value is not None else default
+
+
+def basic_auth_from_config(config: Config) -> Optional[tuple[str, str]]:
+    """Basic認証設定（無効・未設定ならNone）"""
+    if config.get('wordpress', 'basic_auth', 'enabled'):
+        ba_user = config.get('wordpress', 'basic_auth', 'username')
+        ba_pass = config.get('wordpress', 'basic_auth', 'password')
+        if ba_user and ba_pass:
+            return (ba_user, ba_pass)
+    return None
+
+
+def target_configs(config: Config, names: Optional[list[str]] = None) -> list[tuple[str, Config]]:
+    """
+    投稿先ごとの設定
+
+    targetsの各項目はwordpressセクションを上書きする。投稿履歴・ブロック列の記録・
+    アップロード済みメディアの記録・同期状態は投稿先ごとに分ける（既定: output/targets/{name}/）。
+    targetsが無ければ設定全体を1つの投稿先（default）とする
+
+    Args:
+        names: 対象の投稿先名（省略時はすべて）
+
+    Returns:
+        list of (投稿先名, 投稿先の設定)
+
+    Raises:
+        ConfigError: targetsの記述が不正、または存在しない投稿先名の時
+    """
+    entries = config.get('targets')
+    if not entries:
+        if names and set(names) != {'default'}:
+            raise ConfigError(f"Unknown target: {', '.join(names)} (targets is not configured)")
+        return [('default', config)]
+    if not isinstance(entries, list):
+        raise ConfigError("targets must be a list")
+
+    targets = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get('name'):
+            raise ConfigError("Each target needs a name")
+        name = str(entry['name'])
+        base_dir = Path(config.get('output', 'targets_dir', default=TARGETS_DIR)) / name
+        wordpress = {
+            key: value for key, value in entry.items()
+            if key != 'name' and key not in TARGET_PATH_KEYS
+        }
+        targets.append((name, config.overlay({
+            'wordpress': wordpress,
+            'output': {
+                'history_file': entry.get('history_file', str(base_dir / 'post_history.yaml')),
+                'snapshot_dir': entry.get('snapshot_dir', str(base_dir / 'snapshots')),
+            },
+            'media': {
+                'index_file': entry.get('media_index_file', str(base_dir / 'media_index.yaml')),
+            },
+            'sync': {
+                'state_file': entry.get('sync_state_file', str(base_dir / 'sync_state.json')),
+            },
+        })))
+
+    if names:
+        known = {name for name, _ in targets}
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ConfigError(f"Unknown target: {', '.join(unknown)}")
+        targets = [(name, target) for name, target in targets if name in names]
+    return targets
@@ -0,0 +1,369 @@
+"""
+Daemon - 常駐モジュール
+原稿の投稿依頼をローカルHTTP API（TCPまたはUnixソケット）で受け付け、内部キューで順に処理する
+
+Structurer・Publisherなどを起動時に一度だけ作って使い回すため、依頼ごとの
+インタプリタ起動・設定読み込み・API接続のコストがかからない
+
+API:
+    GET  /health       稼働確認
+    POST /jobs         投稿依頼 {"file": "原稿パス"} または {"content": "原稿全文", "name": "ファイル名"}
+                       追加で {"options": {"publish": true, "dry_run": true, ...}}
+    GET  /jobs         ジョブ一覧
+    GET  /jobs/{id}    ジョブの状態・ログ
+"""
+import io
+import json
+import os
+import queue
+import re
+import socket
+import socketserver
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional
+
+
+# ジョブの状態
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# 受け付ける依頼本文の上限（原稿全文を含むため余裕を持たせる）
+MAX_REQUEST_BYTES = 10 * 1024 * 1024
+
+_SAFE_NAME_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+class DaemonError(Exception):
+    """Daemon関連のエラー"""
+    pass
+
+
+@dataclass
+class Job:
+    """投稿依頼1件"""
+    id: str
+    file: str
+    options: dict = field(default_factory=dict)
+    state: str = QUEUED
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    ok: Optional[bool] = None
+    error: Optional[str] = None
+    spool: bool = False     # fileは依頼の原稿全文を保存したもの（処理後に削除する）
+    log: io.StringIO = field(default_factory=io.StringIO, repr=False)
+    _log_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def write_log(self, message: str):
+        """ジョブのログに1行追加（処理中もGET /jobs/{id}で読めるようロックして書く）"""
+        with self._log_lock:
+            self.log.write(message + "\n")
+
+    def log_text(self) -> str:
+        with self._log_lock:
+            return self.log.getvalue()
+
+    def to_dict(self, with_log: bool = False) -> dict:
+        data = {
+            'id': self.id,
+            'file': self.file,
+            'options': self.options,
+            'state': self.state,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'ok': self.ok,
+            'error': self.error,
+        }
+        if with_log:
+            data['log'] = self.log_text()
+        return data
+
+
+class JobQueue:
+    """投稿依頼のキュー
+
+    1つのワーカースレッドが順に処理する（投稿履歴などのファイル更新を直列にするため）。
+    完了したジョブは新しいものからmax_finished件まで保持する。原稿全文で依頼されたジョブの
+    原稿ファイル（spool）は処理が終わったら削除する
+    """
+
+    def __init__(self, handler: Callable[[Job], bool], max_finished: int = 200):
+        """
+        Args:
+            handler: ジョブを処理する関数（成功ならTrue）。進捗はjob.write_logでジョブのログに書く
+                     （標準出力はHTTPのスレッドと共有のため、ジョブのログにはしない）
+            max_finished: 保持する完了ジョブ数
+        """
+        self.handler = handler
+        self.max_finished = max_finished
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self, file: str, options: Optional[dict] = None, spool: bool = False) -> Job:
+        job = Job(id=uuid.uuid4().hex[:12], file=file, options=options or {}, spool=spool)
+        with self._lock:
+            self.jobs[job.id] = job
+        self._queue.put(job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        with self._lock:
+            return list(self.jobs.values())
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='job-worker', daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+        # 処理されずに残ったジョブのspoolを消す
+        for job in self.list():
+            if job.state == QUEUED:
+                self._remove_spool(job)
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            job = self.get(job_id)
+            if job is None:
+                continue
+
+            job.state = RUNNING
+            job.started_at = datetime.now().isoformat()
+            try:
+                job.ok = bool(self.handler(job))
+            except Exception as e:
+                job.ok = False
+                job.error = f"{type(e).__name__}: {e}"
+            finally:
+                self._remove_spool(job)
+            job.state = DONE if job.ok else FAILED
+            job.finished_at = datetime.now().isoformat()
+            print(f"[{job.finished_at}] {job.id} {job.state}: {job.file}")
+            self._prune()
+
+    @staticmethod
+    def _remove_spool(job: Job):
+        if job.spool:
+            try:
+                Path(job.file).unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def _prune(self):
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.state in (DONE, FAILED)]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self.jobs[job_id]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON APIのリクエストハンドラ（server.daemonからDaemonを参照する）"""
+
+    server_version = "MiyabiDaemon/1.0"
+
+    def address_string(self) -> str:
+        # Unixソケットではclient_addressが空文字列になる
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.daemon.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _authorized(self) -> bool:
+        token = self.server.daemon.token
+        if token and self.headers.get('X-Miyabi-Token') != token:
+            self._send(401, {'error': 'unauthorized'})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        daemon: Daemon = self.server.daemon
+        path = self.path.split('?', 1)[0].rstrip('/')
+
+        if path == '/health':
+            self._send(200, {'status': 'ok', 'pending': daemon.jobs.pending()})
+        elif path == '/jobs':
+            self._send(200, {'jobs': [job.to_dict() for job in daemon.jobs.list()]})
+        elif path.startswith('/jobs/'):
+            job = daemon.jobs.get(path[len('/jobs/'):])
+            if job is None:
+                self._send(404, {'error': 'job not found'})
+            else:
+                self._send(200, job.to_dict(with_log=True))
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path.split('?', 1)[0].rstrip('/') != '/jobs':
+            self._send(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            self._send(413 if length > 0 else 400, {'error': 'invalid request size'})
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+            if not isinstance(body, dict):
+                raise ValueError("request body must be an object")
+            job = self.server.daemon.submit(body)
+        except (ValueError, DaemonError) as e:
+            self._send(400, {'error': str(e)})
+            return
+        self._send(202, job.to_dict())
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Daemon:
+    """投稿依頼を受け付けるHTTPサーバー
+
+    daemon = Daemon(handler, host='127.0.0.1', port=8765)
+    daemon.serve_forever()
+    """
+
+    # 依頼で指定できるオプション（CLIの同名フラグに対応）
+    ALLOWED_OPTIONS = ('publish', 'dry_run', 'no_cta', 'skip_validation', 'skip_link_check',
+                       'force_new', 'full_update')
+
+    def __init__(
+        self,
+        handler: Callable[[Job], bool],
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        socket_path: Optional[str] = None,
+        spool_dir: str = "output/spool",
+        token: Optional[str] = None,
+        verbose: bool = False
+    ):
+        """
+        Args:
+            handler: ジョブを処理する関数
+            host, port: 待ち受けるアドレス（socket_path指定時は無視）
+            socket_path: Unixソケットのパス
+            spool_dir: 原稿全文で依頼された時の保存先
+            token: 指定時はX-Miyabi-Tokenヘッダーが一致する依頼のみ受け付ける
+            verbose: アクセスログを表示する
+        """
+        self.jobs = JobQueue(handler)
+        self.spool_dir = Path(spool_dir)
+        self.token = token
+        self.verbose = verbose
+        self.socket_path = socket_path
+
+        if socket_path:
+            if not hasattr(socket, 'AF_UNIX'):
+                raise DaemonError("Unix sockets are not supported on this platform")
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.server = _UnixHTTPServer(socket_path, _Handler)
+        else:
+            self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon = self
+
+    @property
+    def address(self) -> str:
+        if self.socket_path:
+            return f"unix:{self.socket_path}"
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def submit(self, body: dict) -> Job:
+        """
+        依頼内容を検証してキューに積む
+
+        Raises:
+            DaemonError: 依頼内容が不正な時
+        """
+        options = body.get('options') or {}
+        if not isinstance(options, dict):
+            raise DaemonError("options must be an object")
+        unknown = set(options) - set(self.ALLOWED_OPTIONS)
+        if unknown:
+            raise DaemonError(f"Unknown options: {', '.join(sorted(unknown))}")
+
+        if body.get('content'):
+            name = _SAFE_NAME_RE.sub('-', Path(str(body.get('name') or 'draft.md')).name)
+            if not name.endswith('.md'):
+                name += '.md'
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            path = self.spool_dir / f"{uuid.uuid4().hex[:8]}-{name}"
+            path.write_text(str(body['content']), encoding='utf-8')
+            file = str(path)
+            spool = True
+        elif body.get('file'):
+            file = str(body['file'])
+            if not Path(file).is_file():
+                raise DaemonError(f"File not found: {file}")
+            spool = False
+        else:
+            raise DaemonError("file or content is required")
+
+        return self.jobs.submit(file, {key: bool(value) for key, value in options.items()}, spool=spool)
+
+    def serve_forever(self):
+        self.jobs.start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """待ち受けを止め、処理中のジョブが終わるのを待つ"""
+        self.server.server_close()
+        self.jobs.stop()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+if __name__ == "__main__":
+    # テスト用: 依頼を受け付けてファイル名を表示するだけのサーバー
+    def echo(job: Job) -> bool:
+        job.write_log(f"received: {job.file} {job.options}")
+        return True
+
+    server = Daemon(echo, verbose=True)
+    print(f"Listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,245 @@
+"""
+Diff - ブロック単位の差分モジュール
+前回投稿時のブロック列をスラッグごとに保存し、新しいHTMLとブロック単位で比較する
+
+差分が無ければ更新リクエストを省略し、メタ情報だけの変更なら本文を送らずに更新する
+"""
+import difflib
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .blocks import BlockParseError, parse_blocks
+
+
+# 本文以外に比較するリクエストフィールド
+META_FIELDS = ('title', 'status', 'meta', 'featured_media', 'date', 'date_gmt')
+
+# プレビューで1ブロックあたりに表示する差分行数
+PREVIEW_LINES = 12
+
+_BLOCK_NAME_RE = re.compile(r'^<!--\s+wp:([a-z][a-z0-9_/-]*)')
+
+
+def split_blocks(content: str) -> list[str]:
+    """
+    ブロックHTMLをトップレベルブロックごとのHTMLに分割
+
+    ブロック間の空白は比較対象にしない。解析できないHTMLは全体を1ブロックとして扱う
+    """
+    try:
+        return [block.serialize() for block in parse_blocks(content, keep_freeform=True)]
+    except BlockParseError:
+        return [content]
+
+
+def _block_hash(block_html: str) -> str:
+    return hashlib.sha1(block_html.encode('utf-8')).hexdigest()
+
+
+def block_name(block_html: Optional[str]) -> str:
+    """ブロックHTMLのブロック名（ブロック外のHTMLは"html"）"""
+    match = _BLOCK_NAME_RE.match(block_html or '')
+    return f"wp:{match.group(1)}" if match else 'html'
+
+
+@dataclass
+class BlockChange:
+    """ブロック1つ分の変更"""
+    op: str  # changed / added / removed
+    old_index: Optional[int]
+    new_index: Optional[int]
+    old: Optional[str] = None
+    new: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return block_name(self.new if self.new is not None else self.old)
+
+
+@dataclass
+class ContentDiff:
+    """前回投稿時との差分"""
+    blocks: list[BlockChange] = field(default_factory=list)
+    fields: list[str] = field(default_factory=list)  # 変更されたメタ情報のフィールド
+    has_snapshot: bool = True
+    block_count: int = 0  # 新しいブロック数
+
+    @property
+    def empty(self) -> bool:
+        """変更なし（前回の記録が無い場合は変更ありとみなす）"""
+        return self.has_snapshot and not self.blocks and not self.fields
+
+    @property
+    def content_changed(self) -> bool:
+        return not self.has_snapshot or bool(self.blocks)
+
+    @property
+    def metadata_only(self) -> bool:
+        """本文は同じでメタ情報だけ変わった"""
+        return self.has_snapshot and not self.blocks and bool(self.fields)
+
+
+def diff_blocks(old: list[str], new: list[str]) -> list[BlockChange]:
+    """
+    ブロック列を比較し、変更・追加・削除されたブロックを返す
+
+    ブロックHTMLのハッシュ列をSequenceMatcherで対応付け、置き換え範囲は
+    先頭から順に「変更」、余りを「追加」「削除」とする
+    """
+    matcher = difflib.SequenceMatcher(
+        None, [_block_hash(b) for b in old], [_block_hash(b) for b in new], autojunk=False
+    )
+    changes = []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == 'equal':
+            continue
+        paired = min(i2 - i1, j2 - j1) if op == 'replace' else 0
+        for k in range(paired):
+            changes.append(BlockChange('changed', i1 + k, j1 + k, old[i1 + k], new[j1 + k]))
+        for i in range(i1 + paired, i2):
+            changes.append(BlockChange('removed', i, None, old=old[i]))
+        for j in range(j1 + paired, j2):
+            changes.append(BlockChange('added', None, j, new=new[j]))
+    return changes
+
+
+def _normalize(value):
+    """比較用に正規化（dictのキー順・数値と文字列の違いを無視）"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+class SnapshotStore:
+    """投稿時のブロック列をスラッグごとに保存するクラス
+
+    output/snapshots/{slug}.json に
+    {"saved_at": ..., "fields": {title, status, meta, ...}, "blocks": [ブロックHTML, ...]}
+    の形で保存する
+    """
+
+    def __init__(self, snapshot_dir: str = "output/snapshots"):
+        self.snapshot_dir = Path(snapshot_dir)
+
+    def _path(self, slug: str) -> Path:
+        return self.snapshot_dir / f"{slug}.json"
+
+    def load(self, slug: str) -> Optional[dict]:
+        path = self._path(slug)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save(self, slug: str, data: dict):
+        """
+        投稿したリクエストボディを記録
+
+        Args:
+            data: 投稿・更新リクエストのボディ。contentが無ければ前回のブロック列を引き継ぐ
+        """
+        if 'content' in data:
+            blocks = split_blocks(data['content'])
+        else:
+            blocks = (self.load(slug) or {}).get('blocks', [])
+
+        snapshot = {
+            'saved_at': datetime.now().isoformat(),
+            'fields': {key: data[key] for key in META_FIELDS if key in data},
+            'blocks': blocks,
+        }
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(slug)
+            tmp = path.with_suffix('.json.tmp')
+            tmp.write_text(json.dumps(snapshot, ensure_ascii=False, indent=1), encoding='utf-8')
+            tmp.replace(path)
+        except OSError as e:
+            # 記録の失敗は警告のみ（次回は全文を送る）
+            print(f"Warning: Failed to save block snapshot: {e}")
+
+    def diff(self, slug: str, data: dict) -> ContentDiff:
+        """
+        前回投稿時と、これから送るリクエストボディを比較
+
+        Args:
+            data: 更新リクエストのボディ（build_update_dataの結果）
+        """
+        new_blocks = split_blocks(data.get('content', ''))
+        snapshot = self.load(slug)
+        if snapshot is None:
+            return ContentDiff(has_snapshot=False, block_count=len(new_blocks))
+
+        old_fields = snapshot.get('fields', {})
+        changed_fields = [
+            key for key in META_FIELDS
+            if key in data and _normalize(data[key]) != _normalize(old_fields.get(key))
+        ]
+        return ContentDiff(
+            blocks=diff_blocks(snapshot.get('blocks', []), new_blocks),
+            fields=changed_fields,
+            block_count=len(new_blocks),
+        )
+
+
+_OP_MARKS = {'changed': '~', 'added': '+', 'removed': '-'}
+
+
+def format_diff(diff: ContentDiff, verbose: bool = False) -> str:
+    """
+    差分をレポート形式で出力
+
+    Args:
+        verbose: 変更されたブロックの行差分も表示する
+    """
+    if not diff.has_snapshot:
+        return f"[Diff] 前回投稿時の記録がありません（全{diff.block_count}ブロックを送信）"
+    if diff.empty:
+        return "[Diff] 前回投稿時から変更はありません"
+
+    counts = {op: sum(1 for change in diff.blocks if change.op == op) for op in _OP_MARKS}
+    lines = [
+        f"[Diff] ブロック {counts['changed']}件変更 / {counts['added']}件追加 / "
+        f"{counts['removed']}件削除（全{diff.block_count}ブロック）"
+    ]
+    if diff.fields:
+        lines.append(f"  メタ情報: {', '.join(diff.fields)}")
+
+    for change in diff.blocks:
+        index = change.new_index if change.new_index is not None else change.old_index
+        lines.append(f"  {_OP_MARKS[change.op]} #{index + 1} {change.name}")
+        if not verbose:
+            continue
+
+        diff_lines = [
+            line for line in difflib.unified_diff(
+                (change.old or '').splitlines(), (change.new or '').splitlines(),
+                lineterm='', n=0
+            )
+            if not line.startswith(('---', '+++', '@@'))
+        ]
+        for line in diff_lines[:PREVIEW_LINES]:
+            lines.append(f"      {line}")
+        if len(diff_lines) > PREVIEW_LINES:
+            lines.append(f"      …他{len(diff_lines) - PREVIEW_LINES}行")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # テスト用: 2つのブロックHTMLファイルを比較
+    import sys
+    if len(sys.argv) > 2:
+        old_html = Path(sys.argv[1]).read_text(encoding='utf-8')
+        new_html = Path(sys.argv[2]).read_text(encoding='utf-8')
+        new_blocks = split_blocks(new_html)
+        result = ContentDiff(
+            blocks=diff_blocks(split_blocks(old_html), new_blocks),
+            block_count=len(new_blocks),
+        )
+        print(format_diff(result, verbose=True))
@@ -4,7 +4,14 @@ JSONからWordPressブロックHTMLを生成
 
 block_generator.pyの正しいテンプレートを使用
 """
+import hashlib
+import html as _html
+import json
+import re
 import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
@@ -14,7 +21,18 @@ if str(TOOLS_DIR) not in sys.path:
     sys.path.insert(0, str(TOOLS_DIR))
 
 # block_generator.pyのBlockGeneratorをインポートして使用
-from block_generator import BlockGenerator as _BlockGenerator
+from block_generator import BlockGenerator as _BlockGenerator, sanitize_article
+
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+@dataclass
+class RenderResult:
+    """HTML生成結果"""
+    html: str
+    json_ld: Optional[str]  # <script type="application/ld+json">の中身（JSON文字列）
+    cache_hit: bool = False
 
 
 class GeneratorError(Exception):
@@ -22,26 +40,62 @@ class GeneratorError(Exception):
     pass
 
 
+def _plain_text(value: str) -> str:
+    """構造化データ用にタグを除去し、文字参照を戻す（戻した < > & は_script_jsonでエスケープする）"""
+    return _html.unescape(_TAG_RE.sub('', value or '')).strip()
+
+
+def _script_json(data: dict) -> str:
+    """
+    <script type="application/ld+json">に埋め込むJSONを生成
+
+    json.dumpsは < > & をエスケープしないため、本文中の "</script>" でスクリプトが閉じないよう
+    block_attrsと同じく \\u003c \\u003e \\u0026 にする（JSONとしては同じ文字列）
+    """
+    encoded = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return encoded.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+
+
+def _read_cta_template(cta_template_path: Optional[str]) -> Optional[str]:
+    """CTAテンプレートを読み込む（ファイルが無ければNone）"""
+    if cta_template_path and Path(cta_template_path).exists():
+        return Path(cta_template_path).read_text(encoding='utf-8')
+    return None
+
+
 class Generator:
     """JSONからWordPressブロックHTMLを生成するクラス
     
     block_generator.pyのBlockGeneratorをラップして使用
     """
     
-    def __init__(self, cta_template_path: Optional[str] = None):
+    # render()結果のキャッシュ件数
+    RENDER_CACHE_SIZE = 256
+    
+    def __init__(
+        self,
+        cta_template_path: Optional[str] = None,
+        organization_id: Optional[str] = None
+    ):
         """
         Args:
             cta_template_path: CTAテンプレートファイルパス
+            organization_id: 構造化データのauthor/publisherに使う組織の@id
         """
         self._generator = _BlockGenerator()
-        self.cta_template = None
-        if cta_template_path and Path(cta_template_path).exists():
-            self.cta_template = Path(cta_template_path).read_text(encoding='utf-8')
+        # sanitize_article済みの記事JSON用（本文をもう一度サニタイズしない）
+        self._sanitized_generator = _BlockGenerator(escape=False)
+        self.cta_template = _read_cta_template(cta_template_path)
+        self.organization_id = organization_id
+        self._render_cache = OrderedDict()
+        # BlockGeneratorは生成中のFAQを持つため、共有したインスタンスでは生成を直列にする
+        self._lock = threading.Lock()
     
     def generate(
         self,
         article_json: dict,
-        include_cta: bool = True
+        include_cta: bool = True,
+        sanitized: bool = False
     ) -> str:
         """
         JSONからブロックHTMLを生成
@@ -49,18 +103,161 @@ class Generator:
         Args:
             article_json: 構造化された記事JSON
             include_cta: CTAを追加するか
+            sanitized: article_jsonがsanitize_article済みか
             
         Returns:
             str: WordPress用ブロックHTML
         """
         # block_generator.pyのgenerateメソッドを使用
-        html = self._generator.generate(article_json)
+        html = self._block_generator(sanitized).generate(article_json)
         
         # CTA追加
         if include_cta and self.cta_template:
             html = html + "\n\n" + self.cta_template
         
         return html
+    
+    def _block_generator(self, sanitized: bool) -> _BlockGenerator:
+        return self._sanitized_generator if sanitized else self._generator
+    
+    def render(
+        self,
+        article_json: dict,
+        include_cta: bool = True,
+        title: str = "",
+        description: str = "",
+        url: str = "",
+        keywords: Optional[list[str]] = None,
+        sanitized: bool = False
+    ) -> RenderResult:
+        """
+        ブロックHTMLとJSON-LD（Article / FAQPage）を1回の生成で作成
+        
+        FAQはHTML生成中に集めたものを使うため、記事JSONを二度走査しない。
+        同じ記事JSON・メタ情報の結果はハッシュをキーにキャッシュする
+        
+        Args:
+            article_json: 構造化された記事JSON
+            include_cta: CTAを追加するか
+            title: 記事タイトル（Article.headline）
+            description: メタディスクリプション（省略時はlead）
+            url: 記事URL（mainEntityOfPage）
+            keywords: タグ
+            sanitized: article_jsonがsanitize_article済みか（構造化時にサニタイズした記事JSON）
+            
+        Returns:
+            RenderResult: HTMLとJSON-LD
+        """
+        key = hashlib.sha256(json.dumps(
+            [article_json, include_cta, title, description, url, keywords, sanitized],
+            ensure_ascii=False,
+            sort_keys=True
+        ).encode('utf-8')).hexdigest()
+        
+        with self._lock:
+            cached = self._render_cache.get(key)
+            if cached is not None:
+                self._render_cache.move_to_end(key)
+                return RenderResult(html=cached.html, json_ld=cached.json_ld, cache_hit=True)
+            
+            html = self.generate(article_json, include_cta=include_cta, sanitized=sanitized)
+            json_ld = self._build_json_ld(
+                article_json,
+                self._block_generator(sanitized).faq_items,
+                title=title,
+                description=description,
+                url=url,
+                keywords=keywords
+            )
+            
+            result = RenderResult(html=html, json_ld=json_ld)
+            self._render_cache[key] = result
+            if len(self._render_cache) > self.RENDER_CACHE_SIZE:
+                self._render_cache.popitem(last=False)
+            return result
+    
+    def _build_json_ld(
+        self,
+        article_json: dict,
+        faq_items: list[tuple[str, str]],
+        title: str,
+        description: str,
+        url: str,
+        keywords: Optional[list[str]]
+    ) -> Optional[str]:
+        """Article / FAQPage のJSON-LDを組み立てる"""
+        graph = []
+        
+        if title:
+            article = {
+                "@type": "Article",
+                "headline": _plain_text(title),
+                "description": _plain_text(description or article_json.get('lead', '')),
+                "inLanguage": "ja",
+            }
+            summary = article_json.get('summary')
+            if isinstance(summary, dict) and summary.get('items'):
+                article["abstract"] = " ".join(_plain_text(item) for item in summary['items'])
+            if keywords:
+                article["keywords"] = ", ".join(keywords)
+            if url:
+                article["mainEntityOfPage"] = {"@type": "WebPage", "@id": url}
+            if self.organization_id:
+                article["author"] = {"@id": self.organization_id}
+                article["publisher"] = {"@id": self.organization_id}
+            graph.append(article)
+        
+        if faq_items:
+            graph.append({
+                "@type": "FAQPage",
+                "mainEntity": [
+                    {
+                        "@type": "Question",
+                        "name": _plain_text(question),
+                        "acceptedAnswer": {"@type": "Answer", "text": _plain_text(answer)},
+                    }
+                    for question, answer in faq_items
+                    if question and answer
+                ],
+            })
+        
+        if not graph:
+            return None
+        return _script_json({"@context": "https://schema.org", "@graph": graph})
+
+
+
+# ========== プロセス内レジストリ ==========
+
+_registry: dict[tuple, Generator] = {}
+_registry_lock = threading.Lock()
+
+
+def get_generator(
+    cta_template_path: Optional[str] = None,
+    organization_id: Optional[str] = None
+) -> Generator:
+    """
+    同じ設定のGeneratorをプロセス内で使い回す
+
+    render()のキャッシュを記事をまたいで効かせるため。CTAテンプレートが更新された場合は
+    内容ハッシュが変わるため新しいGeneratorを作る
+    """
+    cta_template = _read_cta_template(cta_template_path)
+    cta_hash = hashlib.sha256(cta_template.encode('utf-8')).hexdigest() if cta_template else None
+    key = (cta_template_path, cta_hash, organization_id)
+    with _registry_lock:
+        generator = _registry.get(key)
+        if generator is None:
+            generator = Generator(cta_template_path=cta_template_path, organization_id=organization_id)
+            _registry[key] = generator
+        return generator
+
+
+def clear_generators():
+    """レジストリを空にする（設定を読み直す時など）"""
+    with _registry_lock:
+        _registry.clear()
 
 
 if __name__ == "__main__":
@@ -83,5 +280,6 @@ if __name__ == "__main__":
     }
     
     generator = Generator()
-    html = generator.generate(test_json, include_cta=False)
-    print(html)
+    rendered = generator.render(test_json, include_cta=False, title="テスト記事")
+    print(rendered.html)
+    print(rendered.json_ld)
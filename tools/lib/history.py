@@ -1,14 +1,24 @@
 """
 History - 投稿履歴管理モジュール
 slug → post_id のマッピングを管理
+
+--syncでWordPressと照合したエントリには、サイト上のステータス・最終更新日時も記録する
 """
 import yaml
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 
+# 同期でサイト上に無いと分かった投稿のステータス
+STATUS_MISSING = 'missing'
+
+# 更新せずに新規作成するべき投稿のステータス（ゴミ箱・削除済み）
+GONE_STATUSES = ('trash', STATUS_MISSING)
+
+
 @dataclass
 class PostHistory:
     """投稿履歴エントリ"""
@@ -30,6 +40,7 @@ class HistoryManager:
         """
         self.history_file = Path(history_file)
         self.history = self._load()
+        self._defer_save = False
     
     def _load(self) -> dict:
         """履歴ファイルを読み込む"""
@@ -43,6 +54,8 @@ class HistoryManager:
     
     def _save(self):
         """履歴ファイルを保存"""
+        if self._defer_save:
+            return
         try:
             self.history_file.parent.mkdir(parents=True, exist_ok=True)
             with open(self.history_file, 'w', encoding='utf-8') as f:
@@ -57,6 +70,19 @@ class HistoryManager:
             # 履歴保存失敗は警告のみ
             print(f"Warning: Failed to save history: {e}")
     
+    @contextmanager
+    def deferred_save(self):
+        """
+        ブロック内の保存をまとめ、抜ける時に1回だけ書き込む
+        （一括インポートなど大量更新時に使用）
+        """
+        self._defer_save = True
+        try:
+            yield self
+        finally:
+            self._defer_save = False
+            self._save()
+    
     def find_by_slug(self, slug: str) -> Optional[int]:
         """
         slugからpost_idを検索
@@ -72,6 +98,23 @@ class HistoryManager:
             return entry.get('post_id')
         return None
     
+    def remote_status(self, slug: str) -> Optional[str]:
+        """
+        最後に同期した時のサイト上のステータス（未同期ならNone）
+        """
+        entry = self.history.get(slug)
+        if entry and isinstance(entry, dict):
+            return entry.get('status')
+        return None
+    
+    def find_live(self, slug: str) -> Optional[int]:
+        """
+        slugからpost_idを検索（同期でゴミ箱・削除済みと分かった投稿は除く）
+        """
+        if self.remote_status(slug) in GONE_STATUSES:
+            return None
+        return self.find_by_slug(slug)
+    
     def get_entry(self, slug: str) -> Optional[PostHistory]:
         """
         slugから履歴エントリを取得
@@ -99,7 +142,8 @@ class HistoryManager:
         slug: str,
         post_id: int,
         title: str,
-        source_file: str
+        source_file: str,
+        content_hash: Optional[str] = None
     ):
         """
         新規作成の履歴を保存
@@ -109,6 +153,7 @@ class HistoryManager:
             post_id: 投稿ID
             title: 記事タイトル
             source_file: 原稿ファイルパス
+            content_hash: 投稿時の原稿ファイルのSHA-256
         """
         now = datetime.now().isoformat()
         
@@ -120,16 +165,55 @@ class HistoryManager:
             'versions': 1,
             'source_file': source_file
         }
+        if content_hash:
+            self.history[slug]['content_hash'] = content_hash
+        
+        self._save()
+    
+    def save_imported(
+        self,
+        slug: str,
+        post_id: int,
+        title: str,
+        created_at: Optional[str] = None,
+        source_file: str = ''
+    ) -> bool:
+        """
+        インポートした投稿を履歴に登録（既存エントリは上書きしない）
+        
+        Args:
+            slug: URLスラッグ
+            post_id: 投稿ID
+            title: 記事タイトル
+            created_at: 投稿日時
+            source_file: 取り込み元ファイルパス
+            
+        Returns:
+            bool: 新たに登録した場合はTrue
+        """
+        if slug in self.history:
+            return False
+        
+        self.history[slug] = {
+            'post_id': post_id,
+            'title': title,
+            'created_at': created_at or datetime.now().isoformat(),
+            'updated_at': None,
+            'versions': 1,
+            'source_file': source_file
+        }
         
         self._save()
+        return True
     
-    def save_updated(self, slug: str, title: str = None):
+    def save_updated(self, slug: str, title: str = None, content_hash: Optional[str] = None):
         """
         更新の履歴を保存
         
         Args:
             slug: URLスラッグ
             title: 新しいタイトル（変更がある場合）
+            content_hash: 投稿時の原稿ファイルのSHA-256
         """
         if slug not in self.history:
             return
@@ -141,8 +225,43 @@ class HistoryManager:
         
         if title:
             self.history[slug]['title'] = title
+        if content_hash:
+            self.history[slug]['content_hash'] = content_hash
+        
+        self._save()
+    
+    def save_synced(
+        self,
+        slug: str,
+        post_id: int,
+        status: str,
+        modified: Optional[str] = None
+    ) -> bool:
+        """
+        サイトと照合した結果を記録（エントリが無ければ何もしない）
+        
+        Args:
+            slug: URLスラッグ（履歴のキー）
+            post_id: サイト上の投稿ID
+            status: サイト上のステータス（削除済みならSTATUS_MISSING）
+            modified: サイト上の最終更新日時
+            
+        Returns:
+            bool: post_id・ステータス・最終更新日時のいずれかが変わった場合はTrue
+        """
+        entry = self.history.get(slug)
+        if not isinstance(entry, dict):
+            return False
+        
+        synced = {'post_id': post_id, 'status': status}
+        if modified is not None:
+            synced['modified'] = modified
+        changed = any(entry.get(key) != value for key, value in synced.items())
         
+        entry.update(synced)
+        entry['synced_at'] = datetime.now().isoformat()
         self._save()
+        return changed
     
     def list_all(self) -> list[tuple[str, PostHistory]]:
         """
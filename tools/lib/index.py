@@ -0,0 +1,361 @@
+"""
+Index - 原稿インデックスモジュール
+原稿のフロントマター・内容ハッシュと投稿履歴をSQLiteにまとめ、状態を検索する
+
+ファイルの(mtime, サイズ)が変わった原稿だけを読み直すため、2回目以降の更新は
+ディレクトリの走査（stat）のみで済む
+"""
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .history import HistoryManager
+from .loader import Loader, LoaderError
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    path TEXT PRIMARY KEY,
+    slug TEXT,
+    title TEXT,
+    status TEXT,
+    category TEXT,
+    scheduled_at TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    error TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_slug ON drafts (slug);
+
+CREATE TABLE IF NOT EXISTS history (
+    slug TEXT PRIMARY KEY,
+    post_id INTEGER,
+    title TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    versions INTEGER,
+    source_file TEXT,
+    source_path TEXT,
+    content_hash TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def file_sha256(path) -> str:
+    """ファイル内容のSHA-256（履歴のcontent_hashと同じ方法）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _resolve(path: str) -> str:
+    return str(Path(path).resolve()) if path else ''
+
+
+@dataclass
+class DraftStatus:
+    """インデックス上の原稿1件"""
+    path: str
+    slug: Optional[str]
+    title: Optional[str]
+    status: Optional[str]
+    post_id: Optional[int] = None
+    published_at: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class RefreshStats:
+    """refresh()の結果"""
+    scanned: int = 0
+    updated: int = 0
+    removed: int = 0
+    history_reloaded: bool = False
+
+
+class DraftIndex:
+    """原稿・投稿履歴のインデックス
+
+    index = DraftIndex("output/draft_index.sqlite3")
+    index.refresh("../drafts", history)
+    index.unpublished()
+    """
+
+    def __init__(self, index_file: str = "output/draft_index.sqlite3", loader: Optional[Loader] = None):
+        """
+        Args:
+            index_file: SQLiteファイルパス（":memory:"も可）
+            loader: フロントマター読み込みに使うLoader
+        """
+        self.index_file = index_file
+        if index_file != ':memory:':
+            Path(index_file).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(index_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        self.loader = loader or Loader()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'DraftIndex':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ========== 更新 ==========
+
+    def refresh(
+        self,
+        drafts_dir: str,
+        history: Optional[HistoryManager] = None,
+        pattern: str = '**/*.md'
+    ) -> RefreshStats:
+        """
+        原稿フォルダと投稿履歴の変更をインデックスに反映
+
+        Args:
+            drafts_dir: 原稿フォルダ
+            history: 投稿履歴（Noneなら履歴は更新しない）
+            pattern: 原稿ファイルのglobパターン
+        """
+        stats = RefreshStats()
+        known = {
+            row['path']: (row['mtime_ns'], row['size'])
+            for row in self.conn.execute("SELECT path, mtime_ns, size FROM drafts")
+        }
+        seen = set()
+        now = datetime.now().isoformat()
+
+        with self.conn:
+            for path in Path(drafts_dir).glob(pattern):
+                if not path.is_file():
+                    continue
+                key = str(path.resolve())
+                seen.add(key)
+                stats.scanned += 1
+
+                stat = path.stat()
+                if known.get(key) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+
+                self._index_draft(key, stat, now)
+                stats.updated += 1
+
+            removed = [path for path in known if path not in seen and path.startswith(_resolve(drafts_dir))]
+            self.conn.executemany("DELETE FROM drafts WHERE path = ?", [(path,) for path in removed])
+            stats.removed = len(removed)
+
+            if history is not None:
+                stats.history_reloaded = self._refresh_history(history)
+
+        return stats
+
+    def _index_draft(self, path: str, stat, now: str):
+        try:
+            draft = self.loader.load(path, with_body=False)
+            values = (draft.slug, draft.title, draft.status, draft.category,
+                      str(draft.scheduled_at) if draft.scheduled_at else None, None)
+        except LoaderError as e:
+            values = (None, None, None, None, None, str(e))
+
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO drafts
+                (path, slug, title, status, category, scheduled_at, error,
+                 mtime_ns, size, content_hash, indexed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (path, *values, stat.st_mtime_ns, stat.st_size, file_sha256(path), now)
+        )
+
+    def _refresh_history(self, history: HistoryManager) -> bool:
+        """履歴ファイルが変わっていれば履歴テーブルを作り直す"""
+        history_file = history.history_file
+        signature = ''
+        if history_file.exists():
+            stat = history_file.stat()
+            signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'history'").fetchone()
+        if row is not None and row['value'] == signature and signature:
+            return False
+
+        self.conn.execute("DELETE FROM history")
+        self.conn.executemany(
+            """
+            INSERT INTO history
+                (slug, post_id, title, created_at, updated_at, versions,
+                 source_file, source_path, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (slug, entry.post_id, entry.title, entry.created_at, entry.updated_at,
+                 entry.versions, entry.source_file, _resolve(entry.source_file),
+                 history.history[slug].get('content_hash'))
+                for slug, entry in history.list_all()
+            ]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('history', ?)", (signature,)
+        )
+        return True
+
+    # ========== 検索 ==========
+
+    def _rows(self, sql: str, params: tuple = ()) -> list[DraftStatus]:
+        return [
+            DraftStatus(
+                path=row['path'],
+                slug=row['slug'],
+                title=row['title'],
+                status=row['status'],
+                post_id=row['post_id'],
+                published_at=row['published_at'],
+                error=row['error'],
+            )
+            for row in self.conn.execute(sql, params)
+        ]
+
+    _SELECT = """
+        SELECT d.path, d.slug, d.title, d.status, d.error,
+               h.post_id, COALESCE(h.updated_at, h.created_at) AS published_at
+        FROM drafts d LEFT JOIN history h ON h.slug = d.slug
+    """
+
+    def unpublished(self) -> list[DraftStatus]:
+        """投稿履歴に無い原稿"""
+        return self._rows(
+            self._SELECT + " WHERE d.error IS NULL AND h.slug IS NULL ORDER BY d.path"
+        )
+
+    def stale(self) -> list[DraftStatus]:
+        """
+        投稿後に原稿が変更されたもの
+
+        投稿時の内容ハッシュが履歴にあれば比較し、無い古い履歴は更新日時で判定する
+        """
+        result = []
+        for row in self.conn.execute(
+            """
+            SELECT d.path, d.slug, d.title, d.status, d.error, d.content_hash, d.mtime_ns,
+                   h.post_id, h.content_hash AS published_hash,
+                   COALESCE(h.updated_at, h.created_at) AS published_at
+            FROM drafts d JOIN history h ON h.slug = d.slug
+            WHERE d.error IS NULL AND h.source_path = d.path
+            ORDER BY d.path
+            """
+        ):
+            if row['published_hash']:
+                changed = row['published_hash'] != row['content_hash']
+            else:
+                try:
+                    published = datetime.fromisoformat(row['published_at']).timestamp()
+                except (TypeError, ValueError):
+                    continue
+                changed = row['mtime_ns'] / 1e9 > published
+            if changed:
+                result.append(DraftStatus(
+                    path=row['path'],
+                    slug=row['slug'],
+                    title=row['title'],
+                    status=row['status'],
+                    post_id=row['post_id'],
+                    published_at=row['published_at'],
+                ))
+        return result
+
+    def collisions(self) -> dict[str, list[str]]:
+        """
+        スラッグの衝突
+
+        Returns:
+            dict: slug → 原稿パスの一覧。同じスラッグの原稿が複数ある場合と、
+                  別の原稿から投稿済みのスラッグを使っている場合を含む
+        """
+        result: dict[str, list[str]] = {}
+        for row in self.conn.execute(
+            """
+            SELECT slug, path FROM drafts
+            WHERE slug IN (
+                SELECT slug FROM drafts WHERE error IS NULL GROUP BY slug HAVING COUNT(*) > 1
+            )
+            ORDER BY slug, path
+            """
+        ):
+            result.setdefault(row['slug'], []).append(row['path'])
+
+        for row in self.conn.execute(
+            """
+            SELECT d.slug, d.path, h.source_path FROM drafts d JOIN history h ON h.slug = d.slug
+            WHERE d.error IS NULL AND h.source_path != '' AND h.source_path != d.path
+              AND h.source_path IN (SELECT path FROM drafts)
+            ORDER BY d.slug
+            """
+        ):
+            paths = result.setdefault(row['slug'], [])
+            for path in (row['source_path'], row['path']):
+                if path not in paths:
+                    paths.append(path)
+        return result
+
+    def conflicts_for(self, slug: str, path: str) -> list[str]:
+        """
+        同じスラッグを使っている他の原稿（投稿前のチェック用）
+
+        原稿フォルダの外のファイル（デーモンの受信ファイルや、別の場所で編集した原稿）は
+        索引に無く、同じスラッグの原稿の別の版として扱うため、衝突とはみなさない
+        （投稿履歴のスラッグから既存投稿を更新する）
+        """
+        resolved = _resolve(path)
+        if self.conn.execute("SELECT 1 FROM drafts WHERE path = ?", (resolved,)).fetchone() is None:
+            return []
+        return [
+            row['path'] for row in self.conn.execute(
+                "SELECT path FROM drafts WHERE slug = ? AND path != ? ORDER BY path",
+                (slug, resolved)
+            )
+        ]
+
+    def errors(self) -> list[DraftStatus]:
+        """読み込めなかった原稿"""
+        return self._rows(self._SELECT + " WHERE d.error IS NOT NULL ORDER BY d.path")
+
+    def counts(self) -> dict[str, int]:
+        row = self.conn.execute(
+            """
+            SELECT COUNT(*) AS drafts,
+                   SUM(CASE WHEN h.slug IS NOT NULL THEN 1 ELSE 0 END) AS published
+            FROM drafts d LEFT JOIN history h ON h.slug = d.slug
+            """
+        ).fetchone()
+        return {'drafts': row['drafts'] or 0, 'published': row['published'] or 0}
+
+
+if __name__ == "__main__":
+    # テスト用
+    import sys
+    drafts_dir = sys.argv[1] if len(sys.argv) > 1 else '../drafts'
+    with DraftIndex(':memory:') as index:
+        print(index.refresh(drafts_dir, HistoryManager()))
+        for item in index.unpublished():
+            print(f"未投稿: {item.slug} ({item.path})")
+        for item in index.stale():
+            print(f"要更新: {item.slug} ({item.path})")
+        for slug, paths in index.collisions().items():
+            print(f"衝突: {slug}: {', '.join(paths)}")
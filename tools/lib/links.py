@@ -0,0 +1,284 @@
+"""
+Links - リンク・画像URLチェックモジュール
+投稿前にブロックHTML内のhref/srcを抽出し、共有セッションで並列に確認する
+
+同じURLは一括処理全体で1回だけ確認し、結果はTTL付きでディスクにキャッシュする
+"""
+import html
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+_URL_ATTR_RE = re.compile(r'\b(href|src)\s*=\s*(["\'])(.*?)\2', re.IGNORECASE | re.DOTALL)
+
+# 確認対象外のスキーム
+SKIP_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:', '#')
+
+# HEADを受け付けないサーバーはGETで確認し直す
+HEAD_FALLBACK_STATUSES = {400, 403, 405, 501}
+
+
+@dataclass
+class LinkResult:
+    """URL1件の確認結果"""
+    url: str
+    ok: bool
+    status: Optional[int] = None
+    error: Optional[str] = None
+    checked_at: float = 0.0
+    cached: bool = False
+
+
+@dataclass
+class BrokenLink:
+    """記事内の壊れたリンク"""
+    attr: str  # href / src
+    url: str
+    status: Optional[int]
+    error: Optional[str]
+
+
+@dataclass
+class LinkReport:
+    """一括チェックの結果"""
+    checked: int = 0      # 確認したユニークURL数
+    from_cache: int = 0   # うちキャッシュから返した数
+    broken: dict[str, list[BrokenLink]] = field(default_factory=dict)  # slug → 壊れたリンク
+
+    @property
+    def ok(self) -> bool:
+        return not self.broken
+
+
+def extract_urls(content: str, base_url: str = '') -> list[tuple[str, str]]:
+    """
+    HTMLからhref/srcを抽出
+
+    Args:
+        content: ブロックHTML
+        base_url: 相対URLの基準（サイトURL）
+
+    Returns:
+        list of (属性名, 絶対URL)。ページ内リンク・mailto等は除く
+    """
+    urls = []
+    seen = set()
+    for match in _URL_ATTR_RE.finditer(content):
+        attr = match.group(1).lower()
+        url = html.unescape(match.group(3).strip())
+        if not url or url.lower().startswith(SKIP_SCHEMES):
+            continue
+        if base_url:
+            url = urljoin(base_url.rstrip('/') + '/', url)
+        url = url.split('#', 1)[0]
+        if urlparse(url).scheme not in ('http', 'https'):
+            continue
+        if (attr, url) not in seen:
+            seen.add((attr, url))
+            urls.append((attr, url))
+    return urls
+
+
+class LinkChecker:
+    """リンク・画像URLを並列に確認するクラス"""
+
+    USER_AGENT = "miyabi-auto-publisher link-checker"
+
+    def __init__(
+        self,
+        site_url: str = '',
+        cache_file: str = "output/link_cache.json",
+        ttl: float = 24 * 3600,
+        error_ttl: float = 3600,
+        max_workers: int = 8,
+        timeout: float = 10,
+        basic_auth: Optional[tuple[str, str]] = None
+    ):
+        """
+        Args:
+            site_url: サイトURL（相対URLの解決と、Basic認証を付けるホストの判定に使用）
+            cache_file: 確認結果キャッシュのパス
+            ttl: 正常だった結果のキャッシュ有効期間（秒）
+            error_ttl: 失敗した結果のキャッシュ有効期間（秒）
+            max_workers: 同時に確認するURL数
+            timeout: 1リクエストのタイムアウト（秒）
+            basic_auth: サイトのBasic認証情報（サイト内URLにのみ送る）
+        """
+        self.site_url = site_url.rstrip('/')
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.basic_auth = basic_auth
+        self._site_host = urlparse(self.site_url).netloc
+
+        # 全スレッドで1つのセッション（接続プール）を共有する
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = self.USER_AGENT
+
+        self._lock = threading.Lock()
+        self.cache = self._load_cache()
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Optional[dict],
+        site_url: str = '',
+        basic_auth: Optional[tuple[str, str]] = None
+    ) -> 'LinkChecker':
+        """config.yamlのlinksセクションから作成"""
+        config = config or {}
+        return cls(
+            site_url=site_url,
+            cache_file=config.get('cache_file', 'output/link_cache.json'),
+            ttl=float(config.get('ttl_hours', 24)) * 3600,
+            error_ttl=float(config.get('error_ttl_minutes', 60)) * 60,
+            max_workers=int(config.get('max_workers', 8)),
+            timeout=float(config.get('timeout', 10)),
+            basic_auth=basic_auth,
+        )
+
+    # ========== キャッシュ ==========
+
+    def _load_cache(self) -> dict:
+        if self.cache_file.exists():
+            try:
+                return json.loads(self.cache_file.read_text(encoding='utf-8'))
+            except (OSError, json.JSONDecodeError):
+                return {}
+        return {}
+
+    def _save_cache(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(self.cache_file.suffix + '.tmp')
+            tmp.write_text(json.dumps(self.cache, ensure_ascii=False), encoding='utf-8')
+            tmp.replace(self.cache_file)
+        except OSError as e:
+            # キャッシュ保存失敗は警告のみ（次回確認し直すだけ）
+            print(f"Warning: Failed to save link cache: {e}")
+
+    def _cached(self, url: str, now: float) -> Optional[LinkResult]:
+        entry = self.cache.get(url)
+        if not entry:
+            return None
+        ttl = self.ttl if entry.get('ok') else self.error_ttl
+        if now - entry.get('checked_at', 0) > ttl:
+            return None
+        return LinkResult(**{**entry, 'url': url, 'cached': True})
+
+    # ========== 確認 ==========
+
+    def _auth_for(self, url: str):
+        if self.basic_auth and urlparse(url).netloc == self._site_host:
+            return self.basic_auth
+        return None
+
+    def check_url(self, url: str) -> LinkResult:
+        """URL1件を確認（HEAD、受け付けなければGET）"""
+        auth = self._auth_for(url)
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout, auth=auth)
+            if response.status_code in HEAD_FALLBACK_STATUSES:
+                response = self.session.get(
+                    url, allow_redirects=True, timeout=self.timeout, auth=auth, stream=True
+                )
+                response.close()
+            status = response.status_code
+            return LinkResult(url=url, ok=status < 400, status=status, checked_at=time.time())
+        except requests.RequestException as e:
+            return LinkResult(url=url, ok=False, error=type(e).__name__, checked_at=time.time())
+
+    def check_urls(self, urls: list[str]) -> dict[str, LinkResult]:
+        """
+        URLをまとめて確認（重複除去・キャッシュ利用・並列実行）
+
+        Returns:
+            dict: URL → LinkResult
+        """
+        now = time.time()
+        results = {}
+        pending = []
+        for url in dict.fromkeys(urls):
+            cached = self._cached(url, now)
+            if cached is not None:
+                results[url] = cached
+            else:
+                pending.append(url)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                for url, result in zip(pending, executor.map(self.check_url, pending)):
+                    results[url] = result
+
+            with self._lock:
+                for url in pending:
+                    entry = asdict(results[url])
+                    del entry['url'], entry['cached']
+                    self.cache[url] = entry
+                self._save_cache()
+
+        return results
+
+    def check_pages(self, pages: dict[str, str]) -> LinkReport:
+        """
+        複数記事のHTMLをまとめて確認
+
+        Args:
+            pages: slug → ブロックHTML
+
+        Returns:
+            LinkReport: 記事ごとの壊れたリンク
+        """
+        extracted = {slug: extract_urls(content, self.site_url) for slug, content in pages.items()}
+        urls = [url for links in extracted.values() for _, url in links]
+        results = self.check_urls(urls)
+
+        report = LinkReport(
+            checked=len(results),
+            from_cache=sum(1 for result in results.values() if result.cached),
+        )
+        for slug, links in extracted.items():
+            broken = [
+                BrokenLink(attr=attr, url=url, status=results[url].status, error=results[url].error)
+                for attr, url in links if not results[url].ok
+            ]
+            if broken:
+                report.broken[slug] = broken
+        return report
+
+
+def format_link_report(report: LinkReport) -> str:
+    """レポート形式で出力"""
+    lines = [f"[Links] {report.checked}件確認（キャッシュ {report.from_cache}件）"]
+    if report.ok:
+        lines.append("  ✓ リンク切れはありません")
+    for slug, broken in report.broken.items():
+        lines.append(f"  {slug}:")
+        for link in broken:
+            reason = link.status if link.status is not None else link.error
+            lines.append(f"    ✗ {link.attr}: {link.url} ({reason})")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # テスト用
+    import sys
+    if len(sys.argv) > 1:
+        checker = LinkChecker(site_url=sys.argv[2] if len(sys.argv) > 2 else '')
+        page = Path(sys.argv[1])
+        print(format_link_report(checker.check_pages({page.stem: page.read_text(encoding='utf-8')})))
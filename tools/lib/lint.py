@@ -0,0 +1,238 @@
+"""
+Lint - ブロックHTMLの検査モジュール
+ブロックコメントの入れ子・属性JSON・HTMLタグの対応を、先頭から1回なぞるだけで検査する
+
+WordPressはブロックコメントの対応が崩れたり、ブロック内のタグが閉じていなかったりすると
+エディタで「このブロックには、想定されていないか無効なコンテンツが含まれています」と表示する。
+生成のたびに検査できるよう、コメントとタグを1つの正規表現で拾い、スタック1つで対応を取る
+
+    for issue in lint_blocks(html_content):
+        print(issue.line, issue.code, issue.message)
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+# コメント（ブロックコメントを含む）とHTMLタグを1回の走査で拾う
+_TOKEN_RE = re.compile(
+    r'<!--(?P<comment>.*?)-->'
+    r'|<(?P<end>/)?(?P<tag>[a-zA-Z][a-zA-Z0-9-]*)(?P<rest>(?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.DOTALL
+)
+
+# コメントの中身がブロックコメントか（WordPressのパーサーと同じく、前後に空白が必要）
+_BLOCK_COMMENT_RE = re.compile(
+    r'\s+(?P<closer>/)?wp:(?P<name>[a-z][a-z0-9_-]*(?:/[a-z][a-z0-9_-]*)?)'
+    r'\s+(?:(?P<attrs>\{.*\})\s+)?(?P<void>/)?',
+    re.DOTALL
+)
+
+# 閉じタグの無い要素
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+})
+
+# 中身をHTMLとして解釈しない要素
+_RAW_TEXT_END_RE = {
+    tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE)
+    for tag in ('script', 'style', 'textarea')
+}
+
+# 検査の種類
+CODE_BLOCK_UNCLOSED = 'block-unclosed'      # ブロックが閉じていない
+CODE_BLOCK_MISMATCH = 'block-mismatch'      # 閉じたブロックが直前に開いたブロックと違う
+CODE_BLOCK_STRAY = 'block-stray'            # 開いていないブロックの終了コメント
+CODE_BLOCK_ATTRS = 'block-attrs'            # 属性がJSONのオブジェクトでない
+CODE_BLOCK_COMMENT = 'block-comment'        # ブロックコメントとして読めない wp: コメント
+CODE_TAG_UNCLOSED = 'tag-unclosed'          # タグが閉じていない（ブロックの終わりまでに）
+CODE_TAG_MISMATCH = 'tag-mismatch'          # 閉じタグが直前に開いたタグと違う
+CODE_TAG_STRAY = 'tag-stray'                # 開いていないタグの閉じタグ
+
+
+@dataclass
+class LintIssue:
+    """検査で見つかった問題"""
+    code: str
+    message: str
+    offset: int         # 先頭からの文字位置
+    line: int = 0       # 行番号（1始まり）
+    column: int = 0     # 列番号（1始まり）
+
+
+@lru_cache(maxsize=4096)
+def _attrs_error(attrs_raw: str) -> Optional[str]:
+    """属性JSONの問題（問題なければNone。同じ属性は繰り返し出現するためキャッシュする）"""
+    try:
+        attrs = json.loads(attrs_raw)
+    except json.JSONDecodeError as e:
+        return f"JSONとして読めません: {e.msg}（{e.pos + 1}文字目）"
+    if not isinstance(attrs, dict):
+        return "属性はJSONのオブジェクトで指定してください"
+    return None
+
+
+def lint_blocks(content: str) -> list[LintIssue]:
+    """
+    ブロックHTMLを検査
+
+    Returns:
+        list[LintIssue]: 見つかった問題（出現順）
+    """
+    issues: list[LintIssue] = []
+    # 開いているブロック: (名前, 位置, 開いた時のタグの深さ)
+    blocks: list[tuple[str, int, int]] = []
+    # 開いているタグ: (タグ名, 位置)
+    tags: list[tuple[str, int]] = []
+
+    def close_tags(depth: int, reason: str):
+        for tag, position in reversed(tags[depth:]):
+            issues.append(LintIssue(CODE_TAG_UNCLOSED, f"<{tag}> が{reason}までに閉じていません", position))
+        del tags[depth:]
+
+    position = 0
+    length = len(content)
+    while position < length:
+        match = _TOKEN_RE.search(content, position)
+        if match is None:
+            break
+        start = match.start()
+        position = match.end()
+
+        comment = match.group('comment')
+        if comment is not None:
+            if 'wp:' not in comment:
+                continue
+            block = _BLOCK_COMMENT_RE.fullmatch(comment)
+            if block is None:
+                issues.append(LintIssue(
+                    CODE_BLOCK_COMMENT,
+                    "ブロックコメントとして読めません（<!-- wp:名前 {属性} --> の形で、前後に空白が必要）",
+                    start
+                ))
+                continue
+
+            name = block.group('name')
+            if block.group('closer'):
+                if blocks and blocks[-1][0] == name:
+                    close_tags(blocks[-1][2], f" wp:{name} の終わり")
+                    blocks.pop()
+                    continue
+                open_names = [opened for opened, _, _ in blocks]
+                if name in open_names:
+                    # 内側のブロックが閉じ忘れ: そこまで閉じて続ける
+                    index = len(open_names) - 1 - open_names[::-1].index(name)
+                    for opened, opened_at, _ in reversed(blocks[index + 1:]):
+                        issues.append(LintIssue(
+                            CODE_BLOCK_MISMATCH,
+                            f"wp:{opened} が閉じる前に wp:{name} が閉じられています",
+                            opened_at
+                        ))
+                    close_tags(blocks[index][2], f" wp:{name} の終わり")
+                    del blocks[index:]
+                else:
+                    issues.append(LintIssue(CODE_BLOCK_STRAY, f"開いていない wp:{name} の終了コメントです", start))
+                continue
+
+            attrs = block.group('attrs')
+            if attrs is not None:
+                error = _attrs_error(attrs)
+                if error:
+                    issues.append(LintIssue(CODE_BLOCK_ATTRS, f"wp:{name} の属性: {error}", start))
+            if not block.group('void'):
+                blocks.append((name, start, len(tags)))
+            continue
+
+        tag = match.group('tag').lower()
+        if match.group('end'):
+            # ブロックの外側で開いたタグは、ブロックの中では閉じられない
+            floor = blocks[-1][2] if blocks else 0
+            if len(tags) > floor and tags[-1][0] == tag:
+                tags.pop()
+                continue
+            open_tags = [opened for opened, _ in tags[floor:]]
+            if tag in open_tags:
+                index = floor + len(open_tags) - 1 - open_tags[::-1].index(tag)
+                for opened, opened_at in reversed(tags[index + 1:]):
+                    issues.append(LintIssue(
+                        CODE_TAG_MISMATCH, f"<{opened}> が閉じる前に </{tag}> があります", opened_at
+                    ))
+                del tags[index:]
+            elif tag not in VOID_TAGS:
+                issues.append(LintIssue(CODE_TAG_STRAY, f"開いていない </{tag}> です", start))
+            continue
+
+        if tag in VOID_TAGS or match.group('rest').endswith('/'):
+            continue
+        raw_text_end = _RAW_TEXT_END_RE.get(tag)
+        if raw_text_end is not None:
+            end = raw_text_end.search(content, position)
+            if end is None:
+                issues.append(LintIssue(CODE_TAG_UNCLOSED, f"<{tag}> が閉じていません", start))
+                break
+            position = end.end()
+            continue
+        tags.append((tag, start))
+
+    close_tags(0, "ファイルの終わり")
+    for name, opened_at, _ in reversed(blocks):
+        issues.append(LintIssue(CODE_BLOCK_UNCLOSED, f"wp:{name} が閉じていません", opened_at))
+
+    issues.sort(key=lambda issue: issue.offset)
+    _locate(content, issues)
+    return issues
+
+
+def _locate(content: str, issues: list[LintIssue]):
+    """問題の位置に行・列番号を付ける（走査中は数えず、問題がある時だけ数える）"""
+    for issue in issues:
+        issue.line = content.count('\n', 0, issue.offset) + 1
+        issue.column = issue.offset - (content.rfind('\n', 0, issue.offset) + 1) + 1
+
+
+def lint_file(file_path) -> list[LintIssue]:
+    """ブロックHTMLファイルを検査"""
+    return lint_blocks(Path(file_path).read_text(encoding='utf-8'))
+
+
+def expand_paths(patterns: Iterable[str]) -> list[Path]:
+    """ファイル・ディレクトリ・globパターン（** 可）を検査対象のファイルに展開"""
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_file():
+            paths.append(path)
+        elif path.is_dir():
+            paths.extend(sorted(path.rglob('*.txt')))
+        else:
+            anchor = Path(path.anchor) if path.is_absolute() else Path('.')
+            relative = str(path.relative_to(anchor)) if path.is_absolute() else pattern
+            paths.extend(sorted(candidate for candidate in anchor.glob(relative) if candidate.is_file()))
+    return list(dict.fromkeys(paths))
+
+
+def format_issue(issue: LintIssue, file_path: str = '') -> str:
+    location = f"{file_path}:{issue.line}:{issue.column}" if file_path else f"{issue.line}:{issue.column}"
+    return f"{location}: [{issue.code}] {issue.message}"
+
+
+def format_lint_report(issues: list[LintIssue], file_path: str = '', limit: int = 20) -> str:
+    """レポート形式で出力（多い時は先頭のlimit件）"""
+    lines = ["[Lint]"]
+    for issue in issues[:limit]:
+        lines.append(f"  ✗ {format_issue(issue, file_path)}")
+    if len(issues) > limit:
+        lines.append(f"  …他{len(issues) - limit}件")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # テスト用: ファイルを検査
+    import sys
+    for file_path in expand_paths(sys.argv[1:] or ['../block-html/**/*.txt', '../wordpress/blocks/*.txt']):
+        for issue in lint_file(file_path):
+            print(format_issue(issue, str(file_path)))
@@ -1,14 +1,23 @@
 """
 Loader - 原稿ファイル読込モジュール
+フロントマターの区切りはmmap上のバイト列で探し、本文は必要な時だけデコードする
 """
+import mmap
+import threading
 import yaml
-import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
+# libyamlがあればC実装のローダーを使う
+_YAMLLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
-@dataclass
+_BOM = b'\xef\xbb\xbf'
+_DELIMITER = b'---'
+_WHITESPACE = b' \t\r\n\x0b\x0c'
+
+
+@dataclass(slots=True)
 class Draft:
     """原稿データを格納するクラス"""
     title: str
@@ -21,6 +30,11 @@ class Draft:
     featured_image: Optional[str] = None
     scheduled_at: Optional[str] = None
     source_file: Optional[str] = None
+    
+    @property
+    def has_body(self) -> bool:
+        """本文を読み込み済みか（Loader.load(with_body=False)ではFalse）"""
+        return self.content is not None
 
 
 class LoaderError(Exception):
@@ -28,18 +42,81 @@ class LoaderError(Exception):
     pass
 
 
+def _skip_line_whitespace(buf, pos: int) -> int:
+    """posから空白・タブ・CRを読み飛ばした位置"""
+    size = len(buf)
+    while pos < size and buf[pos] in b' \t\r':
+        pos += 1
+    return pos
+
+
+def find_frontmatter(buf) -> Optional[tuple[int, int, int]]:
+    """
+    バイト列（mmap可）からフロントマターの位置を探す
+
+    先頭の「---」行から次の「---」行までをフロントマターとみなす
+    （従来の正規表現 ^---\\s*\\n(.*?)\\n---\\s*\\n(.*)$ と同じ規則）
+
+    Returns:
+        (YAML開始, YAML終了, 本文開始) のオフセット。フロントマターが無ければNone
+    """
+    start = len(_BOM) if buf[:len(_BOM)] == _BOM else 0
+    if buf[start:start + len(_DELIMITER)] != _DELIMITER:
+        return None
+
+    # 開始行: ---（空白）\n
+    pos = _skip_line_whitespace(buf, start + len(_DELIMITER))
+    if buf[pos:pos + 1] != b'\n':
+        return None
+    yaml_start = pos + 1
+
+    # 終了行: \n---（空白）\n
+    search = yaml_start - 1
+    while True:
+        found = buf.find(b'\n' + _DELIMITER, search)
+        if found < 0:
+            return None
+        pos = found + 1 + len(_DELIMITER)
+        # ---の後の空白（改行を含む）を読み飛ばし、最後に改行があること
+        end = pos
+        last_newline = -1
+        while end < len(buf) and buf[end] in _WHITESPACE:
+            if buf[end] == 0x0a:
+                last_newline = end
+            end += 1
+        if last_newline >= 0:
+            return yaml_start, max(found, yaml_start), last_newline + 1
+        search = found + 1
+
+
+def _strip_range(buf, start: int, end: int) -> tuple[int, int]:
+    """前後の空白を除いた範囲（コピーせずにオフセットだけ求める）"""
+    while start < end and buf[start] in _WHITESPACE:
+        start += 1
+    while end > start and buf[end - 1] in _WHITESPACE:
+        end -= 1
+    return start, end
+
+
 class Loader:
     """Markdownファイルから原稿を読み込むクラス"""
     
     # 必須フィールド
     REQUIRED_FIELDS = ['title', 'slug', 'description']
     
-    def load(self, file_path: str) -> Draft:
+    # (解決済みパス) → (mtime, サイズ, フロントマター, 本文開始オフセット)
+    # 全インスタンスで共有する
+    _cache: dict[str, tuple] = {}
+    _cache_lock = threading.Lock()
+    
+    def load(self, file_path: str, with_body: bool = True) -> Draft:
         """
         Markdownファイルを読み込み、Draftオブジェクトを返す
         
         Args:
             file_path: 原稿ファイルのパス
+            with_body: Falseならフロントマターだけ読み、contentはNoneにする
+                       （load_body()で後から読み込める）
             
         Returns:
             Draft: パースされた原稿データ
@@ -50,17 +127,26 @@ class Loader:
         path = Path(file_path)
         
         # ファイル存在確認
-        if not path.exists():
-            raise LoaderError(f"File not found: {file_path}")
-        
-        # ファイル読み込み
         try:
-            content = path.read_text(encoding='utf-8')
-        except Exception as e:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise LoaderError(f"File not found: {file_path}")
+        except OSError as e:
             raise LoaderError(f"Failed to read file: {e}")
         
-        # フロントマターと本文を分離
-        frontmatter, body = self._parse_frontmatter(content)
+        key = str(path.absolute())
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        
+        body = None
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            frontmatter, body_offset = cached[2], cached[3]
+            if with_body:
+                body = self._read_body(path, body_offset)
+        else:
+            frontmatter, body_offset, body = self._read(path, with_body)
+            with self._cache_lock:
+                self._cache[key] = (stat.st_mtime_ns, stat.st_size, frontmatter, body_offset)
         
         # 必須フィールドチェック
         for field in self.REQUIRED_FIELDS:
@@ -68,21 +154,96 @@ class Loader:
                 raise LoaderError(f"Missing required field: {field}")
         
         # Draftオブジェクト作成
+        tags = frontmatter.get('tags', [])
         draft = Draft(
             title=frontmatter['title'],
             slug=frontmatter['slug'],
             description=frontmatter['description'],
-            content=body.strip(),
+            content=body,
             category=frontmatter.get('category'),
-            tags=frontmatter.get('tags', []),
+            tags=list(tags) if isinstance(tags, list) else tags,
             status=frontmatter.get('status', 'draft'),
             featured_image=frontmatter.get('featured_image'),
             scheduled_at=frontmatter.get('scheduled_at'),
-            source_file=str(path.absolute()),
+            source_file=key,
         )
         
         return draft
     
+    def load_body(self, draft: Draft) -> Draft:
+        """with_body=Falseで読み込んだDraftに本文を読み込む"""
+        if draft.content is None:
+            loaded = self.load(draft.source_file)
+            draft.content = loaded.content
+        return draft
+    
+    def iter_drafts(
+        self,
+        directory: str,
+        pattern: str = '**/*.md',
+        with_body: bool = False
+    ) -> Iterator[tuple[Path, object]]:
+        """
+        ディレクトリ内の原稿を順に読み込む（一覧・索引作成用）
+        
+        Yields:
+            (ファイルパス, Draft または LoaderError)
+        """
+        for path in sorted(Path(directory).glob(pattern)):
+            if not path.is_file():
+                continue
+            try:
+                yield path, self.load(str(path), with_body=with_body)
+            except LoaderError as e:
+                yield path, e
+    
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._cache.clear()
+    
+    # ========== 読み込み ==========
+    
+    def _read(self, path: Path, with_body: bool) -> tuple[dict, int, Optional[str]]:
+        """ファイルを読み、(フロントマター, 本文開始オフセット, 本文) を返す"""
+        try:
+            with open(path, 'rb') as f:
+                if path.stat().st_size == 0:
+                    raise LoaderError("Invalid frontmatter: Missing YAML header (---)")
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    found = find_frontmatter(buf)
+                    if found is None:
+                        raise LoaderError("Invalid frontmatter: Missing YAML header (---)")
+                    yaml_start, yaml_end, body_offset = found
+                    
+                    frontmatter = self._parse_yaml(buf[yaml_start:yaml_end])
+                    body = self._decode_body(buf, body_offset) if with_body else None
+        except LoaderError:
+            raise
+        except (OSError, ValueError) as e:
+            raise LoaderError(f"Failed to read file: {e}")
+        
+        return frontmatter, body_offset, body
+    
+    def _read_body(self, path: Path, body_offset: int) -> str:
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return self._decode_body(buf, body_offset)
+        except (OSError, ValueError) as e:
+            raise LoaderError(f"Failed to read file: {e}")
+    
+    @staticmethod
+    def _decode_body(buf, body_offset: int) -> str:
+        """本文を前後の空白を除いてデコード（コピーはデコード時の1回のみ）"""
+        start, end = _strip_range(buf, body_offset, len(buf))
+        view = memoryview(buf)
+        try:
+            return str(view[start:end], 'utf-8')
+        except UnicodeDecodeError as e:
+            raise LoaderError(f"Failed to read file: {e}")
+        finally:
+            view.release()
+    
     def _parse_frontmatter(self, content: str) -> tuple[dict, str]:
         """
         YAMLフロントマターと本文を分離
@@ -93,24 +254,25 @@ class Loader:
         Returns:
             (frontmatter_dict, body_text)
         """
-        # フロントマターのパターン: ---\n...\n---
-        pattern = r'^---\s*\n(.*?)\n---\s*\n(.*)$'
-        match = re.match(pattern, content, re.DOTALL)
-        
-        if not match:
+        buf = content.encode('utf-8')
+        found = find_frontmatter(buf)
+        if found is None:
             raise LoaderError("Invalid frontmatter: Missing YAML header (---)")
         
-        yaml_content = match.group(1)
-        body = match.group(2)
-        
+        yaml_start, yaml_end, body_offset = found
+        return self._parse_yaml(buf[yaml_start:yaml_end]), buf[body_offset:].decode('utf-8')
+    
+    @staticmethod
+    def _parse_yaml(yaml_content: bytes) -> dict:
         try:
-            frontmatter = yaml.safe_load(yaml_content)
-            if frontmatter is None:
-                frontmatter = {}
-        except yaml.YAMLError as e:
+            frontmatter = yaml.load(yaml_content.decode('utf-8'), Loader=_YAMLLoader)
+        except (yaml.YAMLError, UnicodeDecodeError) as e:
             raise LoaderError(f"Invalid frontmatter: {e}")
-        
-        return frontmatter, body
+        if frontmatter is None:
+            return {}
+        if not isinstance(frontmatter, dict):
+            raise LoaderError("Invalid frontmatter: YAML header must be a mapping")
+        return frontmatter
 
 
 if __name__ == "__main__":
@@ -124,3 +286,10 @@ if __name__ == "__main__":
         print(f"Description: {draft.description}")
         print(f"Category: {draft.category}")
         print(f"Content length: {len(draft.content)} chars")
+    else:
+        # 原稿フォルダの一覧（フロントマターのみ）
+        for file_path, item in Loader().iter_drafts('drafts'):
+            if isinstance(item, LoaderError):
+                print(f"✗ {file_path}: {item}")
+            else:
+                print(f"{item.slug:<40} {item.status:<8} {item.title}")
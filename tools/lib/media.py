@@ -0,0 +1,264 @@
+"""
+Media - アイキャッチ画像処理モジュール
+画像の最適化（リサイズ・WebP/AVIF変換）、重複排除、WordPressへの並列アップロード
+"""
+import hashlib
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@dataclass
+class MediaResult:
+    """アップロード結果"""
+    media_id: int
+    source_url: str
+    sha256: str
+    uploaded: bool  # Falseなら既存メディアを再利用
+
+
+class MediaError(Exception):
+    """Media関連のエラー"""
+    pass
+
+
+class MediaManager:
+    """画像を最適化し、重複を避けてWordPressにアップロードするクラス"""
+
+    SUPPORTED_FORMATS = ('webp', 'avif', 'original')
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        publisher,
+        index_file: str = "output/media_index.yaml",
+        cache_dir: str = "output/media",
+        max_width: int = 1600,
+        image_format: str = "webp",
+        quality: int = 80,
+        max_workers: int = 4
+    ):
+        """
+        Args:
+            publisher: アップロード先のPublisher
+            index_file: メディアインデックス（内容ハッシュ → メディアID）のパス
+            cache_dir: 最適化済み画像の保存先
+            max_width: 最大幅（px）。これより大きい画像は縮小する
+            image_format: 変換形式（webp / avif / original）
+            quality: 変換時の品質（1〜100）
+            max_workers: 並列アップロード数
+        """
+        if image_format not in self.SUPPORTED_FORMATS:
+            raise MediaError(f"Unsupported image format: {image_format}")
+
+        self.publisher = publisher
+        self.index_file = Path(index_file)
+        self.cache_dir = Path(cache_dir)
+        self.max_width = max_width
+        self.image_format = image_format
+        self.quality = quality
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    @classmethod
+    def from_config(cls, publisher, config: Optional[dict]) -> 'MediaManager':
+        """config.yamlのmediaセクションから作成"""
+        config = config or {}
+        return cls(
+            publisher,
+            index_file=config.get('index_file', 'output/media_index.yaml'),
+            cache_dir=config.get('cache_dir', 'output/media'),
+            max_width=int(config.get('max_width', 1600)),
+            image_format=config.get('format', 'webp'),
+            quality=int(config.get('quality', 80)),
+            max_workers=int(config.get('max_workers', 4)),
+        )
+
+    # ========== インデックス ==========
+
+    def _load_index(self) -> dict:
+        if self.index_file.exists():
+            try:
+                return yaml.safe_load(self.index_file.read_text(encoding='utf-8')) or {}
+            except Exception:
+                return {}
+        return {}
+
+    def _save_index(self):
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                yaml.dump(self.index, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        except Exception as e:
+            # インデックス保存失敗は警告のみ（次回再アップロードになるだけ）
+            print(f"Warning: Failed to save media index: {e}")
+
+    def _index_key(self, sha256: str) -> str:
+        """同じ画像でも変換設定が違えば別メディアとして扱う"""
+        if self.image_format == 'original':
+            return f"{sha256}:original"
+        return f"{sha256}:{self.image_format}:{self.max_width}:{self.quality}"
+
+    # ========== 最適化 ==========
+
+    @classmethod
+    def file_hash(cls, path: Path) -> str:
+        """ファイル内容のSHA-256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(cls.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def optimize(self, path: Path, sha256: str) -> Path:
+        """
+        画像を縮小・変換し、変換後のファイルパスを返す
+
+        Pillowが無い、または変換形式が使えない場合は元画像をそのまま返す
+        """
+        if self.image_format == 'original' or Image is None:
+            return path
+
+        pil_format = self.image_format.upper()
+        if pil_format not in Image.registered_extensions().values():
+            # AVIFはPillowのビルドによっては使えない
+            return path
+
+        output = self.cache_dir / f"{path.stem}-{sha256[:12]}-{self.max_width}.{self.image_format}"
+        if output.exists():
+            return output
+
+        try:
+            with Image.open(path) as image:
+                if image.width > self.max_width:
+                    height = round(image.height * self.max_width / image.width)
+                    image = image.resize((self.max_width, height), Image.LANCZOS)
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp = output.with_suffix(output.suffix + '.tmp')
+                image.save(tmp, format=pil_format, quality=self.quality)
+                tmp.replace(output)
+        except Exception as e:
+            raise MediaError(f"Failed to optimize image {path}: {e}")
+
+        return output
+
+    # ========== アップロード ==========
+
+    def ensure(self, image_path: str) -> MediaResult:
+        """
+        画像がWordPressに無ければ最適化してアップロードし、メディアIDを返す
+
+        Args:
+            image_path: 画像ファイルパス
+
+        Returns:
+            MediaResult: アップロード（または再利用）結果
+
+        Raises:
+            MediaError: ファイルが無い、変換・アップロード失敗時
+        """
+        path = Path(image_path)
+        if not path.is_file():
+            raise MediaError(f"Image not found: {image_path}")
+
+        sha256 = self.file_hash(path)
+        key = self._index_key(sha256)
+
+        with self._lock:
+            entry = self.index.get(key)
+        if entry:
+            return MediaResult(
+                media_id=entry['media_id'],
+                source_url=entry.get('source_url', ''),
+                sha256=sha256,
+                uploaded=False
+            )
+
+        upload_path = self.optimize(path, sha256)
+        mime_type = mimetypes.guess_type(upload_path.name)[0] or 'application/octet-stream'
+
+        try:
+            media = self.publisher.upload_media(str(upload_path), mime_type=mime_type)
+        except Exception as e:
+            raise MediaError(f"Failed to upload {path.name}: {e}")
+
+        with self._lock:
+            self.index[key] = {
+                'media_id': media['id'],
+                'source_url': media.get('source_url', ''),
+                'file': path.name,
+                'uploaded_at': datetime.now().isoformat(),
+            }
+            self._save_index()
+
+        return MediaResult(
+            media_id=media['id'],
+            source_url=media.get('source_url', ''),
+            sha256=sha256,
+            uploaded=True
+        )
+
+    def ensure_many(self, image_paths: list[str]) -> dict[str, object]:
+        """
+        複数の画像を並列に処理
+
+        Returns:
+            dict: 画像パス → MediaResult（失敗時はMediaError）
+        """
+        unique_paths = list(dict.fromkeys(image_paths))
+        results = {}
+
+        def _ensure(path: str):
+            try:
+                return self.ensure(path)
+            except MediaError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for path, result in zip(unique_paths, executor.map(_ensure, unique_paths)):
+                results[path] = result
+
+        return results
+
+
+def resolve_image_path(image: str, source_file: Optional[str] = None) -> Path:
+    """
+    原稿のfeatured_imageを実ファイルパスに解決
+
+    原稿ファイルからの相対パス → カレントディレクトリからの相対パスの順に探す。
+    先頭の / はリポジトリのルート（カレントディレクトリ）基準とみなす
+    """
+    candidate = Path(image.lstrip('/')) if image.startswith('/') else Path(image)
+    if source_file and not Path(image).is_absolute():
+        from_draft = Path(source_file).parent / candidate
+        if from_draft.exists():
+            return from_draft
+    if Path(image).is_absolute() and Path(image).exists():
+        return Path(image)
+    return candidate
+
+
+if __name__ == "__main__":
+    # テスト用（最適化のみ）
+    import sys
+    if len(sys.argv) > 1:
+        manager = MediaManager(publisher=None)
+        source = Path(sys.argv[1])
+        optimized = manager.optimize(source, MediaManager.file_hash(source))
+        print(f"{source} ({source.stat().st_size} bytes) -> {optimized} ({optimized.stat().st_size} bytes)")
@@ -0,0 +1,1558 @@
+"""
+Pipeline - 投稿パイプラインモジュール
+原稿読込 → AI構造化 → 検証 → HTML生成 → リンクチェック → WordPress投稿 を実行する
+
+表示はイベント（on_event）、確認はDecisionPolicyに任せるため、CLI以外
+（常駐モード・ジョブランナー等）からもそのまま呼び出せる
+
+    pipeline = Pipeline(config, on_event=print)
+    result = pipeline.run("drafts/xxx.md", PipelineOptions(publish=True))
+    result.stage('structure').elapsed
+
+    results = asyncio.run(pipeline.run_many(files, concurrency=4))
+
+複数サイトへの投稿はFanOutで、構造化・HTML生成を1回だけ行い各投稿先に並行して送る
+
+    fanout = FanOut(config, target_configs(config))
+    result = fanout.run("drafts/xxx.md", PipelineOptions())
+
+ロールバック（rollback）・投稿履歴の同期（sync）・予約投稿（create_scheduler）もPipelineから実行する
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, Optional, Union
+
+from .artifacts import Artifact, ArtifactError, ArtifactStore, live_version
+from .blocks import BlockParseError, html_to_article
+from .config import Config, basic_auth_from_config
+from .diff import ContentDiff, SnapshotStore, format_diff
+from .generator import get_generator
+from .history import GONE_STATUSES, HistoryManager
+from .index import DraftIndex, file_sha256
+from .links import LinkChecker, format_link_report
+from .lint import format_lint_report, lint_blocks
+from .loader import Draft, Loader, LoaderError
+from .media import MediaError, MediaManager, resolve_image_path
+from .publisher import BatchItem, Publisher, PublisherError, RetryPolicy
+from .related import RelatedPost, open_related_index, post_url, with_related
+from .scheduler import (
+    MODE_FUTURE, ScheduleQueue, ScheduledJob, Scheduler, SchedulerError, parse_off_peak, parse_scheduled_at
+)
+from .sections import Article
+from .structurer import ArticleJSON, Structurer, StructurerError, estimate_tokens, get_structurer
+from .similarity import open_similarity_index
+from .sync import SyncReport, Syncer, history_is_trusted
+from .terminology import TerminologyError, open_term_checker
+from .validator import ValidationResult, Validator
+
+
+# ステージ名
+STAGE_LOAD = 'load'
+STAGE_STRUCTURE = 'structure'
+STAGE_VALIDATE = 'validate'
+STAGE_RENDER = 'render'
+STAGE_LINKS = 'links'
+STAGE_PUBLISH = 'publish'
+
+# 結果のアクション
+ACTION_CREATED = 'created'
+ACTION_UPDATED = 'updated'
+ACTION_UNCHANGED = 'unchanged'   # 前回投稿時から変更なし（更新を省略）
+ACTION_QUEUED = 'queued'         # バッチに追加
+ACTION_DRY_RUN = 'dry_run'
+ACTION_CANCELLED = 'cancelled'   # 確認で中止
+
+# イベントの種類
+EVENT_STEP = 'step'
+EVENT_SUCCESS = 'success'
+EVENT_WARNING = 'warning'
+EVENT_ERROR = 'error'
+EVENT_INFO = 'info'
+EVENT_REPORT = 'report'  # 複数行のレポート（検証結果・差分など）
+
+
+@dataclass
+class PipelineEvent:
+    """進捗イベント"""
+    kind: str
+    message: str
+    slug: Optional[str] = None
+    step: Optional[int] = None
+    total: Optional[int] = None
+    target: Optional[str] = None  # 投稿先名（複数サイトへの投稿時）
+
+
+EventCallback = Callable[[PipelineEvent], None]
+
+
+@dataclass
+class StageResult:
+    """ステージ1つ分の結果"""
+    stage: str
+    ok: bool = True
+    elapsed: float = 0.0
+    data: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineResult:
+    """原稿1件の処理結果"""
+    file: str
+    slug: Optional[str] = None
+    ok: bool = False
+    action: Optional[str] = None
+    post_id: Optional[int] = None
+    status: Optional[str] = None
+    edit_url: Optional[str] = None
+    view_url: Optional[str] = None
+    html: Optional[str] = field(default=None, repr=False)
+    extra_meta: Optional[dict] = None
+    stages: list[StageResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def stage(self, name: str) -> Optional[StageResult]:
+        for stage in self.stages:
+            if stage.stage == name:
+                return stage
+        return None
+
+    def to_dict(self) -> dict:
+        """JSON化用（HTMLは含めない）"""
+        data = asdict(self)
+        del data['html']
+        return data
+
+
+@dataclass
+class PipelineOptions:
+    """実行オプション（CLIの同名フラグに対応）"""
+    publish: bool = False
+    dry_run: bool = False
+    confirm: bool = False
+    force_update: bool = False
+    force_new: bool = False
+    full_update: bool = False
+    no_cta: bool = False
+    skip_validation: bool = False
+    skip_link_check: bool = False
+
+    @classmethod
+    def from_args(cls, args, **overrides) -> 'PipelineOptions':
+        """argparseの結果から作成（無い項目は既定値）"""
+        values = {
+            f.name: getattr(args, f.name) for f in fields(cls) if hasattr(args, f.name)
+        }
+        return cls(**{**values, **overrides})
+
+    def merged(self, **overrides) -> 'PipelineOptions':
+        return replace(self, **overrides)
+
+
+class DecisionPolicy:
+    """処理中の判断（確認）を行うクラス
+
+    既定ではすべて承認する。CLIは標準入力で確認するポリシーを渡す
+    """
+
+    def confirm_structure(self, draft: Draft, article_json: ArticleJSON) -> bool:
+        """構造化結果で続行するか（options.confirm時のみ呼ばれる）"""
+        return True
+
+    def confirm_update(self, draft: Draft, post_id: int, diff: ContentDiff) -> bool:
+        """既存投稿を更新するか（options.force_update時は呼ばれない）"""
+        return True
+
+
+class AutoApprove(DecisionPolicy):
+    """すべて承認する（常駐モード・予約投稿用）"""
+    pass
+
+
+class SkipExisting(DecisionPolicy):
+    """既存投稿は更新しない"""
+
+    def confirm_update(self, draft: Draft, post_id: int, diff: ContentDiff) -> bool:
+        return False
+
+
+# ========== 設定からの作成 ==========
+
+def create_publisher(config: Config) -> Optional[Publisher]:
+    """設定からPublisherを作成（WordPress設定が不完全ならNone）"""
+    site_url = config.get('wordpress', 'site_url')
+    username = config.get('wordpress', 'username')
+    app_password = config.get('wordpress', 'app_password')
+
+    if not site_url or not app_password:
+        return None
+
+    return Publisher(
+        site_url,
+        username,
+        app_password,
+        basic_auth=basic_auth_from_config(config),
+        retry_policy=RetryPolicy.from_config(config.get('wordpress', 'retry')),
+        site_timezone=site_timezone(config)
+    )
+
+
+def site_timezone(config: Config):
+    """サイトのタイムゾーン（scheduler.timezone。未設定ならローカル時刻としてNone）"""
+    name = config.get('scheduler', 'timezone')
+    if not name:
+        return None
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(name)
+
+
+def create_link_checker(config: Config, options=None) -> Optional[LinkChecker]:
+    """設定からLinkCheckerを作成（無効化されていればNone）"""
+    if not config.get('links', 'enabled', default=True):
+        return None
+    if options is not None and getattr(options, 'skip_link_check', False):
+        return None
+    return LinkChecker.from_config(
+        config.get('links'),
+        site_url=config.get('wordpress', 'site_url') or '',
+        basic_auth=basic_auth_from_config(config)
+    )
+
+
+def open_snapshot_store(config: Config) -> SnapshotStore:
+    """前回投稿時のブロック列の保存先"""
+    return SnapshotStore(config.get('output', 'snapshot_dir', default='output/snapshots'))
+
+
+def open_artifact_store(config: Config) -> Optional[ArtifactStore]:
+    """生成物の版の保存先（artifacts.enabledがfalseならNone）"""
+    if not config.get('artifacts', 'enabled', default=True):
+        return None
+    return ArtifactStore.from_config(config)
+
+
+def create_media_manager(
+    config: Config,
+    publisher: Publisher,
+    on_event: Optional[EventCallback] = None
+) -> Optional[MediaManager]:
+    """設定からMediaManagerを作成（無効化されていればNone）"""
+    if not config.get('media', 'enabled', default=True):
+        return None
+    try:
+        return MediaManager.from_config(publisher, config.get('media'))
+    except MediaError as e:
+        _notify(on_event, EVENT_WARNING, f"メディア設定が不正です: {e}")
+        return None
+
+
+def open_history(config: Config) -> HistoryManager:
+    """投稿履歴（投稿先ごとにoutput.history_fileで分けられる）"""
+    return HistoryManager(config.get('output', 'history_file', default='output/post_history.yaml'))
+
+
+def open_schedule_queue(config: Config) -> ScheduleQueue:
+    """予約投稿キュー"""
+    return ScheduleQueue(config.get('scheduler', 'queue_file', default='output/schedule_queue.yaml'))
+
+
+def open_draft_index(config: Config, history: Optional[HistoryManager] = None) -> DraftIndex:
+    """原稿インデックスを開き、原稿フォルダと投稿履歴の変更を反映する"""
+    index = DraftIndex(config.get('output', 'index_file', default='output/draft_index.sqlite3'))
+    index.refresh(
+        config.get('drafts', 'dir', default='../drafts'),
+        history or open_history(config),
+        pattern=config.get('drafts', 'pattern', default='**/*.md')
+    )
+    return index
+
+
+def draft_hash(draft) -> Optional[str]:
+    """履歴に記録する原稿ファイルの内容ハッシュ"""
+    try:
+        return file_sha256(draft.source_file) if draft.source_file else None
+    except OSError:
+        return None
+
+
+def mark_published(config: Config, slug: str, html_content: Optional[str]):
+    """投稿した版に投稿日時を記録（記録の失敗は投稿の成否に影響させない）"""
+    store = open_artifact_store(config)
+    if store is None or not html_content:
+        return
+    try:
+        store.mark_published(slug, html_content)
+    except (ArtifactError, OSError):
+        pass
+
+
+def update_similarity_index(config: Config, slug: str, html_content: Optional[str]):
+    """
+    投稿した記事を類似記事の索引に登録し直す（失敗は投稿の成否に影響させない）
+
+    プロセス内で共有する索引をメモリ上で更新するだけで、保存はsave_indexesでまとめて行う
+    """
+    index = open_similarity_index(config)
+    if index is None or not html_content:
+        return
+    try:
+        index.update(slug, Article.from_dict(html_to_article(html_content), slug=slug))
+    except (BlockParseError, ValueError, TypeError):
+        return
+
+
+def update_related_index(config: Config, slug: str, title: str, html_content: Optional[str]):
+    """
+    投稿した記事を関連記事の索引に登録し直す（失敗は投稿の成否に影響させない）
+
+    プロセス内で共有する索引をメモリ上で更新するだけで、保存はsave_indexesでまとめて行う
+    """
+    index = open_related_index(config)
+    if index is None or not html_content:
+        return
+    try:
+        article = Article.from_dict(html_to_article(html_content), slug=slug)
+    except (BlockParseError, ValueError, TypeError):
+        return
+    index.update(slug, article, title, post_url(config, slug))
+
+
+def record_published(config: Config, slug: str, title: str, html_content: Optional[str]):
+    """投稿した記事を、投稿先に関係なく共有する記録（ブロック列の記録・類似記事/関連記事の索引）に反映"""
+    mark_published(config, slug, html_content)
+    update_similarity_index(config, slug, html_content)
+    update_related_index(config, slug, title, html_content)
+
+
+def record_rollback(config: Config, slug: str, artifact: Artifact):
+    """
+    ロールバックを共有する記録に反映（記録の失敗は投稿の成否に影響させない）
+
+    投稿中だった版を取り下げ（次の引数なしのロールバックでさらに前の版に戻るように）、戻した版を投稿済みにする
+    """
+    store = open_artifact_store(config)
+    live = None
+    if store is not None:
+        try:
+            live = live_version(store.versions(slug))
+        except (ArtifactError, OSError):
+            pass
+    record_published(config, slug, artifact.version.title, artifact.html)
+    save_indexes(config)
+    if live is not None and live.version != artifact.version.version:
+        try:
+            store.mark_rolled_back(slug, live.version)
+        except (ArtifactError, OSError):
+            pass
+
+
+def save_indexes(config: Config):
+    """メモリ上で更新した索引を保存（実行・バッチの終わりに1回）"""
+    for index in (open_similarity_index(config), open_related_index(config)):
+        if index is not None:
+            index.save_if_dirty()
+
+
+def find_related(config: Config, slug: str, title: str, article_json: dict) -> list[RelatedPost]:
+    """記事の関連記事（同期でゴミ箱・削除済みと分かった投稿は除く）"""
+    index = open_related_index(config)
+    if index is None or not len(index):
+        return []
+    history = open_history(config)
+    gone = [other for other in index.slugs() if history.remote_status(other) in GONE_STATUSES]
+    return index.query(article_json, title, slug, exclude=gone)
+
+
+def _notify(on_event: Optional[EventCallback], kind: str, message: str, **kwargs):
+    if on_event is not None:
+        on_event(PipelineEvent(kind, message, **kwargs))
+
+
+def check_links(
+    checker: LinkChecker,
+    pages: dict[str, str],
+    config: Config,
+    on_event: Optional[EventCallback] = None
+) -> set[str]:
+    """
+    記事HTML内のリンク・画像URLを確認してレポートを通知
+
+    Args:
+        pages: slug → ブロックHTML
+
+    Returns:
+        リンク切れのため投稿を止めるスラッグ（links.fail_on_broken有効時のみ）
+    """
+    report = checker.check_pages(pages)
+    _notify(on_event, EVENT_REPORT, format_link_report(report))
+    if report.ok:
+        return set()
+    if config.get('links', 'fail_on_broken', default=False):
+        return set(report.broken)
+    _notify(on_event, EVENT_WARNING, "リンク切れがありますが続行します")
+    return set()
+
+
+def upload_featured_image(
+    draft,
+    media: Optional[MediaManager],
+    on_event: Optional[EventCallback] = None
+) -> Optional[int]:
+    """アイキャッチ画像をアップロード（既存ならID再利用）し、メディアIDを返す"""
+    if not draft.featured_image or media is None:
+        return None
+
+    path = resolve_image_path(draft.featured_image, draft.source_file)
+    try:
+        result = media.ensure(str(path))
+    except MediaError as e:
+        _notify(on_event, EVENT_WARNING, f"アイキャッチ画像: {e}")
+        return None
+
+    if result.uploaded:
+        _notify(on_event, EVENT_SUCCESS, f"アイキャッチ画像: アップロード（ID: {result.media_id}）")
+    else:
+        _notify(on_event, EVENT_SUCCESS, f"アイキャッチ画像: 既存メディアを使用（ID: {result.media_id}）")
+    return result.media_id
+
+
+class BatchQueue:
+    """投稿をためておき、最後にまとめてバッチAPIで送信するキュー"""
+
+    def __init__(
+        self,
+        publisher: Publisher,
+        history: HistoryManager,
+        media: Optional[MediaManager] = None,
+        link_checker: Optional[LinkChecker] = None,
+        config: Optional[Config] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        on_event: Optional[EventCallback] = None
+    ):
+        self.publisher = publisher
+        self.history = history
+        self.media = media
+        self.link_checker = link_checker
+        self.config = config
+        self.snapshots = snapshots
+        self.on_event = on_event
+        self.jobs = []  # (BatchItem, Draft, file_path)
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Config,
+        publisher: Publisher,
+        options=None,
+        on_event: Optional[EventCallback] = None,
+        link_check: bool = True
+    ) -> 'BatchQueue':
+        """
+        Args:
+            link_check: 送信前にリンクチェックを行うか（投稿前に確認済みならFalse）
+        """
+        return cls(
+            publisher,
+            open_history(config),
+            create_media_manager(config, publisher, on_event),
+            link_checker=create_link_checker(config, options) if link_check else None,
+            config=config,
+            snapshots=open_snapshot_store(config),
+            on_event=on_event
+        )
+
+    def _emit(self, kind: str, message: str, **kwargs):
+        _notify(self.on_event, kind, message, **kwargs)
+
+    def add(self, item: BatchItem, draft, file_path: str):
+        self.jobs.append((item, draft, file_path))
+
+    def flush(self) -> tuple[int, int]:
+        """
+        ためた投稿をバッチAPIで送信し、履歴を更新
+
+        Returns:
+            (成功件数, 失敗件数)
+        """
+        if not self.jobs:
+            return 0, 0
+
+        self._emit(EVENT_INFO, "\n" + "=" * 50 + f"\n一括投稿中...（{len(self.jobs)}件）\n" + "=" * 50)
+
+        fail = self._check_links()
+        if not self.jobs:
+            return 0, fail
+
+        self._attach_featured_media()
+
+        drafts = {id(item): (draft, file_path) for item, draft, file_path in self.jobs}
+        results = self.publisher.publish_batch([item for item, _, _ in self.jobs])
+        self.jobs = []
+
+        success = 0
+        with self.history.deferred_save():
+            for outcome in results:
+                draft, file_path = drafts[id(outcome.item)]
+                if not outcome.ok:
+                    self._emit(EVENT_ERROR, f"{draft.slug}: {outcome.error}", slug=draft.slug)
+                    fail += 1
+                    continue
+
+                result = outcome.result
+                if self.snapshots is not None:
+                    self.snapshots.save(draft.slug, outcome.item.data)
+                if self.config is not None:
+                    record_published(self.config, draft.slug, draft.title, outcome.item.data.get('content'))
+                if result.action == "updated":
+                    self.history.save_updated(draft.slug, draft.title, content_hash=draft_hash(draft))
+                else:
+                    self.history.save_created(
+                        slug=draft.slug,
+                        post_id=result.post_id,
+                        title=draft.title,
+                        source_file=file_path,
+                        content_hash=draft_hash(draft)
+                    )
+                self._emit(EVENT_SUCCESS, f"{draft.slug}: {result.action}（ID: {result.post_id}）", slug=draft.slug)
+                success += 1
+
+        if self.config is not None and success:
+            save_indexes(self.config)
+        return success, fail
+
+    def _check_links(self) -> int:
+        """全記事のリンクをまとめて確認し、投稿を止める記事をキューから外す（外した件数を返す）"""
+        if self.link_checker is None:
+            return 0
+
+        pages = {draft.slug: item.data.get('content', '') for item, draft, _ in self.jobs}
+        blocked = check_links(self.link_checker, pages, self.config, self.on_event)
+        if not blocked:
+            return 0
+
+        for slug in blocked:
+            self._emit(EVENT_ERROR, f"{slug}: リンク切れのため投稿しません", slug=slug)
+        self.jobs = [job for job in self.jobs if job[1].slug not in blocked]
+        return len(blocked)
+
+    def _attach_featured_media(self):
+        """全記事のアイキャッチ画像を並列にアップロードし、リクエストに設定"""
+        if self.media is None:
+            return
+
+        images = {}
+        for item, draft, _ in self.jobs:
+            if draft.featured_image:
+                path = str(resolve_image_path(draft.featured_image, draft.source_file))
+                images[id(item)] = path
+        if not images:
+            return
+
+        results = self.media.ensure_many(list(images.values()))
+        for item, draft, _ in self.jobs:
+            result = results.get(images.get(id(item)))
+            if isinstance(result, MediaError):
+                self._emit(EVENT_WARNING, f"{draft.slug}: アイキャッチ画像: {result}", slug=draft.slug)
+            elif result is not None:
+                item.data['featured_media'] = result.media_id
+
+
+# ========== パイプライン ==========
+
+class _Run:
+    """1回の実行の結果とイベント通知先"""
+
+    def __init__(self, result: PipelineResult, on_event: Optional[EventCallback], total: int):
+        self.result = result
+        self.on_event = on_event
+        self.total = total
+
+    def emit(self, kind: str, message: str, step: Optional[int] = None):
+        _notify(self.on_event, kind, message, slug=self.result.slug, step=step, total=self.total)
+
+    def step(self, step: int, message: str):
+        self.emit(EVENT_STEP, message, step=step)
+
+    def success(self, message: str):
+        self.emit(EVENT_SUCCESS, message)
+
+    def warning(self, message: str):
+        self.emit(EVENT_WARNING, message)
+
+    def fail(self, stage: StageResult, message: str) -> bool:
+        stage.ok = False
+        stage.error = message
+        self.result.error = message
+        self.emit(EVENT_ERROR, message)
+        return False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageResult]:
+        stage = StageResult(name)
+        self.result.stages.append(stage)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.elapsed = time.perf_counter() - start
+
+
+class Pipeline:
+    """原稿からWordPress投稿までのパイプライン
+
+    Publisher（接続プール）とStructurerは最初に使う時に作り、以降の実行で使い回す。
+    複数の原稿を並行して実行できるが、WordPressへの投稿と履歴の更新は1件ずつ行う
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        policy: Optional[DecisionPolicy] = None,
+        on_event: Optional[EventCallback] = None,
+        publisher: Optional[Publisher] = None,
+        shared_updates: bool = True
+    ):
+        """
+        Args:
+            config: 設定
+            policy: 確認の判断（省略時はすべて承認）
+            on_event: 進捗イベントの通知先（実行ごとの指定と両方に通知する）
+            publisher: 使い回すPublisher（省略時は設定から作成）
+            shared_updates: 投稿後に投稿先に関係なく共有する記録（record_published）を更新するか
+                            （FanOutの投稿先ごとのPipelineではFalse。FanOutが投稿後に1回だけ更新する）
+        """
+        self.config = config
+        self.policy = policy or AutoApprove()
+        self.on_event = on_event
+        self.shared_updates = shared_updates
+        self.loader = Loader()
+        self._publisher = publisher
+        self._publisher_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+
+    @property
+    def publisher(self) -> Optional[Publisher]:
+        """設定から作成したPublisher（WordPress設定が不完全ならNone）"""
+        with self._publisher_lock:
+            if self._publisher is None:
+                self._publisher = create_publisher(self.config)
+            return self._publisher
+
+    def structurer(self) -> Structurer:
+        """設定に対応するStructurer（同じ設定なら全実行で共有）"""
+        config = self.config
+        return get_structurer(
+            api_key=config.get('gemini', 'api_key'),
+            model=config.get('gemini', 'model'),
+            temperature=config.get('gemini', 'temperature', default=0.3),
+            max_output_tokens=config.get('gemini', 'max_output_tokens', default=8192),
+            prompt_template_path=config.get('prompt', 'template_file'),
+            context_cache=config.get('gemini', 'context_cache', default=True),
+            cache_ttl=config.get('gemini', 'cache_ttl', default=3600),
+            chunking=config.get('gemini', 'chunking', default=True),
+            chunk_workers=config.get('gemini', 'chunk_workers', default=4)
+        )
+
+    def _listener(self, on_event: Optional[EventCallback]) -> Optional[EventCallback]:
+        if on_event is None or self.on_event is None:
+            return on_event or self.on_event
+
+        def both(event: PipelineEvent):
+            self.on_event(event)
+            on_event(event)
+        return both
+
+    @staticmethod
+    def _total_steps(options: PipelineOptions) -> int:
+        return 5 if not options.dry_run else 4
+
+    # ========== 同期実行 ==========
+
+    def run(
+        self,
+        file_path: str,
+        options: Optional[PipelineOptions] = None,
+        batch: Optional[BatchQueue] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> PipelineResult:
+        """
+        原稿1件を処理（batch指定時は投稿をキューに積むだけ）
+
+        Returns:
+            PipelineResult: 各ステージの結果を含む処理結果
+        """
+        options = options or PipelineOptions()
+        run = _Run(PipelineResult(file=str(file_path)), self._listener(on_event), self._total_steps(options))
+
+        draft = self._load(file_path, options, run)
+        if draft is None:
+            return run.result
+
+        if not self._prepare(draft, options, run, link_check=batch is None):
+            return run.result
+
+        if options.dry_run:
+            run.result.ok = True
+            run.result.action = ACTION_DRY_RUN
+            return run.result
+
+        self._publish(draft, run.result.html, run.result.extra_meta, options, run, batch=batch)
+        return run.result
+
+    def prepare_file(
+        self,
+        file_path: str,
+        options: Optional[PipelineOptions] = None,
+        link_check: bool = True,
+        on_event: Optional[EventCallback] = None
+    ) -> tuple[Optional[Draft], PipelineResult]:
+        """
+        原稿を読み込み、構造化・検証・HTML生成まで行う（投稿はしない）
+
+        Returns:
+            (原稿, 処理結果)。読み込めなければ原稿はNone
+        """
+        options = options or PipelineOptions()
+        run = _Run(PipelineResult(file=str(file_path)), self._listener(on_event), self._total_steps(options))
+        draft = self._load(file_path, options, run)
+        if draft is not None:
+            run.result.ok = self._prepare(draft, options, run, link_check=link_check)
+            if run.result.ok and options.dry_run:
+                run.result.action = ACTION_DRY_RUN
+        return draft, run.result
+
+    def prepare(
+        self,
+        draft: Draft,
+        options: Optional[PipelineOptions] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> PipelineResult:
+        """構造化・検証・HTML生成・リンクチェックだけを行う（予約投稿の前倒し準備用）"""
+        options = options or PipelineOptions()
+        result = PipelineResult(file=draft.source_file or '', slug=draft.slug)
+        run = _Run(result, self._listener(on_event), self._total_steps(options))
+        result.ok = self._prepare(draft, options, run, link_check=True)
+        return result
+
+    def publish(
+        self,
+        draft: Draft,
+        html_content: str,
+        extra_meta: Optional[dict] = None,
+        options: Optional[PipelineOptions] = None,
+        status: Optional[str] = None,
+        date: Optional[datetime] = None,
+        batch: Optional[BatchQueue] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> PipelineResult:
+        """生成済みHTMLを投稿する（batch指定時はキューに積むだけ）"""
+        options = options or PipelineOptions()
+        result = PipelineResult(file=draft.source_file or '', slug=draft.slug, html=html_content,
+                                extra_meta=extra_meta)
+        run = _Run(result, self._listener(on_event), self._total_steps(options))
+        self._publish(draft, html_content, extra_meta, options, run, batch=batch, status=status, date=date)
+        return result
+
+    # ========== ロールバック ==========
+
+    def load_rollback(
+        self,
+        slug: str,
+        version: Optional[int] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> tuple[Optional[Artifact], PipelineResult]:
+        """
+        ロールバックする版を読み込む
+
+        Args:
+            version: 版番号（省略時はrollback_target = 投稿中の版より前に投稿した版）
+
+        Returns:
+            (版の内容, 処理結果)。読み込めなければ版の内容はNone
+        """
+        result = PipelineResult(file='', slug=slug)
+        run = _Run(result, self._listener(on_event), 1)
+        run.step(1, "ロールバック中...")
+        with run.stage(STAGE_PUBLISH) as stage:
+            store = open_artifact_store(self.config)
+            if store is None:
+                run.fail(stage, "artifacts.enabledがfalseのため版がありません")
+                return None, result
+            try:
+                artifact = store.load(slug, version)
+            except ArtifactError as e:
+                run.fail(stage, str(e))
+                return None, result
+            entry = artifact.version
+            stage.data['artifact_version'] = entry.version
+            result.ok = True
+            result.file = entry.source_file
+            result.html = artifact.html
+            result.extra_meta = artifact.extra_meta
+            run.success(f"版: v{entry.version}（{entry.created_at[:19]}）")
+        return artifact, result
+
+    def publish_rollback(
+        self,
+        slug: str,
+        artifact: Artifact,
+        on_event: Optional[EventCallback] = None
+    ) -> PipelineResult:
+        """
+        load_rollbackで読み込んだ版をそのまま再投稿する（構造化・HTML生成は行わず、更新リクエスト1回）
+
+        投稿ステータス・アイキャッチ画像はサイト上のまま変えない
+        """
+        entry = artifact.version
+        result = PipelineResult(file=entry.source_file, slug=slug, html=artifact.html,
+                                extra_meta=artifact.extra_meta)
+        run = _Run(result, self._listener(on_event), 1)
+        with run.stage(STAGE_PUBLISH) as stage:
+            stage.data['artifact_version'] = entry.version
+            publisher = self.publisher
+            if publisher is None:
+                run.fail(stage, "WordPress設定が不完全です")
+                return result
+
+            with self._publish_lock:
+                history = open_history(self.config)
+                post_id = history.find_live(slug) or publisher.find_post_by_slug(slug)
+                if not post_id:
+                    run.fail(stage, f"投稿が見つかりません: {slug}")
+                    return result
+                data = publisher.build_update_data(
+                    title=entry.title,
+                    content=artifact.html,
+                    status=None,
+                    meta_description=entry.description,
+                    extra_meta=artifact.extra_meta
+                )
+                try:
+                    post = publisher.send_update(post_id, data)
+                except PublisherError as e:
+                    run.fail(stage, str(e))
+                    return result
+                # 戻した版を生成した時の原稿のハッシュ（記録の無い古い版では履歴のハッシュを変えない）
+                history.save_updated(slug, entry.title, content_hash=entry.content_hash)
+                open_snapshot_store(self.config).save(slug, data)
+
+        if self.shared_updates:
+            record_rollback(self.config, slug, artifact)
+        result.ok = True
+        result.action = post.action
+        result.post_id = post.post_id
+        result.status = post.status
+        result.edit_url = post.edit_url
+        result.view_url = post.view_url
+        run.success(f"投稿ID: {post.post_id}（v{entry.version}に戻しました）")
+        run.success(f"ステータス: {post.status}")
+        return result
+
+    def rollback(
+        self,
+        slug: str,
+        version: Optional[int] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> PipelineResult:
+        """
+        保存済みの版を読み込んで再投稿する
+
+        Args:
+            version: 版番号（省略時はrollback_target = 投稿中の版より前に投稿した版）
+        """
+        artifact, result = self.load_rollback(slug, version, on_event)
+        if artifact is None:
+            return result
+        return self.publish_rollback(slug, artifact, on_event)
+
+    # ========== 投稿履歴の同期 ==========
+
+    def sync(self, full: bool = False) -> SyncReport:
+        """
+        WordPressの投稿一覧と投稿履歴を同期
+
+        Args:
+            full: 全件同期（省略時は前回の同期以降に変更された投稿だけ取得）
+
+        Raises:
+            PublisherError: WordPress設定が不完全、または取得に失敗した時
+        """
+        publisher = self.publisher
+        if publisher is None:
+            raise PublisherError("WordPress設定が不完全です")
+        with self._publish_lock:
+            return Syncer.from_config(self.config, publisher, open_history(self.config)).run(full=full)
+
+    # ========== 予約投稿 ==========
+
+    def schedule(self, file_path: str, queue: ScheduleQueue) -> ScheduledJob:
+        """
+        原稿をscheduled_atの日時で予約投稿キューに登録
+
+        Raises:
+            LoaderError: 原稿を読めない時
+            SchedulerError: scheduled_atが無い・解釈できない時
+        """
+        draft = self.loader.load(file_path, with_body=False)
+        if not draft.scheduled_at:
+            raise SchedulerError("scheduled_atが設定されていません")
+        due = parse_scheduled_at(draft.scheduled_at, site_timezone(self.config))
+        return queue.add(draft.slug, draft.source_file, due)
+
+    def create_scheduler(
+        self,
+        queue: ScheduleQueue,
+        options: Optional[PipelineOptions] = None,
+        log: Callable[[str], None] = print
+    ) -> Scheduler:
+        """
+        予約投稿キューを処理するSchedulerを作成（準備・投稿はこのPipelineで対話なしに行う）
+
+        準備したHTMLはscheduler.html_dirに保存し、投稿時に読み込む
+
+        Raises:
+            SchedulerError: scheduler設定が不正な時
+        """
+        config = self.config
+        options = (options or PipelineOptions()).merged(
+            confirm=False, force_update=True, force_new=False, dry_run=False
+        )
+        html_dir = Path(config.get('scheduler', 'html_dir', default='output/scheduled'))
+        tz = site_timezone(config)
+
+        def prepare(job: ScheduledJob):
+            draft = self.loader.load(job.source_file)
+            result = self.prepare(draft, options)
+            if not result.ok:
+                raise SchedulerError(result.error or "構造化・HTML生成に失敗しました")
+
+            html_dir.mkdir(parents=True, exist_ok=True)
+            html_path = html_dir / f"{job.slug}.txt"
+            html_path.write_text(result.html, encoding='utf-8')
+            job.html_file = str(html_path)
+            job.extra_meta = result.extra_meta or {}
+
+        def publish(job: ScheduledJob, mode: str):
+            draft = self.loader.load(job.source_file, with_body=False)
+            html_content = Path(job.html_file).read_text(encoding='utf-8')
+            # 予約時刻を過ぎていればfutureにせずそのまま公開する
+            now = datetime.now(tz) if tz is not None else datetime.now()
+            status = 'future' if mode == MODE_FUTURE and job.due > now else 'publish'
+            result = self.publish(
+                draft, html_content, job.extra_meta or None, options, status=status, date=job.due
+            )
+            if not result.ok:
+                raise SchedulerError(result.error or "投稿に失敗しました")
+            job.post_id = result.post_id
+
+        return Scheduler(
+            queue,
+            prepare=prepare,
+            publish=publish,
+            mode=config.get('scheduler', 'mode', default=MODE_FUTURE),
+            prepare_ahead=timedelta(hours=config.get('scheduler', 'prepare_ahead_hours', default=24)),
+            min_lead=timedelta(minutes=config.get('scheduler', 'min_lead_minutes', default=60)),
+            off_peak=parse_off_peak(config.get('scheduler', 'off_peak')),
+            poll_interval=config.get('scheduler', 'poll_interval', default=60),
+            max_attempts=config.get('scheduler', 'max_attempts', default=3),
+            tz=tz,
+            log=log,
+        )
+
+    # ========== 非同期実行 ==========
+
+    async def run_async(
+        self,
+        file_path: str,
+        options: Optional[PipelineOptions] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> PipelineResult:
+        """run()をスレッドで実行する"""
+        return await asyncio.to_thread(self.run, file_path, options, None, on_event)
+
+    async def run_many(
+        self,
+        files: list[str],
+        options: Optional[PipelineOptions] = None,
+        concurrency: int = 4,
+        on_event: Optional[EventCallback] = None
+    ) -> list[PipelineResult]:
+        """
+        複数の原稿を並行して処理
+
+        Args:
+            concurrency: 同時に処理する原稿数（構造化はこの数まで並行し、投稿は1件ずつ）
+
+        Returns:
+            filesと同じ順の処理結果
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(file_path: str) -> PipelineResult:
+            async with semaphore:
+                return await self.run_async(file_path, options, on_event)
+
+        return list(await asyncio.gather(*(one(file_path) for file_path in files)))
+
+    async def stream(
+        self,
+        file_path: str,
+        options: Optional[PipelineOptions] = None
+    ) -> AsyncIterator[Union[PipelineEvent, PipelineResult]]:
+        """
+        進捗イベントを順に返し、最後にPipelineResultを返す
+
+            async for item in pipeline.stream(path):
+                ...
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def push(event: PipelineEvent):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        task = asyncio.ensure_future(self.run_async(file_path, options, push))
+        while True:
+            getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+                continue
+            getter.cancel()
+            while not events.empty():
+                yield events.get_nowait()
+            yield task.result()
+            return
+
+    # ========== ステージ ==========
+
+    def _load(self, file_path: str, options: PipelineOptions, run: _Run) -> Optional[Draft]:
+        """Step 1: 原稿読込"""
+        run.step(1, "原稿読込中...")
+        with run.stage(STAGE_LOAD) as stage:
+            try:
+                draft = self.loader.load(file_path)
+            except LoaderError as e:
+                run.fail(stage, str(e))
+                return None
+            run.result.slug = draft.slug
+            stage.data['title'] = draft.title
+            run.success(f"タイトル: {draft.title}")
+            run.success(f"スラッグ: {draft.slug}")
+
+            # 原稿フォルダ内に同じスラッグの原稿が他にあれば、既存投稿を上書きしないよう止める
+            # （フォルダ外のファイルは同じ原稿の別の版として、履歴の投稿を更新する）
+            if not options.force_new:
+                with open_draft_index(self.config) as index:
+                    conflicts = index.conflicts_for(draft.slug, draft.source_file)
+                if conflicts:
+                    stage.data['conflicts'] = conflicts
+                    run.fail(stage, f"スラッグ '{draft.slug}' が他の原稿と重複しています: " + ", ".join(conflicts))
+                    return None
+        return draft
+
+    def _prepare(self, draft: Draft, options: PipelineOptions, run: _Run, link_check: bool) -> bool:
+        """Step 2〜3: 構造化・検証・HTML生成（・リンクチェック）"""
+        config = self.config
+        result = run.result
+
+        # Step 2: AI構造化
+        run.step(2, "AI構造化中...")
+        with run.stage(STAGE_STRUCTURE) as stage:
+            if not config.get('gemini', 'api_key'):
+                return run.fail(stage, "GEMINI_API_KEYが設定されていません")
+            try:
+                structurer = self.structurer()
+                if structurer.chunking and structurer.needs_chunking(draft.content):
+                    stage.data['chunked'] = True
+                    run.warning(f"長い原稿のため見出し単位で分割して構造化します（推定{estimate_tokens(draft.content)}トークン）")
+
+                start = time.time()
+                article_json = structurer.structure(draft.content, draft.title)
+                elapsed = time.time() - start
+            except StructurerError as e:
+                return run.fail(stage, str(e))
+            run.success(f"Gemini API: 成功（{elapsed:.1f}秒）")
+
+            # JSON保存
+            if config.get('output', 'save_json'):
+                json_dir = Path(config.get('output', 'json_dir', default='output/json'))
+                json_dir.mkdir(parents=True, exist_ok=True)
+                json_path = json_dir / f"{draft.slug}.json"
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump(article_json.raw_json, f, ensure_ascii=False, indent=2)
+                stage.data['json_path'] = str(json_path)
+                run.success(f"JSON保存: {json_path}")
+
+        # バリデーション
+        if not options.skip_validation:
+            with run.stage(STAGE_VALIDATE) as stage:
+                try:
+                    term_checker = open_term_checker(config)
+                except TerminologyError as e:
+                    return run.fail(stage, str(e))
+                validation: ValidationResult = Validator(
+                    open_similarity_index(config), term_checker
+                ).validate(article_json.raw_json, slug=draft.slug)
+                stage.data['errors'] = len(validation.errors)
+                stage.data['warnings'] = len(validation.warnings)
+                run.emit(EVENT_REPORT, validation.format_report())
+                if not validation.is_valid:
+                    return run.fail(stage, "バリデーションエラー: 続行できません")
+
+        # 確認モード
+        if options.confirm and not self.policy.confirm_structure(draft, article_json):
+            result.action = ACTION_CANCELLED
+            run.emit(EVENT_INFO, "中止しました")
+            return False
+
+        # Step 3: HTML生成
+        run.step(3, "HTML生成中...")
+        with run.stage(STAGE_RENDER) as stage:
+            cta_path = config.get('cta', 'template_file') if config.get('cta', 'enabled') else None
+            generator = get_generator(
+                cta_template_path=cta_path,
+                organization_id=config.get('schema', 'organization_id')
+            )
+
+            # 関連記事（元の記事JSONには加えず、HTMLにだけ入れる）
+            # 構造化時にサニタイズ済みの記事JSONがあればそれを使う（本文のサニタイズを繰り返さない）
+            sanitized = article_json.sanitized_json is not None
+            render_json = article_json.sanitized_json if sanitized else article_json.raw_json
+            related = find_related(config, draft.slug, draft.title, article_json.raw_json)
+            if related:
+                render_json = with_related(
+                    render_json, related, config.get('related', 'title', default='関連記事')
+                )
+                stage.data['related'] = [post.slug for post in related]
+                run.success("関連記事: " + ", ".join(post.slug for post in related))
+
+            rendered = generator.render(
+                render_json,
+                include_cta=not options.no_cta and config.get('cta', 'enabled', default=True),
+                title=draft.title,
+                description=draft.description,
+                keywords=draft.tags,
+                sanitized=sanitized
+            )
+            html_content = rendered.html
+
+            # ブロックコメント・タグの対応（崩れたHTMLはエディタで「無効なコンテンツ」になる）
+            if config.get('lint', 'enabled', default=True):
+                issues = lint_blocks(html_content)
+                if issues:
+                    stage.data['lint_issues'] = len(issues)
+                    run.emit(EVENT_REPORT, format_lint_report(issues))
+                    return run.fail(stage, f"ブロックHTMLに{len(issues)}件の問題があります")
+
+            # ブロック数カウント
+            block_count = html_content.count('<!-- wp:')
+            stage.data['blocks'] = block_count
+            run.success(f"ブロック数: {block_count}")
+
+            # 構造化データ（JSON-LD）は投稿メタとして送る
+            extra_meta = None
+            if rendered.json_ld and config.get('schema', 'enabled', default=True):
+                meta_key = config.get('schema', 'meta_key', default='_miyabi_json_ld')
+                extra_meta = {meta_key: rendered.json_ld}
+                run.success(f"構造化データ: {meta_key}")
+
+            # HTML保存
+            if config.get('output', 'save_html'):
+                html_dir = Path(config.get('output', 'html_dir', default='output/html'))
+                html_dir.mkdir(parents=True, exist_ok=True)
+                html_path = html_dir / f"{draft.slug}.txt"
+                with open(html_path, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+                stage.data['html_path'] = str(html_path)
+                run.success(f"HTML保存: {html_path}")
+
+            # 版の保存（ロールバック用。前回と同じ内容なら版を増やさない）
+            store = open_artifact_store(config)
+            if store is not None:
+                try:
+                    version = store.record(
+                        draft.slug,
+                        html_content,
+                        article_json=article_json.raw_json,
+                        extra_meta=extra_meta,
+                        title=draft.title,
+                        description=draft.description,
+                        source_file=draft.source_file or '',
+                        content_hash=draft_hash(draft)
+                    )
+                    stage.data['artifact_version'] = version.version
+                    run.success(f"版を保存: v{version.version}")
+                except (ArtifactError, OSError) as e:
+                    run.warning(f"版を保存できませんでした: {e}")
+
+        result.html = html_content
+        result.extra_meta = extra_meta
+
+        # リンクチェック（バッチ時は送信前にまとめて確認する）
+        if link_check:
+            link_checker = create_link_checker(config, options)
+            if link_checker is not None:
+                with run.stage(STAGE_LINKS) as stage:
+                    blocked = check_links(link_checker, {draft.slug: html_content}, config, run.on_event)
+                    stage.data['blocked'] = bool(blocked)
+                    if blocked:
+                        return run.fail(stage, "リンク切れのため投稿を中止しました")
+        return True
+
+    def _publish(
+        self,
+        draft: Draft,
+        html_content: str,
+        extra_meta: Optional[dict],
+        options: PipelineOptions,
+        run: _Run,
+        batch: Optional[BatchQueue] = None,
+        status: Optional[str] = None,
+        date: Optional[datetime] = None
+    ) -> bool:
+        """Step 4: WordPress投稿（batch指定時はキューに積むだけ）"""
+        run.step(4, "WordPress投稿中...")
+        with run.stage(STAGE_PUBLISH) as stage:
+            if batch is not None:
+                return self._publish_locked(draft, html_content, extra_meta, options, run, stage,
+                                            batch, status, date)
+            # 履歴ファイルの読み書きを直列にする
+            with self._publish_lock:
+                return self._publish_locked(draft, html_content, extra_meta, options, run, stage,
+                                            batch, status, date)
+
+    def _publish_locked(
+        self,
+        draft: Draft,
+        html_content: str,
+        extra_meta: Optional[dict],
+        options: PipelineOptions,
+        run: _Run,
+        stage: StageResult,
+        batch: Optional[BatchQueue],
+        status: Optional[str],
+        date: Optional[datetime]
+    ) -> bool:
+        config = self.config
+        result = run.result
+        file_path = draft.source_file
+
+        if batch is not None:
+            publisher = batch.publisher
+            history = batch.history
+        else:
+            publisher = self.publisher
+            if publisher is None:
+                return run.fail(stage, "WordPress設定が不完全です")
+            history = open_history(config)
+        snapshots = open_snapshot_store(config)
+
+        try:
+            # 既存投稿チェック
+            # 直近に--syncした履歴は信頼し、履歴に無ければREST APIで探さない
+            existing_post_id = None
+            if not options.force_new:
+                existing_post_id = history.find_live(draft.slug)
+                if not existing_post_id and not history_is_trusted(config):
+                    existing_post_id = publisher.find_post_by_slug(draft.slug)
+
+            # 投稿ステータス
+            if status is None:
+                status = 'publish' if options.publish else config.get('wordpress', 'default_status', default='draft')
+
+            # アイキャッチ画像（バッチ時は送信前にまとめて並列アップロード）
+            featured_media = None
+            if batch is None:
+                featured_media = upload_featured_image(
+                    draft, create_media_manager(config, publisher, run.on_event), run.on_event
+                )
+
+            if existing_post_id and not options.force_new:
+                # 更新モード: 前回投稿時のブロック列と比較する
+                update_data = publisher.build_update_data(
+                    title=draft.title,
+                    content=html_content,
+                    status=status,
+                    meta_description=draft.description,
+                    featured_media=featured_media,
+                    extra_meta=extra_meta,
+                    date=date
+                )
+                diff = snapshots.diff(draft.slug, update_data)
+                stage.data['changed_blocks'] = len(diff.blocks)
+                stage.data['changed_fields'] = list(diff.fields)
+                run.emit(EVENT_REPORT, format_diff(diff, verbose=options.confirm))
+
+                if not options.full_update:
+                    if diff.empty:
+                        result.ok = True
+                        result.action = ACTION_UNCHANGED
+                        result.post_id = existing_post_id
+                        run.success("変更が無いため更新をスキップしました")
+                        return True
+                    if diff.metadata_only:
+                        # 本文は送らずメタ情報だけ更新する
+                        update_data.pop('content')
+
+                if not options.force_update and not self.policy.confirm_update(draft, existing_post_id, diff):
+                    result.action = ACTION_CANCELLED
+                    run.emit(EVENT_INFO, "中止しました")
+                    return False
+
+                if batch is not None:
+                    batch.add(BatchItem(
+                        key=draft.slug,
+                        post_id=existing_post_id,
+                        data=update_data
+                    ), draft, file_path)
+                    result.ok = True
+                    result.action = ACTION_QUEUED
+                    result.post_id = existing_post_id
+                    run.success(f"バッチに追加: 更新（ID: {existing_post_id}）")
+                    return True
+
+                post = publisher.send_update(existing_post_id, update_data)
+                history.save_updated(draft.slug, draft.title, content_hash=draft_hash(draft))
+                snapshots.save(draft.slug, update_data)
+            else:
+                # 新規作成
+                category_id = None
+                if draft.category:
+                    category_id = publisher.get_category_id(draft.category)
+                elif config.get('wordpress', 'default_category'):
+                    category_id = publisher.get_category_id(
+                        config.get('wordpress', 'default_category')
+                    )
+
+                tag_ids = []
+                if draft.tags:
+                    tag_ids = publisher.get_tag_ids(draft.tags)
+
+                if batch is not None:
+                    batch.add(BatchItem(
+                        key=draft.slug,
+                        data=publisher.build_create_data(
+                            title=draft.title,
+                            content=html_content,
+                            slug=draft.slug,
+                            status=status,
+                            category_id=category_id,
+                            tag_ids=tag_ids,
+                            meta_description=draft.description,
+                            extra_meta=extra_meta,
+                            date=date
+                        )
+                    ), draft, file_path)
+                    result.ok = True
+                    result.action = ACTION_QUEUED
+                    run.success("バッチに追加: 新規作成")
+                    return True
+
+                post = publisher.create_post(
+                    title=draft.title,
+                    content=html_content,
+                    slug=draft.slug,
+                    status=status,
+                    category_id=category_id,
+                    tag_ids=tag_ids,
+                    meta_description=draft.description,
+                    featured_media=featured_media,
+                    extra_meta=extra_meta,
+                    date=date
+                )
+                history.save_created(
+                    slug=draft.slug,
+                    post_id=post.post_id,
+                    title=draft.title,
+                    source_file=file_path,
+                    content_hash=draft_hash(draft)
+                )
+                snapshots.save(draft.slug, publisher.build_update_data(
+                    title=draft.title,
+                    content=html_content,
+                    status=status,
+                    meta_description=draft.description,
+                    featured_media=featured_media,
+                    extra_meta=extra_meta,
+                    date=date
+                ))
+
+        except PublisherError as e:
+            return run.fail(stage, str(e))
+
+        if self.shared_updates:
+            record_published(config, draft.slug, draft.title, html_content)
+            save_indexes(config)
+        result.ok = True
+        result.action = post.action
+        result.post_id = post.post_id
+        result.status = post.status
+        result.edit_url = post.edit_url
+        result.view_url = post.view_url
+        run.success(f"投稿ID: {post.post_id}")
+        run.success(f"アクション: {post.action}")
+        run.success(f"ステータス: {post.status}")
+        return True
+
+
+# ========== 複数サイトへの投稿 ==========
+
+class _SerializedPolicy(DecisionPolicy):
+    """並行して投稿する時に、確認（標準入力など）が重ならないよう1件ずつ行う"""
+
+    def __init__(self, policy: DecisionPolicy):
+        self.policy = policy
+        self._lock = threading.Lock()
+
+    def confirm_structure(self, draft: Draft, article_json: ArticleJSON) -> bool:
+        with self._lock:
+            return self.policy.confirm_structure(draft, article_json)
+
+    def confirm_update(self, draft: Draft, post_id: int, diff: ContentDiff) -> bool:
+        with self._lock:
+            return self.policy.confirm_update(draft, post_id, diff)
+
+
+def _tagged(on_event: Optional[EventCallback], target: str) -> Optional[EventCallback]:
+    if on_event is None:
+        return None
+
+    def tag(event: PipelineEvent):
+        event.target = target
+        on_event(event)
+    return tag
+
+
+@dataclass
+class FanOutResult:
+    """原稿1件を複数の投稿先に投稿した結果"""
+    prepared: PipelineResult
+    targets: dict[str, PipelineResult] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.prepared.ok and all(result.ok for result in self.targets.values())
+
+
+class FanOut:
+    """構造化・HTML生成を1回だけ行い、複数の投稿先に並行して投稿する
+
+    投稿先ごとにPublisher（接続プール・カテゴリ/タグのキャッシュ）と投稿履歴を持つ。
+    ブロック列の記録と類似記事・関連記事の索引は投稿先で共有するため、
+    すべての投稿先への投稿が終わった後に1回だけ更新する
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        targets: list[tuple[str, Config]],
+        policy: Optional[DecisionPolicy] = None,
+        on_event: Optional[EventCallback] = None
+    ):
+        """
+        Args:
+            config: 構造化・HTML生成に使う設定
+            targets: (投稿先名, 投稿先の設定) のリスト（target_configsの結果）
+            policy: 確認の判断（投稿先ごとの確認は1件ずつ行う）
+            on_event: 進捗イベントの通知先（投稿先のイベントにはtargetが付く）
+        """
+        policy = _SerializedPolicy(policy or AutoApprove())
+        self.preparer = Pipeline(config, policy=policy, on_event=on_event)
+        self.pipelines = {
+            name: Pipeline(target, policy=policy, on_event=_tagged(on_event, name), shared_updates=False)
+            for name, target in targets
+        }
+
+    def run(
+        self,
+        file_path: str,
+        options: Optional[PipelineOptions] = None,
+        batches: Optional[dict[str, BatchQueue]] = None
+    ) -> FanOutResult:
+        """
+        原稿1件を処理
+
+        Args:
+            batches: 投稿先名 → BatchQueue（指定した投稿先は投稿をキューに積むだけ。
+                     リンクチェックは済んでいるのでlink_check=Falseで作る）
+        """
+        options = options or PipelineOptions()
+        batches = batches or {}
+        # リンクチェックは投稿先に関係なく1回だけ行う
+        draft, prepared = self.preparer.prepare_file(file_path, options)
+        result = FanOutResult(prepared)
+        if draft is None or not prepared.ok or options.dry_run:
+            return result
+
+        def publish(name: str) -> PipelineResult:
+            return self.pipelines[name].publish(
+                draft, prepared.html, prepared.extra_meta, options, batch=batches.get(name)
+            )
+
+        with ThreadPoolExecutor(max_workers=len(self.pipelines)) as executor:
+            futures = {name: executor.submit(publish, name) for name in self.pipelines}
+            result.targets = {name: future.result() for name, future in futures.items()}
+
+        # 共有する記録は、どれか1つの投稿先に投稿できたら1回だけ更新する（キューに積んだ分はflush時）
+        if any(target.ok and target.action != ACTION_QUEUED for target in result.targets.values()):
+            config = self.preparer.config
+            record_published(config, draft.slug, draft.title, prepared.html)
+            save_indexes(config)
+        return result
+
+    def rollback(self, slug: str, version: Optional[int] = None) -> FanOutResult:
+        """
+        保存済みの版を全投稿先に並行して再投稿
+
+        版は投稿前に1回だけ決める（投稿先ごとに決めると、先に戻した投稿先の記録で次の投稿先がさらに前の版に戻る）
+
+        Args:
+            version: 版番号（省略時はrollback_target）
+        """
+        artifact, prepared = self.preparer.load_rollback(slug, version)
+        result = FanOutResult(prepared)
+        if artifact is None:
+            return result
+
+        with ThreadPoolExecutor(max_workers=len(self.pipelines)) as executor:
+            futures = {
+                name: executor.submit(pipeline.publish_rollback, slug, artifact)
+                for name, pipeline in self.pipelines.items()
+            }
+            result.targets = {name: future.result() for name, future in futures.items()}
+
+        if any(target.ok for target in result.targets.values()):
+            record_rollback(self.preparer.config, slug, artifact)
+        return result
+
+
+def format_fanout_summary(results: list[FanOutResult], targets: list[str]) -> str:
+    """投稿先ごとの結果サマリ"""
+    lines = ["[投稿先ごとの結果]"]
+    for name in targets:
+        counts: dict[str, int] = {}
+        failed = []
+        for result in results:
+            target = result.targets.get(name)
+            if target is None:
+                continue
+            if target.ok:
+                counts[target.action] = counts.get(target.action, 0) + 1
+            else:
+                failed.append(f"{target.slug}: {target.error or target.action}")
+        summary = ", ".join(f"{action} {count}件" for action, count in counts.items()) or "なし"
+        lines.append(f"  {name}: {summary}" + (f", 失敗 {len(failed)}件" if failed else ""))
+        for item in failed:
+            lines.append(f"    ✗ {item}")
+    not_prepared = [result.prepared.file for result in results if not result.prepared.ok]
+    if not_prepared:
+        lines.append(f"  構造化・HTML生成に失敗: {len(not_prepared)}件")
+    return "\n".join(lines)
@@ -2,9 +2,14 @@
 Publisher - WordPress投稿モジュール
 REST APIを使用してWordPressに投稿
 """
+import random
 import time
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone, tzinfo
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import quote
 
 import requests
 
@@ -17,6 +22,89 @@ class PostResult:
     view_url: str
     status: str
     action: str  # "created" or "updated"
+    modified: Optional[str] = None
+
+
+@dataclass
+class RetryPolicy:
+    """リトライ方針（指数バックオフ + ジッター）"""
+    max_retries: int = 3  # 初回を除く再試行回数
+    base_delay: float = 1.0  # seconds
+    max_delay: float = 30.0  # seconds
+    max_retry_after: float = 120.0  # Retry-Afterに従う上限（秒）
+    retry_statuses: frozenset = field(
+        default_factory=lambda: frozenset({429, 500, 502, 503, 504})
+    )
+    
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'RetryPolicy':
+        """config.yamlのwordpress.retryから作成"""
+        config = config or {}
+        policy = cls()
+        for key in ('max_retries', 'base_delay', 'max_delay', 'max_retry_after'):
+            if config.get(key) is not None:
+                setattr(policy, key, type(getattr(policy, key))(config[key]))
+        return policy
+    
+    @property
+    def max_attempts(self) -> int:
+        return self.max_retries + 1
+    
+    def is_retryable(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+    
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        attempt回目（0始まり）の失敗後に待つ秒数
+        
+        Retry-Afterヘッダー（秒数またはHTTP日付）があればそれを優先する
+        """
+        # Full Jitter: 0〜min(max_delay, base*2^attempt) の一様乱数
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        
+        wait = self._parse_retry_after(retry_after)
+        if wait is None:
+            return backoff
+        return min(max(wait, backoff), self.max_retry_after)
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class BatchItem:
+    """一括投稿の1件分"""
+    key: str  # 結果との対応付け用（通常はslug）
+    data: dict  # REST APIに送るリクエストボディ
+    post_id: Optional[int] = None  # 指定時は更新、Noneなら新規作成
+    
+    @property
+    def action(self) -> str:
+        return "updated" if self.post_id else "created"
+
+
+@dataclass
+class BatchResult:
+    """一括投稿の1件分の結果"""
+    item: BatchItem
+    result: Optional[PostResult] = None
+    error: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.result is not None
 
 
 class PublisherError(Exception):
@@ -27,15 +115,29 @@ class PublisherError(Exception):
 class Publisher:
     """WordPress REST APIで投稿を管理するクラス"""
     
-    MAX_RETRIES = 2
-    RETRY_DELAY = 2  # seconds
+    REQUEST_TIMEOUT = 30  # seconds
+    
+    # バッチAPI（WordPress 5.6+）の1リクエストあたり上限
+    BATCH_MAX_REQUESTS = 25
+    
+    # レスポンスに含めるフィールド（_fields）。本文などの大きいフィールドを返させない
+    POST_FIELDS = "id,link,status,modified"
+    LOOKUP_FIELDS = "id"
+    TERM_FIELDS = "id,name"
+    
+    # 作成リクエストがサーバーに届いたか分からない（作成済みの可能性がある）ステータス
+    AMBIGUOUS_STATUSES = {502, 504}
+    # 照合時の時計ずれの許容幅
+    RECONCILE_CLOCK_SKEW = timedelta(minutes=5)
     
     def __init__(
         self,
         site_url: str,
         username: str,
         app_password: str,
-        basic_auth: Optional[tuple[str, str]] = None
+        basic_auth: Optional[tuple[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        site_timezone: Optional[tzinfo] = None
     ):
         """
         Args:
@@ -43,10 +145,16 @@ class Publisher:
             username: WordPressユーザー名
             app_password: Application Password
             basic_auth: サーバーBasic認証情報 (user, password) または None
+            retry_policy: リトライ方針（省略時はRetryPolicyの既定値）
+            site_timezone: サイトのタイムゾーン（modified_after等の日時の指定に使う。Noneならローカル時刻）
         """
         self.site_url = site_url.rstrip('/')
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.site_timezone = site_timezone
         
         # セッションを作成
+        # 圧縮レスポンスはrequestsの既定のAccept-Encodingで受け付ける
+        # （urllib3のmake_headersと同じ値。brotli / zstandardが入っていればbr / zstdも含まれる）
         self.session = requests.Session()
         
         # サーバーBasic認証がある場合、URLに認証情報を埋め込む
@@ -66,6 +174,7 @@ class Publisher:
             ))
         
         self.api_url = f"{self.site_url}/wp-json/wp/v2"
+        self.batch_url = f"{self.site_url}/wp-json/batch/v1"
         
         # WordPress Application Password認証
         # URL方式でBasic認証を突破した後、AuthorizationヘッダーでWP認証
@@ -76,6 +185,9 @@ class Publisher:
         # カテゴリ/タグのキャッシュ
         self._categories_cache = None
         self._tags_cache = None
+        
+        # バッチAPIが使えるか（Noneは未確認）
+        self._batch_supported = None
     
     def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
         """HTTPリクエストを実行"""
@@ -92,6 +204,7 @@ class Publisher:
             response = self._make_request(
                 'get',
                 f"{self.api_url}/users/me",
+                params={"_fields": self.LOOKUP_FIELDS},
                 timeout=10
             )
             return response.status_code == 200
@@ -108,23 +221,129 @@ class Publisher:
         Returns:
             int or None: 見つかった場合はpost_id
         """
+        post = self._find_post_object(slug, fields=self.LOOKUP_FIELDS)
+        return post['id'] if post else None
+    
+    def _find_post_object(
+        self,
+        slug: str,
+        modified_after: Optional[datetime] = None,
+        fields: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        slugで投稿を検索し、REST APIの投稿オブジェクトを返す
+        
+        Args:
+            fields: 返させるフィールド（省略時はPOST_FIELDS）
+        """
+        params = {"slug": slug, "status": "any", "_fields": fields or self.POST_FIELDS}
+        if modified_after is not None:
+            params["modified_after"] = self.site_time(modified_after)
+        
         try:
             response = self._make_request(
                 'get',
                 f"{self.api_url}/posts",
-                params={"slug": slug, "status": "any"},
+                params=params,
                 timeout=10
             )
             
             if response.status_code == 200:
                 posts = response.json()
                 if posts and len(posts) > 0:
-                    return posts[0]['id']
+                    return posts[0]
         except Exception:
             pass
-        
+
         return None
-    
+
+    def site_time(self, moment: datetime) -> str:
+        """
+        日時をサイトのタイムゾーンのローカル時刻（タイムゾーンなしのISO形式）にする
+
+        modified_afterはWordPress側でpost_modified（サイトのローカル時刻）と比較されるため、
+        UTCやオフセット付きで渡すとタイムゾーンの差だけずれる
+        """
+        if moment.tzinfo is None:
+            return moment.isoformat(timespec='seconds')
+        return moment.astimezone(self.site_timezone).replace(tzinfo=None).isoformat(timespec='seconds')
+
+    def list_posts(
+        self,
+        page: int = 1,
+        per_page: int = 100,
+        fields: Optional[str] = None,
+        status: str = "any",
+        modified_after: Optional[str] = None
+    ) -> tuple[list[dict], int]:
+        """
+        投稿一覧を1ページ分取得（id昇順）
+
+        Args:
+            page: ページ番号（1始まり）
+            per_page: 1ページの件数（最大100）
+            fields: 返させるフィールド（省略時はPOST_FIELDS）
+            status: 投稿ステータス（カンマ区切りで複数指定可）
+            modified_after: この日時（サイトのタイムゾーン）より後に更新された投稿のみ
+
+        Returns:
+            (投稿オブジェクトのリスト, 総ページ数)
+
+        Raises:
+            PublisherError: 取得に失敗した時
+        """
+        params = {
+            "page": page,
+            "per_page": per_page,
+            "status": status,
+            "orderby": "id",
+            "order": "asc",
+            "_fields": fields or self.POST_FIELDS,
+        }
+        if modified_after:
+            params["modified_after"] = modified_after
+
+        policy = self.retry_policy
+        last_error = None
+
+        # 取得は冪等なので、接続エラー・429/5xxは常に再試行してよい
+        for attempt in range(policy.max_attempts):
+            retry_after = None
+            try:
+                response = self._make_request(
+                    'get',
+                    f"{self.api_url}/posts",
+                    params=params,
+                    timeout=self.REQUEST_TIMEOUT
+                )
+            except (requests.Timeout, requests.ConnectionError) as e:
+                last_error = str(e)
+            except requests.RequestException as e:
+                raise PublisherError(f"WordPress post listing failed: {e}")
+            else:
+                status_code = response.status_code
+                if status_code == 200:
+                    total_pages = int(response.headers.get('X-WP-TotalPages') or 1)
+                    try:
+                        return response.json(), total_pages
+                    except ValueError:
+                        raise PublisherError("WordPress post listing failed: Invalid JSON response")
+                if status_code == 400 and page > 1:
+                    # ページ数を超えた（取得中に投稿が減った）
+                    return [], page - 1
+                if status_code in (401, 403):
+                    raise PublisherError("WordPress auth failed: Cannot list posts")
+
+                last_error = f"HTTP {status_code}: {response.text}"
+                if not policy.is_retryable(status_code):
+                    raise PublisherError(f"WordPress post listing failed: {last_error}")
+                retry_after = response.headers.get('Retry-After')
+
+            if attempt < policy.max_attempts - 1:
+                time.sleep(policy.delay(attempt, retry_after))
+
+        raise PublisherError(f"WordPress post listing failed: {last_error}")
+
     def create_post(
         self,
         title: str,
@@ -133,7 +352,10 @@ class Publisher:
         status: str = "draft",
         category_id: Optional[int] = None,
         tag_ids: Optional[list[int]] = None,
-        meta_description: Optional[str] = None
+        meta_description: Optional[str] = None,
+        featured_media: Optional[int] = None,
+        extra_meta: Optional[dict] = None,
+        date: Optional[datetime] = None
     ) -> PostResult:
         """
         新規投稿を作成
@@ -142,32 +364,29 @@ class Publisher:
             title: 記事タイトル
             content: 記事本文（ブロックHTML）
             slug: URLスラッグ
-            status: 投稿ステータス（draft/publish）
+            status: 投稿ステータス（draft/publish/future）
             category_id: カテゴリID
             tag_ids: タグIDリスト
             meta_description: メタディスクリプション
+            featured_media: アイキャッチ画像のメディアID
+            extra_meta: 追加の投稿メタ（構造化データ等）
+            date: 公開日時（status="future"で予約投稿）
             
         Returns:
             PostResult: 投稿結果
         """
-        data = {
-            "title": title,
-            "content": content,
-            "slug": slug,
-            "status": status,
-        }
-        
-        if category_id:
-            data["categories"] = [category_id]
-        
-        if tag_ids:
-            data["tags"] = tag_ids
-        
-        # メタディスクリプション（Yoast SEO用）
-        if meta_description:
-            data["meta"] = {
-                "_yoast_wpseo_metadesc": meta_description
-            }
+        data = self.build_create_data(
+            title=title,
+            content=content,
+            slug=slug,
+            status=status,
+            category_id=category_id,
+            tag_ids=tag_ids,
+            meta_description=meta_description,
+            featured_media=featured_media,
+            extra_meta=extra_meta,
+            date=date
+        )
         
         return self._post_with_retry(data, action="created")
     
@@ -175,9 +394,12 @@ class Publisher:
         self,
         post_id: int,
         title: str,
-        content: str,
-        status: str = "draft",
-        meta_description: Optional[str] = None
+        content: Optional[str],
+        status: Optional[str] = "draft",
+        meta_description: Optional[str] = None,
+        featured_media: Optional[int] = None,
+        extra_meta: Optional[dict] = None,
+        date: Optional[datetime] = None
     ) -> PostResult:
         """
         既存投稿を更新
@@ -185,103 +407,501 @@ class Publisher:
         Args:
             post_id: 投稿ID
             title: 記事タイトル
-            content: 記事本文（ブロックHTML）
-            status: 投稿ステータス
+            content: 記事本文（ブロックHTML）。Noneなら本文は送らない
+            status: 投稿ステータス。Noneならサイト上のステータスのまま
             meta_description: メタディスクリプション
+            featured_media: アイキャッチ画像のメディアID
+            extra_meta: 追加の投稿メタ（構造化データ等）
+            date: 公開日時（status="future"で予約投稿）
+            
+        Returns:
+            PostResult: 投稿結果
+        """
+        data = self.build_update_data(
+            title=title,
+            content=content,
+            status=status,
+            meta_description=meta_description,
+            featured_media=featured_media,
+            extra_meta=extra_meta,
+            date=date
+        )
+        
+        return self.send_update(post_id, data)
+    
+    def send_update(self, post_id: int, data: dict) -> PostResult:
+        """
+        build_update_dataで作成したリクエストボディで既存投稿を更新
+        
+        Args:
+            post_id: 投稿ID
+            data: 更新リクエストのボディ
             
         Returns:
             PostResult: 投稿結果
         """
+        return self._put_with_retry(post_id, data)
+    
+    @staticmethod
+    def date_fields(date: datetime) -> dict:
+        """
+        公開日時のリクエストフィールド
+        
+        タイムゾーン付きならUTCに変換してdate_gmt、無ければサイトのローカル時刻としてdate
+        """
+        if date.tzinfo is not None:
+            return {"date_gmt": date.astimezone(timezone.utc).replace(tzinfo=None).isoformat(timespec='seconds')}
+        return {"date": date.isoformat(timespec='seconds')}
+    
+    def build_create_data(
+        self,
+        title: str,
+        content: str,
+        slug: str,
+        status: str = "draft",
+        category_id: Optional[int] = None,
+        tag_ids: Optional[list[int]] = None,
+        meta_description: Optional[str] = None,
+        featured_media: Optional[int] = None,
+        extra_meta: Optional[dict] = None,
+        date: Optional[datetime] = None
+    ) -> dict:
+        """新規投稿用のリクエストボディを作成"""
         data = {
             "title": title,
             "content": content,
+            "slug": slug,
             "status": status,
         }
         
+        if category_id:
+            data["categories"] = [category_id]
+        
+        if tag_ids:
+            data["tags"] = tag_ids
+        
+        # メタディスクリプション（Yoast SEO用）
         if meta_description:
             data["meta"] = {
                 "_yoast_wpseo_metadesc": meta_description
             }
         
-        return self._put_with_retry(post_id, data)
+        if featured_media:
+            data["featured_media"] = featured_media
+        
+        if extra_meta:
+            data.setdefault("meta", {}).update(extra_meta)
+        
+        if date is not None:
+            data.update(self.date_fields(date))
+        
+        return data
+    
+    def build_update_data(
+        self,
+        title: str,
+        content: Optional[str],
+        status: Optional[str] = "draft",
+        meta_description: Optional[str] = None,
+        featured_media: Optional[int] = None,
+        extra_meta: Optional[dict] = None,
+        date: Optional[datetime] = None
+    ) -> dict:
+        """更新用のリクエストボディを作成（content・statusがNoneならその項目を含めない）"""
+        data = {"title": title}
+        if status is not None:
+            data["status"] = status
+        if content is not None:
+            data["content"] = content
+        
+        if meta_description:
+            data["meta"] = {
+                "_yoast_wpseo_metadesc": meta_description
+            }
+        
+        if featured_media:
+            data["featured_media"] = featured_media
+        
+        if extra_meta:
+            data.setdefault("meta", {}).update(extra_meta)
+        
+        if date is not None:
+            data.update(self.date_fields(date))
+        
+        return data
+    
+    def _to_post_result(self, result: dict, action: str) -> PostResult:
+        """REST APIの投稿オブジェクトをPostResultに変換"""
+        return PostResult(
+            post_id=result['id'],
+            edit_url=f"{self.site_url}/wp-admin/post.php?post={result['id']}&action=edit",
+            view_url=result.get('link', ''),
+            status=result.get('status', 'draft'),
+            action=action,
+            modified=result.get('modified')
+        )
     
     def _post_with_retry(self, data: dict, action: str = "created") -> PostResult:
-        """リトライ付きPOST"""
+        """
+        リトライ付きPOST
+        
+        タイムアウト等で作成済みか分からない場合は、再送前にslugで照合し
+        作成済みならその投稿を結果として返す（重複投稿を防ぐ）
+        """
+        started_at = datetime.now(timezone.utc)
+        slug = data.get('slug')
+        
+        def reconcile() -> Optional[PostResult]:
+            if not slug:
+                return None
+            post = self._find_post_object(
+                slug,
+                modified_after=started_at - self.RECONCILE_CLOCK_SKEW
+            )
+            return self._to_post_result(post, action) if post else None
+        
+        return self._send_with_retry(
+            'post',
+            f"{self.api_url}/posts",
+            data,
+            expected_status=201,
+            action=action,
+            error_label="WordPress post failed",
+            reconcile=reconcile
+        )
+    
+    def _put_with_retry(self, post_id: int, data: dict) -> PostResult:
+        """リトライ付きPUT（同じ内容の再送は結果が変わらないため照合不要）"""
+        return self._send_with_retry(
+            'put',
+            f"{self.api_url}/posts/{post_id}",
+            data,
+            expected_status=200,
+            action="updated",
+            error_label="WordPress update failed",
+            not_found_message=f"WordPress post not found: {post_id}"
+        )
+    
+    def _send_with_retry(
+        self,
+        method: str,
+        url: str,
+        data: dict,
+        expected_status: int,
+        action: str,
+        error_label: str,
+        reconcile: Optional[Callable[[], Optional[PostResult]]] = None,
+        not_found_message: Optional[str] = None
+    ) -> PostResult:
+        """
+        RetryPolicyに従って送信
+        
+        - 接続エラー・タイムアウト・429/5xxのみ再試行（400等は即エラー）
+        - Retry-Afterヘッダーがあれば従う
+        - reconcile指定時、結果不明の失敗の後は再送前に照合する
+        """
+        policy = self.retry_policy
         last_error = None
         
-        for attempt in range(self.MAX_RETRIES):
+        for attempt in range(policy.max_attempts):
+            retry_after = None
+            ambiguous = False
+            
             try:
                 response = self._make_request(
-                    'post',
-                    f"{self.api_url}/posts",
+                    method,
+                    url,
                     json=data,
-                    timeout=30
+                    params={"_fields": self.POST_FIELDS},
+                    timeout=self.REQUEST_TIMEOUT
                 )
-                
-                if response.status_code == 201:
-                    result = response.json()
-                    return PostResult(
-                        post_id=result['id'],
-                        edit_url=f"{self.site_url}/wp-admin/post.php?post={result['id']}&action=edit",
-                        view_url=result.get('link', ''),
-                        status=result.get('status', 'draft'),
-                        action=action
-                    )
-                elif response.status_code == 401:
+            except requests.ConnectTimeout as e:
+                # 接続できていないので送信されていない
+                last_error = f"Connect timeout: {e}"
+            except (requests.Timeout, requests.ConnectionError) as e:
+                # 送信後に切れた可能性がある
+                last_error = str(e)
+                ambiguous = True
+            except requests.RequestException as e:
+                raise PublisherError(f"{error_label}: {e}")
+            else:
+                status = response.status_code
+                if status == expected_status:
+                    # 本文の解析は成功時だけ（失敗時はステータスで判断する）
+                    try:
+                        return self._to_post_result(response.json(), action)
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                    # 成功したが本文が読めない（プラグインの出力が混ざった等）: 作成済みなので照合して結果を得る
+                    result = reconcile() if reconcile is not None else None
+                    if result is not None:
+                        return result
+                    raise PublisherError(f"{error_label}: Invalid JSON response (HTTP {status})")
+                if status == 401:
                     raise PublisherError("WordPress auth failed: Invalid credentials")
-                elif response.status_code == 403:
+                if status == 403:
                     raise PublisherError("WordPress auth failed: Insufficient permissions")
-                else:
-                    last_error = f"HTTP {response.status_code}: {response.text}"
+                if status == 404 and not_found_message:
+                    raise PublisherError(not_found_message)
+                
+                last_error = f"HTTP {status}: {response.text}"
+                if not policy.is_retryable(status):
+                    raise PublisherError(f"{error_label}: {last_error}")
+                retry_after = response.headers.get('Retry-After')
+                ambiguous = status in self.AMBIGUOUS_STATUSES
+            
+            if attempt >= policy.max_attempts - 1:
+                break
+            
+            time.sleep(policy.delay(attempt, retry_after))
+            
+            if ambiguous and reconcile is not None:
+                result = reconcile()
+                if result is not None:
+                    return result
+        
+        raise PublisherError(f"{error_label}: {last_error}")
+    
+    def publish_batch(self, items: list[BatchItem]) -> list[BatchResult]:
+        """
+        複数の投稿をバッチAPI（/wp-json/batch/v1）でまとめて作成・更新
+        
+        - 最大25件ずつ1リクエストにまとめる
+        - 一時的なエラーで失敗したサブリクエストだけを再送する
+        - バッチAPIが使えないサーバーでは1件ずつ投稿する
+        
+        Args:
+            items: 投稿内容のリスト
+            
+        Returns:
+            list[BatchResult]: itemsと同じ順序の結果リスト
+            
+        Raises:
+            PublisherError: 認証エラー時
+        """
+        results = {id(item): BatchResult(item=item) for item in items}
+        pending = list(items)
+        started_at = datetime.now(timezone.utc)
+        
+        policy = self.retry_policy
+        for attempt in range(policy.max_attempts):
+            if not pending or self._batch_supported is False:
+                break
+            
+            retry = []
+            for start in range(0, len(pending), self.BATCH_MAX_REQUESTS):
+                chunk = pending[start:start + self.BATCH_MAX_REQUESTS]
+                responses = self._send_batch(chunk)
+                if responses is None:
+                    # バッチAPI非対応: 残りはすべて個別投稿へ（前のチャンクで再送対象になったものも残す）
+                    retry.extend(pending[start:])
+                    break
+                
+                for item, response in zip(chunk, responses):
+                    outcome = results[id(item)]
+                    status = response.get('status', 0)
+                    body = response.get('body') or {}
+                    expected = 200 if item.post_id else 201
                     
-            except PublisherError:
-                raise
-            except Exception as e:
-                last_error = str(e)
+                    if status == expected and isinstance(body, dict) and 'id' in body:
+                        outcome.result = self._to_post_result(body, item.action)
+                        outcome.error = None
+                    else:
+                        message = body.get('message', '') if isinstance(body, dict) else ''
+                        outcome.error = f"HTTP {status}: {message}".rstrip(': ')
+                        if policy.is_retryable(status) or status == 0:
+                            retry.append(item)
             
-            if attempt < self.MAX_RETRIES - 1:
-                time.sleep(self.RETRY_DELAY)
+            pending = retry
+            if pending and self._batch_supported is not False and attempt < policy.max_attempts - 1:
+                time.sleep(policy.delay(attempt))
+                pending = self._reconcile_pending_creates(pending, results, started_at)
+        
+        # バッチで処理できなかったものは1件ずつ
+        if pending and self._batch_supported is False:
+            for item in pending:
+                outcome = results[id(item)]
+                try:
+                    if item.post_id:
+                        outcome.result = self._put_with_retry(item.post_id, item.data)
+                    else:
+                        outcome.result = self._post_with_retry(item.data, action="created")
+                    outcome.error = None
+                except PublisherError as e:
+                    if 'auth failed' in str(e):
+                        raise
+                    outcome.error = str(e)
         
-        raise PublisherError(f"WordPress post failed: {last_error}")
+        return [results[id(item)] for item in items]
     
-    def _put_with_retry(self, post_id: int, data: dict) -> PostResult:
-        """リトライ付きPUT"""
-        last_error = None
+    def _reconcile_pending_creates(
+        self,
+        pending: list[BatchItem],
+        results: dict,
+        started_at: datetime
+    ) -> list[BatchItem]:
+        """
+        結果不明のまま失敗した新規作成を、再送前にslugで照合
+        作成済みだったものは結果を埋めて再送対象から外す
+        """
+        remaining = []
+        for item in pending:
+            outcome = results[id(item)]
+            ambiguous = outcome.error is not None and (
+                outcome.error.startswith('HTTP 0')
+                or any(outcome.error.startswith(f'HTTP {code}') for code in self.AMBIGUOUS_STATUSES)
+            )
+            slug = item.data.get('slug')
+            if item.post_id or not ambiguous or not slug:
+                remaining.append(item)
+                continue
+            
+            post = self._find_post_object(slug, modified_after=started_at - self.RECONCILE_CLOCK_SKEW)
+            if post:
+                outcome.result = self._to_post_result(post, item.action)
+                outcome.error = None
+            else:
+                remaining.append(item)
+        return remaining
+    
+    def _send_batch(self, chunk: list[BatchItem]) -> Optional[list[dict]]:
+        """
+        バッチリクエストを1回送信
+        
+        Returns:
+            list[dict] or None: サブリクエストごとのレスポンス。バッチAPI非対応ならNone
+        """
+        requests_body = []
+        for item in chunk:
+            if item.post_id:
+                requests_body.append({
+                    "method": "PUT",
+                    "path": f"/wp/v2/posts/{item.post_id}?_fields={self.POST_FIELDS}",
+                    "body": item.data,
+                })
+            else:
+                requests_body.append({
+                    "method": "POST",
+                    "path": f"/wp/v2/posts?_fields={self.POST_FIELDS}",
+                    "body": item.data,
+                })
+        
+        try:
+            response = self._make_request(
+                'post',
+                self.batch_url,
+                json={"validation": "normal", "requests": requests_body},
+                timeout=60
+            )
+        except Exception as e:
+            # 通信エラーは全件を再送対象にする
+            return [{"status": 0, "body": {"message": str(e)}} for _ in chunk]
         
-        for attempt in range(self.MAX_RETRIES):
+        if response.status_code == 401:
+            raise PublisherError("WordPress auth failed: Invalid credentials")
+        if response.status_code == 403:
+            raise PublisherError("WordPress auth failed: Insufficient permissions")
+        
+        status_code = response.status_code
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        
+        if status_code in (200, 207):
+            responses = body.get('responses') if isinstance(body, dict) else None
+            if isinstance(responses, list) and len(responses) == len(chunk):
+                self._batch_supported = True
+                return responses
+            # 処理されたか分からない: 結果不明として照合・再送に回す
+            return [{"status": 0, "body": {"message": "Invalid batch response"}} for _ in chunk]
+        
+        code = body.get('code') if isinstance(body, dict) else None
+        if status_code == 404 or code == 'rest_no_route':
+            # ルートがない: バッチAPI非対応
+            self._batch_supported = False
+            return None
+        
+        if status_code == 413 and len(chunk) > 1:
+            # 本文の大きい記事が重なった: 半分ずつ送り直す
+            middle = len(chunk) // 2
+            first = self._send_batch(chunk[:middle])
+            if first is None:
+                return None
+            second = self._send_batch(chunk[middle:])
+            if second is None:
+                # 前半は処理済みのため、後半だけ失敗として返す（全件を個別投稿に回すと前半が重複する）
+                second = [{"status": 404, "body": {"message": "Batch API not available"}} for _ in chunk[middle:]]
+            return first + second
+        
+        # 429/5xxは再送対象、それ以外（400・1件でも大きすぎる413等）はチャンクの全件を失敗にする
+        message = body.get('message', '') if isinstance(body, dict) else ''
+        return [{"status": status_code, "body": {"message": message}} for _ in chunk]
+    
+    def upload_media(
+        self,
+        file_path: str,
+        mime_type: str,
+        filename: Optional[str] = None
+    ) -> dict:
+        """
+        メディアライブラリにファイルをアップロード
+        ファイルはメモリに読み込まずストリーミングで送信する
+        
+        Args:
+            file_path: アップロードするファイル
+            mime_type: MIMEタイプ（例: image/webp）
+            filename: WordPress上のファイル名（省略時は元のファイル名）
+            
+        Returns:
+            dict: 作成されたメディア（id, source_url）
+            
+        Raises:
+            PublisherError: アップロード失敗時
+        """
+        path = Path(file_path)
+        name = filename or path.name
+        headers = {
+            "Content-Type": mime_type,
+            "Content-Length": str(path.stat().st_size),
+            "Content-Disposition": (
+                f'attachment; filename="{quote(name)}"; '
+                f"filename*=UTF-8''{quote(name)}"
+            ),
+        }
+        
+        policy = self.retry_policy
+        last_error = None
+        for attempt in range(policy.max_attempts):
+            retry_after = None
             try:
-                response = self._make_request(
-                    'put',
-                    f"{self.api_url}/posts/{post_id}",
-                    json=data,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return PostResult(
-                        post_id=result['id'],
-                        edit_url=f"{self.site_url}/wp-admin/post.php?post={result['id']}&action=edit",
-                        view_url=result.get('link', ''),
-                        status=result.get('status', 'draft'),
-                        action="updated"
+                with open(path, 'rb') as f:
+                    response = self._make_request(
+                        'post',
+                        f"{self.api_url}/media",
+                        data=f,
+                        headers=headers,
+                        params={"_fields": "id,source_url"},
+                        timeout=120
                     )
-                elif response.status_code == 401:
-                    raise PublisherError("WordPress auth failed: Invalid credentials")
-                elif response.status_code == 404:
-                    raise PublisherError(f"WordPress post not found: {post_id}")
-                else:
-                    last_error = f"HTTP {response.status_code}: {response.text}"
-                    
-            except PublisherError:
-                raise
-            except Exception as e:
+            except OSError as e:
+                raise PublisherError(f"Failed to read media file: {e}")
+            except requests.RequestException as e:
                 last_error = str(e)
+            else:
+                if response.status_code == 201:
+                    return response.json()
+                if response.status_code in (401, 403):
+                    raise PublisherError("WordPress auth failed: Cannot upload media")
+                last_error = f"HTTP {response.status_code}: {response.text}"
+                if not policy.is_retryable(response.status_code):
+                    break
+                retry_after = response.headers.get('Retry-After')
             
-            if attempt < self.MAX_RETRIES - 1:
-                time.sleep(self.RETRY_DELAY)
+            if attempt < policy.max_attempts - 1:
+                time.sleep(policy.delay(attempt, retry_after))
         
-        raise PublisherError(f"WordPress update failed: {last_error}")
+        raise PublisherError(f"WordPress media upload failed: {last_error}")
     
     def get_category_id(self, category_name: str) -> Optional[int]:
         """
@@ -298,7 +918,7 @@ class Publisher:
                 response = self._make_request(
                     'get',
                     f"{self.api_url}/categories",
-                    params={"per_page": 100},
+                    params={"per_page": 100, "_fields": self.TERM_FIELDS},
                     timeout=10
                 )
                 if response.status_code == 200:
@@ -328,7 +948,7 @@ class Publisher:
                 response = self._make_request(
                     'get',
                     f"{self.api_url}/tags",
-                    params={"per_page": 100},
+                    params={"per_page": 100, "_fields": self.TERM_FIELDS},
                     timeout=10
                 )
                 if response.status_code == 200:
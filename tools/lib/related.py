@@ -0,0 +1,562 @@
+"""
+Related - 関連記事の提案モジュール
+過去記事の文字n-gramのTF-IDFベクトルを索引にしておき、生成中の記事とのコサイン類似度で
+関連記事を選んで、記事末尾の「関連記事」セクション（type: related）として挿入する
+
+日本語は単語の区切りが無いため、形態素解析の代わりに文字bigramを語として数える。
+行列（記事×語）は語の出現回数だけを保存し、読み込み後の最初の検索でTF-IDFの重みを計算する。
+numpy/scipyがあれば疎行列とベクトルの積で、無ければ語ごとの転置リストで類似度を求める。
+索引はプロセス内で1つだけ開き（open_related_index）、投稿した記事はメモリ上の重みに差分として
+加えて、実行・バッチの終わりにsaveでまとめて書き出す
+
+    index = open_related_index(config)
+    for post in index.query(article_json, title, slug):
+        ...
+"""
+import base64
+import json
+import math
+import os
+import threading
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .sections import Article
+from .similarity import normalize_text, section_texts
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+
+# 索引ファイルの形式（変わったら作り直す）
+INDEX_FORMAT = 1
+
+# 多くの記事に出る語（「する」「ます」等）を除くのは、記事数がこれ以上の時だけ
+MIN_DOCS_FOR_MAX_DF = 10
+
+# numpy/scipyが無い時に類似度の計算に使う、記事側の語の数（重みの大きい順）
+# 転置リストを全語でたどると記事数に比例して遅くなるため。上位の語だけでも順位はほぼ変わらない
+QUERY_TERMS = 100
+
+# 重みを計算した後に追加・削除した記事がこの数（または記事数の1割）を超えたら重みを計算し直す
+# それまでは追加した記事を計算済みのIDFで重み付けし、削除した記事の行は使わない
+MAX_PENDING_DOCS = 20
+
+# 記事本文に挿入するセクションのタイプ
+SECTION_TYPE = 'related'
+
+
+def term_counts(text: str, n: int) -> dict[str, int]:
+    """正規化した本文の文字n-gramの出現回数"""
+    text = normalize_text(text)
+    counts = {}
+    for i in range(len(text) - n + 1):
+        gram = text[i:i + n]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def article_text(article: Article, title: str = '') -> str:
+    """索引に使う本文（タイトル・ポイント・各節・まとめ）"""
+    parts = [title] if title else []
+    if article.points:
+        parts.extend(article.points.items)
+    parts.extend(text for _, text in section_texts(article))
+    if article.summary:
+        parts.extend(article.summary.items)
+    return "\n".join(parts)
+
+
+@dataclass
+class RelatedPost:
+    """関連記事の候補"""
+    slug: str
+    title: str
+    url: str
+    score: float    # コサイン類似度
+
+
+class _Doc:
+    """索引に登録した記事（語IDと出現回数）"""
+
+    __slots__ = ('title', 'url', 'terms', 'counts')
+
+    def __init__(self, title: str, url: str, terms: array, counts: array):
+        self.title = title
+        self.url = url
+        self.terms = terms
+        self.counts = counts
+
+
+class RelatedIndex:
+    """記事の文字n-gram出現回数を持つ索引
+
+    output/related_index.json に
+    {"format", "params": {ngram}, "terms": [語...], "docs": {slug: [タイトル, URL, 語ID(base64), 回数(base64)]}}
+    の形で保存する（重み・文書頻度は読み込み後に計算する）
+
+    複数のスレッド（並行実行・複数の投稿先）から同じ索引を使うため、読み書きはロックして行う
+    """
+
+    def __init__(
+        self,
+        index_file: str = "output/related_index.json",
+        ngram: int = 2,
+        limit: int = 3,
+        min_score: float = 0.05,
+        max_df: float = 0.5
+    ):
+        """
+        Args:
+            index_file: 索引ファイルのパス
+            ngram: n-gramの文字数
+            limit: 提案する関連記事の最大数
+            min_score: 提案するコサイン類似度の下限
+            max_df: これより多くの記事（割合）に出る語は類似度の計算に使わない
+        """
+        self.index_file = Path(index_file)
+        self.ngram = ngram
+        self.limit = limit
+        self.min_score = min_score
+        self.max_df = max_df
+        self.terms: list[str] = []
+        self.vocab: dict[str, int] = {}
+        self.df: list[int] = []
+        self.docs: dict[str, _Doc] = {}
+        self.dirty = False
+        self._model = None
+        self._rows: dict[str, int] = {}                                 # 重みを計算済みの記事の行
+        self._dead: set[int] = set()                                    # 計算後に削除・更新した記事の行
+        self._pending: dict[str, tuple[list[int], list[float]]] = {}    # 計算後に追加した記事の重み
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._load()
+
+    @classmethod
+    def from_config(cls, config) -> 'RelatedIndex':
+        """config.yamlのrelatedセクションから作成"""
+        return cls(
+            index_file=config.get('related', 'index_file', default='output/related_index.json'),
+            ngram=int(config.get('related', 'ngram', default=2)),
+            limit=int(config.get('related', 'limit', default=3)),
+            min_score=float(config.get('related', 'min_score', default=0.05)),
+            max_df=float(config.get('related', 'max_df', default=0.5)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.docs
+
+    def slugs(self) -> list[str]:
+        """登録済みの記事のスラッグ"""
+        with self._lock:
+            return list(self.docs)
+
+    # ========== 保存 ==========
+
+    def _file_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = self.index_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        self._stamp = self._file_stamp()
+        if self._stamp is None:
+            return
+        try:
+            data = json.loads(self.index_file.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return
+        # 形式・パラメータが変わった索引は使わない（--index-relatedで作り直す）
+        if data.get('format') != INDEX_FORMAT or data.get('params') != {'ngram': self.ngram}:
+            return
+        self.terms = data.get('terms', [])
+        self.vocab = {term: term_id for term_id, term in enumerate(self.terms)}
+        self.df = [0] * len(self.terms)
+        df = self.df
+        for slug, (title, url, encoded_terms, encoded_counts) in data.get('docs', {}).items():
+            terms = array('I')
+            terms.frombytes(base64.b64decode(encoded_terms))
+            counts = array('I')
+            counts.frombytes(base64.b64decode(encoded_counts))
+            self.docs[slug] = _Doc(title, url, terms, counts)
+            for term_id in terms:
+                df[term_id] += 1
+
+    def refresh(self):
+        """他のプロセス（--index-related等）が索引ファイルを書き換えていれば読み込み直す
+
+        未保存の更新がある時は読み込み直さない（次のsaveで上書きする）
+        """
+        with self._lock:
+            if self.dirty or self._file_stamp() == self._stamp:
+                return
+            self.terms = []
+            self.vocab = {}
+            self.df = []
+            self.docs.clear()
+            self._reset_model()
+            self._load()
+
+    def save(self):
+        with self._lock:
+            self._compact()
+            docs = {
+                slug: [
+                    doc.title,
+                    doc.url,
+                    base64.b64encode(doc.terms.tobytes()).decode('ascii'),
+                    base64.b64encode(doc.counts.tobytes()).decode('ascii'),
+                ]
+                for slug, doc in self.docs.items()
+            }
+            try:
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                # 一時ファイル名はプロセス・スレッドごとに分ける（同時に保存しても互いに消さない）
+                tmp = self.index_file.with_name(
+                    f"{self.index_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+                )
+                tmp.write_text(
+                    json.dumps(
+                        {'format': INDEX_FORMAT, 'params': {'ngram': self.ngram},
+                         'terms': self.terms, 'docs': docs},
+                        ensure_ascii=False
+                    ),
+                    encoding='utf-8'
+                )
+                tmp.replace(self.index_file)
+            except OSError as e:
+                # 保存失敗は警告のみ（次回の投稿時に追加し直す）
+                print(f"Warning: Failed to save related index: {e}")
+                return
+            self.dirty = False
+            self._stamp = self._file_stamp()
+
+    def save_if_dirty(self):
+        """更新があれば保存"""
+        if self.dirty:
+            self.save()
+
+    def _compact(self):
+        """どの記事にも出なくなった語が4分の1を超えたら語IDを振り直す"""
+        unused = self.df.count(0)
+        if unused * 4 <= len(self.terms):
+            return
+        remap = {}
+        terms = []
+        for term_id, term in enumerate(self.terms):
+            if self.df[term_id]:
+                remap[term_id] = len(terms)
+                terms.append(term)
+        for doc in self.docs.values():
+            doc.terms = array('I', (remap[term_id] for term_id in doc.terms))
+        self.terms = terms
+        self.vocab = {term: term_id for term_id, term in enumerate(terms)}
+        self.df = [df for df in self.df if df]
+        self._reset_model()
+
+    # ========== 索引 ==========
+
+    def _term_ids(self, counts: dict[str, int], add: bool) -> tuple[array, array]:
+        """語の出現回数を語IDの配列に変換（addがFalseなら未知の語は捨てる）"""
+        terms = array('I')
+        values = array('I')
+        vocab = self.vocab
+        for term, count in counts.items():
+            term_id = vocab.get(term)
+            if term_id is None:
+                if not add:
+                    continue
+                term_id = vocab[term] = len(self.terms)
+                self.terms.append(term)
+                self.df.append(0)
+            terms.append(term_id)
+            values.append(count)
+        return terms, values
+
+    def update(self, slug: str, article: Article, title: str = '', url: str = ''):
+        """記事を登録し直す（保存はsaveで行う。計算済みの重みには差分として加える）"""
+        counts = term_counts(article_text(article, title), self.ngram)
+        with self._lock:
+            self.remove(slug)
+            if not counts:
+                return
+            terms, values = self._term_ids(counts, add=True)
+            for term_id in terms:
+                self.df[term_id] += 1
+            self.docs[slug] = _Doc(title or slug, url, terms, values)
+            self.dirty = True
+            if self._model is not None:
+                self._pending[slug] = self._weights(terms, values, self._model[1], self._new_idf())
+
+    def remove(self, slug: str):
+        with self._lock:
+            doc = self.docs.pop(slug, None)
+            if doc is None:
+                return
+            for term_id in doc.terms:
+                self.df[term_id] -= 1
+            self.dirty = True
+            if self._model is not None:
+                self._pending.pop(slug, None)
+                row = self._rows.get(slug)
+                if row is not None:
+                    self._dead.add(row)
+
+    def build(self, articles: Iterable[tuple[Article, str, str]]) -> int:
+        """(記事, タイトル, URL)の一覧から作り直す（登録した記事数を返す）"""
+        with self._lock:
+            self.terms = []
+            self.vocab = {}
+            self.df = []
+            self.docs.clear()
+            self._reset_model()
+            for article, title, url in articles:
+                if article.slug:
+                    self.update(article.slug, article, title, url)
+            self.dirty = True
+            return len(self.docs)
+
+    # ========== 重み ==========
+
+    def _idf(self) -> list[float]:
+        """語ごとのIDF（多くの記事に出る語は0）"""
+        n = len(self.docs)
+        max_df = self.max_df * n if n >= MIN_DOCS_FOR_MAX_DF else n
+        return [
+            math.log((1 + n) / (1 + df)) + 1 if 0 < df <= max_df else 0.0
+            for df in self.df
+        ]
+
+    def _new_idf(self) -> float:
+        """重みの計算後に初めて出た語のIDF（計算時の記事数で、1記事にだけ出る語として扱う）"""
+        n = len(self._model[0])
+        return math.log((1 + n) / 2) + 1
+
+    def _weights(
+        self,
+        terms: array,
+        counts: array,
+        idf: list[float],
+        new_idf: float = 0.0
+    ) -> tuple[list[int], list[float]]:
+        """語IDと出現回数を、長さ1に正規化したTF-IDF（tfは1+log）に変換
+
+        idfに無い語（重みの計算後に初めて出た語）はnew_idfで重み付けする
+        """
+        ids = []
+        weights = []
+        known = len(idf)
+        for term_id, count in zip(terms, counts):
+            weight = (1.0 + math.log(count)) * (idf[term_id] if term_id < known else new_idf)
+            if weight:
+                ids.append(term_id)
+                weights.append(weight)
+        norm = math.sqrt(sum(weight * weight for weight in weights))
+        if norm:
+            weights = [weight / norm for weight in weights]
+        return ids, weights
+
+    def _reset_model(self):
+        self._model = None
+        self._rows = {}
+        self._dead = set()
+        self._pending = {}
+
+    def _build_model(self):
+        """登録済みの記事の重みを計算（numpy/scipyがあれば疎行列、無ければ転置リスト）"""
+        self._reset_model()
+        idf = self._idf()
+        slugs = list(self.docs)
+        self._rows = {slug: row for row, slug in enumerate(slugs)}
+
+        if sparse is not None:
+            indptr = [0]
+            indices = []
+            data = []
+            for slug in slugs:
+                doc = self.docs[slug]
+                ids, weights = self._weights(doc.terms, doc.counts, idf)
+                indices.extend(ids)
+                data.extend(weights)
+                indptr.append(len(indices))
+            matrix = sparse.csr_matrix(
+                (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr)),
+                shape=(len(slugs), len(self.terms))
+            )
+            self._model = (slugs, idf, matrix)
+            return
+
+        postings: dict[int, tuple[list[int], list[float]]] = {}
+        for row, slug in enumerate(slugs):
+            doc = self.docs[slug]
+            for term_id, weight in zip(*self._weights(doc.terms, doc.counts, idf)):
+                posting = postings.get(term_id)
+                if posting is None:
+                    posting = postings[term_id] = ([], [])
+                posting[0].append(row)
+                posting[1].append(weight)
+        self._model = (slugs, idf, postings)
+
+    def _scores(self, counts: dict[str, int]) -> tuple[list[str], list[float]]:
+        """登録済みの各記事とのコサイン類似度（削除した記事は-1）"""
+        changed = len(self._pending) + len(self._dead)
+        if self._model is None or changed > max(MAX_PENDING_DOCS, len(self.docs) // 10):
+            self._build_model()
+        slugs, idf, model = self._model
+        terms, values = self._term_ids(counts, add=False)
+        ids, weights = self._weights(terms, values, idf, self._new_idf())
+
+        if sparse is not None:
+            columns = model.shape[1]
+            vector = np.zeros(columns, dtype=np.float32)
+            for term_id, weight in zip(ids, weights):
+                if term_id < columns:
+                    vector[term_id] = weight
+            scores = (model @ vector).tolist()
+        else:
+            scores = [0.0] * len(slugs)
+            top = sorted(zip(weights, ids), reverse=True)[:QUERY_TERMS]
+            # 追加した記事との類似度も同じ語だけで計算する（登録済みの記事と比べられるように）
+            weights, ids = [weight for weight, _ in top], [term_id for _, term_id in top]
+            for weight, term_id in top:
+                posting = model.get(term_id)
+                if posting is None:
+                    continue
+                for row, doc_weight in zip(*posting):
+                    scores[row] += weight * doc_weight
+
+        for row in self._dead:
+            scores[row] = -1.0
+        if not self._pending:
+            return slugs, scores
+        vector = dict(zip(ids, weights))
+        slugs = slugs + list(self._pending)
+        for doc_ids, doc_weights in self._pending.values():
+            scores.append(sum(vector.get(term_id, 0.0) * weight for term_id, weight in zip(doc_ids, doc_weights)))
+        return slugs, scores
+
+    # ========== 検索 ==========
+
+    def query(
+        self,
+        article_json: dict,
+        title: str = '',
+        slug: str = '',
+        exclude: Iterable[str] = ()
+    ) -> list[RelatedPost]:
+        """
+        記事に近い登録済みの記事を探す
+
+        Args:
+            article_json: 記事JSON
+            title: 記事タイトル
+            slug: 記事のスラッグ（自分自身は候補にしない）
+            exclude: 候補にしないスラッグ（ゴミ箱の投稿など）
+
+        Returns:
+            list[RelatedPost]: 類似度の高い順に最大limit件
+        """
+        if not self.docs or self.limit <= 0:
+            return []
+        counts = term_counts(article_text(Article.from_dict(article_json), title), self.ngram)
+        if not counts:
+            return []
+        with self._lock:
+            return self._rank(counts, slug, exclude)
+
+    def _rank(self, counts: dict[str, int], slug: str, exclude: Iterable[str]) -> list[RelatedPost]:
+        slugs, scores = self._scores(counts)
+
+        skip = set(exclude)
+        skip.add(slug)
+        ranked = sorted(
+            (row for row, score in enumerate(scores) if score >= self.min_score and slugs[row] not in skip),
+            key=lambda row: -scores[row]
+        )
+        result = []
+        for row in ranked[:self.limit]:
+            doc = self.docs[slugs[row]]
+            result.append(RelatedPost(slugs[row], doc.title, doc.url, round(scores[row], 4)))
+        return result
+
+
+def related_section(posts: list[RelatedPost], title: str = '関連記事') -> dict:
+    """関連記事をBlockGeneratorのrelatedセクションにする"""
+    return {
+        'type': SECTION_TYPE,
+        'title': title,
+        'items': [{'title': post.title, 'url': post.url} for post in posts],
+    }
+
+
+def with_related(article_json: dict, posts: list[RelatedPost], title: str = '関連記事') -> dict:
+    """sectionsの末尾に関連記事を加えた記事JSON（元の記事JSONは変更しない）"""
+    if not posts:
+        return article_json
+    sections = [
+        section for section in article_json.get('sections') or []
+        if not (isinstance(section, dict) and section.get('type') == SECTION_TYPE)
+    ]
+    sections.append(related_section(posts, title))
+    return {**article_json, 'sections': sections}
+
+
+def post_url(config, slug: str) -> str:
+    """記事のURL（related.url_templateの {site_url} と {slug} を置き換える）"""
+    template = config.get('related', 'url_template', default='/{slug}/')
+    site_url = (config.get('wordpress', 'site_url') or '').rstrip('/')
+    return template.format(site_url=site_url, slug=slug)
+
+
+# 開いた索引（索引ファイルと設定ごとにプロセス内で1つ）
+_registry: dict[tuple, RelatedIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def open_related_index(config) -> Optional[RelatedIndex]:
+    """
+    関連記事の索引（related.enabledがfalseならNone）
+
+    同じ索引ファイル・設定ならプロセス内で同じ索引を返す（記事ごとに読み込み・重みの計算をしない）。
+    他のプロセスが索引ファイルを書き換えていれば読み込み直す
+    """
+    if not config.get('related', 'enabled', default=True):
+        return None
+    index_file = config.get('related', 'index_file', default='output/related_index.json')
+    key = (
+        str(Path(index_file).resolve()),
+        int(config.get('related', 'ngram', default=2)),
+        int(config.get('related', 'limit', default=3)),
+        float(config.get('related', 'min_score', default=0.05)),
+        float(config.get('related', 'max_df', default=0.5)),
+    )
+    with _registry_lock:
+        index = _registry.get(key)
+        if index is None:
+            index = _registry[key] = RelatedIndex.from_config(config)
+            return index
+    index.refresh()
+    return index
+
+
+if __name__ == "__main__":
+    # テスト用: アーカイブの記事ごとに関連記事を表示
+    import sys
+    from .archive import Archive
+    archive = Archive.from_dirs(sys.argv[1:] or ['../block-html/posts'])
+    index = RelatedIndex(index_file='/dev/null')
+    index.build((article, article.slug, '') for article in archive)
+    for article in archive:
+        posts = index.query(article.to_dict(), slug=article.slug)
+        print(f"{article.slug}: " + ", ".join(f"{post.slug} ({post.score:.2f})" for post in posts))
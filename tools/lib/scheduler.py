@@ -0,0 +1,417 @@
+"""
+Scheduler - 予約投稿モジュール
+原稿のscheduled_atを優先度付きキュー（heapq）で管理し、閑散時間帯に構造化・HTML生成を
+前倒しで済ませてから、予約投稿（WordPressのfuture）または期限到来時に投稿する
+"""
+import heapq
+import itertools
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time as dt_time, timedelta, tzinfo
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import yaml
+
+
+# ジョブの状態
+PENDING = 'pending'      # 未準備
+PREPARED = 'prepared'    # 構造化・HTML生成済み
+DONE = 'done'            # 投稿（予約）済み
+FAILED = 'failed'        # 再試行回数を超えて失敗
+
+MODE_FUTURE = 'future'   # 準備でき次第WordPressに予約投稿（status=future）
+MODE_AT_DUE = 'at_due'   # 期限到来時にこちらから公開
+
+
+class SchedulerError(Exception):
+    """Scheduler関連のエラー"""
+    pass
+
+
+def parse_scheduled_at(value, tz: Optional[tzinfo] = None) -> datetime:
+    """
+    フロントマターのscheduled_atをdatetimeに変換
+
+    YAMLが解釈したdatetime/date、または "YYYY-MM-DD HH:MM[:SS]" 形式の文字列。
+    tz指定時はタイムゾーン無しの値をtzの時刻とみなしてtz付きで返す。
+    tz未指定時はローカル時刻（タイムゾーン無し）に揃える
+
+    Raises:
+        SchedulerError: 解釈できない時
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime.combine(value, dt_time())
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.strip())
+        except ValueError:
+            raise SchedulerError(f"Invalid scheduled_at: {value!r}")
+    else:
+        raise SchedulerError(f"Invalid scheduled_at: {value!r}")
+
+    if tz is not None:
+        return parsed.replace(tzinfo=tz) if parsed.tzinfo is None else parsed.astimezone(tz)
+    if parsed.tzinfo is not None:
+        return parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _timestamp(due: datetime) -> float:
+    return due.timestamp()
+
+
+@dataclass
+class ScheduledJob:
+    """予約投稿ジョブ"""
+    slug: str
+    source_file: str
+    scheduled_at: str  # ISO形式
+    state: str = PENDING
+    attempts: int = 0
+    retry_at: Optional[str] = None
+    prepared_at: Optional[str] = None
+    html_file: Optional[str] = None
+    extra_meta: dict = field(default_factory=dict)
+    post_id: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def due(self) -> datetime:
+        return datetime.fromisoformat(self.scheduled_at)
+
+    def ready(self, now: datetime) -> bool:
+        """再試行待ちでないか"""
+        return self.retry_at is None or datetime.fromisoformat(self.retry_at) <= now
+
+
+class ScheduleQueue:
+    """scheduled_at順の優先度付きキュー（YAMLファイルに永続化）"""
+
+    def __init__(self, queue_file: str = "output/schedule_queue.yaml"):
+        """
+        Args:
+            queue_file: キューの保存先
+        """
+        self.queue_file = Path(queue_file)
+        self.jobs: dict[str, ScheduledJob] = {}
+        # (タイムスタンプ, 連番, slug)。日時変更時は古い要素を残し、取り出し時に読み捨てる
+        self._heap: list[tuple[float, int, str]] = []
+        # slug → 現在有効なヒープ要素の連番（同じ日時に戻した時に古い要素を区別する）
+        self._entries: dict[str, int] = {}
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+        self._load()
+
+    # ========== 永続化 ==========
+
+    def _load(self):
+        if not self.queue_file.exists():
+            return
+        try:
+            data = yaml.safe_load(self.queue_file.read_text(encoding='utf-8')) or []
+        except Exception as e:
+            raise SchedulerError(f"Failed to load schedule queue: {e}")
+        for entry in data:
+            job = ScheduledJob(**entry)
+            self.jobs[job.slug] = job
+        self._rebuild_heap()
+
+    def save(self):
+        with self._lock:
+            try:
+                self.queue_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.queue_file.with_suffix(self.queue_file.suffix + '.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    yaml.dump(
+                        [asdict(job) for job in self.ordered()],
+                        f,
+                        allow_unicode=True,
+                        default_flow_style=False,
+                        sort_keys=False
+                    )
+                tmp.replace(self.queue_file)
+            except Exception as e:
+                # キュー保存失敗は警告のみ（次回起動時に原稿から登録し直せる）
+                print(f"Warning: Failed to save schedule queue: {e}")
+
+    def _rebuild_heap(self):
+        self._heap = []
+        self._entries = {}
+        for job in self.jobs.values():
+            if job.state in (PENDING, PREPARED):
+                self._push(job)
+
+    def _push(self, job: ScheduledJob):
+        seq = next(self._counter)
+        self._entries[job.slug] = seq
+        heapq.heappush(self._heap, (_timestamp(job.due), seq, job.slug))
+
+    # ========== 操作 ==========
+
+    def add(self, slug: str, source_file: str, scheduled_at: datetime) -> ScheduledJob:
+        """
+        ジョブを登録（同じスラッグは日時・原稿を差し替えて準備からやり直す）
+        """
+        with self._lock:
+            job = ScheduledJob(
+                slug=slug,
+                source_file=source_file,
+                scheduled_at=scheduled_at.isoformat(),
+            )
+            self.jobs[slug] = job
+            # 以前の要素は連番が変わるので取り出し時に読み捨てられる
+            self._push(job)
+            self.save()
+            return job
+
+    def remove(self, slug: str) -> bool:
+        with self._lock:
+            if self.jobs.pop(slug, None) is None:
+                return False
+            self._entries.pop(slug, None)
+            self.save()
+            return True
+
+    def _live(self, entry: tuple[float, int, str]) -> Optional[ScheduledJob]:
+        """ヒープ要素が現在のジョブを指していればそのジョブ"""
+        _, seq, slug = entry
+        job = self.jobs.get(slug)
+        if job is None or job.state not in (PENDING, PREPARED):
+            return None
+        if self._entries.get(slug) != seq:
+            return None
+        return job
+
+    def _compact(self):
+        """先頭の無効な要素を捨てる"""
+        while self._heap and self._live(self._heap[0]) is None:
+            heapq.heappop(self._heap)
+
+    def peek(self) -> Optional[ScheduledJob]:
+        """最も早いジョブ"""
+        with self._lock:
+            self._compact()
+            return self.jobs[self._heap[0][2]] if self._heap else None
+
+    def ordered(self) -> list[ScheduledJob]:
+        """全ジョブ（日時順）"""
+        return sorted(self.jobs.values(), key=lambda job: _timestamp(job.due))
+
+    def upcoming(self, until: datetime) -> Iterator[ScheduledJob]:
+        """untilまでに期限が来る未完了のジョブを日時順に返す"""
+        with self._lock:
+            self._compact()
+            limit = _timestamp(until)
+            for entry in heapq.nsmallest(len(self._heap), self._heap):
+                if entry[0] > limit:
+                    break
+                job = self._live(entry)
+                if job is not None:
+                    yield job
+
+    def pop_due(self, now: datetime) -> Optional[ScheduledJob]:
+        """期限が来たジョブを1件取り出す（無ければNone）"""
+        with self._lock:
+            self._compact()
+            if not self._heap or self._heap[0][0] > _timestamp(now):
+                return None
+            _, _, slug = heapq.heappop(self._heap)
+            del self._entries[slug]
+            return self.jobs[slug]
+
+    def requeue(self, job: ScheduledJob):
+        """pop_due()したジョブを戻す（再試行待ち）"""
+        with self._lock:
+            self._push(job)
+            self.save()
+
+
+class Scheduler:
+    """予約投稿の実行ループ
+
+    prepare(job): 構造化・HTML生成を行い、job.html_file等を設定する
+    publish(job, mode): WordPressに投稿し、job.post_idを設定する
+    """
+
+    def __init__(
+        self,
+        queue: ScheduleQueue,
+        prepare: Callable[[ScheduledJob], None],
+        publish: Callable[[ScheduledJob, str], None],
+        mode: str = MODE_FUTURE,
+        prepare_ahead: timedelta = timedelta(hours=24),
+        min_lead: timedelta = timedelta(hours=1),
+        off_peak: Optional[tuple[dt_time, dt_time]] = None,
+        poll_interval: float = 60.0,
+        max_attempts: int = 3,
+        retry_delay: timedelta = timedelta(minutes=10),
+        tz: Optional[tzinfo] = None,
+        log: Callable[[str], None] = print
+    ):
+        """
+        Args:
+            queue: ジョブキュー
+            prepare: 準備処理（構造化・HTML生成）
+            publish: 投稿処理
+            mode: future（準備後すぐ予約投稿）/ at_due（期限到来時に公開）
+            prepare_ahead: 何時間前から準備を始めるか
+            min_lead: 閑散時間帯でなくても準備を始める残り時間
+            off_peak: 準備を行う時間帯（開始, 終了）。Noneなら常時
+            poll_interval: 最大待機秒数
+            max_attempts: 失敗時の最大試行回数
+            retry_delay: 再試行までの待ち時間（試行回数倍）
+            tz: サイトのタイムゾーン（parse_scheduled_atに渡したものと同じ）
+            log: ログ出力関数
+        """
+        if mode not in (MODE_FUTURE, MODE_AT_DUE):
+            raise SchedulerError(f"Unknown scheduler mode: {mode}")
+
+        self.queue = queue
+        self.prepare = prepare
+        self.publish = publish
+        self.mode = mode
+        self.prepare_ahead = prepare_ahead
+        self.min_lead = min_lead
+        self.off_peak = off_peak
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.tz = tz
+        self.log = log
+        self._stop = threading.Event()
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz) if self.tz is not None else datetime.now()
+
+    def in_off_peak(self, now: datetime) -> bool:
+        """閑散時間帯か（日付をまたぐ指定にも対応）"""
+        if self.off_peak is None:
+            return True
+        start, end = self.off_peak
+        current = now.time()
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    def _fail(self, job: ScheduledJob, error: Exception, now: datetime):
+        job.attempts += 1
+        job.error = str(error)
+        if job.attempts >= self.max_attempts:
+            job.state = FAILED
+            self.log(f"✗ {job.slug}: {error}（{job.attempts}回失敗したため中止）")
+        else:
+            job.retry_at = (now + self.retry_delay * job.attempts).isoformat()
+            self.log(f"⚠ {job.slug}: {error}（{job.retry_at}に再試行）")
+
+    def _prepare(self, job: ScheduledJob, now: datetime):
+        try:
+            self.prepare(job)
+        except Exception as e:
+            self._fail(job, e, now)
+            return
+        job.state = PREPARED
+        job.prepared_at = now.isoformat()
+        job.retry_at = None
+        job.error = None
+        self.log(f"✓ {job.slug}: 準備完了（公開予定 {job.scheduled_at}）")
+
+    def _publish(self, job: ScheduledJob, now: datetime) -> bool:
+        try:
+            self.publish(job, self.mode)
+        except Exception as e:
+            self._fail(job, e, now)
+            return False
+        job.state = DONE
+        job.retry_at = None
+        job.error = None
+        self.log(f"✓ {job.slug}: {'予約投稿' if self.mode == MODE_FUTURE else '公開'}完了（ID: {job.post_id}）")
+        return True
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """
+        実行可能なジョブを処理する
+
+        Returns:
+            int: 状態が変わったジョブ数
+        """
+        changed = 0
+        now = now or self.now()
+        off_peak = self.in_off_peak(now)
+
+        # 準備（期限が近い順）
+        for job in list(self.queue.upcoming(now + self.prepare_ahead)):
+            if not job.ready(now):
+                continue
+            if job.state == PENDING and (off_peak or job.due - now <= self.min_lead):
+                self._prepare(job, now)
+                changed += 1
+            # 予約投稿モードは準備でき次第WordPressに渡す
+            if job.state == PREPARED and self.mode == MODE_FUTURE and job.ready(now):
+                self._publish(job, now)
+                changed += 1
+
+        # 期限到来（公開モード、または準備が間に合わなかったもの）
+        deferred = []
+        while True:
+            job = self.queue.pop_due(now)
+            if job is None:
+                break
+            if not job.ready(now):
+                deferred.append(job)
+                continue
+            if job.state == PENDING:
+                self._prepare(job, now)
+            if job.state == PREPARED:
+                self._publish(job, now)
+            changed += 1
+            if job.state in (PENDING, PREPARED):
+                deferred.append(job)
+        for job in deferred:
+            self.queue.requeue(job)
+
+        if changed:
+            self.queue.save()
+        return changed
+
+    def next_wakeup(self, now: datetime) -> float:
+        """次に処理が必要になるまでの秒数（poll_intervalが上限）"""
+        wait = self.poll_interval
+        job = self.queue.peek()
+        if job is not None:
+            until_prepare = (job.due - self.prepare_ahead - now).total_seconds()
+            until_due = (job.due - now).total_seconds()
+            for candidate in (until_prepare, until_due):
+                if candidate > 0:
+                    wait = min(wait, candidate)
+        return max(wait, 1.0)
+
+    def run_forever(self):
+        """stop()が呼ばれるまでループ"""
+        self._stop.clear()
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.next_wakeup(self.now()))
+
+    def stop(self):
+        self._stop.set()
+
+
+def parse_off_peak(value: Optional[str]) -> Optional[tuple[dt_time, dt_time]]:
+    """"01:00-06:00" 形式を(開始, 終了)に変換"""
+    if not value:
+        return None
+    try:
+        start, end = (dt_time.fromisoformat(part.strip()) for part in str(value).split('-', 1))
+    except ValueError:
+        raise SchedulerError(f"Invalid off_peak: {value!r} (expected HH:MM-HH:MM)")
+    return start, end
+
+
+if __name__ == "__main__":
+    # テスト用
+    queue = ScheduleQueue("output/schedule_queue.yaml")
+    for scheduled in queue.ordered():
+        print(f"{scheduled.scheduled_at}  {scheduled.state:<8} {scheduled.slug}")
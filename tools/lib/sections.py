@@ -0,0 +1,318 @@
+"""
+Sections - 記事JSONの型付き表現モジュール
+アーカイブ全体を読み込む処理向けに、記事とsectionを__slots__付きのクラスで保持する
+
+記事JSON（dict）1件は数百個のdict・listになるが、こちらはsection1つにつき
+オブジェクト1つ（配列はtuple）で済む。typeは各クラスの定数、見出し等の繰り返し
+出現する文字列はsys.internで共有する
+"""
+import sys
+from typing import Optional
+
+_intern = sys.intern
+
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+def _interned(value) -> str:
+    return _intern(_text(value))
+
+
+def _strings(values) -> tuple:
+    return tuple(_text(value) for value in values or ())
+
+
+class Section:
+    """sectionの基底クラス
+
+    FIELDSに列挙した属性をto_dict()で出力する。未知のキーはextraに残す
+    """
+
+    __slots__ = ('extra',)
+
+    type: str = ''
+    FIELDS: tuple = ()
+    KNOWN_KEYS: frozenset = frozenset({'type'})
+
+    def _init_extra(self, data: dict):
+        extra = {key: value for key, value in data.items() if key not in self.KNOWN_KEYS}
+        self.extra = extra or None
+
+    def to_dict(self) -> dict:
+        """BlockGenerator・Validatorに渡せるdictに戻す"""
+        data = {'type': self.type}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if isinstance(value, tuple):
+                value = [list(row) if isinstance(row, tuple) else row for row in value]
+            data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Section) and self.to_dict() == other.to_dict()
+
+
+class Heading(Section):
+    __slots__ = ('level', 'text')
+    type = 'heading'
+    FIELDS = ('level', 'text')
+    KNOWN_KEYS = frozenset({'type', 'level', 'text'})
+
+    def __init__(self, data: dict):
+        self.level = int(data.get('level', 2))
+        # 「よくある質問」「まとめ」等は記事をまたいで繰り返し出現する
+        self.text = _interned(data.get('text', ''))
+        self._init_extra(data)
+
+
+class Paragraph(Section):
+    __slots__ = ('text',)
+    type = 'paragraph'
+    FIELDS = ('text',)
+    KNOWN_KEYS = frozenset({'type', 'text'})
+
+    def __init__(self, data: dict):
+        self.text = _text(data.get('text', ''))
+        self._init_extra(data)
+
+
+class ListSection(Section):
+    __slots__ = ('items', 'ordered')
+    type = 'list'
+    FIELDS = ('items', 'ordered')
+    KNOWN_KEYS = frozenset({'type', 'items', 'ordered'})
+
+    def __init__(self, data: dict):
+        self.items = _strings(data.get('items'))
+        self.ordered = True if data.get('ordered') else None
+        self._init_extra(data)
+
+
+class WarningBox(Section):
+    """注意ボックス（contentキーもtextとして読む）"""
+    __slots__ = ('text',)
+    type = 'warning'
+    FIELDS = ('text',)
+    KNOWN_KEYS = frozenset({'type', 'text', 'content'})
+
+    def __init__(self, data: dict):
+        self.text = _text(data.get('content', data.get('text', '')))
+        self._init_extra(data)
+
+
+class Box(Section):
+    __slots__ = ('title', 'content', 'style')
+    type = 'box'
+    FIELDS = ('title', 'content', 'style')
+    KNOWN_KEYS = frozenset({'type', 'title', 'content', 'style'})
+
+    def __init__(self, data: dict):
+        self.title = _interned(data.get('title', ''))
+        self.content = _text(data.get('content', ''))
+        style = data.get('style')
+        self.style = _interned(style) if style is not None else None
+        self._init_extra(data)
+
+
+class Table(Section):
+    __slots__ = ('headers', 'rows', 'caption', 'fixed_layout')
+    type = 'table'
+    FIELDS = ('headers', 'rows', 'caption', 'fixed_layout')
+    KNOWN_KEYS = frozenset({'type', 'headers', 'rows', 'caption', 'fixed_layout'})
+
+    def __init__(self, data: dict):
+        self.headers = tuple(_interned(header) for header in data.get('headers') or ())
+        self.rows = tuple(_strings(row) for row in data.get('rows') or ())
+        self.caption = _text(data['caption']) if data.get('caption') else None
+        self.fixed_layout = True if data.get('fixed_layout') else None
+        self._init_extra(data)
+
+
+class FAQ(Section):
+    """FAQ（単一のq/a形式と、items形式の両方を扱う）"""
+    __slots__ = ('q', 'a', 'items')
+    type = 'faq'
+    FIELDS = ('q', 'a', 'items')
+    KNOWN_KEYS = frozenset({'type', 'q', 'a', 'question', 'answer', 'items'})
+
+    def __init__(self, data: dict):
+        q = data.get('q', data.get('question'))
+        a = data.get('a', data.get('answer'))
+        self.q = _text(q) if q is not None else None
+        self.a = _text(a) if a is not None else None
+        items = data.get('items')
+        self.items = tuple(
+            (_text(item.get('q', item.get('question', ''))), _text(item.get('a', item.get('answer', ''))))
+            for item in items if isinstance(item, dict)
+        ) if isinstance(items, list) else None
+        self._init_extra(data)
+
+    def pairs(self) -> list[tuple[str, str]]:
+        """(質問, 回答)の一覧"""
+        if self.items is not None:
+            return list(self.items)
+        return [(self.q or '', self.a or '')]
+
+    def to_dict(self) -> dict:
+        data = {'type': self.type}
+        if self.q is not None:
+            data['q'] = self.q
+        if self.a is not None:
+            data['a'] = self.a
+        if self.items is not None:
+            data['items'] = [{'q': q, 'a': a} for q, a in self.items]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+class Spacer(Section):
+    __slots__ = ('height',)
+    type = 'spacer'
+    FIELDS = ('height',)
+    KNOWN_KEYS = frozenset({'type', 'height'})
+
+    def __init__(self, data: dict):
+        self.height = _interned(data.get('height', '2rem'))
+        self._init_extra(data)
+
+
+class Related(Section):
+    """関連記事（items: [{"title", "url"}]）"""
+    __slots__ = ('title', 'items')
+    type = 'related'
+    FIELDS = ('title', 'items')
+    KNOWN_KEYS = frozenset({'type', 'title', 'items'})
+
+    def __init__(self, data: dict):
+        self.title = _interned(data.get('title', '関連記事'))
+        self.items = tuple(
+            (_text(item.get('title', '')), _text(item.get('url', '')))
+            for item in data.get('items') or () if isinstance(item, dict)
+        )
+        self._init_extra(data)
+
+    def to_dict(self) -> dict:
+        data = {'type': self.type, 'title': self.title}
+        data['items'] = [{'title': title, 'url': url} for title, url in self.items]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+class RawSection(Section):
+    """対応するクラスが無いsection（dictのまま保持）"""
+    __slots__ = ('type',)
+
+    def __init__(self, data: dict):
+        self.type = _interned(data.get('type', ''))
+        self._init_extra(data)
+
+
+SECTION_TYPES: dict[str, type] = {
+    cls.type: cls
+    for cls in (Heading, Paragraph, ListSection, WarningBox, Box, Table, FAQ, Spacer, Related)
+}
+
+
+def section_from_dict(data: dict) -> Section:
+    """section辞書を型付きsectionに変換"""
+    cls = SECTION_TYPES.get(data.get('type', 'paragraph'), RawSection)
+    return cls(data)
+
+
+class ItemBox:
+    """points / summary（タイトル + 項目）"""
+
+    __slots__ = ('title', 'items')
+
+    def __init__(self, data: Optional[dict]):
+        data = data or {}
+        self.title = _interned(data.get('title', ''))
+        self.items = _strings(data.get('items'))
+
+    def to_dict(self) -> dict:
+        return {'title': self.title, 'items': list(self.items)}
+
+    def __bool__(self) -> bool:
+        return bool(self.title or self.items)
+
+
+class Article:
+    """型付きの記事データ"""
+
+    __slots__ = ('slug', 'lead', 'points', 'sections', 'summary', 'extra')
+
+    KNOWN_KEYS = frozenset({'lead', 'points', 'sections', 'summary'})
+
+    def __init__(
+        self,
+        lead: str = '',
+        points: Optional[ItemBox] = None,
+        sections: tuple = (),
+        summary: Optional[ItemBox] = None,
+        slug: str = '',
+        extra: Optional[dict] = None
+    ):
+        self.slug = slug
+        self.lead = lead
+        self.points = points
+        self.sections = sections
+        self.summary = summary
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict, slug: str = '') -> 'Article':
+        """記事JSON（dict）から作成"""
+        extra = {key: value for key, value in data.items() if key not in cls.KNOWN_KEYS}
+        return cls(
+            lead=_text(data.get('lead', '')),
+            points=ItemBox(data['points']) if data.get('points') else None,
+            sections=tuple(section_from_dict(section) for section in data.get('sections') or ()),
+            summary=ItemBox(data['summary']) if data.get('summary') else None,
+            slug=_intern(slug),
+            extra=extra or None,
+        )
+
+    def to_dict(self) -> dict:
+        """記事JSON（BlockGeneratorの入力形式）に戻す"""
+        data = {}
+        if self.lead:
+            data['lead'] = self.lead
+        if self.points:
+            data['points'] = self.points.to_dict()
+        data['sections'] = [section.to_dict() for section in self.sections]
+        if self.summary:
+            data['summary'] = self.summary.to_dict()
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def iter_type(self, section_type: str):
+        """指定typeのsectionを順に返す"""
+        for section in self.sections:
+            if section.type == section_type:
+                yield section
+
+    def __repr__(self) -> str:
+        return f"Article({self.slug!r}, sections={len(self.sections)})"
+
+
+if __name__ == "__main__":
+    # テスト用
+    import json
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as f:
+            article = Article.from_dict(json.load(f))
+        print(json.dumps(article.to_dict(), ensure_ascii=False, indent=2))
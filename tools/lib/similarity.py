@@ -0,0 +1,424 @@
+"""
+Similarity - 類似記事検出モジュール
+記事をh2見出しごとの節に分け、文字n-gramのMinHashとLSHで過去記事との重複を探す
+
+アーカイブ全体との総当たり比較（記事数の2乗）は投稿のたびには回せないため、
+MinHash署名をバンドに分けたバケットに登録しておき、同じバケットに入った節だけを比較する。
+索引はプロセス内で1つだけ開き（open_similarity_index）、投稿のたびにその記事の分だけメモリ上で
+更新して、実行・バッチの終わりにsaveでまとめて書き出す
+
+    index = open_similarity_index(config)
+    for match in index.query(Article.from_dict(article_json), slug):
+        ...
+"""
+import base64
+import html
+import json
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .sections import Article
+
+
+# MinHashの署名長・LSHのバンド分割（32バンド×4行: 類似度0.42付近から候補になる）
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# 署名の計算に使う定数（32bitのCRCを64bitに広げる乗数・補完時のずらし幅）
+_GOLDEN = 0x9E3779B97F4A7C15
+_OFFSET = 0x9E3779B1
+_MASK64 = (1 << 64) - 1
+_MAX_HASH = (1 << 32) - 1
+_EMPTY = 1 << 32
+
+# 索引ファイルの形式（変わったら作り直す）
+INDEX_FORMAT = 1
+
+# 記事全体を表す節のラベル
+WHOLE_ARTICLE = '記事全体'
+
+_TAG_RE = re.compile(r'<[^>]+>')
+# 比較に使わない文字（空白・句読点・記号）
+_NOISE_RE = re.compile(r'[\s、。，．・「」『』（）()【】\[\]!！?？:：;；"\'“”‘’…ー―\-]+')
+
+
+def normalize_text(text: str) -> str:
+    """タグ・空白・句読点を除き、全角半角を揃える"""
+    text = html.unescape(_TAG_RE.sub('', text))
+    return _NOISE_RE.sub('', unicodedata.normalize('NFKC', text)).lower()
+
+
+def shingles(text: str, n: int) -> set[str]:
+    """文字n-gramの集合"""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def section_texts(article: Article) -> list[tuple[str, str]]:
+    """
+    記事をh2見出しごとの節に分け、節の本文を返す
+
+    Returns:
+        list of (ラベル, 本文)。ラベルは "sections[先頭の添字] 見出し"
+    """
+    units = []
+    label = 'lead'
+    parts = [article.lead] if article.lead else []
+
+    def flush():
+        if parts:
+            units.append((label, "\n".join(parts)))
+
+    for index, section in enumerate(article.sections):
+        kind = section.type
+        if kind == 'heading' and getattr(section, 'level', 2) == 2:
+            flush()
+            label = f"sections[{index}] {section.text}"
+            parts = []
+        elif kind == 'heading':
+            parts.append(section.text)
+        elif kind in ('paragraph', 'warning'):
+            parts.append(section.text)
+        elif kind == 'list':
+            parts.extend(section.items)
+        elif kind == 'box':
+            parts.extend((section.title, section.content))
+        elif kind == 'table':
+            parts.extend(cell for row in section.rows for cell in row)
+            if section.caption:
+                parts.append(section.caption)
+        elif kind == 'faq':
+            parts.extend(text for pair in section.pairs() for text in pair)
+    flush()
+    return units
+
+
+class MinHasher:
+    """文字n-gram集合のMinHash署名を計算するクラス
+
+    n-gramごとにハッシュを1回だけ計算し、上位ビットで振り分けたビンごとの最小値を署名とする
+    （One Permutation Hashing）。空のビンは右隣の空でないビンの値を借りる（回転による補完）。
+    ハッシュ関数をnum_perm個使う通常のMinHashより、n-gram数×num_perm回の計算が要らない
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM):
+        if num_perm & (num_perm - 1):
+            raise ValueError("num_perm must be a power of two")
+        self.num_perm = num_perm
+        self._shift = 64 - (num_perm.bit_length() - 1)
+
+    def signature(self, grams: Iterable[str]) -> Optional[array]:
+        """署名（n-gramが無ければNone）"""
+        num_perm = self.num_perm
+        shift = self._shift
+        bins = [_EMPTY] * num_perm
+        for gram in grams:
+            mixed = (zlib.crc32(gram.encode('utf-8')) * _GOLDEN) & _MASK64
+            slot = mixed >> shift
+            value = mixed & _MAX_HASH
+            if value < bins[slot]:
+                bins[slot] = value
+        if all(value == _EMPTY for value in bins):
+            return None
+
+        # 空のビンは、右隣（循環）で最初に値のあるビンの値に距離分の定数を足して埋める
+        signature = list(bins)
+        for slot in range(num_perm):
+            if bins[slot] != _EMPTY:
+                continue
+            distance = 1
+            while bins[(slot + distance) % num_perm] == _EMPTY:
+                distance += 1
+            signature[slot] = (bins[(slot + distance) % num_perm] + distance * _OFFSET) & _MAX_HASH
+        return array('I', signature)
+
+
+def estimate_similarity(sig1: array, sig2: array) -> float:
+    """2つの署名からJaccard係数を推定"""
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+@dataclass
+class SimilarMatch:
+    """類似する節"""
+    label: str          # 調べた記事の節
+    slug: str           # 類似する記事
+    other_label: str    # 類似する記事の節
+    similarity: float   # 推定Jaccard係数
+
+    @property
+    def whole_article(self) -> bool:
+        return self.label == WHOLE_ARTICLE
+
+
+class SimilarityIndex:
+    """節のMinHash署名とLSHバケットを持つ索引
+
+    output/similarity_index.json に
+    {"format", "params": {ngram, num_perm, bands}, "units": {"slug#n": [slug, ラベル, 署名(base64)]}}
+    の形で保存する（バケットは読み込み時に作り直す）
+
+    複数のスレッド（並行実行・複数の投稿先）から同じ索引を使うため、読み書きはロックして行う
+    """
+
+    def __init__(
+        self,
+        index_file: str = "output/similarity_index.json",
+        threshold: float = 0.6,
+        ngram: int = 5,
+        min_chars: int = 80
+    ):
+        """
+        Args:
+            index_file: 索引ファイルのパス
+            threshold: 類似とみなす推定Jaccard係数
+            ngram: n-gramの文字数
+            min_chars: 比較する節の最小文字数（正規化後）。短い節は定型文が多いため除く
+        """
+        self.index_file = Path(index_file)
+        self.threshold = threshold
+        self.ngram = ngram
+        self.min_chars = min_chars
+        self.hasher = MinHasher()
+        self.units: dict[str, tuple[str, str, array]] = {}
+        self.buckets: dict[tuple, set[str]] = defaultdict(set)
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._load()
+
+    @classmethod
+    def from_config(cls, config) -> 'SimilarityIndex':
+        """config.yamlのsimilarityセクションから作成"""
+        return cls(
+            index_file=config.get('similarity', 'index_file', default='output/similarity_index.json'),
+            threshold=float(config.get('similarity', 'threshold', default=0.6)),
+            ngram=int(config.get('similarity', 'ngram', default=5)),
+            min_chars=int(config.get('similarity', 'min_chars', default=80)),
+        )
+
+    def _params(self) -> dict:
+        return {'ngram': self.ngram, 'num_perm': NUM_PERM, 'bands': BANDS}
+
+    # ========== 保存 ==========
+
+    def _file_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = self.index_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        self._stamp = self._file_stamp()
+        if self._stamp is None:
+            return
+        try:
+            data = json.loads(self.index_file.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return
+        # 形式・パラメータが変わった索引は使わない（--index-similarで作り直す）
+        if data.get('format') != INDEX_FORMAT or data.get('params') != self._params():
+            return
+        for key, (slug, label, encoded) in data.get('units', {}).items():
+            signature = array('I')
+            signature.frombytes(base64.b64decode(encoded))
+            self._add(key, slug, label, signature)
+
+    def refresh(self):
+        """他のプロセス（--index-similar等）が索引ファイルを書き換えていれば読み込み直す
+
+        未保存の更新がある時は読み込み直さない（次のsaveで上書きする）
+        """
+        with self._lock:
+            if self.dirty or self._file_stamp() == self._stamp:
+                return
+            self.units.clear()
+            self.buckets.clear()
+            self._load()
+
+    def save(self):
+        with self._lock:
+            units = {
+                key: [slug, label, base64.b64encode(signature.tobytes()).decode('ascii')]
+                for key, (slug, label, signature) in self.units.items()
+            }
+            try:
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                # 一時ファイル名はプロセス・スレッドごとに分ける（同時に保存しても互いに消さない）
+                tmp = self.index_file.with_name(
+                    f"{self.index_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+                )
+                tmp.write_text(
+                    json.dumps({'format': INDEX_FORMAT, 'params': self._params(), 'units': units},
+                               ensure_ascii=False),
+                    encoding='utf-8'
+                )
+                tmp.replace(self.index_file)
+            except OSError as e:
+                # 保存失敗は警告のみ（次回の投稿時に追加し直す）
+                print(f"Warning: Failed to save similarity index: {e}")
+                return
+            self.dirty = False
+            self._stamp = self._file_stamp()
+
+    def save_if_dirty(self):
+        """更新があれば保存"""
+        if self.dirty:
+            self.save()
+
+    # ========== 索引 ==========
+
+    @staticmethod
+    def _bands(signature: array):
+        for band in range(BANDS):
+            yield (band, *signature[band * ROWS:(band + 1) * ROWS])
+
+    def _add(self, key: str, slug: str, label: str, signature: array):
+        self.units[key] = (slug, label, signature)
+        for band in self._bands(signature):
+            self.buckets[band].add(key)
+
+    def _remove(self, key: str):
+        _, _, signature = self.units.pop(key)
+        for band in self._bands(signature):
+            bucket = self.buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band]
+
+    def signatures(self, article: Article) -> list[tuple[str, array]]:
+        """記事の節と記事全体の署名（短い節は除く）"""
+        result = []
+        whole = set()
+        for label, text in section_texts(article):
+            text = normalize_text(text)
+            grams = shingles(text, self.ngram)
+            whole |= grams
+            if len(text) >= self.min_chars:
+                result.append((label, self.hasher.signature(grams)))
+        if whole:
+            result.append((WHOLE_ARTICLE, self.hasher.signature(whole)))
+        return result
+
+    def update(self, slug: str, article: Article):
+        """記事の節を登録し直す（保存はsaveで行う）"""
+        signatures = self.signatures(article)
+        with self._lock:
+            self._remove_slug(slug)
+            for number, (label, signature) in enumerate(signatures):
+                self._add(f"{slug}#{number}", slug, label, signature)
+            self.dirty = True
+
+    def remove(self, slug: str):
+        with self._lock:
+            if self._remove_slug(slug):
+                self.dirty = True
+
+    def _remove_slug(self, slug: str) -> bool:
+        # 節のキーは "slug#番号" で、番号は0から連続する
+        number = 0
+        while f"{slug}#{number}" in self.units:
+            self._remove(f"{slug}#{number}")
+            number += 1
+        return number > 0
+
+    def query(self, article: Article, slug: str = '') -> list[SimilarMatch]:
+        """
+        他の記事の節で、threshold以上に類似するものを探す
+
+        記事全体は記事全体とだけ、節は節とだけ比較する
+
+        Args:
+            slug: 調べる記事のスラッグ（同じスラッグの登録済みの節は比較しない）
+
+        Returns:
+            list[SimilarMatch]: 類似度の高い順
+        """
+        matches = []
+        signatures = self.signatures(article)
+        with self._lock:
+            self._match(signatures, slug, matches)
+        matches.sort(key=lambda match: -match.similarity)
+        return matches
+
+    def _match(self, signatures: list[tuple[str, array]], slug: str, matches: list[SimilarMatch]):
+        for label, signature in signatures:
+            candidates = set()
+            for band in self._bands(signature):
+                candidates |= self.buckets.get(band, set())
+
+            whole = label == WHOLE_ARTICLE
+            for key in candidates:
+                other_slug, other_label, other_signature = self.units[key]
+                if other_slug == slug or (other_label == WHOLE_ARTICLE) != whole:
+                    continue
+                similarity = estimate_similarity(signature, other_signature)
+                if similarity >= self.threshold:
+                    matches.append(SimilarMatch(label, other_slug, other_label, similarity))
+
+    def build(self, articles: Iterable[Article]) -> int:
+        """アーカイブ全体から作り直す（登録した記事数を返す）"""
+        with self._lock:
+            self.units.clear()
+            self.buckets.clear()
+            count = 0
+            for article in articles:
+                if article.slug:
+                    self.update(article.slug, article)
+                    count += 1
+            self.dirty = True
+            return count
+
+
+# 開いた索引（索引ファイルと設定ごとにプロセス内で1つ）
+_registry: dict[tuple, SimilarityIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def open_similarity_index(config) -> Optional[SimilarityIndex]:
+    """
+    類似記事の索引（similarity.enabledがfalseならNone）
+
+    同じ索引ファイル・設定ならプロセス内で同じ索引を返す（記事ごとに読み込み直さない）。
+    他のプロセスが索引ファイルを書き換えていれば読み込み直す
+    """
+    if not config.get('similarity', 'enabled', default=True):
+        return None
+    index_file = config.get('similarity', 'index_file', default='output/similarity_index.json')
+    key = (
+        str(Path(index_file).resolve()),
+        float(config.get('similarity', 'threshold', default=0.6)),
+        int(config.get('similarity', 'ngram', default=5)),
+        int(config.get('similarity', 'min_chars', default=80)),
+    )
+    with _registry_lock:
+        index = _registry.get(key)
+        if index is None:
+            index = _registry[key] = SimilarityIndex.from_config(config)
+            return index
+    index.refresh()
+    return index
+
+
+if __name__ == "__main__":
+    # テスト用: 記事JSON同士の類似節を表示
+    import sys
+    from .archive import Archive
+    archive = Archive.from_dirs(sys.argv[1:] or ['../block-html/posts'])
+    index = SimilarityIndex(index_file='/dev/null')
+    index.build(archive)
+    for article in archive:
+        for match in index.query(article, article.slug):
+            print(f"{article.slug} {match.label} ≈ {match.slug} {match.other_label} ({match.similarity:.2f})")
@@ -2,27 +2,58 @@
 Structurer - AI構造化モジュール
 Gemini APIを使用して原稿をJSON形式に構造化
 """
+import hashlib
 import json
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 
+from .generator import sanitize_article
+from .sections import Article
+
 try:
     import google.generativeai as genai
 except ImportError:
     genai = None
 
 
-@dataclass
 class ArticleJSON:
-    """構造化された記事データ"""
-    lead: str
-    points: dict
-    sections: list[dict]
-    summary: dict
-    raw_json: dict  # 元のJSON全体
+    """構造化された記事データ
+
+    JSON全体（raw_json）だけを保持し、各項目はそこから参照する。
+    sanitized_jsonは本文をsanitize_article済みの複製で、HTML生成はこちらを使う
+    """
+
+    __slots__ = ('raw_json', 'sanitized_json')
+
+    def __init__(self, raw_json: dict, sanitized_json: Optional[dict] = None):
+        self.raw_json = raw_json
+        self.sanitized_json = sanitized_json
+
+    @property
+    def lead(self) -> str:
+        return self.raw_json.get('lead', '')
+
+    @property
+    def points(self) -> dict:
+        return self.raw_json.get('points', {})
+
+    @property
+    def sections(self) -> list[dict]:
+        return self.raw_json.get('sections', [])
+
+    @property
+    def summary(self) -> dict:
+        return self.raw_json.get('summary', {})
+
+    def to_article(self, slug: str = '') -> Article:
+        """型付きの記事データに変換"""
+        return Article.from_dict(self.raw_json, slug=slug)
 
 
 class StructurerError(Exception):
@@ -30,60 +61,21 @@ class StructurerError(Exception):
     pass
 
 
-class Structurer:
-    """Gemini APIを使用して記事を構造化するクラス"""
-    
-    DEFAULT_MODEL = "gemini-2.0-flash"
-    MAX_RETRIES = 3
-    RETRY_DELAY = 2  # seconds
-    
-    def __init__(
-        self,
-        api_key: str,
-        model: str = None,
-        temperature: float = 0.3,
-        max_output_tokens: int = 8192,
-        prompt_template_path: Optional[str] = None
-    ):
-        """
-        Args:
-            api_key: Gemini APIキー
-            model: 使用するモデル名
-            temperature: 生成温度（低いほど安定）
-            max_output_tokens: 最大出力トークン数
-            prompt_template_path: プロンプトテンプレートファイルパス
-        """
-        if genai is None:
-            raise StructurerError(
-                "google-generativeai package not installed. "
-                "Run: pip install google-generativeai"
-            )
-        
-        genai.configure(api_key=api_key)
-        self.model_name = model or self.DEFAULT_MODEL
-        self.temperature = temperature
-        self.max_output_tokens = max_output_tokens
-        
-        # モデル初期化
-        self.model = genai.GenerativeModel(
-            self.model_name,
-            generation_config=genai.GenerationConfig(
-                temperature=self.temperature,
-                max_output_tokens=self.max_output_tokens,
-                response_mime_type="application/json",
-            )
-        )
-        
-        # プロンプトテンプレート読み込み
-        self.prompt_template = self._load_prompt_template(prompt_template_path)
-    
-    def _load_prompt_template(self, path: Optional[str]) -> str:
-        """プロンプトテンプレートを読み込む"""
-        if path and Path(path).exists():
-            return Path(path).read_text(encoding='utf-8')
-        
-        # デフォルトプロンプト
-        return """あなたは記事構造化の専門家です。
+def _heading_level(value) -> int:
+    """モデル出力の見出しレベル（"h2"・null等の読めない値や範囲外は2。BlockGenerator._headingと同じ）"""
+    try:
+        level = int(value)
+    except (ValueError, TypeError):
+        return 2
+    return level if 1 <= level <= 6 else 2
+
+
+class TruncatedResponseError(StructurerError):
+    """出力がmax_output_tokensで途中で切れた"""
+    pass
+
+
+DEFAULT_PROMPT_TEMPLATE = """あなたは記事構造化の専門家です。
 以下の記事原稿を、指定されたJSON形式に構造化してください。
 
 ## 出力形式
@@ -138,11 +130,331 @@ class Structurer:
 
 ## 記事原稿
 """
+
+
+# 分割構造化で各チャンクに付ける指示
+CHUNK_NOTE = """### 分割処理（パート{index}/{total}）
+これは長い記事原稿の一部です。この部分のsectionsのみを出力してください。
+- lead / points / summary は出力しない（空でよい）
+- h2の個数など記事全体に対するルールはこの部分には適用しない
+- 原稿の見出し構成・順序を変えない"""
+
+# 分割構造化の最後にlead/points/summaryを生成するプロンプト
+FINALIZE_PROMPT = """あなたは記事構造化の専門家です。
+以下は記事の見出しと各段落です。これを読んで、記事全体のリード文・ポイント・まとめを
+次のJSON形式で出力してください。
+
+```json
+{
+  "lead": "リード文（150文字以内）",
+  "points": {"title": "この記事のポイント", "items": ["ポイント1", "ポイント2", "ポイント3"]},
+  "summary": {"title": "まとめ", "items": ["まとめ1", "まとめ2", "まとめ3", "まとめ4"]}
+}
+```
+
+- points.itemsは3項目固定（すべて結論形）
+- summary.itemsは4項目以上（各25文字以内）
+- lead / points / summaryで内容が重複しすぎないようにする
+
+## 記事の見出しと段落
+"""
+
+_HEADING_LINE_RE = {
+    level: re.compile(rf'^(?={"#" * level} )', re.MULTILINE)
+    for level in (2, 3)
+}
+_PARAGRAPH_BREAK_RE = re.compile(r'(?<=\n\n)')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークン数の概算（APIを呼ばない事前見積もり）
+
+    Geminiのトークナイザでは日本語はおおむね1文字1トークン、
+    英数字・記号は4文字で1トークン程度になる
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return (len(text) - ascii_chars) + ascii_chars // 4 + 1
+
+
+def _pack(parts: list[str], budget: int) -> list[str]:
+    """隣り合うpartsを予算内でまとめる"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for part in parts:
+        tokens = estimate_tokens(part)
+        if current and current_tokens + tokens > budget:
+            chunks.append(''.join(current))
+            current, current_tokens = [], 0
+        current.append(part)
+        current_tokens += tokens
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def split_markdown(content: str, budget: int) -> list[str]:
+    """
+    Markdown原稿を見出しの境界で予算（推定トークン数）以下のチャンクに分割
+
+    h2 → h3 → 空行（段落）の順に細かくし、隣り合う部分は予算内でまとめ直す。
+    1段落で予算を超える場合はその段落を1チャンクとする
+    """
+    if estimate_tokens(content) <= budget:
+        return [content]
+
+    for pattern in (_HEADING_LINE_RE[2], _HEADING_LINE_RE[3], _PARAGRAPH_BREAK_RE):
+        parts = [part for part in pattern.split(content) if part]
+        if len(parts) < 2:
+            continue
+        chunks = []
+        for part in parts:
+            if estimate_tokens(part) > budget:
+                chunks.extend(split_markdown(part, budget))
+            else:
+                chunks.append(part)
+        return _pack(chunks, budget)
+
+    return [content]
+
+
+def _is_truncated(response) -> bool:
+    """finish_reasonがMAX_TOKENSか"""
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return False
+    return getattr(reason, 'name', reason) in ('MAX_TOKENS', 2)
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """読み込み済みのプロンプトテンプレート"""
+    text: str
+    sha256: str
+    source: str  # ファイルパス（デフォルトプロンプトは"<default>"）
+
+
+# (パス, mtime, サイズ) → PromptTemplate
+_template_cache: dict[tuple, PromptTemplate] = {}
+_template_lock = threading.Lock()
+
+
+def load_prompt_template(path: Optional[str] = None) -> PromptTemplate:
+    """
+    プロンプトテンプレートを読み込む（プロセス内で1回だけ）
+
+    ファイルが更新された場合（mtime・サイズが変わった場合）のみ読み直す。
+    ファイルが無ければデフォルトプロンプトを返す
+    """
+    file_path = Path(path) if path else None
+    if file_path is not None and file_path.is_file():
+        stat = file_path.stat()
+        key = (str(file_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        source = str(file_path)
+    else:
+        key = ('<default>',)
+        source = '<default>'
+
+    with _template_lock:
+        template = _template_cache.get(key)
+        if template is None:
+            text = file_path.read_text(encoding='utf-8') if len(key) > 1 else DEFAULT_PROMPT_TEMPLATE
+            template = PromptTemplate(
+                text=text,
+                sha256=hashlib.sha256(text.encode('utf-8')).hexdigest(),
+                source=source,
+            )
+            _template_cache[key] = template
+        return template
+
+
+class Structurer:
+    """Gemini APIを使用して記事を構造化するクラス"""
+    
+    DEFAULT_MODEL = "gemini-2.0-flash"
+    MAX_RETRIES = 3
+    RETRY_DELAY = 2  # seconds
+    
+    # コンテキストキャッシュを作れる最小トークン数（これ未満なら作成を試みない）
+    CONTEXT_CACHE_MIN_TOKENS = 1024
+    CONTEXT_CACHE_PREFIX = "miyabi-prompt"
+    # キャッシュが期限切れ・削除済みの時の例外（google.api_core.exceptions）
+    CACHE_MISS_ERRORS = ('NotFound', 'PermissionDenied', 'InvalidArgument')
+    # 期限切れの少し前に有効期間を延長する（秒）
+    CONTEXT_CACHE_RENEW_MARGIN = 300
+    
+    # 出力JSONは原稿のおよそ1.6倍のトークン数になる。上限の75%に収まるよう分割する
+    OUTPUT_EXPANSION = 1.6
+    OUTPUT_SAFETY = 0.75
+    FINALIZE_MAX_OUTPUT_TOKENS = 2048
+    
+    def __init__(
+        self,
+        api_key: str,
+        model: str = None,
+        temperature: float = 0.3,
+        max_output_tokens: int = 8192,
+        prompt_template_path: Optional[str] = None,
+        context_cache: bool = False,
+        cache_ttl: int = 3600,
+        chunking: bool = True,
+        chunk_workers: int = 4
+    ):
+        """
+        Args:
+            api_key: Gemini APIキー
+            model: 使用するモデル名
+            temperature: 生成温度（低いほど安定）
+            max_output_tokens: 最大出力トークン数
+            prompt_template_path: プロンプトテンプレートファイルパス
+            context_cache: プロンプトテンプレートをGeminiのコンテキストキャッシュに載せるか
+            cache_ttl: コンテキストキャッシュの有効期間（秒）
+            chunking: 長い原稿を見出し単位で分割して構造化するか
+            chunk_workers: 分割構造化の並列数
+        """
+        if genai is None:
+            raise StructurerError(
+                "google-generativeai package not installed. "
+                "Run: pip install google-generativeai"
+            )
+        
+        _configure(api_key)
+        self.model_name = model or self.DEFAULT_MODEL
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self.chunking = chunking
+        self.chunk_workers = max(1, chunk_workers)
+        self.generation_config = genai.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=self.max_output_tokens,
+            response_mime_type="application/json",
+        )
+        
+        # モデル初期化
+        self.model = genai.GenerativeModel(
+            self.model_name,
+            generation_config=self.generation_config
+        )
+        
+        # プロンプトテンプレート読み込み
+        self.template = load_prompt_template(prompt_template_path)
+        self.prompt_template = self.template.text
+        self.prompt_tokens: Optional[int] = None
+        
+        # テンプレート部分をキャッシュ済みのモデル（使えない場合はNone）
+        self.cached_model = None
+        self.cached_content = None
+        self.cache_ttl = cache_ttl
+        self._cache_expires = 0.0     # time.monotonic()での有効期限
+        self._cache_lock = threading.RLock()
+        if context_cache:
+            self._setup_context_cache(cache_ttl)
+    
+    # ========== コンテキストキャッシュ ==========
+    
+    def _cache_display_name(self) -> str:
+        """テンプレートの内容ハッシュとモデル名からキャッシュ名を決める"""
+        model = self.model_name.rsplit('/', 1)[-1]
+        return f"{self.CONTEXT_CACHE_PREFIX}-{model}-{self.template.sha256[:16]}"
+    
+    def _find_context_cache(self, display_name: str):
+        """同じテンプレートのキャッシュが既にあれば返す（別プロセスで作成済みのもの）"""
+        for cached in genai.caching.CachedContent.list():
+            if cached.display_name == display_name:
+                return cached
+        return None
+    
+    def _setup_context_cache(self, ttl: int):
+        """
+        テンプレートをコンテキストキャッシュに載せる
+        
+        作成できない場合（モデル非対応、トークン数不足、API失敗）は
+        警告を出して通常のリクエストにフォールバックする
+        """
+        display_name = self._cache_display_name()
+        try:
+            cached = self._find_context_cache(display_name)
+            if cached is None:
+                self.prompt_tokens = self.model.count_tokens(self.prompt_template).total_tokens
+                if self.prompt_tokens < self.CONTEXT_CACHE_MIN_TOKENS:
+                    return
+                cached = genai.caching.CachedContent.create(
+                    model=self.model_name if self.model_name.startswith('models/') else f"models/{self.model_name}",
+                    display_name=display_name,
+                    contents=[{'role': 'user', 'parts': [{'text': self.prompt_template}]}],
+                    ttl=timedelta(seconds=ttl),
+                )
+            elif cached.usage_metadata is not None:
+                self.prompt_tokens = cached.usage_metadata.total_token_count
+            
+            self.cached_model = genai.GenerativeModel.from_cached_content(
+                cached_content=cached,
+                generation_config=self.generation_config
+            )
+            self.cached_content = cached
+            self._cache_expires = time.monotonic() + self._seconds_left(cached, ttl)
+        except Exception as e:
+            print(f"Warning: Context cache unavailable, sending full prompt: {e}")
+            self.cached_model = None
+            self.cached_content = None
+    
+    @staticmethod
+    def _seconds_left(cached, ttl: int) -> float:
+        """キャッシュの残り有効期間（別プロセスで作成済みのものはexpire_timeから求める）"""
+        expire_time = getattr(cached, 'expire_time', None)
+        if expire_time is None:
+            return ttl
+        try:
+            return max(0.0, (expire_time - datetime.now(timezone.utc)).total_seconds())
+        except TypeError:
+            return ttl
+    
+    def _context_model(self):
+        """
+        テンプレートをキャッシュ済みのモデル（使えなければNone）
+        
+        期限切れが近ければ有効期間を延長し、延長できなければ作り直す。
+        --serveや--run-schedulerのように長く動くプロセスでもキャッシュを使い続けるため
+        """
+        if self.cached_model is None:
+            return None
+        if time.monotonic() < self._cache_expires - self.CONTEXT_CACHE_RENEW_MARGIN:
+            return self.cached_model
+        with self._cache_lock:
+            cached = self.cached_content
+            if cached is not None and time.monotonic() >= self._cache_expires - self.CONTEXT_CACHE_RENEW_MARGIN:
+                try:
+                    cached.update(ttl=timedelta(seconds=self.cache_ttl))
+                    self._cache_expires = time.monotonic() + self.cache_ttl
+                except Exception as e:
+                    self._renew_context_cache(cached, e)
+            return self.cached_model
+    
+    def _renew_context_cache(self, failed, error: Exception):
+        """
+        期限切れ・削除済みのキャッシュを作り直す（作れなければ以後フルプロンプトで送る）
+        
+        並列の構造化で同時に失敗した場合は、最初のスレッドだけが作り直す
+        """
+        with self._cache_lock:
+            if self.cached_content is not failed:
+                return
+            print(f"Warning: Context cache expired, re-creating it: {error}")
+            self.cached_model = None
+            self.cached_content = None
+            self._setup_context_cache(self.cache_ttl)
     
     def structure(self, content: str, title: str = "") -> ArticleJSON:
         """
         記事本文をJSON構造に変換
         
+        出力がmax_output_tokensに収まらない見込みの長い原稿は、見出し単位で
+        分割して並列に構造化する（1回で送って途中で切れた場合も同様）
+        
         Args:
             content: 記事本文（Markdown形式）
             title: 記事タイトル（プロンプトに含める）
@@ -153,31 +465,79 @@ class Structurer:
         Raises:
             StructurerError: API呼び出し失敗、またはJSON解析失敗時
         """
-        # プロンプト構築
-        prompt = self.prompt_template
+        if self.chunking and self.needs_chunking(content):
+            return self._structure_chunked(content, title)
+        
+        try:
+            json_data = self._request_json(self._article_prompt(content, title))
+        except TruncatedResponseError:
+            if not self.chunking:
+                raise
+            # 同じリクエストを繰り返しても同じ所で切れるので分割に切り替える
+            return self._structure_chunked(content, title)
+        
+        return self._to_article(json_data)
+    
+    def _to_article(self, json_data: dict) -> ArticleJSON:
+        # 見出しレベルはモデル出力のまま後段（Article.from_dict等）で数値として扱うため、ここで整える
+        for section in json_data.get('sections') or ():
+            if isinstance(section, dict) and section.get('type') == 'heading':
+                section['level'] = _heading_level(section.get('level', 2))
+        # 本文のサニタイズは構造化の時に1回だけ行い、HTML生成では繰り返さない
+        return ArticleJSON(json_data, sanitize_article(json_data))
+    
+    @staticmethod
+    def _article_prompt(content: str, title: str = "", note: str = "") -> str:
+        """テンプレートの後ろに付ける記事部分"""
+        article = ""
         if title:
-            prompt += f"\n### タイトル: {title}\n"
-        prompt += f"\n{content}"
+            article += f"\n### タイトル: {title}\n"
+        if note:
+            article += f"\n{note}\n"
+        article += f"\n{content}"
+        return article
+    
+    # ========== API呼び出し ==========
+    
+    def _generate(self, article: str) -> str:
+        """テンプレート + 記事部分を送信し、レスポンステキストを返す"""
+        cached_model = self._context_model()
+        cached = self.cached_content
+        if cached_model is not None:
+            try:
+                response = cached_model.generate_content(article)
+            except Exception as e:
+                if type(e).__name__ not in self.CACHE_MISS_ERRORS:
+                    raise
+                self._renew_context_cache(cached, e)
+                cached_model = self.cached_model
+                if cached_model is not None:
+                    response = cached_model.generate_content(article)
+                else:
+                    response = self.model.generate_content(self.prompt_template + article)
+        else:
+            response = self.model.generate_content(self.prompt_template + article)
+        
+        if _is_truncated(response):
+            raise TruncatedResponseError(
+                f"Response truncated at max_output_tokens={self.max_output_tokens}"
+            )
+        return response.text
+    
+    def _request_json(self, article: str, generate=None) -> dict:
+        """
+        リトライ付きでAPIを呼び出しJSONを返す
         
-        # リトライ付きでAPI呼び出し
+        出力が途中で切れた場合は同じリクエストを繰り返さずTruncatedResponseErrorを送出する
+        """
+        generate = generate or self._generate
         last_error = None
         for attempt in range(self.MAX_RETRIES):
             try:
-                response = self.model.generate_content(prompt)
-                raw_text = response.text
-                
-                # JSON解析
-                json_data = self._parse_json(raw_text)
-                
-                # ArticleJSONオブジェクト作成
-                return ArticleJSON(
-                    lead=json_data.get('lead', ''),
-                    points=json_data.get('points', {}),
-                    sections=json_data.get('sections', []),
-                    summary=json_data.get('summary', {}),
-                    raw_json=json_data
-                )
-                
+                raw_text = generate(article)
+                return self._parse_json(raw_text)
+            except TruncatedResponseError:
+                raise
             except Exception as e:
                 last_error = e
                 if attempt < self.MAX_RETRIES - 1:
@@ -185,6 +545,86 @@ class Structurer:
         
         raise StructurerError(f"Gemini API failed after {self.MAX_RETRIES} retries: {last_error}")
     
+    # ========== 分割構造化 ==========
+    
+    @property
+    def chunk_token_budget(self) -> int:
+        """1チャンクあたりの入力トークン上限（出力が上限に収まる大きさ）"""
+        return int(self.max_output_tokens * self.OUTPUT_SAFETY / self.OUTPUT_EXPANSION)
+    
+    def needs_chunking(self, content: str) -> bool:
+        """出力（JSON）がmax_output_tokensを超えそうか"""
+        return estimate_tokens(content) > self.chunk_token_budget
+    
+    def _structure_chunked(self, content: str, title: str) -> ArticleJSON:
+        """見出しで分割して並列に構造化し、lead/points/summaryを最後に生成する"""
+        chunks = split_markdown(content, self.chunk_token_budget)
+        total = len(chunks)
+        
+        with ThreadPoolExecutor(max_workers=min(self.chunk_workers, total)) as executor:
+            results = list(executor.map(
+                lambda args: self._structure_chunk(args[1], title, args[0] + 1, total),
+                enumerate(chunks)
+            ))
+        
+        sections = [section for chunk_sections in results for section in chunk_sections]
+        overview = self._finalize(title, sections)
+        
+        return self._to_article({
+            'lead': overview.get('lead', ''),
+            'points': overview.get('points', {}),
+            'sections': sections,
+            'summary': overview.get('summary', {}),
+        })
+    
+    def _structure_chunk(self, chunk: str, title: str, index: int, total: int) -> list[dict]:
+        """チャンク1つ分のsectionsを返す（それでも切れる場合はさらに半分にする）"""
+        note = CHUNK_NOTE.format(index=index, total=total)
+        try:
+            json_data = self._request_json(self._article_prompt(chunk, title, note))
+        except TruncatedResponseError:
+            halves = split_markdown(chunk, max(estimate_tokens(chunk) // 2, 1))
+            if len(halves) < 2:
+                raise StructurerError(
+                    f"Chunk {index}/{total} cannot be split further and exceeds max_output_tokens"
+                )
+            return [
+                section
+                for half in halves
+                for section in self._structure_chunk(half, title, index, total)
+            ]
+        return json_data.get('sections', [])
+    
+    def _finalize(self, title: str, sections: list[dict]) -> dict:
+        """見出しと段落の要約からlead/points/summaryだけを生成する軽量な呼び出し"""
+        outline = []
+        for section in sections:
+            if not isinstance(section, dict):
+                continue
+            if section.get('type') == 'heading':
+                outline.append(f"{'#' * _heading_level(section.get('level', 2))} {section.get('text', '')}")
+            elif section.get('type') in ('paragraph', 'warning'):
+                outline.append(section.get('text', ''))
+        
+        prompt = FINALIZE_PROMPT
+        if title:
+            prompt += f"\n### タイトル: {title}\n"
+        prompt += "\n" + "\n".join(outline)
+        
+        generation_config = genai.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=self.FINALIZE_MAX_OUTPUT_TOKENS,
+            response_mime_type="application/json",
+        )
+        
+        def _generate_overview(text: str) -> str:
+            response = self.model.generate_content(text, generation_config=generation_config)
+            if _is_truncated(response):
+                raise TruncatedResponseError("Overview response truncated")
+            return response.text
+        
+        return self._request_json(prompt, generate=_generate_overview)
+    
     def _parse_json(self, raw_text: str) -> dict:
         """
         APIレスポンスからJSONを解析
@@ -218,6 +658,68 @@ class Structurer:
         return text
 
 
+# ========== プロセス内レジストリ ==========
+
+_configured_api_key: Optional[str] = None
+_registry: dict[tuple, Structurer] = {}
+_registry_lock = threading.Lock()
+
+
+def _configure(api_key: str):
+    """genai.configureはAPIキーが変わった時だけ呼ぶ"""
+    global _configured_api_key
+    if api_key != _configured_api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+
+
+def get_structurer(
+    api_key: str,
+    model: str = None,
+    temperature: float = 0.3,
+    max_output_tokens: int = 8192,
+    prompt_template_path: Optional[str] = None,
+    context_cache: bool = False,
+    cache_ttl: int = 3600,
+    chunking: bool = True,
+    chunk_workers: int = 4
+) -> Structurer:
+    """
+    同じ設定のStructurerをプロセス内で使い回す
+
+    複数ファイルを処理する時に、ファイルごとのモデル初期化・テンプレート読み込み・
+    コンテキストキャッシュ作成を避ける。テンプレートファイルが更新された場合は
+    内容ハッシュが変わるため新しいStructurerを作る
+    """
+    template = load_prompt_template(prompt_template_path)
+    key = (
+        api_key, model or Structurer.DEFAULT_MODEL, temperature, max_output_tokens,
+        template.sha256, context_cache, chunking, chunk_workers,
+    )
+    with _registry_lock:
+        structurer = _registry.get(key)
+        if structurer is None:
+            structurer = Structurer(
+                api_key,
+                model=model,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                prompt_template_path=prompt_template_path,
+                context_cache=context_cache,
+                cache_ttl=cache_ttl,
+                chunking=chunking,
+                chunk_workers=chunk_workers,
+            )
+            _registry[key] = structurer
+        return structurer
+
+
+def clear_structurers():
+    """レジストリを空にする（設定を読み直す時など）"""
+    with _registry_lock:
+        _registry.clear()
+
+
 if __name__ == "__main__":
     # テスト用
     import os
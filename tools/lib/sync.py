@@ -0,0 +1,320 @@
+"""
+Sync - WordPressと投稿履歴の同期モジュール
+サイト上の全投稿をREST APIのページ単位で並列に取得し、投稿履歴（slug → post_id）と照合する
+
+管理画面での編集・ゴミ箱への移動・新規作成を履歴に反映し、削除済み（履歴だけに残る）投稿や
+スラッグの重複を報告する。2回目以降はmodified_afterで前回以降に更新された投稿だけを取得する
+
+直近に同期済みなら、投稿時のスラッグ検索（1記事1リクエスト）を省略して履歴を信頼できる
+"""
+import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from .history import STATUS_MISSING, HistoryManager
+from .publisher import Publisher
+
+
+# 取得するフィールドとステータス（ゴミ箱も含める）
+SYNC_FIELDS = "id,slug,status,modified,title"
+SYNC_STATUSES = "publish,future,draft,pending,private,trash"
+
+# レポートに1件ずつ表示する登録件数（初回同期では全投稿が登録されるため）
+REPORT_ADDED_LIMIT = 20
+
+
+@dataclass
+class RemotePost:
+    """サイト上の投稿1件"""
+    id: int
+    slug: str
+    status: str
+    modified: Optional[str] = None
+    title: str = ''
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'RemotePost':
+        title = data.get('title')
+        if isinstance(title, dict):
+            title = title.get('rendered', '')
+        return cls(
+            id=int(data['id']),
+            slug=data.get('slug') or '',
+            status=data.get('status') or '',
+            modified=data.get('modified'),
+            title=title or '',
+        )
+
+
+@dataclass
+class SyncReport:
+    """同期の結果"""
+    full: bool                  # 全件取得したか（Falseならmodified_after以降のみ）
+    fetched: int = 0            # 取得した投稿数
+    pages: int = 0              # 取得したページ数
+    added: list[str] = field(default_factory=list)       # サイトにだけあった投稿（履歴に登録）
+    updated: list[str] = field(default_factory=list)     # ステータス・更新日時などが変わった
+    relinked: list[tuple[str, int, int]] = field(default_factory=list)  # (slug, 旧ID, 新ID)
+    renamed: list[tuple[str, str]] = field(default_factory=list)        # (履歴のslug, サイトのslug)
+    trashed: list[str] = field(default_factory=list)     # ゴミ箱にある
+    orphans: list[str] = field(default_factory=list)     # 履歴にあるがサイトに無い（全件取得時のみ）
+    duplicates: dict[str, list[int]] = field(default_factory=dict)  # 同じslugの投稿が複数
+    shared_ids: dict[int, list[str]] = field(default_factory=dict)  # 同じ投稿を指す履歴が複数
+
+    @property
+    def ok(self) -> bool:
+        """要確認の項目（削除済み・重複）が無い"""
+        return not self.orphans and not self.duplicates and not self.shared_ids
+
+
+class Syncer:
+    """投稿履歴をサイトの投稿一覧と照合するクラス
+
+    同期状態（最終同期日時・取得済みの最終更新日時）は
+    output/sync_state.json に {"last_sync", "last_full_sync", "high_water"} の形で保存する
+    """
+
+    def __init__(
+        self,
+        publisher: Publisher,
+        history: HistoryManager,
+        state_file: str = "output/sync_state.json",
+        max_workers: int = 4,
+        per_page: int = 100
+    ):
+        """
+        Args:
+            publisher: 取得に使うPublisher
+            history: 照合する投稿履歴
+            state_file: 同期状態のパス
+            max_workers: 並列に取得するページ数
+            per_page: 1ページの件数（REST APIの上限は100）
+        """
+        self.publisher = publisher
+        self.history = history
+        self.state_file = Path(state_file)
+        self.max_workers = max_workers
+        self.per_page = min(max(1, per_page), 100)
+        self.state = load_sync_state(self.state_file)
+
+    @classmethod
+    def from_config(cls, config, publisher: Publisher, history: HistoryManager) -> 'Syncer':
+        """config.yamlのsyncセクションから作成"""
+        return cls(
+            publisher,
+            history,
+            state_file=config.get('sync', 'state_file', default='output/sync_state.json'),
+            max_workers=int(config.get('sync', 'max_workers', default=4)),
+            per_page=int(config.get('sync', 'per_page', default=100)),
+        )
+
+    # ========== 取得 ==========
+
+    def crawl(self, modified_after: Optional[str] = None) -> tuple[list[RemotePost], int]:
+        """
+        投稿一覧を全ページ取得（1ページ目で総ページ数を知り、残りを並列に取得）
+
+        Returns:
+            (投稿のリスト, 取得したページ数)
+
+        Raises:
+            PublisherError: 取得に失敗した時
+        """
+        def fetch(page: int) -> list[dict]:
+            posts, _ = self.publisher.list_posts(
+                page=page, per_page=self.per_page, fields=SYNC_FIELDS,
+                status=SYNC_STATUSES, modified_after=modified_after
+            )
+            return posts
+
+        first, total_pages = self.publisher.list_posts(
+            page=1, per_page=self.per_page, fields=SYNC_FIELDS,
+            status=SYNC_STATUSES, modified_after=modified_after
+        )
+        pages = [first]
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, total_pages - 1)) as executor:
+                pages.extend(executor.map(fetch, range(2, total_pages + 1)))
+
+        # 取得中に投稿が増減するとページ境界がずれるため、IDで重複を除く
+        posts = {}
+        for page in pages:
+            for data in page:
+                post = RemotePost.from_json(data)
+                posts[post.id] = post
+        return list(posts.values()), total_pages
+
+    # ========== 照合 ==========
+
+    def reconcile(self, posts: list[RemotePost], full: bool) -> SyncReport:
+        """
+        取得した投稿を投稿履歴に反映
+
+        Args:
+            posts: サイト上の投稿
+            full: postsがサイトの全投稿か（Trueの時だけ、無い投稿を削除済みとみなす）
+        """
+        report = SyncReport(full=full, fetched=len(posts))
+        remote = {post.id: post for post in posts}
+
+        by_slug = defaultdict(list)
+        for post in posts:
+            if post.slug and post.status != 'trash':
+                by_slug[post.slug].append(post.id)
+        report.duplicates = {slug: ids for slug, ids in by_slug.items() if len(ids) > 1}
+
+        entries = [
+            (slug, entry) for slug, entry in self.history.history.items() if isinstance(entry, dict)
+        ]
+        slugs_by_id = defaultdict(list)
+        for slug, entry in entries:
+            slugs_by_id[entry.get('post_id')].append(slug)
+
+        with self.history.deferred_save():
+            for slug, entry in entries:
+                post_id = entry.get('post_id')
+                post = remote.get(post_id)
+
+                if post is None:
+                    if not full:
+                        continue
+                    # 作り直された投稿（同じslugの投稿が1件だけある）は付け替える
+                    candidates = [
+                        candidate for candidate in by_slug.get(slug, []) if candidate not in slugs_by_id
+                    ]
+                    if len(candidates) == 1:
+                        post = remote[candidates[0]]
+                        report.relinked.append((slug, post_id, post.id))
+                        slugs_by_id[post.id].append(slug)
+                        self.history.save_synced(slug, post.id, post.status, post.modified)
+                    else:
+                        report.orphans.append(slug)
+                        self.history.save_synced(slug, post_id, STATUS_MISSING)
+                    continue
+
+                if post.status == 'trash':
+                    report.trashed.append(slug)
+                elif post.slug and post.slug != slug:
+                    report.renamed.append((slug, post.slug))
+                if self.history.save_synced(slug, post.id, post.status, post.modified):
+                    report.updated.append(slug)
+
+            # 管理画面で作られた投稿を登録（同じslugの履歴が別の投稿を指していれば重複として報告）
+            for post in posts:
+                if post.id in slugs_by_id or not post.slug or post.status == 'trash':
+                    continue
+                if post.slug in self.history.history:
+                    ids = report.duplicates.setdefault(post.slug, [])
+                    for post_id in (self.history.find_by_slug(post.slug), post.id):
+                        if post_id not in ids:
+                            ids.append(post_id)
+                    continue
+                self.history.save_imported(
+                    slug=post.slug, post_id=post.id, title=post.title, created_at=post.modified
+                )
+                self.history.save_synced(post.slug, post.id, post.status, post.modified)
+                slugs_by_id[post.id].append(post.slug)
+                report.added.append(post.slug)
+
+        report.shared_ids = {
+            post_id: slugs for post_id, slugs in slugs_by_id.items() if post_id and len(slugs) > 1
+        }
+        return report
+
+    def run(self, full: bool = False) -> SyncReport:
+        """
+        同期を実行（初回・full指定時は全件、それ以外は前回以降に更新された投稿のみ）
+
+        Raises:
+            PublisherError: 取得に失敗した時
+        """
+        high_water = self.state.get('high_water')
+        full = full or not high_water or not self.state.get('last_full_sync')
+
+        posts, pages = self.crawl(modified_after=None if full else high_water)
+        report = self.reconcile(posts, full=full)
+        report.pages = pages
+
+        now = datetime.now().isoformat()
+        modified = [post.modified for post in posts if post.modified]
+        self.state['last_sync'] = now
+        if full:
+            self.state['last_full_sync'] = now
+        if modified:
+            # modifiedはサイトのタイムゾーンの "YYYY-MM-DDTHH:MM:SS" なので文字列で比較できる
+            self.state['high_water'] = max(modified + ([high_water] if high_water and not full else []))
+        save_sync_state(self.state_file, self.state)
+        return report
+
+
+def load_sync_state(state_file) -> dict:
+    path = Path(state_file)
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return {}
+    return {}
+
+
+def save_sync_state(state_file, state: dict):
+    path = Path(state_file)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(json.dumps(state, ensure_ascii=False, indent=1), encoding='utf-8')
+        tmp.replace(path)
+    except OSError as e:
+        # 保存失敗は警告のみ（次回は全件取得し直す）
+        print(f"Warning: Failed to save sync state: {e}")
+
+
+def history_is_trusted(config) -> bool:
+    """
+    投稿履歴を信頼して投稿時のスラッグ検索を省略できるか
+
+    全件同期を1回以上行い、最後の同期がsync.trust_hours以内の時にTrue（0なら常にFalse）
+    """
+    trust_hours = float(config.get('sync', 'trust_hours', default=0) or 0)
+    if trust_hours <= 0:
+        return False
+    state = load_sync_state(config.get('sync', 'state_file', default='output/sync_state.json'))
+    if not state.get('last_full_sync') or not state.get('last_sync'):
+        return False
+    try:
+        last_sync = datetime.fromisoformat(state['last_sync'])
+    except ValueError:
+        return False
+    return datetime.now() - last_sync <= timedelta(hours=trust_hours)
+
+
+def format_sync_report(report: SyncReport) -> str:
+    """レポート形式で出力"""
+    mode = "全件" if report.full else "差分"
+    lines = [
+        f"[Sync] {mode}: {report.fetched}件取得（{report.pages}ページ）"
+        f" / 登録 {len(report.added)}件 / 更新 {len(report.updated)}件"
+    ]
+    for slug in report.added[:REPORT_ADDED_LIMIT]:
+        lines.append(f"  + {slug}（サイトで作成）")
+    if len(report.added) > REPORT_ADDED_LIMIT:
+        lines.append(f"  + …他{len(report.added) - REPORT_ADDED_LIMIT}件")
+    for slug, old_id, new_id in report.relinked:
+        lines.append(f"  ~ {slug}: ID {old_id} → {new_id}（作り直された投稿に付け替え）")
+    for slug, remote_slug in report.renamed:
+        lines.append(f"  ~ {slug}: サイト上のスラッグは {remote_slug}")
+    for slug in report.trashed:
+        lines.append(f"  ! {slug}: ゴミ箱にあります（次回の投稿では新規作成）")
+    for slug in report.orphans:
+        lines.append(f"  ✗ {slug}: サイトにありません（削除済み）")
+    for slug, ids in report.duplicates.items():
+        lines.append(f"  ✗ {slug}: 同じスラッグの投稿が複数あります（ID: {', '.join(map(str, ids))}）")
+    for post_id, slugs in report.shared_ids.items():
+        lines.append(f"  ✗ ID {post_id}: 複数の履歴が同じ投稿を指しています（{', '.join(slugs)}）")
+    if not report.full:
+        lines.append("  ※差分同期では削除済みの投稿は検出しません（--full-syncで全件照合）")
+    return "\n".join(lines)
@@ -0,0 +1,364 @@
+"""
+Terminology - 用語・禁止表現チェックモジュール
+用語辞書（terminology.yaml）の全パターンを1つのAho-Corasickオートマトンにまとめ、
+記事JSONの全テキストを1回なぞるだけで禁止表現・表記ゆれを見つける
+
+パターンごとに正規表現で検索すると、辞書の語数×本文の長さの時間がかかる。
+オートマトンなら辞書の大きさによらず本文の長さに比例する。構築済みのオートマトンは
+辞書の内容ハッシュと一緒に保存し、辞書が変わるまで作り直さない
+
+    checker = TermChecker.from_config(config)
+    for hit in checker.check(article_json):
+        print(hit.path, hit.pattern, hit.suggestion)
+"""
+import hashlib
+import html
+import json
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import yaml
+
+
+# キャッシュの形式（変わったら作り直す）
+CACHE_FORMAT = 1
+
+# 一致の重さ
+LEVEL_ERROR = 'error'       # 使えない表現
+LEVEL_WARNING = 'warning'   # 表記ゆれ
+LEVEL_ALLOW = 'allow'       # 例外（重なる一致を報告しない）
+
+# 照合しない記事JSONのキー（表示されない値・URL）
+SKIP_KEYS = frozenset({'type', 'level', 'style', 'height', 'ordered', 'fixed_layout', 'url'})
+
+# 報告に添える前後の文字数
+CONTEXT_CHARS = 12
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+class TerminologyError(Exception):
+    """用語辞書関連のエラー"""
+    pass
+
+
+def normalize(text: str) -> str:
+    """タグを除き、全角半角・大文字小文字を揃える（文字数が変わる場合がある）"""
+    return unicodedata.normalize('NFKC', html.unescape(_TAG_RE.sub('', text))).lower()
+
+
+@dataclass
+class TermEntry:
+    """辞書の1項目"""
+    pattern: str
+    level: str
+    suggestion: str = ''    # 推奨表記（表記ゆれのみ）
+    note: str = ''          # 理由
+
+
+@dataclass
+class TermHit:
+    """本文中の一致"""
+    path: str           # 記事JSON内の位置（例: sections[3].items[0]）
+    entry: TermEntry
+    context: str        # 一致した箇所の前後（正規化後）
+    count: int = 1      # 同じ位置で同じ語が一致した回数
+
+    @property
+    def is_error(self) -> bool:
+        return self.entry.level == LEVEL_ERROR
+
+
+def load_dictionary(dictionary_file) -> list[TermEntry]:
+    """
+    用語辞書（prohibited / preferred / allowed）を読み込む
+
+    Raises:
+        TerminologyError: 読み込めない・形式が正しくない時
+    """
+    path = Path(dictionary_file)
+    try:
+        data = yaml.safe_load(path.read_text(encoding='utf-8')) or {}
+    except (OSError, yaml.YAMLError) as e:
+        raise TerminologyError(f"用語辞書を読み込めません: {path}: {e}")
+    if not isinstance(data, dict):
+        raise TerminologyError(f"用語辞書の形式が正しくありません: {path}")
+
+    entries = []
+    for item in data.get('prohibited') or []:
+        if isinstance(item, str):
+            item = {'pattern': item}
+        if not isinstance(item, dict) or not item.get('pattern'):
+            raise TerminologyError(f"prohibitedの項目にpatternがありません: {item!r}")
+        entries.append(TermEntry(str(item['pattern']), LEVEL_ERROR, note=str(item.get('note') or '')))
+
+    preferred = data.get('preferred') or {}
+    if not isinstance(preferred, dict):
+        raise TerminologyError("preferredは 推奨表記: [言い換える表記...] の形で指定してください")
+    for suggestion, variants in preferred.items():
+        if isinstance(variants, str):
+            variants = [variants]
+        for variant in variants or []:
+            entries.append(TermEntry(str(variant), LEVEL_WARNING, suggestion=str(suggestion)))
+
+    for pattern in data.get('allowed') or []:
+        entries.append(TermEntry(str(pattern), LEVEL_ALLOW))
+    return entries
+
+
+class Automaton:
+    """Aho-Corasickオートマトン
+
+    状態ごとに 遷移（文字 → 状態）・失敗時の戻り先・その状態で一致するパターン番号 を持つ。
+    一致するパターンには、失敗リンクをたどった先の状態で一致するものも含めておく
+    """
+
+    def __init__(self, goto: list[dict[str, int]], fail: list[int], out: list[tuple[int, ...]],
+                 lengths: list[int]):
+        self.goto = goto
+        self.fail = fail
+        self.out = out
+        self.lengths = lengths
+
+    @classmethod
+    def build(cls, patterns: list[str]) -> 'Automaton':
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        for number, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    out.append([])
+                state = next_state
+            out[state].append(number)
+
+        # 幅優先で失敗リンクを張る（浅い状態から順に決まる）
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                back = fail[state]
+                while back and char not in goto[back]:
+                    back = fail[back]
+                target = goto[back].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                out[next_state].extend(out[fail[next_state]])
+
+        return cls(goto, fail, [tuple(numbers) for numbers in out], [len(pattern) for pattern in patterns])
+
+    def find(self, text: str) -> Iterator[tuple[int, int]]:
+        """(開始位置, パターン番号)を本文の先頭から順に返す"""
+        goto = self.goto
+        fail = self.fail
+        out = self.out
+        lengths = self.lengths
+        state = 0
+        for position, char in enumerate(text):
+            transitions = goto[state]
+            while char not in transitions and state:
+                state = fail[state]
+                transitions = goto[state]
+            state = transitions.get(char, 0)
+            if out[state]:
+                end = position + 1
+                for number in out[state]:
+                    yield end - lengths[number], number
+
+    def to_json(self) -> dict:
+        return {'goto': self.goto, 'fail': self.fail, 'out': self.out, 'lengths': self.lengths}
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'Automaton':
+        return cls(data['goto'], data['fail'], [tuple(numbers) for numbers in data['out']], data['lengths'])
+
+
+def iter_text_fields(value, path: str = '') -> Iterator[tuple[str, str]]:
+    """記事JSONの全テキストを (位置, 本文) で返す"""
+    if isinstance(value, str):
+        if value:
+            yield path, value
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            if key not in SKIP_KEYS:
+                yield from iter_text_fields(child, f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield from iter_text_fields(child, f"{path}[{index}]")
+
+
+class TermChecker:
+    """用語辞書で記事JSONを照合するクラス"""
+
+    def __init__(
+        self,
+        dictionary_file: str = "terminology.yaml",
+        cache_file: Optional[str] = "output/terminology_automaton.json"
+    ):
+        """
+        Args:
+            dictionary_file: 用語辞書のパス
+            cache_file: 構築済みオートマトンの保存先（Noneなら毎回構築）
+
+        Raises:
+            TerminologyError: 用語辞書を読み込めない時
+        """
+        self.dictionary_file = Path(dictionary_file)
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.entries: list[TermEntry] = []
+        self.automaton: Optional[Automaton] = None
+        self._load()
+
+    @classmethod
+    def from_config(cls, config) -> 'TermChecker':
+        """config.yamlのterminologyセクションから作成"""
+        return cls(
+            dictionary_file=config.get('terminology', 'dictionary_file', default='terminology.yaml'),
+            cache_file=config.get('terminology', 'cache_file', default='output/terminology_automaton.json'),
+        )
+
+    # ========== 構築・キャッシュ ==========
+
+    def _load(self):
+        try:
+            source = self.dictionary_file.read_bytes()
+        except OSError as e:
+            raise TerminologyError(f"用語辞書を読み込めません: {self.dictionary_file}: {e}")
+        digest = hashlib.sha256(source).hexdigest()
+        if self._load_cache(digest):
+            return
+
+        entries = load_dictionary(self.dictionary_file)
+        # 同じパターンは1つにまとめる（後に書いた項目を優先）
+        by_pattern: dict[str, TermEntry] = {}
+        for entry in entries:
+            pattern = normalize(entry.pattern)
+            if pattern:
+                by_pattern[pattern] = entry
+        self.entries = list(by_pattern.values())
+        self.automaton = Automaton.build(list(by_pattern))
+        self._save_cache(digest)
+
+    def _load_cache(self, digest: str) -> bool:
+        if self.cache_file is None or not self.cache_file.exists():
+            return False
+        try:
+            data = json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return False
+        if data.get('format') != CACHE_FORMAT or data.get('source_sha256') != digest:
+            return False
+        try:
+            self.entries = [TermEntry(**entry) for entry in data['entries']]
+            self.automaton = Automaton.from_json(data['automaton'])
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def _save_cache(self, digest: str):
+        if self.cache_file is None:
+            return
+        data = {
+            'format': CACHE_FORMAT,
+            'source_sha256': digest,
+            'entries': [vars(entry) for entry in self.entries],
+            'automaton': self.automaton.to_json(),
+        }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(self.cache_file.suffix + '.tmp')
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+            tmp.replace(self.cache_file)
+        except OSError as e:
+            # 保存失敗は警告のみ（次回も辞書から構築する）
+            print(f"Warning: Failed to save terminology cache: {e}")
+
+    # ========== 照合 ==========
+
+    def scan(self, text: str) -> list[tuple[int, int, TermEntry]]:
+        """
+        1つのテキスト内の一致（正規化後の開始位置, 終了位置, 項目）
+
+        例外（allowed）と重なる一致、より長い一致に含まれる一致は除く
+        """
+        entries = self.entries
+        lengths = self.automaton.lengths
+        matches = []
+        allowed = []
+        for start, number in self.automaton.find(text):
+            span = (start, start + lengths[number], entries[number])
+            if span[2].level == LEVEL_ALLOW:
+                allowed.append(span)
+            else:
+                matches.append(span)
+        if not matches:
+            return []
+
+        result = []
+        covered_end = -1
+        for start, end, entry in sorted(matches, key=lambda span: (span[0], -span[1])):
+            if end <= covered_end:
+                continue
+            if any(a_start < end and start < a_end for a_start, a_end, _ in allowed):
+                continue
+            result.append((start, end, entry))
+            covered_end = end
+        return result
+
+    def check(self, article_json: dict) -> list[TermHit]:
+        """
+        記事JSONの全テキストを照合
+
+        Returns:
+            list[TermHit]: 使えない表現 → 表記ゆれ の順（それぞれ記事内の出現順）
+        """
+        hits: dict[tuple[str, str], TermHit] = {}
+        for path, value in iter_text_fields(article_json):
+            text = normalize(value)
+            for start, end, entry in self.scan(text):
+                key = (path, entry.pattern)
+                if key in hits:
+                    hits[key].count += 1
+                    continue
+                context = text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS]
+                hits[key] = TermHit(path, entry, context)
+        return sorted(hits.values(), key=lambda hit: not hit.is_error)
+
+
+def format_hit(hit: TermHit) -> str:
+    """1件の一致の説明（バリデーションの報告用）"""
+    times = f"（{hit.count}箇所）" if hit.count > 1 else ''
+    if hit.is_error:
+        note = f"（{hit.entry.note}）" if hit.entry.note else ''
+        return f"{hit.path}: 「{hit.entry.pattern}」は使えません{note}{times} …{hit.context}…"
+    return f"{hit.path}: 「{hit.entry.pattern}」→「{hit.entry.suggestion}」に統一してください{times}"
+
+
+def open_term_checker(config) -> Optional[TermChecker]:
+    """
+    用語チェック（terminology.enabledがfalseならNone）
+
+    Raises:
+        TerminologyError: 用語辞書を読み込めない時
+    """
+    if not config.get('terminology', 'enabled', default=True):
+        return None
+    return TermChecker.from_config(config)
+
+
+if __name__ == "__main__":
+    # テスト用: 記事JSONファイルを照合
+    import sys
+    checker = TermChecker(cache_file=None)
+    for file_path in sys.argv[1:]:
+        article = json.loads(Path(file_path).read_text(encoding='utf-8'))
+        for hit in checker.check(article):
+            print(f"{file_path}: {format_hit(hit)}")
@@ -5,6 +5,10 @@ Validator - 構造バリデーションモジュール
 from dataclasses import dataclass, field
 from typing import Optional
 
+from .sections import Article
+from .similarity import SimilarityIndex
+from .terminology import TermChecker, format_hit
+
 
 @dataclass
 class ValidationResult:
@@ -62,12 +66,26 @@ class Validator:
     MIN_SUMMARY_ITEMS = 4
     MIN_FAQ_COUNT = 2
     
-    def validate(self, article_json: dict) -> ValidationResult:
+    def __init__(
+        self,
+        similarity_index: Optional[SimilarityIndex] = None,
+        term_checker: Optional[TermChecker] = None
+    ):
+        """
+        Args:
+            similarity_index: 過去記事の類似節の索引（指定時は重複チェックを行う）
+            term_checker: 用語辞書（指定時は禁止表現・表記ゆれのチェックを行う）
+        """
+        self.similarity_index = similarity_index
+        self.term_checker = term_checker
+    
+    def validate(self, article_json: dict, slug: str = '') -> ValidationResult:
         """
         JSONの構造を検証
         
         Args:
             article_json: 構造化された記事JSON（raw_json形式）
+            slug: 記事のスラッグ（類似チェックで自分自身の過去の版を除く）
             
         Returns:
             ValidationResult: バリデーション結果
@@ -89,6 +107,14 @@ class Validator:
         # 5. summaryチェック
         self._check_summary(article_json, result)
         
+        # 6. 過去記事との重複チェック
+        if self.similarity_index is not None:
+            self._check_similarity(article_json, slug, result)
+        
+        # 7. 禁止表現・表記ゆれチェック
+        if self.term_checker is not None:
+            self._check_terms(article_json, result)
+        
         return result
     
     def _check_required_fields(self, data: dict, result: ValidationResult):
@@ -165,6 +191,35 @@ class Validator:
         if len(items) < self.MIN_SUMMARY_ITEMS:
             result.add_warning('WRN-005', f'summaryが{len(items)}項目（{self.MIN_SUMMARY_ITEMS}項目以上推奨）')
 
+    
+    def _check_similarity(self, data: dict, slug: str, result: ValidationResult):
+        """過去記事と重複する節・記事のチェック（節ごとに最も近いものだけ報告）"""
+        reported = set()
+        for match in self.similarity_index.query(Article.from_dict(data), slug):
+            if match.label in reported:
+                continue
+            reported.add(match.label)
+            if match.whole_article:
+                result.add_warning(
+                    'WRN-007',
+                    f'記事全体が既存記事「{match.slug}」と類似しています（類似度{match.similarity:.0%}）'
+                )
+            else:
+                result.add_warning(
+                    'WRN-006',
+                    f'{match.label} が既存記事「{match.slug}」の {match.other_label} と'
+                    f'類似しています（類似度{match.similarity:.0%}）'
+                )
+
+    
+    def _check_terms(self, data: dict, result: ValidationResult):
+        """用語辞書の禁止表現（エラー）と表記ゆれ（警告）のチェック"""
+        for hit in self.term_checker.check(data):
+            if hit.is_error:
+                result.add_error('ERR-004', format_hit(hit))
+            else:
+                result.add_warning('WRN-008', format_hit(hit))
+
 
 if __name__ == "__main__":
     # テスト用
@@ -0,0 +1,305 @@
+"""
+WXR - WordPressエクスポートファイル（WXR）入出力モジュール
+iterparseで1件ずつ読み、1件ずつ書き出すため記事数に関わらずメモリ使用量は一定
+"""
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO
+from urllib.parse import quote
+from xml.sax.saxutils import escape as _xml_escape, quoteattr as _xml_quoteattr
+
+
+WXR_VERSION = "1.2"
+WXR_NAMESPACES = {
+    'excerpt': f"http://wordpress.org/export/{WXR_VERSION}/excerpt/",
+    'content': "http://purl.org/rss/1.0/modules/content/",
+    'wfw': "http://wellformedweb.org/CommentAPI/",
+    'dc': "http://purl.org/dc/elements/1.1/",
+    'wp': f"http://wordpress.org/export/{WXR_VERSION}/",
+}
+
+# Yoast SEOのメタディスクリプション
+META_DESCRIPTION_KEY = "_yoast_wpseo_metadesc"
+
+# ファイル名にするとディレクトリの外を指せる文字（パス区切り・制御文字）
+_UNSAFE_SLUG_RE = re.compile(r'[/\\\x00-\x1f\x7f]')
+
+# ターム（カテゴリー・タグ）のスラッグに残す文字（WordPressのsanitize_title_with_dashesと同じ）
+_TERM_SLUG_DROP_RE = re.compile(r'[^%a-z0-9 _-]')
+_TERM_SLUG_DASH_RE = re.compile(r'[\s.]+')
+_TERM_SLUG_DASHES_RE = re.compile(r'-{2,}')
+
+
+@dataclass
+class WXRItem:
+    """WXRの<item>1件分"""
+    title: str
+    slug: str
+    content: str
+    status: str = "draft"
+    post_type: str = "post"
+    post_id: Optional[int] = None
+    post_date: Optional[str] = None  # "YYYY-MM-DD HH:MM:SS"（サイトのローカル時刻）
+    categories: list[str] = field(default_factory=list)
+    tags: list[str] = field(default_factory=list)
+    meta: dict = field(default_factory=dict)
+    excerpt: str = ""
+    link: str = ""
+
+    @property
+    def meta_description(self) -> Optional[str]:
+        return self.meta.get(META_DESCRIPTION_KEY)
+
+
+class WXRError(Exception):
+    """WXR関連のエラー"""
+    pass
+
+
+def is_safe_slug(slug: str) -> bool:
+    """スラッグをそのままファイル名にしてよいか（".." や "/" でディレクトリの外に出ないか）"""
+    return bool(slug) and not slug.startswith('.') and _UNSAFE_SLUG_RE.search(slug) is None
+
+
+def term_slug(name: str) -> str:
+    """
+    ターム名からスラッグ（nicename）を作る
+
+    WordPressと同じく小文字にして空白・ピリオドをハイフンにし、ASCII以外は小文字の%エンコードにする
+    （「労務 管理」→ %e5%8a%b4%e5%8b%99-%e7%ae%a1%e7%90%86）
+    """
+    slug = _TERM_SLUG_DASH_RE.sub('-', name.strip().lower().replace('%', ''))
+    slug = ''.join(char if char.isascii() else quote(char).lower() for char in slug)
+    slug = _TERM_SLUG_DROP_RE.sub('', slug)
+    return _TERM_SLUG_DASHES_RE.sub('-', slug).strip('-')
+
+
+# ========== 読み込み ==========
+
+def _local_name(tag: str) -> str:
+    """'{namespace}name' → 'name'（WXRのバージョン差を吸収する）"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _item_from_element(element: ET.Element) -> WXRItem:
+    values = {}
+    categories = []
+    tags = []
+    meta = {}
+
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 'category':
+            domain = child.get('domain')
+            if domain == 'category':
+                categories.append((child.text or '').strip())
+            elif domain == 'post_tag':
+                tags.append((child.text or '').strip())
+        elif name == 'postmeta':
+            key = value = None
+            for meta_child in child:
+                meta_name = _local_name(meta_child.tag)
+                if meta_name == 'meta_key':
+                    key = meta_child.text
+                elif meta_name == 'meta_value':
+                    value = meta_child.text or ''
+            if key:
+                meta[key] = value
+        elif child.tag.startswith('{') and name == 'encoded':
+            # content:encoded / excerpt:encoded は名前空間で区別する
+            prefix = 'excerpt' if 'excerpt' in child.tag else 'content'
+            values[prefix] = child.text or ''
+        else:
+            values[name] = child.text or ''
+
+    post_id = values.get('post_id', '').strip()
+    return WXRItem(
+        title=values.get('title', ''),
+        slug=values.get('post_name', ''),
+        content=values.get('content', ''),
+        status=values.get('status', 'draft') or 'draft',
+        post_type=values.get('post_type', 'post') or 'post',
+        post_id=int(post_id) if post_id.isdigit() else None,
+        post_date=values.get('post_date') or None,
+        categories=categories,
+        tags=tags,
+        meta=meta,
+        excerpt=values.get('excerpt', ''),
+        link=values.get('link', ''),
+    )
+
+
+def iter_wxr_items(source, post_types: Optional[Iterable[str]] = ('post',)) -> Iterator[WXRItem]:
+    """
+    WXRファイルから<item>を1件ずつ読み出す
+
+    Args:
+        source: ファイルパスまたはバイナリファイルオブジェクト
+        post_types: 対象とする投稿タイプ（Noneなら全件）
+
+    Yields:
+        WXRItem: 読み込んだ投稿
+
+    Raises:
+        WXRError: XMLとして解析できない時
+    """
+    wanted = set(post_types) if post_types is not None else None
+    try:
+        context = ET.iterparse(source, events=('start', 'end'))
+        _, root = next(context)
+        channel = None
+        for event, element in context:
+            if event == 'start':
+                if channel is None and _local_name(element.tag) == 'channel':
+                    channel = element
+                continue
+            if _local_name(element.tag) != 'item':
+                continue
+
+            item = _item_from_element(element)
+            # 読み終えた要素を捨てて木が伸びないようにする
+            element.clear()
+            if channel is not None:
+                channel.remove(element)
+
+            if wanted is None or item.post_type in wanted:
+                yield item
+    except ET.ParseError as e:
+        raise WXRError(f"Invalid WXR file: {e}")
+    except OSError as e:
+        raise WXRError(f"Failed to read file: {e}")
+
+
+# ========== 書き出し ==========
+
+def _cdata(text: str) -> str:
+    """CDATAセクションに包む（]]> は分割して埋め込む）"""
+    return '<![CDATA[' + (text or '').replace(']]>', ']]]]><![CDATA[>') + ']]>'
+
+
+class WXRWriter:
+    """WXRファイルを1件ずつ書き出すクラス
+
+    with WXRWriter(path, site_url) as writer:
+        writer.write_item(item)
+    """
+
+    def __init__(
+        self,
+        target,
+        site_url: str = "",
+        site_title: str = "",
+        author: str = "admin"
+    ):
+        """
+        Args:
+            target: 出力先パスまたはテキストファイルオブジェクト
+            site_url: サイトURL（<wp:base_site_url>に使用）
+            site_title: サイト名
+            author: 投稿者ログイン名（<dc:creator>に使用）
+        """
+        self.target = target
+        self.site_url = site_url.rstrip('/')
+        self.site_title = site_title
+        self.author = author
+        self.count = 0
+        self._file: Optional[TextIO] = None
+        self._owns_file = False
+
+    def __enter__(self) -> 'WXRWriter':
+        if isinstance(self.target, (str, Path)):
+            path = Path(self.target)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, 'w', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self._file = self.target
+        self._write_header()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._file.write('</channel>\n</rss>\n')
+        finally:
+            if self._owns_file:
+                self._file.close()
+
+    def _write_header(self):
+        namespaces = '\n'.join(
+            f'\txmlns:{prefix}="{uri}"' for prefix, uri in WXR_NAMESPACES.items()
+        )
+        now = format_datetime(datetime.now(timezone.utc))
+        self._file.write(
+            '<?xml version="1.0" encoding="UTF-8" ?>\n'
+            f'<rss version="2.0"\n{namespaces}\n>\n'
+            '<channel>\n'
+            f'\t<title>{_xml_escape(self.site_title)}</title>\n'
+            f'\t<link>{_xml_escape(self.site_url)}</link>\n'
+            '\t<description></description>\n'
+            f'\t<pubDate>{now}</pubDate>\n'
+            '\t<language>ja</language>\n'
+            f'\t<wp:wxr_version>{WXR_VERSION}</wp:wxr_version>\n'
+            f'\t<wp:base_site_url>{_xml_escape(self.site_url)}</wp:base_site_url>\n'
+            f'\t<wp:base_blog_url>{_xml_escape(self.site_url)}</wp:base_blog_url>\n'
+        )
+
+    def write_item(self, item: WXRItem):
+        """投稿1件を書き出す"""
+        if self._file is None:
+            raise WXRError("WXRWriter must be used as a context manager")
+
+        link = item.link or (f"{self.site_url}/{item.slug}/" if self.site_url else "")
+        post_date = item.post_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        lines = [
+            '\t<item>',
+            f'\t\t<title>{_xml_escape(item.title)}</title>',
+            f'\t\t<link>{_xml_escape(link)}</link>',
+            f'\t\t<dc:creator>{_cdata(self.author)}</dc:creator>',
+            f'\t\t<guid isPermaLink="false">{_xml_escape(link)}</guid>',
+            '\t\t<description></description>',
+            f'\t\t<content:encoded>{_cdata(item.content)}</content:encoded>',
+            f'\t\t<excerpt:encoded>{_cdata(item.excerpt)}</excerpt:encoded>',
+        ]
+        if item.post_id:
+            lines.append(f'\t\t<wp:post_id>{int(item.post_id)}</wp:post_id>')
+        lines += [
+            f'\t\t<wp:post_date>{_cdata(post_date)}</wp:post_date>',
+            f'\t\t<wp:post_name>{_cdata(item.slug)}</wp:post_name>',
+            f'\t\t<wp:status>{_cdata(item.status)}</wp:status>',
+            f'\t\t<wp:post_type>{_cdata(item.post_type)}</wp:post_type>',
+            '\t\t<wp:comment_status><![CDATA[closed]]></wp:comment_status>',
+            '\t\t<wp:ping_status><![CDATA[closed]]></wp:ping_status>',
+        ]
+        for domain, names in (('category', item.categories), ('post_tag', item.tags)):
+            for name in names:
+                lines.append(
+                    f'\t\t<category domain="{domain}" nicename={_xml_quoteattr(term_slug(name))}>'
+                    f'{_cdata(name)}</category>'
+                )
+        for key, value in item.meta.items():
+            if value is None:
+                continue
+            lines += [
+                '\t\t<wp:postmeta>',
+                f'\t\t\t<wp:meta_key>{_cdata(key)}</wp:meta_key>',
+                f'\t\t\t<wp:meta_value>{_cdata(str(value))}</wp:meta_value>',
+                '\t\t</wp:postmeta>',
+            ]
+        lines.append('\t</item>\n')
+
+        self._file.write('\n'.join(lines))
+        self.count += 1
+
+
+if __name__ == "__main__":
+    # テスト用
+    import sys
+    if len(sys.argv) > 1:
+        for wxr_item in iter_wxr_items(sys.argv[1], post_types=None):
+            print(f"[{wxr_item.post_type}] {wxr_item.post_id} {wxr_item.slug}: {wxr_item.title}")
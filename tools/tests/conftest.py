@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# tools/ をインポートパスに追加（block_generator, lib を直接インポートする）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
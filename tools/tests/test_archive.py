@@ -0,0 +1,32 @@
+"""Archive の読み込みのテスト"""
+import json
+
+from lib.archive import Archive
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+def test_iter_skips_malformed_sections(tmp_path):
+    _write(tmp_path / 'good.json', {'sections': [{'type': 'heading', 'level': 2, 'text': '見出し'}]})
+    _write(tmp_path / 'bad-level.json', {'sections': [{'type': 'heading', 'level': 'h2', 'text': '見出し'}]})
+    _write(tmp_path / 'not-object.json', ['sections'])
+    (tmp_path / 'broken.json').write_text('{', encoding='utf-8')
+
+    archive = Archive.from_dirs([str(tmp_path)])
+    slugs = [article.slug for article in archive]
+
+    assert slugs == ['good']
+    assert sorted(path.name for path, _ in archive.errors) == ['bad-level.json', 'broken.json', 'not-object.json']
+
+
+def test_iter_skips_block_html_with_invalid_heading_level(tmp_path):
+    (tmp_path / 'bad.txt').write_text(
+        '<!-- wp:heading {"level":"x"} -->\n<h2 class="wp-block-heading">見出し</h2>\n<!-- /wp:heading -->',
+        encoding='utf-8'
+    )
+    archive = Archive.from_dirs([str(tmp_path)])
+
+    assert list(archive) == []
+    assert [path.name for path, _ in archive.errors] == ['bad.txt']
@@ -0,0 +1,107 @@
+"""ArtifactStore の版管理・ロールバック先のテスト"""
+import pytest
+
+from lib.artifacts import ArtifactError, ArtifactStore, format_versions, rollback_target
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'artifacts'), codec='zlib')
+
+
+def publish(store, slug, html, title='T'):
+    version = store.record(slug, html, article_json={'html': html}, title=title)
+    store.mark_published(slug, html)
+    return version
+
+
+def rollback(store, slug):
+    """Pipeline.rollbackと同じ記録（投稿中の版を取り下げ、ロールバック先を投稿）"""
+    versions = store.versions(slug)
+    live = max((v for v in versions if v.published_at), key=lambda v: v.published_at[-1])
+    artifact = store.load(slug)
+    store.mark_published(slug, artifact.html)
+    store.mark_rolled_back(slug, live.version)
+    return artifact.version.version
+
+
+def test_record_deduplicates_content(store):
+    first = store.record('post', '<p>a</p>', article_json={'a': 1}, extra_meta={'k': 'v'}, title='T')
+    again = store.record('post', '<p>a</p>', article_json={'a': 1}, extra_meta={'k': 'v'}, title='T')
+    changed = store.record('post', '<p>b</p>', article_json={'a': 1}, title='T')
+
+    assert again.version == first.version
+    assert changed.version == first.version + 1
+    artifact = store.load('post', first.version)
+    assert artifact.html == '<p>a</p>'
+    assert artifact.article_json == {'a': 1}
+    assert artifact.extra_meta == {'k': 'v'}
+
+
+def test_repeated_rollback_walks_further_back(store):
+    for html in ('<p>v1</p>', '<p>v2</p>', '<p>v3</p>'):
+        publish(store, 'post', html)
+
+    assert rollback(store, 'post') == 2
+    # 2回目は取り下げたv3ではなく、さらに1つ前へ
+    assert rollback(store, 'post') == 1
+    with pytest.raises(ArtifactError):
+        store.load('post')
+
+
+def test_rollback_target_after_fixing_skips_the_rolled_back_version(store):
+    publish(store, 'post', '<p>good</p>')
+    publish(store, 'post', '<p>bad</p>')
+    assert rollback(store, 'post') == 1
+
+    publish(store, 'post', '<p>fixed</p>')
+
+    assert rollback_target(store.versions('post')).version == 1
+
+
+def test_republished_version_is_a_candidate_again(store):
+    publish(store, 'post', '<p>v1</p>')
+    publish(store, 'post', '<p>v2</p>')
+    rollback(store, 'post')
+
+    # 取り下げたv2を明示的に投稿し直した
+    store.mark_published('post', '<p>v2</p>')
+
+    assert rollback_target(store.versions('post')).version == 1
+    assert not store.versions('post')[1].rolled_back_at
+
+
+def test_rollback_target_without_publish_records(store):
+    store.record('post', '<p>v1</p>')
+    store.record('post', '<p>v2</p>')
+
+    assert rollback_target(store.versions('post')).version == 1
+    assert 'v1' in format_versions('post', store.versions('post')).split('← ロールバック先')[0].splitlines()[-1]
+
+
+def test_prune_keeps_rollback_target(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'artifacts'), max_versions=1, max_age_days=0, codec='zlib')
+    publish(store, 'post', '<p>v1</p>')
+    publish(store, 'post', '<p>v2</p>')
+    publish(store, 'post', '<p>v3</p>')
+    rollback(store, 'post')
+    for html in ('<p>v4</p>', '<p>v5</p>'):
+        store.record('post', html)
+
+    kept = [v.version for v in store.versions('post')]
+    assert rollback_target(store.versions('post')).version in kept
+
+
+def test_gc_removes_unreferenced_objects(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'artifacts'), max_versions=1, max_age_days=0, codec='zlib')
+    for html in ('<p>v1</p>', '<p>v2</p>', '<p>v3</p>'):
+        store.record('post', html)
+
+    report = store.gc()
+
+    assert report.objects_removed > 0
+    # 最新版とロールバック先だけ残る
+    assert [v.version for v in store.versions('post')] == [2, 3]
+    with pytest.raises(ArtifactError):
+        store.load('post', 1)
+    assert store.load('post', 3).html == '<p>v3</p>'
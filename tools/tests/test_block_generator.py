@@ -0,0 +1,105 @@
+"""block_generator のサニタイズのテスト"""
+import pytest
+
+from block_generator import BlockGenerator, clear_sanitize_cache, sanitize_article, sanitize_inline
+
+
+@pytest.fixture(autouse=True)
+def _clear_memo():
+    clear_sanitize_cache()
+    yield
+    clear_sanitize_cache()
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('<strong>unclosed', '<strong>unclosed</strong>'),
+    ('<strong><em>both', '<strong><em>both</em></strong>'),
+    ('stray</strong> close', 'stray close'),
+    ('<b><i>x</b>y</i>', '<b><i>x</i></b>y'),
+    ('<a href="/p/">link', '<a href="/p/">link</a>'),
+    ('<span class="c">a</span> <br> b', '<span class="c">a</span> <br> b'),
+    ('<strong>ok</strong>', '<strong>ok</strong>'),
+])
+def test_sanitize_inline_balances_allowed_tags(value, expected):
+    assert sanitize_inline(value) == expected
+
+
+def test_sanitize_inline_escapes_unknown_tags():
+    assert sanitize_inline('<script>x</script>') == '&lt;script&gt;x&lt;/script&gt;'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('<a href="/p?a=1&amp;b=2">x</a>', '<a href="/p?a=1&amp;b=2">x</a>'),
+    ('<a href="/p?a=1&b=2">x</a>', '<a href="/p?a=1&amp;b=2">x</a>'),
+    ('<a href="&#106;avascript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href="java&#x09;script:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href=" \x01JavaScript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href="&#x64;ata:text/html,x">x</a>', '<a>x</a>'),
+    ('<a href="/p/" rel="a&amp;b">x</a>', '<a href="/p/" rel="a&amp;b">x</a>'),
+])
+def test_sanitize_inline_href(value, expected):
+    assert sanitize_inline(value) == expected
+
+
+@pytest.mark.parametrize('value', [
+    'plain text',
+    '1 > 0',
+    '<strong>a</strong><br>b<em>c</em>',
+])
+def test_sanitize_inline_passes_clean_text_through(value):
+    assert sanitize_inline(value) is value
+
+
+@pytest.mark.parametrize('level', ['h2', None, [3], 0, 9])
+def test_heading_with_invalid_level_falls_back_to_h2(level):
+    html = BlockGenerator().generate({'sections': [{'type': 'heading', 'level': level, 'text': '見出し'}]})
+    assert '<h2 ' in html
+
+
+NASTY = '<script>x</script> Q&A <b>太字 <a href="javascript:alert(1)">リンク</a> 1 < 2 &amp; 3'
+
+
+def _all_sections(text):
+    return {
+        'lead': text,
+        'points': {'title': text, 'items': [text, 'ポイント']},
+        'sections': [
+            {'type': 'heading', 'level': 2, 'text': text},
+            {'type': 'paragraph', 'text': text},
+            {'type': 'list', 'items': [text, 'b'], 'ordered': True},
+            {'type': 'box', 'title': text, 'content': text, 'style': 'warning'},
+            {'type': 'warning', 'text': text},
+            {'type': 'table', 'headers': [text, 'h'], 'rows': [[text, 1]], 'caption': text},
+            {'type': 'faq', 'q': text, 'a': text},
+            {'type': 'faq', 'items': [{'q': text, 'a': text}]},
+            {'type': 'spacer', 'height': '2rem'},
+            {'type': 'related', 'title': text, 'items': [{'title': text, 'url': '/a/?x=1&y=2'}]},
+        ],
+        'summary': {'title': text, 'items': [text]},
+    }
+
+
+@pytest.mark.parametrize('text', [NASTY, 'プレーンな本文', '<strong>強調</strong>と<br>改行'])
+def test_sanitized_article_renders_the_same_html(text):
+    data = _all_sections(text)
+
+    escaped = BlockGenerator().generate(data)
+    presanitized = BlockGenerator(escape=False).generate(sanitize_article(data))
+
+    assert presanitized == escaped
+    assert '<script>' not in presanitized
+
+
+def test_sanitize_article_keeps_non_text_fields():
+    data = {'sections': [{'type': 'spacer', 'height': '1<2'}, {'type': 'related', 'items': [{'url': '/a?b&c'}]}]}
+
+    assert sanitize_article(data) == data
+
+
+def test_related_items_are_sanitized_without_escape():
+    html = BlockGenerator(escape=False).generate({'sections': [
+        {'type': 'related', 'title': '<i>関連', 'items': [{'title': '<script>x</script>', 'url': '/a/'}]},
+    ]})
+
+    assert '<script>' not in html
+    assert '<i>関連</i>' in html
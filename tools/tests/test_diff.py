@@ -0,0 +1,141 @@
+"""ブロック単位の差分（SnapshotStore / diff_blocks / format_diff）のテスト"""
+import json
+
+import pytest
+
+from lib.diff import ContentDiff, SnapshotStore, diff_blocks, format_diff, split_blocks
+
+
+def paragraph(text):
+    return f"<!-- wp:paragraph -->\n<p>{text}</p>\n<!-- /wp:paragraph -->"
+
+
+def heading(text):
+    return f'<!-- wp:heading {{"level":3}} -->\n<h3>{text}</h3>\n<!-- /wp:heading -->'
+
+
+def content(*blocks):
+    return "\n\n".join(blocks) + "\n"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / 'snapshots'))
+
+
+def test_split_blocks_ignores_whitespace_between_blocks():
+    a = split_blocks(content(paragraph('a'), heading('h')))
+    b = split_blocks(paragraph('a') + "\n\n\n\n" + heading('h'))
+
+    assert a == b == [paragraph('a'), heading('h')]
+
+
+def test_split_blocks_keeps_unparsable_html_as_one_block():
+    html = '<p>loose</p><!-- wp:paragraph -->'
+
+    assert split_blocks(html) == [html]
+
+
+def test_diff_blocks_pairs_replacements_and_reports_rest():
+    old = [paragraph('a'), paragraph('b'), paragraph('c')]
+    new = [paragraph('a'), paragraph('B'), heading('new'), paragraph('c'), paragraph('d')]
+
+    changes = diff_blocks(old, new)
+
+    assert [(c.op, c.old_index, c.new_index) for c in changes] == [
+        ('changed', 1, 1),
+        ('added', None, 2),
+        ('added', None, 4),
+    ]
+    assert changes[1].name == 'wp:heading'
+
+
+def test_diff_blocks_reports_removed_blocks():
+    changes = diff_blocks([paragraph('a'), heading('h'), paragraph('b')], [paragraph('a'), paragraph('b')])
+
+    assert [(c.op, c.old_index, c.name) for c in changes] == [('removed', 1, 'wp:heading')]
+
+
+def test_diff_without_snapshot_is_not_empty(store):
+    diff = store.diff('post', {'title': 'T', 'content': content(paragraph('a'))})
+
+    assert not diff.has_snapshot
+    assert not diff.empty
+    assert diff.content_changed
+    assert diff.block_count == 1
+    assert '記録がありません' in format_diff(diff)
+
+
+def test_unchanged_update_is_empty(store):
+    data = {'title': 'T', 'status': 'publish', 'meta': {'a': 1, 'b': 2}, 'content': content(paragraph('a'))}
+    store.save('post', data)
+
+    # 空白の違い・metaのキー順は変更とみなさない
+    again = dict(data, meta={'b': 2, 'a': 1}, content=paragraph('a'))
+    diff = store.diff('post', again)
+
+    assert diff.empty
+    assert format_diff(diff) == "[Diff] 前回投稿時から変更はありません"
+
+
+def test_metadata_only_change(store):
+    store.save('post', {'title': 'T', 'status': 'draft', 'content': content(paragraph('a'))})
+
+    diff = store.diff('post', {'title': 'T2', 'status': 'draft', 'content': content(paragraph('a'))})
+
+    assert diff.metadata_only
+    assert not diff.content_changed
+    assert diff.fields == ['title']
+
+
+def test_save_without_content_keeps_previous_blocks(store, tmp_path):
+    store.save('post', {'title': 'T', 'content': content(paragraph('a'), paragraph('b'))})
+    # メタ情報だけ更新した時は本文を送らない
+    store.save('post', {'title': 'T2'})
+
+    snapshot = store.load('post')
+    assert snapshot['fields'] == {'title': 'T2'}
+    assert snapshot['blocks'] == [paragraph('a'), paragraph('b')]
+    assert store.diff('post', {'title': 'T2', 'content': content(paragraph('a'), paragraph('b'))}).empty
+
+
+def test_broken_snapshot_is_treated_as_missing(store):
+    store.snapshot_dir.mkdir(parents=True)
+    (store.snapshot_dir / 'post.json').write_text('{broken', encoding='utf-8')
+
+    assert store.load('post') is None
+    assert not store.diff('post', {'content': paragraph('a')}).has_snapshot
+
+
+def test_snapshot_file_format(store):
+    store.save('post', {'title': 'T', 'featured_media': 5, 'categories': [1], 'content': paragraph('a')})
+
+    saved = json.loads((store.snapshot_dir / 'post.json').read_text(encoding='utf-8'))
+    # 比較対象外のフィールドは記録しない
+    assert saved['fields'] == {'title': 'T', 'featured_media': 5}
+    assert saved['blocks'] == [paragraph('a')]
+    assert not list(store.snapshot_dir.glob('*.tmp'))
+
+
+def test_format_diff_lists_changes_and_truncates_preview():
+    long_old = "<!-- wp:html -->\n" + "\n".join(f"line {i}" for i in range(20)) + "\n<!-- /wp:html -->"
+    long_new = long_old.replace('line', 'LINE')
+    diff = ContentDiff(
+        blocks=diff_blocks([paragraph('a'), long_old], [paragraph('b'), long_new, heading('h')]),
+        fields=['title'],
+        block_count=3,
+    )
+
+    summary = format_diff(diff)
+    assert summary.splitlines() == [
+        "[Diff] ブロック 2件変更 / 1件追加 / 0件削除（全3ブロック）",
+        "  メタ情報: title",
+        "  ~ #1 wp:paragraph",
+        "  ~ #2 wp:html",
+        "  + #3 wp:heading",
+    ]
+
+    verbose = format_diff(diff, verbose=True)
+    assert "      -<p>a</p>" in verbose
+    assert "      +<p>b</p>" in verbose
+    assert "…他28行" in verbose
@@ -0,0 +1,63 @@
+"""Generator の構造化データ（JSON-LD）のテスト"""
+import json
+
+import pytest
+
+from lib.generator import Generator, clear_generators, get_generator
+
+PAYLOAD = '</script><script>alert(1)</script>'
+# sanitize_inlineでエスケープ済みの形（_plain_textで文字参照を戻すとPAYLOADになる）
+ESCAPED = '&lt;/script&gt;&lt;script&gt;alert(1)&lt;/script&gt;'
+
+
+@pytest.fixture(autouse=True)
+def _clear_registry():
+    clear_generators()
+    yield
+    clear_generators()
+
+
+def _article(text):
+    return {
+        'lead': 'リード',
+        'sections': [{'type': 'faq', 'q': '質問', 'a': text}],
+        'summary': {'title': 'まとめ', 'items': [text]},
+    }
+
+
+def test_json_ld_cannot_close_script_tag():
+    rendered = Generator().render(_article(ESCAPED), include_cta=False, title=PAYLOAD)
+
+    assert '<' not in rendered.json_ld
+    assert '>' not in rendered.json_ld
+    graph = json.loads(rendered.json_ld)['@graph']
+    article, faq = graph
+    assert article['headline'] == 'alert(1)'
+    assert article['abstract'] == PAYLOAD
+    assert faq['mainEntity'][0]['acceptedAnswer']['text'] == PAYLOAD
+
+
+def test_json_ld_escapes_ampersand():
+    rendered = Generator().render(_article('A&amp;B'), include_cta=False, title='T')
+
+    assert '&' not in rendered.json_ld
+    assert json.loads(rendered.json_ld)['@graph'][0]['abstract'] == 'A&B'
+
+
+def test_get_generator_shares_render_cache(tmp_path):
+    cta = tmp_path / 'cta.txt'
+    cta.write_text('<!-- wp:paragraph --><p>CTA</p><!-- /wp:paragraph -->', encoding='utf-8')
+    article = _article('回答')
+
+    first = get_generator(str(cta), 'org').render(article, title='T')
+    second = get_generator(str(cta), 'org').render(article, title='T')
+
+    assert not first.cache_hit
+    assert second.cache_hit
+    assert get_generator(str(cta), 'other') is not get_generator(str(cta), 'org')
+
+    # CTAテンプレートが変われば別のGenerator（古いCTAのキャッシュは使わない）
+    cta.write_text('<!-- wp:paragraph --><p>新CTA</p><!-- /wp:paragraph -->', encoding='utf-8')
+    third = get_generator(str(cta), 'org').render(article, title='T')
+    assert not third.cache_hit
+    assert '新CTA' in third.html
@@ -0,0 +1,338 @@
+"""Publisher の再試行・照合・一括投稿のテスト（WordPressは疑似セッションで置き換える）"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+import requests
+
+from lib.publisher import BatchItem, Publisher, PublisherError, RetryPolicy
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None, text=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.text = text if text is not None else ('' if body is None else str(body))
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("No JSON object could be decoded")
+        return self._body
+
+
+class FakeSession:
+    """送信内容を記録し、用意した応答（または例外）を順に返す"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def _respond(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        response = self.responses.pop(0)
+        if callable(response):
+            response = response(method, url, kwargs)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def get(self, url, **kwargs):
+        return self._respond('get', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._respond('post', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self._respond('put', url, **kwargs)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """待ち時間を記録するだけにする"""
+    recorded = []
+    monkeypatch.setattr('lib.publisher.time.sleep', recorded.append)
+    return recorded
+
+
+def make_publisher(*responses, max_retries=2, site_timezone=None):
+    publisher = Publisher(
+        'https://example.com', 'user', 'pass',
+        retry_policy=RetryPolicy(max_retries=max_retries, base_delay=0.0),
+        site_timezone=site_timezone
+    )
+    publisher.session = FakeSession(*responses)
+    return publisher
+
+
+def post_body(post_id, status='draft'):
+    return {'id': post_id, 'link': f'https://example.com/?p={post_id}', 'status': status}
+
+
+def batch_ok(items, first_id=1):
+    return FakeResponse(207, {'responses': [
+        {'status': 200 if item.post_id else 201, 'body': post_body(first_id + i)}
+        for i, item in enumerate(items)
+    ]})
+
+
+def items(count, prefix='post'):
+    return [BatchItem(key=f'{prefix}-{i}', data={'title': str(i), 'slug': f'{prefix}-{i}'}) for i in range(count)]
+
+
+# ========== 一括投稿 ==========
+
+def test_batch_keeps_earlier_retryable_failures_when_batch_api_is_missing(sleeps):
+    batch = items(Publisher.BATCH_MAX_REQUESTS + 1)
+    first_chunk = FakeResponse(207, {'responses': [
+        {'status': 503, 'body': {'message': 'busy'}}
+    ] + [
+        {'status': 201, 'body': post_body(i + 1)} for i in range(1, Publisher.BATCH_MAX_REQUESTS)
+    ]})
+    no_route = FakeResponse(404, {'code': 'rest_no_route', 'message': 'No route'})
+    publisher = make_publisher(
+        first_chunk, no_route,
+        FakeResponse(201, post_body(100)), FakeResponse(201, post_body(101)),
+    )
+
+    results = publisher.publish_batch(batch)
+
+    assert all(result.ok for result in results), [result.error for result in results if not result.ok]
+    assert results[0].result.post_id == 100
+    assert results[-1].result.post_id == 101
+    assert publisher._batch_supported is False
+
+
+def test_batch_413_splits_the_chunk(sleeps):
+    batch = items(4)
+    publisher = make_publisher(
+        FakeResponse(413, {'code': 'rest_request_too_large', 'message': 'Too large'}),
+        batch_ok(batch[:2], first_id=1),
+        batch_ok(batch[2:], first_id=3),
+    )
+
+    results = publisher.publish_batch(batch)
+
+    assert [result.result.post_id for result in results] == [1, 2, 3, 4]
+    assert [len(kwargs['json']['requests']) for _, _, kwargs in publisher.session.calls] == [4, 2, 2]
+    assert publisher._batch_supported is True
+
+
+def test_batch_single_oversized_item_fails_without_disabling_batch(sleeps):
+    batch = items(2)
+    publisher = make_publisher(
+        FakeResponse(413, {'message': 'Too large'}),
+        batch_ok(batch[:1], first_id=1),
+        FakeResponse(413, {'message': 'Too large'}),
+    )
+
+    results = publisher.publish_batch(batch)
+
+    assert results[0].ok
+    assert results[1].error == 'HTTP 413: Too large'
+    assert publisher._batch_supported is not False
+
+
+def test_batch_400_fails_the_chunk_without_disabling_batch(sleeps):
+    batch = items(3)
+    publisher = make_publisher(FakeResponse(400, {'code': 'rest_invalid_param', 'message': 'Invalid'}))
+
+    results = publisher.publish_batch(batch)
+
+    assert [result.error for result in results] == ['HTTP 400: Invalid'] * 3
+    assert len(publisher.session.calls) == 1
+    assert publisher._batch_supported is not False
+
+
+def test_batch_retries_only_retryable_subrequests(sleeps):
+    batch = items(3)
+    publisher = make_publisher(
+        FakeResponse(207, {'responses': [
+            {'status': 201, 'body': post_body(1)},
+            {'status': 429, 'body': {'message': 'slow down'}},
+            {'status': 400, 'body': {'message': 'bad'}},
+        ]}),
+        batch_ok(batch[1:2], first_id=2),
+    )
+
+    results = publisher.publish_batch(batch)
+
+    assert [result.ok for result in results] == [True, True, False]
+    assert [len(kwargs['json']['requests']) for _, _, kwargs in publisher.session.calls] == [3, 1]
+
+
+# ========== 結果不明の作成の照合 ==========
+
+def test_created_post_with_unreadable_body_is_reconciled(sleeps):
+    publisher = make_publisher(
+        FakeResponse(201, None, text='<html>plugin notice</html>'),
+        FakeResponse(200, [post_body(7)]),
+    )
+
+    result = publisher.create_post('title', 'content', 'my-post')
+
+    assert result.post_id == 7
+    assert [method for method, _, _ in publisher.session.calls] == ['post', 'get']
+
+
+def test_created_post_with_unreadable_body_raises_publisher_error(sleeps):
+    publisher = make_publisher(
+        FakeResponse(201, None, text='<html>plugin notice</html>'),
+        FakeResponse(200, []),
+    )
+
+    with pytest.raises(PublisherError, match='Invalid JSON response'):
+        publisher.create_post('title', 'content', 'my-post')
+    # 作成済みの可能性があるため再送しない
+    assert [method for method, _, _ in publisher.session.calls] == ['post', 'get']
+
+
+def test_reconcile_passes_modified_after_in_site_local_time(sleeps):
+    tokyo = ZoneInfo('Asia/Tokyo')
+    publisher = make_publisher(
+        requests.ReadTimeout('read timed out'),
+        FakeResponse(200, [post_body(7)]),
+        site_timezone=tokyo,
+    )
+
+    publisher.create_post('title', 'content', 'my-post')
+
+    params = publisher.session.calls[1][2]['params']
+    modified_after = datetime.fromisoformat(params['modified_after'])
+    assert modified_after.tzinfo is None
+    expected = datetime.now(tokyo).replace(tzinfo=None) - Publisher.RECONCILE_CLOCK_SKEW
+    assert abs(modified_after - expected) < timedelta(minutes=1)
+
+
+# ========== 再試行 ==========
+
+def test_retries_429_and_5xx_and_honours_retry_after(sleeps):
+    publisher = make_publisher(
+        FakeResponse(429, {'message': 'slow down'}),
+        FakeResponse(503, {'message': 'busy'}, headers={'Retry-After': '7'}),
+        FakeResponse(201, post_body(1)),
+    )
+
+    result = publisher.create_post('title', 'content', 'my-post')
+
+    assert result.post_id == 1
+    assert result.action == 'created'
+    assert sleeps == [0.0, 7.0]
+    # 503は作成されていないことが分かるステータスなので照合しない
+    assert [method for method, _, _ in publisher.session.calls] == ['post', 'post', 'post']
+
+
+def test_retry_after_is_capped(sleeps):
+    publisher = make_publisher(
+        FakeResponse(429, {}, headers={'Retry-After': '3600'}),
+        FakeResponse(201, post_body(1)),
+    )
+    publisher.retry_policy.max_retry_after = 60.0
+
+    publisher.create_post('title', 'content', 'my-post')
+
+    assert sleeps == [60.0]
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now().astimezone() + timedelta(seconds=30)
+    header = retry_at.strftime('%a, %d %b %Y %H:%M:%S %z')
+
+    wait = RetryPolicy._parse_retry_after(header)
+
+    assert 25 <= wait <= 31
+    assert RetryPolicy._parse_retry_after('not a date') is None
+
+
+@pytest.mark.parametrize('status', [400, 409, 422])
+def test_non_retryable_4xx_fails_immediately(sleeps, status):
+    publisher = make_publisher(FakeResponse(status, {'message': 'bad'}, text='bad'))
+
+    with pytest.raises(PublisherError, match=f'HTTP {status}'):
+        publisher.create_post('title', 'content', 'my-post')
+    assert len(publisher.session.calls) == 1
+    assert sleeps == []
+
+
+def test_auth_failure_is_not_retried(sleeps):
+    publisher = make_publisher(FakeResponse(401, {}))
+
+    with pytest.raises(PublisherError, match='auth failed'):
+        publisher.update_post(5, 'title', 'content')
+    assert len(publisher.session.calls) == 1
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    publisher = make_publisher(*(FakeResponse(503, {}, text='busy') for _ in range(3)), max_retries=2)
+
+    with pytest.raises(PublisherError, match='HTTP 503'):
+        publisher.create_post('title', 'content', 'my-post')
+    assert len(publisher.session.calls) == 3
+    assert len(sleeps) == 2
+
+
+# ========== 重複投稿の防止（照合） ==========
+
+def test_timed_out_create_that_was_created_is_not_resent(sleeps):
+    publisher = make_publisher(
+        requests.ReadTimeout('read timed out'),
+        FakeResponse(200, [post_body(42)]),
+    )
+
+    result = publisher.create_post('title', 'content', 'my-post')
+
+    assert result.post_id == 42
+    assert [method for method, _, _ in publisher.session.calls] == ['post', 'get']
+    assert publisher.session.calls[1][2]['params']['slug'] == 'my-post'
+
+
+def test_ambiguous_502_without_match_is_resent(sleeps):
+    publisher = make_publisher(
+        FakeResponse(502, {}, text='bad gateway'),
+        FakeResponse(200, []),
+        FakeResponse(201, post_body(3)),
+    )
+
+    result = publisher.create_post('title', 'content', 'my-post')
+
+    assert result.post_id == 3
+    assert [method for method, _, _ in publisher.session.calls] == ['post', 'get', 'post']
+
+
+def test_connect_timeout_is_resent_without_reconcile(sleeps):
+    publisher = make_publisher(
+        requests.ConnectTimeout('connect timed out'),
+        FakeResponse(201, post_body(3)),
+    )
+
+    publisher.create_post('title', 'content', 'my-post')
+
+    assert [method for method, _, _ in publisher.session.calls] == ['post', 'post']
+
+
+def test_update_is_resent_without_reconcile(sleeps):
+    publisher = make_publisher(
+        FakeResponse(504, {}, text='gateway timeout'),
+        FakeResponse(200, post_body(5)),
+    )
+
+    result = publisher.update_post(5, 'title', 'content')
+
+    assert result.action == 'updated'
+    assert [method for method, _, _ in publisher.session.calls] == ['put', 'put']
+
+
+def test_batch_ambiguous_create_is_reconciled_before_resend(sleeps):
+    batch = items(2)
+    publisher = make_publisher(
+        FakeResponse(207, {'responses': [
+            {'status': 201, 'body': post_body(1)},
+            {'status': 504, 'body': {'message': 'timeout'}},
+        ]}),
+        FakeResponse(200, [post_body(2)]),
+    )
+
+    results = publisher.publish_batch(batch)
+
+    assert [result.result.post_id for result in results] == [1, 2]
+    assert [method for method, _, _ in publisher.session.calls] == ['post', 'get']
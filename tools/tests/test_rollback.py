@@ -0,0 +1,119 @@
+"""Pipeline.rollback / FanOut.rollback のテスト（WordPressへの送信は偽のPublisherで記録する）"""
+import pytest
+
+from lib.artifacts import ArtifactStore
+from lib.config import Config
+from lib.history import HistoryManager
+from lib.pipeline import FanOut, Pipeline
+from lib.publisher import PostResult, PublisherError
+
+
+class FakePublisher:
+    """send_updateに渡された更新リクエストを記録する"""
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    def find_post_by_slug(self, slug):
+        return None
+
+    def build_update_data(self, title, content, status='draft', meta_description=None,
+                          featured_media=None, extra_meta=None, date=None):
+        data = {'title': title, 'content': content}
+        if meta_description:
+            data['meta'] = {'_yoast_wpseo_metadesc': meta_description}
+        return data
+
+    def send_update(self, post_id, data):
+        if self.fail:
+            raise PublisherError('WordPress update failed: HTTP 500')
+        self.sent.append((post_id, data))
+        return PostResult(post_id=post_id, edit_url=f'edit/{post_id}', view_url='', status='publish',
+                          action='updated')
+
+
+def make_config(tmp_path, name='default'):
+    return Config.from_dict({
+        'wordpress': {'site_url': 'https://example.com'},
+        'output': {
+            'history_file': str(tmp_path / name / 'post_history.yaml'),
+            'snapshot_dir': str(tmp_path / name / 'snapshots'),
+        },
+        'artifacts': {'dir': str(tmp_path / 'artifacts'), 'codec': 'zlib'},
+        'similarity': {'enabled': False},
+        'related': {'enabled': False},
+    })
+
+
+def publish(store, html, content_hash):
+    version = store.record('post', html, article_json={}, title=f'T {html}', content_hash=content_hash)
+    store.mark_published('post', html)
+    return version
+
+
+def register(config, post_id=10):
+    history = HistoryManager(config.get('output', 'history_file'))
+    history.save_created(slug='post', post_id=post_id, title='T', source_file='post.md', content_hash='h3')
+    return history
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = make_config(tmp_path)
+    store = ArtifactStore.from_config(config)
+    for number in (1, 2, 3):
+        publish(store, f'<p>v{number}</p>', f'h{number}')
+    register(config)
+    return config
+
+
+def test_rollback_sends_the_update_once_and_records_version_hash(config):
+    publisher = FakePublisher()
+    result = Pipeline(config, publisher=publisher).rollback('post')
+
+    assert result.ok
+    assert publisher.sent == [(10, {'title': 'T <p>v2</p>', 'content': '<p>v2</p>'})]
+    entry = HistoryManager(config.get('output', 'history_file')).history['post']
+    assert entry['content_hash'] == 'h2'
+    assert entry['title'] == 'T <p>v2</p>'
+
+
+def test_repeated_rollback_walks_further_back(config):
+    publisher = FakePublisher()
+    pipeline = Pipeline(config, publisher=publisher)
+
+    assert pipeline.rollback('post').stage('publish').data['artifact_version'] == 2
+    assert pipeline.rollback('post').stage('publish').data['artifact_version'] == 1
+    assert not pipeline.rollback('post').ok
+    assert [data['content'] for _, data in publisher.sent] == ['<p>v2</p>', '<p>v1</p>']
+
+
+def test_failed_rollback_leaves_records_unchanged(config):
+    result = Pipeline(config, publisher=FakePublisher(fail=True)).rollback('post')
+
+    assert not result.ok
+    assert 'HTTP 500' in result.error
+    store = ArtifactStore.from_config(config)
+    assert [v.rolled_back_at for v in store.versions('post')] == [None, None, None]
+    assert HistoryManager(config.get('output', 'history_file')).history['post']['content_hash'] == 'h3'
+
+
+def test_fanout_rolls_every_target_back_to_the_same_version(tmp_path, config):
+    targets = [(name, make_config(tmp_path, name)) for name in ('staging', 'production')]
+    publishers = {}
+    for name, target in targets:
+        register(target, post_id=20 if name == 'staging' else 30)
+    fanout = FanOut(config, targets)
+    for name, pipeline in fanout.pipelines.items():
+        publishers[name] = pipeline._publisher = FakePublisher()
+
+    result = fanout.rollback('post')
+
+    assert result.ok
+    assert publishers['staging'].sent == [(20, {'title': 'T <p>v2</p>', 'content': '<p>v2</p>'})]
+    assert publishers['production'].sent == [(30, {'title': 'T <p>v2</p>', 'content': '<p>v2</p>'})]
+    # 取り下げ（v3）の記録は全投稿先の後に1回だけ
+    store = ArtifactStore.from_config(config)
+    assert [v.version for v in store.versions('post') if v.rolled_back_at] == [3]
+    assert fanout.rollback('post').prepared.stage('publish').data['artifact_version'] == 1
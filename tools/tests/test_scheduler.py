@@ -0,0 +1,253 @@
+"""予約投稿キュー（ScheduleQueue / Scheduler）のテスト"""
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+import pytest
+
+from lib.scheduler import (
+    DONE, FAILED, MODE_AT_DUE, MODE_FUTURE, PENDING, PREPARED,
+    ScheduleQueue, Scheduler, SchedulerError, parse_off_peak, parse_scheduled_at,
+)
+
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return ScheduleQueue(str(tmp_path / 'queue.yaml'))
+
+
+class Recorder:
+    """prepare / publish の呼び出しを記録し、指定回数だけ失敗させる"""
+
+    def __init__(self, fail_prepare=0, fail_publish=0):
+        self.calls = []
+        self.fail_prepare = fail_prepare
+        self.fail_publish = fail_publish
+
+    def prepare(self, job):
+        self.calls.append(('prepare', job.slug))
+        if self.fail_prepare:
+            self.fail_prepare -= 1
+            raise RuntimeError('prepare failed')
+        job.html_file = f'{job.slug}.html'
+
+    def publish(self, job, mode):
+        self.calls.append(('publish', job.slug, mode))
+        if self.fail_publish:
+            self.fail_publish -= 1
+            raise RuntimeError('publish failed')
+        job.post_id = 100
+
+
+def make_scheduler(queue, recorder, **kwargs):
+    kwargs.setdefault('min_lead', timedelta(hours=1))
+    return Scheduler(queue, recorder.prepare, recorder.publish, log=lambda message: None, **kwargs)
+
+
+# ========== parse ==========
+
+def test_parse_scheduled_at_formats():
+    assert parse_scheduled_at('2026-03-01 09:30') == datetime(2026, 3, 1, 9, 30)
+    assert parse_scheduled_at(datetime(2026, 3, 1).date()) == datetime(2026, 3, 1)
+    with pytest.raises(SchedulerError):
+        parse_scheduled_at('来週')
+    with pytest.raises(SchedulerError):
+        parse_scheduled_at(20260301)
+
+
+def test_parse_scheduled_at_timezone():
+    jst = timezone(timedelta(hours=9))
+
+    assert parse_scheduled_at('2026-03-01 09:00', jst) == datetime(2026, 3, 1, 9, 0, tzinfo=jst)
+    # タイムゾーン付きの値はサイトのタイムゾーンに変換
+    assert parse_scheduled_at('2026-03-01T00:00:00+00:00', jst) == datetime(2026, 3, 1, 9, 0, tzinfo=jst)
+
+
+def test_parse_off_peak():
+    assert parse_off_peak('01:00-06:00') == (dt_time(1), dt_time(6))
+    assert parse_off_peak('') is None
+    with pytest.raises(SchedulerError):
+        parse_off_peak('深夜')
+
+
+# ========== ScheduleQueue ==========
+
+def test_queue_orders_by_scheduled_at(queue):
+    queue.add('late', 'late.md', NOW + timedelta(hours=3))
+    queue.add('early', 'early.md', NOW + timedelta(hours=1))
+    queue.add('middle', 'middle.md', NOW + timedelta(hours=2))
+
+    assert queue.peek().slug == 'early'
+    assert [job.slug for job in queue.upcoming(NOW + timedelta(hours=2))] == ['early', 'middle']
+    assert queue.pop_due(NOW) is None
+    assert queue.pop_due(NOW + timedelta(hours=2)).slug == 'early'
+    assert queue.pop_due(NOW + timedelta(hours=2)).slug == 'middle'
+    assert queue.pop_due(NOW + timedelta(hours=2)) is None
+
+
+def test_readding_slug_reschedules_without_stale_entries(queue):
+    queue.add('post', 'post.md', NOW + timedelta(hours=1))
+    queue.add('post', 'post.md', NOW + timedelta(hours=5))
+    queue.add('post', 'post.md', NOW + timedelta(hours=1))
+
+    assert [job.slug for job in queue.upcoming(NOW + timedelta(hours=6))] == ['post']
+    assert queue.pop_due(NOW + timedelta(hours=6)).slug == 'post'
+    assert queue.pop_due(NOW + timedelta(hours=6)) is None
+
+
+def test_readding_finished_slug_requeues_it(queue):
+    queue.add('post', 'post.md', NOW)
+    queue.jobs['post'].state = DONE
+    assert queue.peek() is None
+
+    queue.add('post', 'post.md', NOW)
+
+    assert queue.peek().slug == 'post'
+    assert queue.peek().state == PENDING
+
+
+def test_done_and_removed_jobs_leave_the_heap(queue):
+    queue.add('done', 'done.md', NOW)
+    queue.add('removed', 'removed.md', NOW)
+    queue.add('open', 'open.md', NOW + timedelta(hours=1))
+
+    queue.jobs['done'].state = DONE
+    assert queue.remove('removed')
+    assert not queue.remove('removed')
+
+    assert queue.peek().slug == 'open'
+
+
+def test_queue_persists_and_restores_heap(queue, tmp_path):
+    queue.add('b', 'b.md', NOW + timedelta(hours=2))
+    queue.add('a', 'a.md', NOW + timedelta(hours=1))
+    queue.jobs['b'].state = PREPARED
+    queue.jobs['b'].html_file = 'b.html'
+    queue.add('c', 'c.md', NOW)
+    queue.jobs['c'].state = FAILED
+    queue.save()
+
+    restored = ScheduleQueue(str(tmp_path / 'queue.yaml'))
+
+    assert [job.slug for job in restored.ordered()] == ['c', 'a', 'b']
+    assert restored.jobs['b'].html_file == 'b.html'
+    # 失敗したジョブはキューに戻らない
+    assert [job.slug for job in restored.upcoming(NOW + timedelta(hours=3))] == ['a', 'b']
+
+
+def test_broken_queue_file_raises(tmp_path):
+    path = tmp_path / 'queue.yaml'
+    path.write_text('- slug: [', encoding='utf-8')
+
+    with pytest.raises(SchedulerError):
+        ScheduleQueue(str(path))
+
+
+# ========== Scheduler ==========
+
+def test_future_mode_prepares_ahead_and_publishes_once(queue):
+    recorder = Recorder()
+    scheduler = make_scheduler(queue, recorder, mode=MODE_FUTURE, prepare_ahead=timedelta(hours=24))
+    queue.add('soon', 'soon.md', NOW + timedelta(hours=10))
+    queue.add('later', 'later.md', NOW + timedelta(days=3))
+
+    assert scheduler.run_once(NOW) == 2
+    assert recorder.calls == [('prepare', 'soon'), ('publish', 'soon', MODE_FUTURE)]
+    assert queue.jobs['soon'].state == DONE
+    assert queue.jobs['soon'].post_id == 100
+    assert queue.jobs['later'].state == PENDING
+
+    # 期限が来ても投稿済みのジョブは再投稿しない
+    assert scheduler.run_once(NOW + timedelta(hours=11)) == 0
+
+
+def test_at_due_mode_prepares_early_and_publishes_on_due(queue):
+    recorder = Recorder()
+    scheduler = make_scheduler(queue, recorder, mode=MODE_AT_DUE)
+    queue.add('post', 'post.md', NOW + timedelta(hours=2))
+
+    scheduler.run_once(NOW)
+    assert queue.jobs['post'].state == PREPARED
+    assert recorder.calls == [('prepare', 'post')]
+
+    scheduler.run_once(NOW + timedelta(hours=2))
+    assert queue.jobs['post'].state == DONE
+    assert recorder.calls[-1] == ('publish', 'post', MODE_AT_DUE)
+
+
+def test_off_peak_defers_preparation_until_min_lead(queue):
+    recorder = Recorder()
+    scheduler = make_scheduler(
+        queue, recorder, mode=MODE_AT_DUE, off_peak=(dt_time(1), dt_time(6)), min_lead=timedelta(hours=1)
+    )
+    queue.add('post', 'post.md', NOW + timedelta(hours=3))
+
+    # 12:00は閑散時間帯外で、公開まで3時間ある
+    assert scheduler.run_once(NOW) == 0
+    # 残り1時間を切ったら時間帯に関わらず準備
+    scheduler.run_once(NOW + timedelta(hours=2, minutes=30))
+    assert queue.jobs['post'].state == PREPARED
+
+
+def test_in_off_peak_across_midnight(queue):
+    scheduler = make_scheduler(queue, Recorder(), off_peak=(dt_time(23), dt_time(2)))
+
+    assert scheduler.in_off_peak(datetime(2026, 3, 1, 23, 30))
+    assert scheduler.in_off_peak(datetime(2026, 3, 2, 1, 0))
+    assert not scheduler.in_off_peak(datetime(2026, 3, 2, 2, 0))
+
+
+def test_failure_retries_after_delay_then_gives_up(queue):
+    recorder = Recorder(fail_publish=5)
+    scheduler = make_scheduler(
+        queue, recorder, mode=MODE_AT_DUE, max_attempts=2, retry_delay=timedelta(minutes=10)
+    )
+    queue.add('post', 'post.md', NOW)
+
+    scheduler.run_once(NOW)
+    job = queue.jobs['post']
+    assert job.state == PREPARED
+    assert job.attempts == 1
+    assert job.retry_at == (NOW + timedelta(minutes=10)).isoformat()
+    assert job.error == 'publish failed'
+
+    # 再試行待ちの間は投稿しない
+    publishes = sum(1 for call in recorder.calls if call[0] == 'publish')
+    scheduler.run_once(NOW + timedelta(minutes=5))
+    assert sum(1 for call in recorder.calls if call[0] == 'publish') == publishes
+
+    scheduler.run_once(NOW + timedelta(minutes=10))
+    assert job.state == FAILED
+    assert job.attempts == 2
+    assert queue.peek() is None
+
+
+def test_retry_succeeds_and_clears_error(queue):
+    recorder = Recorder(fail_prepare=1)
+    scheduler = make_scheduler(queue, recorder, mode=MODE_AT_DUE, retry_delay=timedelta(minutes=10))
+    queue.add('post', 'post.md', NOW)
+
+    scheduler.run_once(NOW)
+    assert queue.jobs['post'].state == PENDING
+
+    scheduler.run_once(NOW + timedelta(minutes=10))
+    job = queue.jobs['post']
+    assert job.state == DONE
+    assert job.error is None
+    assert job.retry_at is None
+    assert len(queue._heap) == 0
+
+
+def test_next_wakeup(queue):
+    scheduler = make_scheduler(queue, Recorder(), prepare_ahead=timedelta(hours=1), poll_interval=600)
+    assert scheduler.next_wakeup(NOW) == 600
+
+    queue.add('post', 'post.md', NOW + timedelta(hours=1, minutes=2))
+    # 準備開始（公開の1時間前）まで2分
+    assert scheduler.next_wakeup(NOW) == 120
+
+
+def test_unknown_mode_is_rejected(queue):
+    with pytest.raises(SchedulerError):
+        make_scheduler(queue, Recorder(), mode='later')
@@ -0,0 +1,66 @@
+"""Structurer のモデル出力の扱いのテスト（Gemini APIは呼ばない）"""
+import types
+
+import pytest
+
+import lib.structurer as structurer_module
+from lib.structurer import Structurer
+
+
+class FakeModel:
+    """送られたプロンプトを記録し、固定のJSONを返す"""
+
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return types.SimpleNamespace(text=self.text, candidates=[])
+
+
+@pytest.fixture
+def structurer(monkeypatch):
+    monkeypatch.setattr(
+        structurer_module, 'genai', types.SimpleNamespace(GenerationConfig=lambda **kwargs: kwargs)
+    )
+    instance = Structurer.__new__(Structurer)
+    instance.temperature = 0.3
+    instance.model = FakeModel('{"lead": "リード", "points": {}, "summary": {}}')
+    return instance
+
+
+@pytest.mark.parametrize('level, expected', [
+    (3, 3), ('4', 4), ('h2', 2), (None, 2), ([3], 2), (0, 2), (7, 2),
+])
+def test_to_article_normalizes_heading_level(structurer, level, expected):
+    article = structurer._to_article({'sections': [{'type': 'heading', 'level': level, 'text': '見出し'}]})
+
+    assert article.sections[0]['level'] == expected
+    assert article.to_article().sections[0].level == expected
+
+
+def test_finalize_accepts_malformed_sections(structurer):
+    sections = [
+        {'type': 'heading', 'level': 'h2', 'text': '見出し'},
+        {'type': 'heading', 'level': None, 'text': '小見出し'},
+        'not a section',
+        {'type': 'paragraph', 'text': '本文'},
+    ]
+
+    overview = structurer._finalize('タイトル', sections)
+
+    assert overview['lead'] == 'リード'
+    prompt = structurer.model.prompts[0]
+    assert '## 見出し' in prompt
+    assert '## 小見出し' in prompt
+
+
+def test_to_article_keeps_raw_json_and_sanitizes_a_copy(structurer):
+    raw = {'lead': 'Q&A <script>x</script>', 'sections': [{'type': 'paragraph', 'text': '<strong>強調</strong>'}]}
+
+    article = structurer._to_article(raw)
+
+    assert article.raw_json['lead'] == 'Q&A <script>x</script>'
+    assert article.sanitized_json['lead'] == 'Q&amp;A &lt;script&gt;x&lt;/script&gt;'
+    assert article.sanitized_json['sections'][0]['text'] == '<strong>強調</strong>'
@@ -0,0 +1,44 @@
+"""WXR入出力のテスト"""
+import io
+
+import pytest
+
+from lib.wxr import WXRItem, WXRWriter, is_safe_slug, iter_wxr_items, term_slug
+
+
+@pytest.mark.parametrize('slug, expected', [
+    ('kintai-kanri', True),
+    ('%e5%8b%a4%e6%80%a0', True),
+    ('', False),
+    ('..', False),
+    ('../../etc/cron', False),
+    ('a/b', False),
+    ('a\\b', False),
+    ('.hidden', False),
+    ('a\x00b', False),
+])
+def test_is_safe_slug(slug, expected):
+    assert is_safe_slug(slug) is expected
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('Tax Tips', 'tax-tips'),
+    ('労務 管理', '%e5%8a%b4%e5%8b%99-%e7%ae%a1%e7%90%86'),
+    ('v1.2  release', 'v1-2-release'),
+    ('100% (!)', '100'),
+])
+def test_term_slug(name, expected):
+    assert term_slug(name) == expected
+
+
+def test_writer_uses_term_slug_as_nicename(tmp_path):
+    output = tmp_path / 'export.xml'
+    with WXRWriter(str(output), site_url='https://example.com') as writer:
+        writer.write_item(WXRItem(title='t', slug='post', content='', categories=['労務 管理'], tags=['Tax Tips']))
+
+    text = output.read_text(encoding='utf-8')
+    assert 'nicename="%e5%8a%b4%e5%8b%99-%e7%ae%a1%e7%90%86"' in text
+    assert 'nicename="tax-tips"' in text
+    item = next(iter_wxr_items(str(output)))
+    assert item.categories == ['労務 管理']
+    assert item.tags == ['Tax Tips']